@@ -0,0 +1,302 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+from datetime import datetime, timezone
+
+import numpy as np
+
+'''
+Answer keys compiled from an instructor's solution workbook, so expected values can change without
+editing the graders.
+
+    python answer_keys.py --challenge "Project 1: Cafe Bloom" --solution solutions/cafe_bloom.xlsx
+    python answer_keys.py --show answer_keys/project_1_cafe_bloom.npz
+
+The cached values of the solution (what Excel calculated when it was saved) are read from the cells
+listed in ANSWER_KEY_SPECS and written to answer_keys/<challenge>.npz: one record per expected cell
+(group, key, sheet, cell, value and the decimal places numbers are compared to) plus metadata (the
+solution's file name and SHA-256, and when it was compiled).
+
+grading_algorithms.py reads every key in answer_keys/ once, when it is imported (so once per worker
+process), and grades with its values instead of the built-in ones; groups a key does not have keep the
+built-in values. The keys' digests are part of GRADER_VERSION, so results cached or journaled with
+other expected values are not reused.
+
+Groups, by kind:
+    pairs       {label: value} from a two column range (the label in the first column)
+    cells       {cell: value} for a list of cells
+    table       the rows of values of a range
+    blank_rows  the row numbers whose cell in a one column range is empty
+'''
+
+ANSWER_KEY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_keys")
+ANSWER_KEY_VERSION = 1
+
+# Where each challenge's expected values are in its solution workbook (sheet None is the active sheet),
+# and how many decimal places numbers are compared to (no "places": exactly)
+ANSWER_KEY_SPECS = {
+    "Skill: Import data into workbooks": {
+        "solution_data": {"kind": "table", "sheet": None, "range": "A1:D6"},
+    },
+    "Project 1: Cafe Bloom": {
+        "country_prices": {"kind": "pairs", "sheet": "CoffeeAnalysis", "range": "A4:B14", "places": 2},
+        "country_ratings": {"kind": "pairs", "sheet": "CoffeeAnalysis", "range": "D4:E14", "places": 2},
+        "calc_checks": {"kind": "cells", "sheet": "CoffeeAnalysis", "places": 2,
+                        "cells": ["B15", "E15", "I4", "I5", "I7", "I8", "I12", "I13", "I14", "I18"]},
+    },
+    "Project 2: Marathon Participants": {
+        "report_values": {"kind": "cells", "sheet": "Report",
+                          "cells": ["B2", "B3", "B4", "D2", "D3", "D4", "F2", "F3", "F4", "H2", "H3", "H4", "B7", "B8"]},
+        "allowed_empty_cells": {"kind": "blank_rows", "sheet": "Names & Emails", "range": "B2:B523"},
+    },
+}
+
+# Value types of a record
+_BLANK, _INTEGER, _FLOAT, _TEXT, _BOOLEAN = range(5)
+
+
+class AnswerKey:
+    def __init__(self, challenge, values, places, metadata, digest=None):
+        self.challenge = challenge
+        self.values = values  # group -> expected values (see the kinds above)
+        self.places = places  # group -> decimal places numbers are compared to, or None
+        self.metadata = metadata
+        self.digest = digest  # SHA-256 of the compiled key, None for the built-in values
+
+    def __getitem__(self, group):
+        return self.values[group]
+
+
+def answer_key_path(challenge, directory=ANSWER_KEY_DIR):
+    return os.path.join(directory, re.sub(r"[^a-z0-9]+", "_", challenge.lower()).strip("_") + ".npz")
+
+
+def _record_value(value):
+    if value is None:
+        return _BLANK, np.nan, ""
+    if isinstance(value, bool):
+        return _BOOLEAN, float(value), ""
+    if isinstance(value, int):
+        return _INTEGER, float(value), ""
+    if isinstance(value, float):
+        return _FLOAT, value, ""
+    if isinstance(value, datetime):
+        return _TEXT, np.nan, value.isoformat()
+    return _TEXT, np.nan, str(value)
+
+
+def _python_value(kind, number, text):
+    if kind == _INTEGER:
+        return int(number)
+    if kind == _FLOAT:
+        return float(number)
+    if kind == _BOOLEAN:
+        return bool(number)
+    if kind == _TEXT:
+        return str(text)
+    return None
+
+
+# The expected values of one group in a solution workbook, as [(key, cell, value)]
+def _read_group(wb, group, spec):
+    from openpyxl.utils.cell import range_boundaries
+    sheet = spec["sheet"]
+    if sheet is None:
+        ws = wb.active
+    elif sheet in wb.sheetnames:
+        ws = wb[sheet]
+    else:
+        raise ValueError(f"The solution has no sheet '{sheet}' ({group}).")
+
+    entries = []
+    if spec["kind"] == "cells":
+        for cell in spec["cells"]:
+            entries.append((cell, cell, ws[cell].value))
+    else:
+        min_col, min_row, max_col, max_row = range_boundaries(spec["range"])
+        for offset, row in enumerate(ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col)):
+            if spec["kind"] == "pairs":
+                label, value = row[0].value, row[1].value
+                if label is not None and str(label).strip():
+                    entries.append((str(label).strip(), row[1].coordinate, value))
+            elif spec["kind"] == "table":
+                entries.extend((str(offset), cell.coordinate, cell.value) for cell in row)
+            elif row[0].value is None or str(row[0].value).strip() == "":  # blank_rows
+                entries.append((str(row[0].row), row[0].coordinate, None))
+
+    if spec["kind"] in ("cells", "pairs"):
+        empty = [cell for _, cell, value in entries if value is None]
+        if empty:
+            raise ValueError(f"Solution cells {', '.join(empty)} ({group}) have no value. Formulas only have one once the "
+                             "workbook was saved by Excel, open the solution in Excel and save it again.")
+    return entries
+
+
+'''
+Compile a challenge's answer key from a solution workbook and write it to output_path.
+places overrides the decimal places of groups ({group: places}). Returns the number of expected cells.
+'''
+def compile_answer_key(challenge, solution_path, output_path, places=None):
+    from openpyxl import load_workbook
+    if challenge not in ANSWER_KEY_SPECS:
+        raise ValueError(f"There are no expected values to compile for {challenge}.")
+    specs = ANSWER_KEY_SPECS[challenge]
+    places = {group: spec.get("places") for group, spec in specs.items()} | (places or {})
+
+    with open(solution_path, "rb") as f:
+        solution = f.read()
+    wb = load_workbook(io.BytesIO(solution), data_only=True)
+
+    records = []
+    for group, spec in specs.items():
+        for key, cell, value in _read_group(wb, group, spec):
+            kind, number, text = _record_value(value)
+            group_places = -1 if places[group] is None else places[group]
+            records.append((group, key, spec["sheet"] or "", cell, kind, number, text, group_places))
+
+    # Text columns are as wide as their longest entry, which keeps the key small
+    def width(column):
+        return max(1, max((len(record[column]) for record in records), default=1))
+    dtype = [("group", f"U{width(0)}"), ("key", f"U{width(1)}"), ("sheet", f"U{width(2)}"), ("cell", f"U{width(3)}"),
+             ("kind", "u1"), ("number", "f8"), ("text", f"U{width(6)}"), ("places", "i1")]
+    metadata = {
+        "challenge": challenge,
+        "groups": {group: spec["kind"] for group, spec in specs.items()},
+        "places": places,
+        "solution": os.path.basename(solution_path),
+        "solution_sha256": hashlib.sha256(solution).hexdigest(),
+        "compiled_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "wb") as f:
+        np.savez_compressed(f, version=ANSWER_KEY_VERSION, metadata=json.dumps(metadata),
+                            records=np.array(records, dtype=dtype))
+    return len(records)
+
+
+def read_answer_key(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        if int(arrays["version"]) != ANSWER_KEY_VERSION:
+            raise ValueError(f"{path} was compiled by another version of the grader, compile it again.")
+        metadata = json.loads(str(arrays["metadata"]))
+        records = arrays["records"]
+
+    values = {}
+    places = metadata["places"]
+    kinds = metadata["groups"]
+    for record in records:
+        group = str(record["group"])
+        key = str(record["key"])
+        value = _python_value(int(record["kind"]), record["number"], record["text"])
+        if kinds[group] == "table":
+            rows = values.setdefault(group, {})
+            rows.setdefault(key, []).append(value)
+        elif kinds[group] == "blank_rows":
+            values.setdefault(group, set()).add(int(key))
+        else:
+            values.setdefault(group, {})[key] = value
+
+    for group, kind in kinds.items():
+        if kind == "table":
+            values[group] = list(values.get(group, {}).values())
+        elif kind == "blank_rows":
+            values[group] = frozenset(values.get(group, ()))
+    return AnswerKey(metadata["challenge"], values, places, metadata, hashlib.sha256(data).hexdigest())
+
+
+# Every compiled key in a folder, {challenge: AnswerKey}; keys that cannot be read are left out (with a warning)
+def load_answer_keys(directory=ANSWER_KEY_DIR):
+    keys = {}
+    if not os.path.isdir(directory):
+        return keys
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".npz"):
+            continue
+        try:
+            key = read_answer_key(os.path.join(directory, name))
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            print(f"Ignoring answer key {name}: {e}", file=sys.stderr)
+            continue
+        if key.challenge in ANSWER_KEY_SPECS:
+            keys[key.challenge] = key
+    return keys
+
+
+# A challenge's answer key: the compiled one's groups where there is one, the built-in defaults otherwise
+def answer_key(challenge, defaults, compiled_keys):
+    places = {group: spec.get("places") for group, spec in ANSWER_KEY_SPECS[challenge].items()}
+    compiled = compiled_keys.get(challenge)
+    if compiled is None:
+        return AnswerKey(challenge, dict(defaults), places, {"solution": "built-in"})
+    values = dict(defaults)
+    for group in defaults:
+        if group in compiled.values:
+            values[group] = compiled.values[group]
+            places[group] = compiled.places[group]
+    return AnswerKey(challenge, values, places, compiled.metadata, compiled.digest)
+
+
+# Added to GRADER_VERSION: nothing with the built-in values, a digest of the compiled keys otherwise
+def answer_keys_version(compiled_keys):
+    if not compiled_keys:
+        return ""
+    digests = "".join(compiled_keys[challenge].digest for challenge in sorted(compiled_keys))
+    return "+keys." + hashlib.sha256(digests.encode("ascii")).hexdigest()[:12]
+
+
+def _json_value(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Compile an answer key from a solution workbook.")
+    parser.add_argument("--challenge", choices=list(ANSWER_KEY_SPECS), metavar="CHALLENGE",
+                        help="Challenge the solution is for, one of: " + "; ".join(ANSWER_KEY_SPECS))
+    parser.add_argument("--solution", metavar="XLSX", help="The instructor's solution workbook, saved by Excel")
+    parser.add_argument("--output", help="Where to write the key (default: answer_keys/<challenge>.npz, which the graders use)")
+    parser.add_argument("--places", action="append", default=[], metavar="GROUP=N",
+                        help="Decimal places numbers of a group are compared to (repeatable)")
+    parser.add_argument("--show", metavar="NPZ", help="Print a compiled key as JSON instead")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.show:
+        key = read_answer_key(args.show)
+        print(json.dumps({"metadata": key.metadata, "places": key.places,
+                          "values": {group: _json_value(value) for group, value in key.values.items()}}, indent=2))
+        return 0
+    if not (args.challenge and args.solution):
+        parser.error("--challenge and --solution are required (or use --show)")
+
+    places = {}
+    for option in args.places:
+        group, _, number = option.partition("=")
+        if group not in ANSWER_KEY_SPECS[args.challenge] or not number.isdigit():
+            parser.error(f"--places must be GROUP=N with one of: {', '.join(ANSWER_KEY_SPECS[args.challenge])}")
+        places[group] = int(number)
+
+    output_path = args.output or answer_key_path(args.challenge)
+    try:
+        cells = compile_answer_key(args.challenge, args.solution, output_path, places)
+    except Exception as e:
+        print(json.dumps({"event": "failed", "message": str(e)}))
+        return 1
+    print(json.dumps({"event": "compiled", "challenge": args.challenge, "key": output_path, "cells": cells}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
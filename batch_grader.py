@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from contextlib import redirect_stdout
+
+from grading_runner import CHALLENGES, RESULT_CACHE_DIR, SIMILARITY_INDEX_PATH, process_submissions
+from report_writer import REPORT_FORMATS
+from batch_manifest import load_manifest, run_manifest
+from resource_limits import DEFAULT_LIMITS, DEFAULT_MAX_TASKS_PER_CHILD
+from zip_submissions import is_submission_archive
+
+'''
+Grade a folder of submissions without the GUI (e.g. from cron on a server without a display).
+
+    python batch_grader.py --folder submissions/section_1 --challenge "Project 1: Cafe Bloom" \
+        --output reports/section_1 --workers 4 --format csv
+
+    python batch_grader.py --manifest end_of_term.json --workers 8   # several jobs, see batch_manifest.py
+
+Progress is printed to stdout as one JSON object per line:
+    {"event": "preflight", "submissions": 25, "gradeable": 22, "missing_sheets": 1, "corrupt": 1, "encrypted": 1,
+     "wrong_format": 0, "estimated_seconds": 3.5}
+    {"event": "progress", "percent": 40}
+    {"event": "complete", "report": "...", "submissions": 25, "graded": 25, "errors": 1}
+    {"event": "cancelled", "report": "...", "submissions": 25, "graded": 10, "errors": 0}
+    {"event": "failed", "message": "..."}
+With --manifest, "complete" and "cancelled" carry the combined numbers, the summary file and one entry
+per job ("jobs").
+Anything the graders print themselves goes to stderr, so stdout stays machine-readable.
+
+Ctrl+C or SIGTERM cancels the run: submissions already being graded finish, a partial report is
+written and the checkpoint journal stays in the output folder. Run again with --resume to grade only
+the submissions that are still missing.
+
+Exit codes:
+    0  report written, every submission graded
+    1  report written, but some submissions could not be graded (listed as "Error: ..." in the report)
+    2  bad arguments (unknown challenge, missing folder, ...)
+    3  grading failed, no report was written
+    4  cancelled, a partial report was written
+
+Every submission is graded under resource limits (--time-limit, --memory-limit, --size-limit, see
+resource_limits.py); a file that hits one is reported as "Error: Resource limit exceeded: ..." and counted
+in "resource_limited". Worker processes are replaced after --recycle-after files.
+
+Before grading, the files are triaged (see preflight.py): corrupt, encrypted and wrong format files are
+reported as "Error: Not gradeable (...)" without being graded and counted in "rejected". The "preflight"
+event counts the files to grade per status, with a rough estimate of the grading time. --no-preflight
+sends every file to the graders.
+
+With --results-store, the outcome of every rubric check of every student is added to that folder as one
+run (labelled --run-label), for failure rates and score distributions across runs (see check_results.py).
+"complete" then names the run's file ("check_results"). With --history, the run and every student's
+result and check outcomes are added to that SQLite file, kept across runs (see grade_history.py).
+'''
+
+EXIT_OK = 0
+EXIT_SUBMISSION_ERRORS = 1
+EXIT_USAGE = 2
+EXIT_FAILED = 3
+EXIT_CANCELLED = 4
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Grade a folder of Excel submissions without the GUI.")
+    parser.add_argument("--folder", help="Folder with one sub folder per student, or an LMS zip export")
+    parser.add_argument("--challenge", choices=CHALLENGES, metavar="CHALLENGE",
+                        help="Challenge to grade, one of: " + "; ".join(CHALLENGES))
+    parser.add_argument("--output", help="Folder the report is written to (created if needed)")
+    parser.add_argument("--manifest", metavar="JSON_OR_TOML",
+                        help="Grade every job listed in a manifest instead of one folder (see batch_manifest.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--format", default="xlsx", choices=REPORT_FORMATS, help="Report format (default: xlsx)")
+    parser.add_argument("--no-cache", action="store_true", help="Grade every file, even if an unchanged copy was graded before")
+    parser.add_argument("--similarity", action="store_true", help="Flag suspiciously similar submissions")
+    parser.add_argument("--similarity-exclude", action="append", default=[], metavar="XLSX",
+                        help="Starter or solution workbook whose content is ignored by the similarity check (repeatable; "
+                             "default: the challenge's workbooks in similarity_templates/)")
+    parser.add_argument("--trace", metavar="JSON", help="Write timing spans of the run as a Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument("--timing-columns", action="store_true", help="Add each student's wall time, CPU time and peak memory to the report")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run, skipping submissions it already graded")
+    parser.add_argument("--time-limit", type=float, default=DEFAULT_LIMITS["wall_seconds"], metavar="SECONDS",
+                        help="Stop grading a submission after this many seconds (default: %(default)s)")
+    parser.add_argument("--memory-limit", type=int, default=DEFAULT_LIMITS["memory_mb"], metavar="MB",
+                        help="Stop grading a submission that needs more memory than this (default: %(default)s)")
+    parser.add_argument("--size-limit", type=int, default=DEFAULT_LIMITS["uncompressed_mb"], metavar="MB",
+                        help="Do not grade workbooks that unpack to more than this (default: %(default)s)")
+    parser.add_argument("--no-limits", action="store_true", help="Grade without resource limits")
+    parser.add_argument("--recycle-after", type=int, default=DEFAULT_MAX_TASKS_PER_CHILD, metavar="FILES",
+                        help="Replace each worker process after this many files, 0 to never (default: %(default)s)")
+    parser.add_argument("--no-preflight", action="store_true",
+                        help="Grade every file, also those the pre-flight check finds corrupt, encrypted or in the wrong format")
+    parser.add_argument("--results-store", metavar="FOLDER",
+                        help="Add every check outcome of the run to this check results store (see check_results.py)")
+    parser.add_argument("--history", metavar="SQLITE", help="Add the run and every result to this grade history (see grade_history.py)")
+    parser.add_argument("--run-label", metavar="LABEL", help="Label of the run in the results store and history, e.g. 2026-fall")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.manifest and not (args.folder and args.challenge and args.output):
+        parser.error("--folder, --challenge and --output are required (or use --manifest)")
+
+    # Progress goes to the real stdout, even while grader output is redirected to stderr
+    stdout = sys.stdout
+    def emit(event, **fields):
+        print(json.dumps({"event": event, **fields}), file=stdout, flush=True)
+
+    if args.workers < 1:
+        emit("failed", message="--workers must be at least 1")
+        return EXIT_USAGE
+
+    # Ctrl+C and SIGTERM ask the run to stop; a second Ctrl+C interrupts as usual
+    cancel_event = threading.Event()
+    def cancel(signum, frame):
+        cancel_event.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+    signal.signal(signal.SIGINT, cancel)
+    signal.signal(signal.SIGTERM, cancel)
+
+    if args.manifest:
+        return grade_manifest(args, emit, cancel_event)
+
+    if not os.path.isdir(args.folder) and not is_submission_archive(args.folder):
+        emit("failed", message=f"Submissions folder not found: {args.folder}")
+        return EXIT_USAGE
+    os.makedirs(args.output, exist_ok=True)
+
+    outcome = {}
+    def grading_complete(success, message):
+        outcome["success"] = success
+        outcome["message"] = message
+
+    try:
+        with redirect_stdout(sys.stderr):
+            summary = process_submissions(
+                args.folder,
+                args.challenge,
+                args.output,
+                lambda percent: emit("progress", percent=percent),
+                grading_complete,
+                args.workers,
+                None if args.no_cache else RESULT_CACHE_DIR,
+                SIMILARITY_INDEX_PATH if args.similarity else None,
+                args.similarity_exclude,
+                args.format,
+                args.trace,
+                args.timing_columns,
+                args.resume,
+                cancel_event,
+                resource_limits(args),
+                args.recycle_after or None,
+                preflight=not args.no_preflight,
+                preflight_callback=lambda preflight: emit("preflight", **preflight),
+                results_store=args.results_store,
+                run_label=args.run_label,
+                history_path=args.history
+            )
+    except Exception as e:
+        emit("failed", message=str(e))
+        return EXIT_FAILED
+
+    if summary and summary["cancelled"]:
+        emit("cancelled", **{k: v for k, v in summary.items() if k != "cancelled"})
+        return EXIT_CANCELLED
+    if not outcome.get("success") or summary is None:
+        emit("failed", message=outcome.get("message", "Grading did not complete."))
+        return EXIT_FAILED
+
+    emit("complete", **{k: v for k, v in summary.items() if k != "cancelled"})
+    return EXIT_SUBMISSION_ERRORS if summary["errors"] else EXIT_OK
+
+
+def resource_limits(args):
+    if args.no_limits:
+        return None
+    return {"wall_seconds": args.time_limit, "memory_mb": args.memory_limit, "uncompressed_mb": args.size_limit}
+
+
+def grade_manifest(args, emit, cancel_event):
+    try:
+        manifest = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        emit("failed", message=f"Could not read the manifest: {e}")
+        return EXIT_USAGE
+
+    try:
+        with redirect_stdout(sys.stderr):
+            summary = run_manifest(
+                manifest,
+                lambda percent: emit("progress", percent=percent),
+                args.workers,
+                None if args.no_cache else RESULT_CACHE_DIR,
+                cancel_event,
+                resource_limits(args),
+                args.recycle_after or None,
+                preflight=not args.no_preflight,
+                preflight_callback=lambda preflight: emit("preflight", **preflight),
+                results_store=args.results_store,
+                run_label=args.run_label,
+                history_path=args.history
+            )
+    except Exception as e:
+        emit("failed", message=str(e))
+        return EXIT_FAILED
+
+    emit("cancelled" if summary["cancelled"] else "complete", **{k: v for k, v in summary.items() if k != "cancelled"})
+    if summary["cancelled"]:
+        return EXIT_CANCELLED
+    return EXIT_SUBMISSION_ERRORS if summary["errors"] else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
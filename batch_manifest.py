@@ -0,0 +1,213 @@
+import csv
+import json
+import os
+import zipfile
+
+from grading_runner import (CHALLENGES, RunArchive, build_grade_row, find_submission_files, grade_distinct_files,
+                            hash_submission)
+from zip_submissions import is_submission_archive
+from report_writer import REPORT_FORMATS, open_report_writer
+from result_cache import ResultCache
+
+'''
+Grade several folder/challenge jobs in one run (e.g. every section at the end of term), described by
+a JSON or TOML manifest:
+
+    {
+      "format": "xlsx",
+      "summary": "reports/summary.csv",
+      "jobs": [
+        {"folder": "fall/section_1", "challenge": "Project 1: Cafe Bloom", "output": "reports/section_1/project_1"},
+        {"folder": "fall/section_1", "challenge": "Project 2: Marathon Participants", "output": "reports/section_1/project_2"},
+        {"folder": "fall/section_2", "challenge": "Project 1: Cafe Bloom", "output": "reports/section_2/project_1", "format": "csv"}
+      ]
+    }
+
+    # The same manifest as TOML (needs Python 3.11 or newer)
+    format = "xlsx"
+    [[jobs]]
+    folder = "fall/section_1"
+    challenge = "Project 1: Cafe Bloom"
+    output = "reports/section_1/project_1"
+
+Relative paths are relative to the manifest, and a job's folder may also be an LMS zip export (see
+zip_submissions.py). Each job may set "name" (default: the folder name and challenge) and "format".
+
+Every job's files go to one shared worker pool. Byte-identical files are graded once per challenge,
+even across jobs, and a file graded for several challenges is parsed once for all of them (see
+grading_runner.grade_file_for_challenges). Each job gets its own report, written in submission order,
+and the run writes a combined summary CSV: one line per job with its submissions, errors and average
+percentage ("summary", default batch_summary.csv next to the manifest).
+'''
+
+SUMMARY_HEADER = ["Job", "Challenge", "Folder", "Submissions", "Errors", "Average Percentage", "Report"]
+
+
+def load_manifest(path):
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML manifests need Python 3.11 or newer, use a JSON manifest instead.")
+        with open(path, "rb") as f:
+            manifest = tomllib.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(path))
+    default_format = manifest.get("format", "xlsx")
+    jobs = []
+    for number, job in enumerate(manifest.get("jobs", []), start=1):
+        missing = [key for key in ("folder", "challenge", "output") if not job.get(key)]
+        if missing:
+            raise ValueError(f"Job {number} of the manifest has no {', '.join(missing)}.")
+        if job["challenge"] not in CHALLENGES:
+            raise ValueError(f"Job {number} of the manifest has an unknown challenge: {job['challenge']}")
+        report_format = job.get("format", default_format)
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Job {number} of the manifest has an unknown report format: {report_format}")
+        folder = os.path.join(base, job["folder"])
+        if not os.path.isdir(folder) and not is_submission_archive(folder):
+            raise ValueError(f"Submissions folder of job {number} not found: {folder}")
+        jobs.append({
+            "name": job.get("name") or f"{os.path.basename(os.path.normpath(folder))}: {job['challenge']}",
+            "folder": folder,
+            "challenge": job["challenge"],
+            "output": os.path.join(base, job["output"]),
+            "format": report_format,
+        })
+    if not jobs:
+        raise ValueError("The manifest lists no jobs.")
+    reports = [(os.path.normpath(job["output"]), job["format"]) for job in jobs]
+    if len(set(reports)) != len(reports):
+        raise ValueError("Two jobs of the manifest would write the same report, give them different outputs.")
+
+    summary = os.path.join(base, manifest.get("summary", "batch_summary.csv"))
+    return {"jobs": jobs, "summary": summary}
+
+
+# One job's report: rows that finish early wait until the rows before them are written
+class _JobReport:
+    def __init__(self, job, submissions):
+        self.job = job
+        self.submissions = submissions
+        os.makedirs(job["output"], exist_ok=True)
+        self.writer = open_report_writer(job["output"], job["format"])
+        self.pending_rows = {}
+        self.next_row = 0
+        self.completed = 0
+        self.errors = 0
+        self.resource_limited = 0
+        self.rejected = 0
+        self.percentages = []
+
+    def record(self, index, result):
+        row = build_grade_row(self.submissions[index][0], result)
+        self.pending_rows[index] = row
+        self.completed += 1
+        if "error" in result:
+            self.errors += 1
+        if "resource_limit" in result:
+            self.resource_limited += 1
+        if "preflight" in result:
+            self.rejected += 1
+        self.percentages.append(row["Percentage"])
+        while self.next_row in self.pending_rows:
+            self.writer.write_row(self.pending_rows.pop(self.next_row))
+            self.next_row += 1
+
+    def close(self):
+        for index in sorted(self.pending_rows):  # Only left over when the run was cancelled
+            self.writer.write_row(self.pending_rows.pop(index))
+        report_path = self.writer.close()
+        average = round(sum(self.percentages) / len(self.percentages), 2) if self.percentages else 0
+        return {"name": self.job["name"], "challenge": self.job["challenge"], "folder": self.job["folder"],
+                "report": report_path, "submissions": len(self.submissions), "graded": self.completed,
+                "errors": self.errors, "resource_limited": self.resource_limited, "rejected": self.rejected, "average_percentage": average}
+
+
+'''
+Run every job of a loaded manifest on one pool of max_workers processes.
+progress_callback gets the percentage of all submissions done; cache_dir, cancel_event, resource_limits
+and max_tasks_per_child, preflight and preflight_callback, results_store, run_label and history_path work as in
+process_submissions (every job's results go into one run of the store and of the history).
+Returns {"jobs": [per job summary], "summary", "submissions", "errors", "resource_limited", "rejected", "cancelled"},
+plus "check_results" with a results_store.
+'''
+def run_manifest(manifest, progress_callback, max_workers=1, cache_dir=None, cancel_event=None,
+                 resource_limits=None, max_tasks_per_child=None, preflight=True, preflight_callback=None,
+                 results_store=None, run_label=None, history_path=None):
+    reports = [_JobReport(job, find_submission_files(job["folder"])) for job in manifest["jobs"]]
+    total_submissions = sum(len(report.submissions) for report in reports)
+
+    from grading_algorithms import GRADER_VERSION
+    cache = ResultCache(cache_dir, GRADER_VERSION) if cache_dir else None
+
+    # Every distinct file (by content hash) with the challenges it is graded for and who handed it in:
+    # {file_hash: (path, {challenge: [(report, submission index)]})}
+    distinct_files = {}
+    for report in reports:
+        for index, (_, student_file_path) in enumerate(report.submissions):
+            try:
+                file_hash = hash_submission(student_file_path)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                file_hash = student_file_path  # Unreadable file, grading will report the error
+            targets = distinct_files.setdefault(file_hash, (student_file_path, {}))[1]
+            targets.setdefault(report.job["challenge"], []).append((report, index))
+
+    with RunArchive(results_store, history_path, run_label,
+                    "; ".join(dict.fromkeys(job["folder"] for job in manifest["jobs"])),
+                    "; ".join(dict.fromkeys(job["challenge"] for job in manifest["jobs"]))) as archive:
+        completed = 0
+        def record_result(file_hash, challenge, result):
+            nonlocal completed
+            for report, index in distinct_files[file_hash][1][challenge]:
+                report.record(index, result)
+                archive.add(os.path.basename(os.path.normpath(report.job["folder"])), report.submissions[index][0],
+                            challenge, result, file_hash)
+                completed += 1
+            progress_callback(int((completed / total_submissions) * 100) if total_submissions else 100)
+
+        def earlier_result(file_hash, challenge):
+            return cache.get(cache.key(file_hash, challenge)) if cache else None
+
+        def finish_result(file_hash, challenge, result):
+            if cache and "error" not in result:
+                cache.put(cache.key(file_hash, challenge), result)
+
+        cancelled = grade_distinct_files(
+            [(file_hash, student_file_path, list(targets)) for file_hash, (student_file_path, targets) in distinct_files.items()],
+            record_result, earlier_result, finish_result, max_workers, resource_limits, max_tasks_per_child, preflight,
+            preflight_callback, cancel_event
+        )
+
+        if cache:
+            cache.evict()
+
+        job_summaries = [report.close() for report in reports]
+        check_results_path = archive.close(cancelled)
+
+    write_summary(manifest["summary"], job_summaries)
+    run_summary = {
+        "jobs": job_summaries,
+        "summary": manifest["summary"],
+        "submissions": total_submissions,
+        "errors": sum(job["errors"] for job in job_summaries),
+        "resource_limited": sum(job["resource_limited"] for job in job_summaries),
+        "rejected": sum(job["rejected"] for job in job_summaries),
+        "cancelled": cancelled,
+    }
+    if results_store:
+        run_summary["check_results"] = check_results_path
+    return run_summary
+
+
+def write_summary(path, job_summaries):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(SUMMARY_HEADER)
+        for job in job_summaries:
+            writer.writerow([job["name"], job["challenge"], job["folder"], job["submissions"], job["errors"],
+                             job["average_percentage"], job["report"]])
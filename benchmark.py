@@ -0,0 +1,205 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from grading_runner import CHALLENGES, grade_file, process_submissions
+from import_timing import git_commit, time_import
+from synthetic_submissions import MISTAKES, build_workbook, challenge_folder_name, generate_cohort
+
+'''
+Benchmark suite for the graders, run on synthetic submissions (synthetic_submissions.py).
+
+    python benchmark.py                                   # all challenges, cohorts of 10, 100 and 1000
+    python benchmark.py --sizes 10,10000 --workers 8 --output results/abc123.json
+    python benchmark.py --compare results/before.json     # print the change against an earlier run
+
+Measures:
+    grader_latency  per challenge and variant (correct, partial, oversized, corrupt): median and
+                    p95 time to grade one file (grade_file), and its peak Python allocation (tracemalloc)
+    throughput      end-to-end process_submissions per challenge and cohort size (no result cache):
+                    seconds, submissions per second and peak resident memory of the run, each run in a
+                    fresh interpreter so peaks are not carried over
+    imports         import time of the entry points (import_timing.py)
+
+Results are written as JSON with the git commit, so runs from different commits can be compared.
+'''
+
+DEFAULT_SIZES = [10, 100, 1000]
+DEFAULT_REPEATS = 5
+LATENCY_PADDING_ROWS = 20000
+RESULT_KEYS = {"grader_latency": ("challenge", "variant"), "throughput": ("challenge", "size", "workers", "format")}
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+# Peak resident memory of this process and of its (finished) worker processes, in MB
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None, None  # Windows
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return round(own / divisor, 1), round(children / divisor, 1)
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def bench_grader_latency(challenge, workdir, repeats=DEFAULT_REPEATS):
+    correct = build_workbook(challenge)
+    variants = {
+        "correct": correct,
+        "partial": build_workbook(challenge, MISTAKES[challenge]),
+        "oversized": build_workbook(challenge, padding_rows=LATENCY_PADDING_ROWS),
+        "corrupt": correct[:len(correct) // 2],
+    }
+
+    results = []
+    for variant, data in variants.items():
+        path = os.path.join(workdir, f"{challenge_folder_name(challenge)}_{variant}.xlsx")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        samples = []
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            grade_file(challenge, path)  # Warm up (imports, rubric plans, excluded shingles)
+            for _ in range(repeats):
+                start = time.perf_counter()
+                grade_file(challenge, path)
+                samples.append((time.perf_counter() - start) * 1000)
+
+            tracemalloc.start()
+            grade_file(challenge, path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        results.append({
+            "challenge": challenge,
+            "variant": variant,
+            "file_kb": round(len(data) / 1024, 1),
+            "median_ms": round(statistics.median(samples), 2),
+            "p95_ms": round(_percentile(samples, 0.95), 2),
+            "peak_alloc_mb": round(peak / 1024 / 1024, 2),
+        })
+    return results
+
+
+# Runs inside a fresh interpreter (see bench_throughput) and prints its measurements as JSON
+def _throughput_probe(folder, challenge, output, workers, report_format):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        start = time.perf_counter()
+        summary = process_submissions(folder, challenge, output, lambda percent: None,
+                                      lambda success, message: None,
+                                      int(workers), None, None, (), report_format)
+        seconds = time.perf_counter() - start
+    own, children = peak_rss_mb()
+    print(json.dumps({"seconds": seconds, "summary": summary, "peak_rss_mb": own, "workers_peak_rss_mb": children}))
+
+
+def bench_throughput(challenge, size, workdir, workers=1, report_format="xlsx", seed=0):
+    folder = os.path.join(workdir, f"{challenge_folder_name(challenge)}_{size}")
+    if not os.path.isdir(folder):
+        generate_cohort(folder, challenge, size, seed=seed)
+    output = os.path.join(workdir, "reports")
+    os.makedirs(output, exist_ok=True)
+
+    completed = subprocess.run(
+        [sys.executable, "-c", "import sys, benchmark; benchmark._throughput_probe(*sys.argv[1:])",
+         folder, challenge, output, str(workers), report_format],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "challenge": challenge,
+        "size": size,
+        "workers": workers,
+        "format": report_format,
+        "seconds": round(probe["seconds"], 3),
+        "per_second": round(size / probe["seconds"], 1) if probe["seconds"] else None,
+        "errors": probe["summary"]["errors"] if probe["summary"] else None,
+        "peak_rss_mb": probe["peak_rss_mb"],
+        "workers_peak_rss_mb": probe["workers_peak_rss_mb"],
+    }
+
+
+def run_benchmarks(challenges, sizes, workers=1, report_format="xlsx", repeats=DEFAULT_REPEATS, workdir=None, log=print):
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "grader_latency": [],
+        "throughput": [],
+        "imports": [time_import(module) for module in ("grading_runner", "batch_grader")],
+    }
+
+    with tempfile.TemporaryDirectory(prefix="grader_bench_") as temp_dir:
+        workdir = workdir or temp_dir
+        os.makedirs(workdir, exist_ok=True)
+        for challenge in challenges:
+            for result in bench_grader_latency(challenge, workdir, repeats):
+                results["grader_latency"].append(result)
+                log(f"latency     {challenge:40} {result['variant']:10} {result['median_ms']:9.2f} ms (p95 {result['p95_ms']:.2f})")
+            for size in sizes:
+                result = bench_throughput(challenge, size, workdir, workers, report_format)
+                results["throughput"].append(result)
+                log(f"throughput  {challenge:40} {size:6} subs {result['seconds']:9.2f} s ({result['per_second']}/s, peak {result['peak_rss_mb']} MB)")
+    return results
+
+
+# Print how each measurement changed between two result files (negative is faster / smaller)
+def compare(old, new, log=print):
+    log(f"{old.get('commit')} -> {new.get('commit')}")
+    for section, keys in RESULT_KEYS.items():
+        previous = {tuple(row[key] for key in keys): row for row in old.get(section, [])}
+        for row in new.get(section, []):
+            key = tuple(row[k] for k in keys)
+            before = previous.get(key)
+            if not before:
+                continue
+            metric = "median_ms" if section == "grader_latency" else "seconds"
+            if before[metric]:
+                change = (row[metric] - before[metric]) / before[metric] * 100
+                log(f"{section:15} {' / '.join(str(part) for part in key):60} {before[metric]:10} -> {row[metric]:10} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the graders on synthetic submissions.")
+    parser.add_argument("--challenge", action="append", choices=CHALLENGES, metavar="CHALLENGE",
+                        help="Challenge to benchmark (repeatable, default: all)")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Cohort sizes for the throughput runs, e.g. 10,100,1000,10000")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--format", default="xlsx", choices=("xlsx", "csv", "jsonl"))
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--workdir", help="Keep the generated cohorts here (reused by later runs) instead of a temporary folder")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = run_benchmarks(args.challenge or CHALLENGES, sizes, args.workers, args.format, args.repeats, args.workdir)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
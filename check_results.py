@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+'''
+Per-check results of grading runs, for cohort analytics.
+
+The report has one row per student with the feedback joined into one string, which answers "what did
+this student get" but not "which rubric item did 40% of the students miss". While a submission is graded,
+every check records its outcome:
+
+    check_results.record("I4", earned=3, possible=3)                  # rubric checks (rubric.Rubric.grade)
+    check_results.record("headers", 0, 2)                             # hand-written checks (grading_algorithms.py)
+
+grade_file collects them into the result as "checks" ([check id, earned, possible, code] lists, so they
+are cached and journaled with the rest of the result). Recording is per thread, like tracing.py, and costs
+a thread-local lookup when nothing is recording. Codes are PASSED, FAILED, SKIPPED (its 'requires' check
+did not pass), ERROR, or a more specific failure a check reports (e.g. the formula check's "static_value").
+A submission without checks (not gradeable, or the grader failed) is stored as one SUBMISSION_CHECK row
+with the kind of error as its code. Grading that ended early says nothing about the rubric items it never
+reached, so those submissions are excluded: they are not rubric items in failure_rates() and are counted as
+"excluded" instead of 0% in score_distribution(). A grader that catches its own error calls abandon(), so
+the checks it recorded before the error are dropped and the submission is excluded as INCOMPLETE.
+
+A store is a folder with one compressed .npz file per run (never rewritten, so runs are only ever added):
+
+    <store>/run-20261020T235900.123456-<id>.npz    (named by when it was written, so names sort oldest first)
+        version     STORE_VERSION
+        meta        JSON: label (e.g. "2026-fall"), grader version, when the run finished, whether it was
+                    cancelled (its submissions are complete, but not every student's is there)
+        sections, students, challenges, checks, codes    the distinct strings of the run
+        rows        NumPy structured array (ROW_DTYPE), one row per check outcome, strings as positions
+                    in the arrays above
+
+load_results() concatenates the runs into one CheckResults (string columns remapped to shared
+vocabularies), whose failure_rates() and score_distribution() aggregate with bincount/unique, so a few
+hundred thousand rows take milliseconds. From the command line:
+
+    python check_results.py STORE [--label 2026-fall] [--challenge "Project 1: Cafe Bloom"] [--scores]
+
+prints one JSON object per line: an "item" event per rubric item, most failed first (or one
+"scores" event with the score distribution).
+'''
+
+# Bump when the file layout changes, so older files are skipped instead of misread
+STORE_VERSION = 1
+
+PASSED = "passed"
+FAILED = "failed"
+SKIPPED = "skipped"
+ERROR = "error"
+INCOMPLETE = "incomplete"
+
+# Check id of the row stored for a submission that has no checks of its own
+SUBMISSION_CHECK = "(submission)"
+# Codes of SUBMISSION_CHECK rows whose submissions are left out of the analytics (grading ended early)
+EXCLUDED_CODES = ("not_gradeable", "resource_limit", ERROR, INCOMPLETE)
+
+ROW_DTYPE = [("section", "<i4"), ("student", "<i4"), ("challenge", "<i2"), ("check", "<i2"), ("code", "<i2"),
+             ("earned", "<f4"), ("possible", "<f4")]
+_VOCABULARIES = (("sections", "section"), ("students", "student"), ("challenges", "challenge"), ("checks", "check"),
+                 ("codes", "code"))
+
+_local = threading.local()
+
+
+# Record a check outcome if the current thread is recording (code defaults to passed when all points were earned)
+def record(check_id, earned, possible, code=None):
+    checks = getattr(_local, "checks", None)
+    if checks is not None:
+        checks.append([check_id, earned, possible, code or (PASSED if earned >= possible else FAILED)])
+
+
+# Drop the checks recorded so far: the grader stopped early (e.g. it caught an error), so they are incomplete
+def abandon():
+    checks = getattr(_local, "checks", None)
+    if checks is not None:
+        checks.clear()
+        checks.abandoned = True
+
+
+class _Checks(list):
+    abandoned = False
+
+
+# Record the checks of a block into the yielded list (its `abandoned` is set once abandon() was called)
+@contextmanager
+def recording():
+    previous = getattr(_local, "checks", None)
+    _local.checks = checks = _Checks()
+    try:
+        yield checks
+    finally:
+        _local.checks = previous
+
+
+def _submission_code(result):
+    if "preflight" in result:
+        return "not_gradeable"
+    if "resource_limit" in result:
+        return "resource_limit"
+    if "error" in result:
+        return ERROR
+    # "checks" is None when the grader abandoned them; results without "checks" come from graders that had none yet
+    return INCOMPLETE if "checks" in result else "score_only"
+
+
+'''
+Check outcomes of one run, collected as results come in (process_submissions, batch_manifest.run_manifest)
+and written to the store once the run is done.
+'''
+class RunResults:
+    def __init__(self, label=None, grader_version=None):
+        self.label = label
+        self.grader_version = grader_version
+        self.vocabularies = {name: {} for name, _ in _VOCABULARIES}
+        self.columns = {field: [] for field, _ in ROW_DTYPE}
+
+    def _position(self, vocabulary, value):
+        positions = self.vocabularies[vocabulary]
+        return positions.setdefault(value, len(positions))
+
+    def add(self, section, student, challenge, result):
+        checks = result.get("checks")
+        if checks is None or "error" in result:
+            checks = [[SUBMISSION_CHECK, result.get("score", 0), result.get("total_points", 0), _submission_code(result)]]
+        section = self._position("sections", str(section))
+        student = self._position("students", str(student))
+        challenge = self._position("challenges", str(challenge))
+        for check_id, earned, possible, code in checks:
+            self.columns["section"].append(section)
+            self.columns["student"].append(student)
+            self.columns["challenge"].append(challenge)
+            self.columns["check"].append(self._position("checks", str(check_id)))
+            self.columns["code"].append(self._position("codes", code))
+            self.columns["earned"].append(earned)
+            self.columns["possible"].append(possible)
+
+    def __len__(self):
+        return len(self.columns["check"])
+
+    # Add the run to the store folder (created if needed), returns the path of its file
+    def write(self, store, cancelled=False):
+        import numpy as np
+
+        os.makedirs(store, exist_ok=True)
+        rows = np.empty(len(self), dtype=ROW_DTYPE)
+        for field, _ in ROW_DTYPE:
+            rows[field] = self.columns[field]
+        finished = datetime.now()
+        meta = {"label": self.label, "grader_version": self.grader_version, "finished": finished.strftime("%Y-%m-%dT%H:%M:%S"),
+                "cancelled": bool(cancelled)}
+        vocabularies = {name: np.array(list(self.vocabularies[name]), dtype=str) for name, _ in _VOCABULARIES}
+
+        path = os.path.join(store, f"run-{finished.strftime('%Y%m%dT%H%M%S.%f')}-{uuid.uuid4().hex[:8]}.npz")
+        partial_path = path + ".partial"
+        with open(partial_path, "wb") as f:
+            np.savez_compressed(f, version=STORE_VERSION, meta=json.dumps(meta), rows=rows, **vocabularies)
+        os.replace(partial_path, path)  # Readers never see a half written run
+        return path
+
+
+'''
+Every check outcome of the loaded runs: `rows` is one structured array (ROW_DTYPE plus "run"), the string
+columns are positions in `sections`, `students`, `challenges`, `checks` and `codes`, and `runs` holds each
+run's meta data (plus its "path").
+'''
+class CheckResults:
+    def __init__(self, rows, runs, vocabularies):
+        self.rows = rows
+        self.runs = runs
+        for name, _ in _VOCABULARIES:
+            setattr(self, name, vocabularies[name])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _select(self, challenge):
+        if challenge is None:
+            return self.rows
+        if challenge not in self.challenges:
+            return self.rows[:0]
+        return self.rows[self.rows["challenge"] == self.challenges.index(challenge)]
+
+    # Mask of the rows that stand for a whole submission: every SUBMISSION_CHECK row, or only the excluded ones
+    def _submission_rows(self, rows, excluded_only=False):
+        import numpy as np
+
+        if SUBMISSION_CHECK not in self.checks:
+            return np.zeros(len(rows), dtype=bool)
+        mask = rows["check"] == self.checks.index(SUBMISSION_CHECK)
+        if excluded_only:
+            mask &= np.isin(rows["code"], [position for position, code in enumerate(self.codes) if code in EXCLUDED_CODES])
+        return mask
+
+    '''
+    Per rubric item (challenge and check id): how often it was graded ("attempts"), how often it did not
+    pass ("failed", which includes "skipped" and "errors"), the failure rate and the points lost. Items
+    with a failure rate below min_rate are left out; the rest come most failed first. Submissions without
+    checks of their own (SUBMISSION_CHECK) are not rubric items and are left out as well.
+    '''
+    def failure_rates(self, challenge=None, min_rate=0.0):
+        import numpy as np
+
+        rows = self._select(challenge)
+        rows = rows[~self._submission_rows(rows)]
+        if not len(rows):
+            return []
+        codes = {code: position for position, code in enumerate(self.codes)}
+        code = rows["code"]
+        item = rows["challenge"].astype(np.int64) * len(self.checks) + rows["check"]
+        items, inverse = np.unique(item, return_inverse=True)
+
+        def count(mask):
+            return np.bincount(inverse, weights=mask, minlength=len(items))
+
+        attempts = np.bincount(inverse, minlength=len(items))
+        failed = attempts - count(code == codes.get(PASSED, -1))
+        skipped = count(code == codes.get(SKIPPED, -1))
+        errors = count(code == codes.get(ERROR, -1))
+        earned = count(rows["earned"])
+        possible = count(rows["possible"])
+        rates = failed / attempts
+
+        order = np.lexsort((items, -rates))
+        return [{
+            "challenge": self.challenges[int(items[i]) // len(self.checks)],
+            "check": self.checks[int(items[i]) % len(self.checks)],
+            "attempts": int(attempts[i]),
+            "failed": int(failed[i]),
+            "skipped": int(skipped[i]),
+            "errors": int(errors[i]),
+            "failure_rate": round(float(rates[i]), 4),
+            "points_lost": round(float(possible[i] - earned[i]), 2),
+        } for i in order if rates[i] >= min_rate]
+
+    '''
+    Distribution of the submissions' percentages (points earned over points possible of their checks, one
+    submission per run, section, student and challenge): count, mean, median, quartiles and a histogram over
+    0-100% with `bins` equal bins. Submissions whose grading ended early are only counted ("excluded").
+    '''
+    def score_distribution(self, challenge=None, bins=10):
+        import numpy as np
+
+        rows = self._select(challenge)
+        excluded = self._submission_rows(rows, excluded_only=True)
+        rows = rows[~excluded]
+        if not len(rows):
+            return {"submissions": 0, "excluded": int(excluded.sum())}
+        submission = rows["run"].astype(np.int64)
+        for field, vocabulary in (("section", self.sections), ("student", self.students), ("challenge", self.challenges)):
+            submission = submission * len(vocabulary) + rows[field]
+        _, inverse = np.unique(submission, return_inverse=True)
+        earned = np.bincount(inverse, weights=rows["earned"])
+        possible = np.bincount(inverse, weights=rows["possible"])
+        percentages = np.divide(earned * 100, possible, out=np.zeros_like(earned), where=possible > 0)
+
+        counts, edges = np.histogram(percentages, bins=bins, range=(0, 100))
+        quartiles = np.percentile(percentages, [25, 50, 75])
+        return {
+            "submissions": len(percentages),
+            "excluded": int(excluded.sum()),
+            "mean": round(float(percentages.mean()), 2),
+            "median": round(float(quartiles[1]), 2),
+            "quartiles": [round(float(value), 2) for value in quartiles],
+            "histogram": {"edges": [round(float(edge), 2) for edge in edges], "counts": counts.tolist()},
+        }
+
+
+# Runs in the store, oldest first
+def run_files(store):
+    if not os.path.isdir(store):
+        return []
+    return [os.path.join(store, name) for name in sorted(os.listdir(store))
+            if name.startswith("run-") and name.endswith(".npz")]
+
+
+'''
+Load every run in the store (only those labelled with one of `labels`, if given) into one CheckResults.
+Files written by another store version are skipped.
+'''
+def load_results(store, labels=None):
+    import numpy as np
+
+    vocabularies = {name: {} for name, _ in _VOCABULARIES}
+    runs = []
+    parts = []
+    for path in run_files(store):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != STORE_VERSION:
+                continue
+            meta = json.loads(str(data["meta"]))
+            if labels is not None and meta.get("label") not in labels:
+                continue
+            rows = data["rows"]
+            part = np.empty(len(rows), dtype=ROW_DTYPE + [("run", "<i4")])
+            for name, field in _VOCABULARIES:
+                positions = vocabularies[name]
+                remap = np.array([positions.setdefault(value, len(positions)) for value in data[name].tolist()], dtype=np.int64)
+                part[field] = remap[rows[field]] if len(remap) else rows[field]
+            for field in ("earned", "possible"):
+                part[field] = rows[field]
+            part["run"] = len(runs)
+            runs.append(dict(meta, path=path))
+            parts.append(part)
+
+    rows = np.concatenate(parts) if parts else np.empty(0, dtype=ROW_DTYPE + [("run", "<i4")])
+    return CheckResults(rows, runs, {name: list(positions) for name, positions in vocabularies.items()})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Failure rates and score distributions from a check results store.")
+    parser.add_argument("store", help="Folder the runs were stored in (batch_grader.py --results-store)")
+    parser.add_argument("--label", action="append", metavar="LABEL", help="Only runs with this label (repeatable)")
+    parser.add_argument("--challenge", help="Only this challenge")
+    parser.add_argument("--min-rate", type=float, default=0.0, help="Only items failed at least this often (0-1)")
+    parser.add_argument("--scores", action="store_true", help="Print the score distribution instead of the items")
+    parser.add_argument("--bins", type=int, default=10, help="Histogram bins of the score distribution (default: 10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def emit(event, **fields):
+        print(json.dumps({"event": event, **fields}), flush=True)
+
+    results = load_results(args.store, args.label)
+    if args.scores:
+        emit("scores", runs=len(results.runs), **results.score_distribution(args.challenge, args.bins))
+    else:
+        for item in results.failure_rates(args.challenge, args.min_rate):
+            emit("item", **item)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import json
+import os
+
+'''
+Append-only checkpoint journal of a grading run.
+
+process_submissions appends one JSON line per graded file as soon as it finishes, so a crash, a
+sleeping laptop or a dropped network share loses at most the submissions that were being graded at
+that moment. The first line describes the run; a resumed run only reuses the journal when it was
+written for the same folder, challenge and grader version:
+
+    {"type": "run", "folder": "...", "challenge": "...", "grader_version": "2"}
+    {"type": "result", "file_hash": "<sha256>", "result": {"score": ..., "total_points": ..., "feedback": [...]}}
+
+Results are keyed by the file's content hash, so a student who re-uploads is graded again. A line
+cut off by a crash is ignored. The journal is removed once the run completes.
+'''
+
+JOURNAL_NAME = "grading_journal.jsonl"
+
+
+class CheckpointJournal:
+    def __init__(self, path, folder, challenge, grader_version):
+        self.path = path
+        self.header = {"type": "run", "folder": os.path.abspath(folder), "challenge": challenge,
+                       "grader_version": str(grader_version)}
+        self.file = None
+
+    # Results journaled by an earlier run of the same folder/challenge/grader version: {file_hash: result}
+    def load(self):
+        results = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return results
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Cut off while it was being written
+        if not records or records[0] != self.header:
+            return {}
+
+        for record in records[1:]:
+            if record.get("type") == "result":
+                results[record["file_hash"]] = record["result"]
+        return results
+
+    # Open the journal for appending; with keep_existing (resuming a run that load() accepted) earlier results stay.
+    # Returns the journal, which closes (and is kept for a resume) when a with block around it is left early
+    def open(self, keep_existing=False):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if keep_existing:
+            self.file = open(self.path, "a", encoding="utf-8")
+            if self._cut_off():
+                self.file.write("\n")  # End the cut off line, so the next record is not glued onto it
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+            self._write(self.header)
+        return self
+
+    # Whether the journal ends in the middle of a line (a crash cut off the last record)
+    def _cut_off(self):
+        with open(self.path, "rb") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b"\n"
+
+    def append(self, file_hash, result):
+        self._write({"type": "result", "file_hash": file_hash, "result": result})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self, completed=False):
+        if self.file:
+            self.file.close()
+            self.file = None
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
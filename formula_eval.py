@@ -0,0 +1,856 @@
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import to_excel
+
+'''
+Built-in evaluator for the formulas our challenges use, for workbooks saved without cached values.
+
+Excel stores the result of every formula next to it, and the graders read those results. Files written
+by Google Sheets exports, LibreOffice or scripts (openpyxl among them) often store the formula only,
+so every formula cell read as empty and the submission scored zero. workbook_loader.py asks this
+module for the value of such a cell instead:
+
+    evaluator = FormulaEvaluator(workbook.formulas, cached_values)
+    evaluator.value("CoffeeAnalysis", 4, 9)   -> "Australia"  (I4: =INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0)))
+
+Only the cells that are asked for are computed. The formula cells a cell refers to (through ranges,
+structured table references like Times[Time] and defined names) form a dependency graph; it is walked
+from the requested cell, precedents first, and every computed cell is memoized, so a shared
+precedent is computed once however many cells read it. Cells that do have a cached value keep it.
+
+Supported: numbers, text, TRUE/FALSE, error literals, cell/range/column references (optionally on
+another sheet), structured references (Table[Column], Table[#All], Table[[#Data],[A]:[B]], [@Column]),
+defined names, the operators + - * / ^ & % and comparisons, and the functions in FUNCTIONS (array
+arguments like LEN(A4:A14) work element by element, as in Excel 365). A formula using anything else
+evaluates to None, the same as a missing cached value; parse_formula raises FormulaSyntaxError.
+'''
+
+
+# Excel error values (#N/A, #DIV/0!, ...), kept as strings like openpyxl reports cached errors
+class FormulaError(str):
+    pass
+
+
+ERROR_CODES = ("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A", "#SPILL!", "#CALC!")
+NA, DIV0, VALUE, REF, NAME, NUM = (FormulaError(code) for code in ("#N/A", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!"))
+
+
+class FormulaSyntaxError(ValueError):
+    pass
+
+
+# Raised while evaluating; the cell gets the error value
+class _Error(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+# Raised for functions and constructs this module does not implement; the cell gets None
+class _Unsupported(Exception):
+    pass
+
+
+class _Circular(Exception):
+    pass
+
+
+# An omitted argument, e.g. the if_not_found of XLOOKUP(A1,B:B,C:C,,1)
+_MISSING = object()
+
+_NAME = r"[A-Za-z_\\][\w.]*"
+_CELL = r"\$?[A-Za-z]{1,3}\$?\d+"
+_TOKEN = re.compile(rf'''
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A|SPILL!|CALC!))
+  | (?P<sheet>(?:'(?:[^']|'')+'|{_NAME})!)
+  | (?P<table>(?:{_NAME})?\[(?:[^\[\]]|\[(?:[^\]']|'.)*\])*\])
+  | (?P<function>{_NAME}(?=\())
+  | (?P<range>(?:{_CELL}(?::{_CELL})?|\$?[A-Za-z]{{1,3}}:\$?[A-Za-z]{{1,3}}|\$?\d+:\$?\d+)(?![\w.(]))
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<name>{_NAME})
+  | (?P<operator><>|<=|>=|[-+*/^&=<>%(),])
+''', re.VERBOSE)
+
+_COMPARISONS = ("=", "<>", "<", ">", "<=", ">=")
+# Binary operators from the loosest to the tightest binding
+_PRECEDENCE = [_COMPARISONS, ("&",), ("+", "-"), ("*", "/"), ("^",)]
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise FormulaSyntaxError(f"Unexpected {text[position:position + 10]!r} in {text!r}")
+        if match.lastgroup != "space":
+            tokens.append((match.lastgroup, match.group()))
+        position = match.end()
+    return tokens
+
+
+# "A1", "$B$4:$B$14", "C:C" or "3:5" as (min_row, min_col, max_row, max_col); None stands for "to the end of the sheet"
+def _parse_ref(text):
+    text = text.replace("$", "")
+    first, _, last = text.partition(":")
+    last = last or first
+    if first.isdigit():
+        return int(first), 1, int(last), None
+    if first.isalpha():
+        return 1, column_index_from_string(first.upper()), None, column_index_from_string(last.upper())
+    min_col, min_row, max_col, max_row = range_boundaries(f"{first}:{last}".upper())
+    return min_row, min_col, max_row, max_col
+
+
+# Recursive descent parser; the tree is made of tuples such as ("call", "MAX", [("ref", None, 4, 2, 14, 2)])
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        kind, text = self.peek()
+        if kind is None or (value is not None and text != value):
+            raise FormulaSyntaxError(f"Expected {value or 'more'} in {self.text!r}")
+        self.position += 1
+        return kind, text
+
+    def parse(self):
+        tree = self.expression()
+        if self.position != len(self.tokens):
+            raise FormulaSyntaxError(f"Unexpected {self.peek()[1]!r} in {self.text!r}")
+        return tree
+
+    def expression(self, level=0):
+        if level == len(_PRECEDENCE):
+            return self.unary()
+        tree = self.expression(level + 1)
+        while self.peek()[0] == "operator" and self.peek()[1] in _PRECEDENCE[level]:
+            operator = self.take()[1]
+            tree = ("op", operator, tree, self.expression(level + 1))
+        return tree
+
+    def unary(self):
+        if self.peek() in (("operator", "-"), ("operator", "+")):
+            sign = self.take()[1]
+            operand = self.unary()
+            return ("neg", operand) if sign == "-" else operand
+        tree = self.primary()
+        while self.peek() == ("operator", "%"):
+            self.take()
+            tree = ("percent", tree)
+        return tree
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "number":
+            return ("number", float(text) if any(c in text for c in ".eE") else int(text))
+        if kind == "string":
+            return ("string", text[1:-1].replace('""', '"'))
+        if kind == "error":
+            return ("error", text)
+        if kind == "range":
+            return ("ref", None, *_parse_ref(text))
+        if kind == "sheet":
+            sheet = text[:-1]
+            if sheet.startswith("'"):
+                sheet = sheet[1:-1].replace("''", "'")
+            kind, text = self.take()
+            if kind != "range":
+                raise _Unsupported(f"{sheet}!{text}")
+            return ("ref", sheet, *_parse_ref(text))
+        if kind == "table":
+            name, _, spec = text.partition("[")
+            return ("table", name or None, spec[:-1])
+        if kind == "function":
+            return self.call(text)
+        if kind == "name":
+            if text.upper() in ("TRUE", "FALSE"):
+                return ("bool", text.upper() == "TRUE")
+            return ("name", text)
+        if text == "(":
+            tree = self.expression()
+            self.take(")")
+            return tree
+        raise FormulaSyntaxError(f"Unexpected {text!r} in {self.text!r}")
+
+    def call(self, name):
+        # Functions newer than Excel 2007 are stored as _xlfn.XLOOKUP, _xlfn._xlws.SORT, ...
+        name = re.sub(r"^(?:_xlfn\.)?(?:_xlws\.)?", "", name).upper()
+        self.take("(")
+        args = []
+        if self.peek() == ("operator", ")"):
+            self.take()
+            return ("call", name, args)
+        while True:
+            if self.peek() in (("operator", ","), ("operator", ")")):
+                args.append(("missing",))
+            else:
+                args.append(self.expression())
+            if self.take()[1] == ")":
+                return ("call", name, args)
+
+
+'''
+Parse formula text ("=AVERAGE(B4:B14)", with or without the "=") into a tree of tuples:
+    ("number", 1.5) ("string", "x") ("bool", True) ("error", "#N/A") ("missing",)
+    ("ref", sheet or None, min_row, min_col, max_row, max_col)   max_row/max_col None for whole columns/rows
+    ("table", table name or None, "[#Data],[Time]") ("name", "EmployeeInfo")
+    ("call", "XLOOKUP", [args]) ("op", "+", left, right) ("neg", operand) ("percent", operand)
+Trees are cached by formula text (formulas repeat across a sheet and across a cohort).
+'''
+@lru_cache(maxsize=8192)
+def parse_formula(text):
+    try:
+        return _Parser(text[1:] if text.startswith("=") else text).parse()
+    except _Unsupported as e:
+        raise FormulaSyntaxError(f"Unsupported reference {e} in {text!r}") from None
+
+
+_LITERALS = re.compile(r'''("(?:[^"]|"")*"|'(?:[^']|'')*'|\[[^\[\]]*\])''')
+
+'''
+Formula text that the usual variants of one formula share: upper case, no "$", no _xlfn. prefixes and no
+spaces around operators and separators; text in double quotes is kept as it is. E.g.
+    "= average( $B$4:$B$14 )", "=_xlfn.AVERAGE(B4:B14)"  ->  "=AVERAGE(B4:B14)"
+'''
+@lru_cache(maxsize=8192)
+def normalize_formula(text):
+    parts = _LITERALS.split(text.strip())
+    for index, part in enumerate(parts):
+        if index % 2:
+            # Text stays as typed, sheet names in quotes and table/column names only ignore case
+            parts[index] = part if part.startswith('"') else part.upper()
+        else:
+            part = re.sub(r"_XLFN\.|_XLWS\.", "", part.upper().replace("$", ""))
+            parts[index] = re.sub(r"\s*([-+*/^&=<>%(),:!])\s*", r"\1", part)
+    return "=" + "".join(parts).strip().lstrip("=")
+
+
+# The references (ref, table and name nodes) a formula tree contains
+def references(tree):
+    if tree[0] in ("ref", "table", "name"):
+        yield tree
+    elif tree[0] == "call":
+        for arg in tree[2]:
+            yield from references(arg)
+    elif tree[0] == "op":
+        yield from references(tree[2])
+        yield from references(tree[3])
+    elif tree[0] in ("neg", "percent"):
+        yield from references(tree[1])
+
+
+# ---- Values ----
+# A value is a scalar (None for an empty cell, int/float, str, bool, FormulaError) or an array: a list of rows
+
+def _check(value):
+    if isinstance(value, FormulaError):
+        raise _Error(value)
+    return value
+
+
+def _number(value):
+    _check(value)
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, (datetime, date, time, timedelta)):
+        return to_excel(value)
+    try:
+        number = float(value)
+    except ValueError:
+        raise _Error(VALUE) from None
+    return int(number) if number.is_integer() and "." not in value and "e" not in value.lower() else number
+
+
+def _text(value):
+    _check(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (datetime, date, time, timedelta)):
+        value = to_excel(value)
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() and abs(value) < 1e15 else format(value, ".15g")
+    return str(value)
+
+
+def _scalar(value):
+    if value is _MISSING:
+        return None
+    # A range where one value is expected: its top-left value (what Excel shows in the formula's cell)
+    while isinstance(value, list):
+        value = value[0][0] if value and value[0] else None
+    return value
+
+
+def _as_array(value):
+    return value if isinstance(value, list) else [[value]]
+
+
+def _vector(value):
+    rows = _as_array(value)
+    if len(rows) == 1:
+        return list(rows[0])
+    if all(len(row) == 1 for row in rows):
+        return [row[0] for row in rows]
+    raise _Error(NA)
+
+
+def _flatten(value):
+    for row in _as_array(value):
+        yield from row
+
+
+def _attempt(function, *args):
+    try:
+        return function(*args)
+    except _Error as e:
+        return e.code
+
+
+# Apply a function of one value to every value of an array
+def _elementwise(function, value):
+    if isinstance(value, list):
+        return [[_attempt(function, item) for item in row] for row in value]
+    return function(value)
+
+
+# Excel's ordering: numbers < text < booleans, text compared without case; empty cells are 0, "" or FALSE
+def _compare(a, b):
+    a, b = _check(a), _check(b)
+    if a is None:
+        a = "" if isinstance(b, str) else False if isinstance(b, bool) else 0
+    if b is None:
+        b = "" if isinstance(a, str) else False if isinstance(a, bool) else 0
+    if isinstance(a, (datetime, date, time, timedelta)):
+        a = to_excel(a)
+    if isinstance(b, (datetime, date, time, timedelta)):
+        b = to_excel(b)
+    rank_a, rank_b = (2 if isinstance(v, bool) else 1 if isinstance(v, str) else 0 for v in (a, b))
+    if rank_a != rank_b:
+        return (rank_a > rank_b) - (rank_a < rank_b)
+    if rank_a == 1:
+        a, b = a.lower(), b.lower()
+    return (a > b) - (a < b)
+
+
+def _divide(a, b):
+    a, b = _number(a), _number(b)
+    if b == 0:
+        raise _Error(DIV0)
+    return a / b
+
+
+def _power(a, b):
+    try:
+        result = _number(a) ** _number(b)
+    except ZeroDivisionError:
+        raise _Error(DIV0) from None
+    except OverflowError:
+        raise _Error(NUM) from None
+    if isinstance(result, complex):
+        raise _Error(NUM)
+    return result
+
+
+_OPERATORS = {
+    "+": lambda a, b: _number(a) + _number(b),
+    "-": lambda a, b: _number(a) - _number(b),
+    "*": lambda a, b: _number(a) * _number(b),
+    "/": _divide,
+    "^": _power,
+    "&": lambda a, b: _text(a) + _text(b),
+    "=": lambda a, b: _compare(a, b) == 0,
+    "<>": lambda a, b: _compare(a, b) != 0,
+    "<": lambda a, b: _compare(a, b) < 0,
+    ">": lambda a, b: _compare(a, b) > 0,
+    "<=": lambda a, b: _compare(a, b) <= 0,
+    ">=": lambda a, b: _compare(a, b) >= 0,
+}
+
+
+# A binary operator; with an array on either side it applies to every value (a single row/column is repeated)
+def _binary(operator, a, b):
+    apply = _OPERATORS[operator]
+    if not isinstance(a, list) and not isinstance(b, list):
+        return apply(a, b)
+    a, b = _as_array(a), _as_array(b)
+    height, width = max(len(a), len(b)), max(len(a[0]), len(b[0]))
+
+    def at(rows, row, column):
+        row = 0 if len(rows) == 1 else row
+        column = 0 if len(rows[0]) == 1 else column
+        return rows[row][column] if row < len(rows) and column < len(rows[0]) else NA
+
+    return [[_attempt(apply, at(a, row, column), at(b, row, column)) for column in range(width)] for row in range(height)]
+
+
+# ---- Functions ----
+
+# The numbers SUM/AVERAGE/MAX/MIN use: numbers in ranges and arrays (text, booleans and empty cells are
+# skipped), and every direct argument that can be read as a number
+def _numbers(args):
+    for arg in args:
+        if arg is _MISSING:
+            continue
+        if isinstance(arg, list):
+            for value in _flatten(arg):
+                _check(value)
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield value
+                elif isinstance(value, (datetime, date, time, timedelta)):
+                    yield to_excel(value)
+        else:
+            yield _number(arg)
+
+
+def _sum(*args):
+    return sum(_numbers(args))
+
+
+def _average(*args):
+    numbers = list(_numbers(args))
+    if not numbers:
+        raise _Error(DIV0)
+    return sum(numbers) / len(numbers)
+
+
+def _max(*args):
+    return max(_numbers(args), default=0)
+
+
+def _min(*args):
+    return min(_numbers(args), default=0)
+
+
+def _count(*args):
+    count = 0
+    for arg in args:
+        for value in (_flatten(arg) if isinstance(arg, list) else [arg]):
+            if isinstance(value, (int, float, datetime, date, time, timedelta)) and not isinstance(value, bool):
+                count += 1
+    return count
+
+
+def _counta(*args):
+    return sum(1 for arg in args if arg is not _MISSING for value in _flatten(arg) if value is not None)
+
+
+def _wildcard(pattern):
+    # * and ? match anything / one character, ~ escapes them
+    parts = re.findall(r"~.|\*|\?|[^~*?]+|~", pattern)
+    regex = "".join(".*" if part == "*" else "." if part == "?" else re.escape(part[1:] if part.startswith("~") and len(part) == 2 else part)
+                    for part in parts)
+    return re.compile(regex, re.IGNORECASE | re.DOTALL)
+
+
+# Equality as lookups use it: text without case (with wildcards when asked), numbers by value, never across types
+def _matches(value, lookup, wildcards=False):
+    if isinstance(lookup, str):
+        if not isinstance(value, str):
+            return False
+        if wildcards and any(c in lookup for c in "*?"):
+            return _wildcard(lookup).fullmatch(value) is not None
+        return value.lower() == lookup.lower()
+    if isinstance(lookup, bool) or isinstance(value, bool):
+        return value is lookup
+    if isinstance(value, (int, float)) and isinstance(lookup, (int, float)):
+        return value == lookup
+    return value == lookup
+
+
+def _countif(cells, criterion):
+    criterion = _check(_scalar(criterion))
+    operator, operand = "=", criterion
+    if isinstance(criterion, str):
+        operator, operand = re.match(r"(<=|>=|<>|<|>|=)?(.*)", criterion, re.DOTALL).groups()
+        operator = operator or "="
+        try:
+            operand = _number(operand) if operand.strip() else operand
+        except _Error:
+            pass
+        if operand == "" or operand is None:
+            test = (lambda value: value is None or value == "") if operator == "=" else (lambda value: value not in (None, ""))
+            return sum(1 for value in _flatten(cells) if test(value))
+
+    def test(value):
+        if value is None or isinstance(value, FormulaError):
+            return operator == "<>"
+        if operator in ("=", "<>"):
+            return _matches(value, operand, wildcards=True) == (operator == "=")
+        if isinstance(operand, str) != isinstance(value, str) or isinstance(value, bool):
+            return False
+        return _OPERATORS[operator](value, operand)
+
+    return sum(1 for value in _flatten(cells) if test(value))
+
+
+def _len(value):
+    return _elementwise(lambda item: len(_text(item)), value)
+
+
+def _upper(value):
+    return _elementwise(lambda item: _text(item).upper(), value)
+
+
+def _lower(value):
+    return _elementwise(lambda item: _text(item).lower(), value)
+
+
+def _index(array, row, column=_MISSING):
+    rows = _as_array(array)
+    row = int(_number(_scalar(row)))
+    if column is _MISSING:
+        # INDEX(A1:E1, 3) is the third column of a single row
+        if len(rows) == 1 and len(rows[0]) > 1:
+            row, column = 1, row
+        else:
+            column = 1 if len(rows[0]) == 1 else 0
+    else:
+        column = int(_number(_scalar(column)))
+    if not (0 <= row <= len(rows) and 0 <= column <= len(rows[0])):
+        raise _Error(REF)
+    if row == 0 and column == 0:
+        return rows
+    if row == 0:
+        return [[values[column - 1]] for values in rows]
+    if column == 0:
+        return [rows[row - 1]]
+    return rows[row - 1][column - 1]
+
+
+def _match(lookup, array, match_type=1):
+    lookup = _check(_scalar(lookup))
+    values = _vector(array)
+    match_type = 1 if match_type is _MISSING else _number(_scalar(match_type))
+    if match_type == 0:
+        for position, value in enumerate(values, 1):
+            if _matches(value, lookup, wildcards=True):
+                return position
+        raise _Error(NA)
+
+    # Sorted lookups (1: ascending, -1: descending) return the last value not past the lookup value
+    found = None
+    for position, value in enumerate(values, 1):
+        if value is None or isinstance(value, FormulaError) or isinstance(value, str) != isinstance(lookup, str):
+            continue
+        order = _compare(value, lookup)
+        if order == 0 or (order < 0) == (match_type > 0):
+            found = position
+        else:
+            break
+    if found is None:
+        raise _Error(NA)
+    return found
+
+
+def _xlookup(lookup, lookup_array, return_array, if_not_found=_MISSING, match_mode=0, search_mode=1):
+    lookup = _check(_scalar(lookup))
+    lookup_rows = _as_array(lookup_array)
+    vertical = len(lookup_rows[0]) == 1
+    values = _vector(lookup_rows)
+    match_mode = 0 if match_mode is _MISSING else _number(_scalar(match_mode))
+    search_mode = 1 if search_mode is _MISSING else _number(_scalar(search_mode))
+    positions = range(len(values)) if search_mode > 0 else range(len(values) - 1, -1, -1)
+
+    found = None
+    for position in positions:
+        if _matches(values[position], lookup, wildcards=match_mode == 2):
+            found = position
+            break
+    if found is None and match_mode in (-1, 1):
+        # Exact match or the next smaller (-1) / larger (1) value
+        best = None
+        for position in positions:
+            value = values[position]
+            if value is None or isinstance(value, FormulaError) or isinstance(value, str) != isinstance(lookup, str):
+                continue
+            if _compare(value, lookup) == match_mode and (best is None or _compare(value, values[best]) == -match_mode):
+                best = position
+        found = best
+    if found is None:
+        if if_not_found is not _MISSING:
+            return if_not_found
+        raise _Error(NA)
+
+    returns = _as_array(return_array)
+    if vertical:
+        if len(returns) != len(values):
+            raise _Error(VALUE)
+        row = returns[found]
+        return row[0] if len(row) == 1 else [row]
+    if len(returns[0]) != len(values):
+        raise _Error(VALUE)
+    column = [[row[found]] for row in returns]
+    return column[0][0] if len(column) == 1 else column
+
+
+FUNCTIONS = {
+    "SUM": _sum, "AVERAGE": _average, "MAX": _max, "MIN": _min, "COUNT": _count, "COUNTA": _counta, "COUNTIF": _countif,
+    "LEN": _len, "UPPER": _upper, "LOWER": _lower, "INDEX": _index, "MATCH": _match, "XLOOKUP": _xlookup,
+}
+
+
+'''
+Computes formula cells of one workbook. `workbook` is an openpyxl workbook (or workbook_loader.LazyWorkbook)
+loaded with formulas, `cached_values` the cached results by sheet title and (row, column); a formula cell
+without an entry there (saved without a <v> element) is computed, every other cell is read as it is.
+'''
+class FormulaEvaluator:
+    def __init__(self, workbook, cached_values):
+        self.workbook = workbook
+        self.cached_values = cached_values
+        self.memo = {}  # (sheet title, row, column) -> computed value
+        self._sheet_titles = {name.lower(): name for name in workbook.sheetnames}
+        self._pending = {}  # sheet title -> formula cells without a cached value
+        self._tables = None
+        self._evaluating = set()
+
+    # Value of a cell, computing it (and the formula cells it depends on) if it is a formula without a cached value
+    def value(self, sheet_name, row, column):
+        ws = self._sheet(sheet_name)
+        if ws is None:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        key = (ws.title, row, column)
+        if key in self.memo:
+            return self.memo[key]
+        if (row, column) not in self._pending_cells(ws.title):
+            return self._cell_value(ws.title, row, column)
+        for node in self._evaluation_order(key):
+            if node not in self.memo:
+                self.memo[node] = self._compute(node)
+        return self.memo[key]
+
+    def _sheet(self, sheet_name):
+        title = self._sheet_titles.get(sheet_name.lower())
+        return None if title is None else self.workbook[title]
+
+    def _pending_cells(self, title):
+        if title not in self._pending:
+            ws = self.workbook[title]
+            cached_values = self.cached_values.get(title, {})
+            self._pending[title] = {
+                key for key, cell in getattr(ws, "_cells", {}).items()
+                if cell.data_type == 'f' and key not in cached_values
+            }
+        return self._pending[title]
+
+    def _cell_value(self, title, row, column):
+        cell = self.workbook[title]._cells.get((row, column))
+        if cell is None:
+            return None
+        if cell.data_type != 'f':
+            return FormulaError(cell.value) if cell.data_type == 'e' else cell.value
+        cached_values = self.cached_values.get(title, {})
+        if (row, column) not in cached_values:
+            return self.value(title, row, column)
+        value = cached_values[(row, column)]
+        return FormulaError(value) if value in ERROR_CODES else value
+
+    def _formula(self, key):
+        title, row, column = key
+        text = self.workbook[title]._cells[(row, column)].value
+        text = getattr(text, "text", text)  # Array formulas (ArrayFormula objects)
+        if not isinstance(text, str):
+            return None
+        try:
+            return parse_formula(text)
+        except FormulaSyntaxError:
+            return None
+
+    # The formula cells without a cached value that `key` depends on, then `key`: walked iteratively
+    # (a long chain of cells referring to the previous one would overflow the stack otherwise)
+    def _evaluation_order(self, key):
+        order, seen = [], {key}
+        stack = [(key, iter(self._precedents(key)))]
+        while stack:
+            node, precedents = stack[-1]
+            for precedent in precedents:
+                if precedent not in seen and precedent not in self.memo:
+                    seen.add(precedent)
+                    stack.append((precedent, iter(self._precedents(precedent))))
+                    break
+            else:
+                stack.pop()
+                order.append(node)
+        return order
+
+    def _precedents(self, key):
+        tree = self._formula(key)
+        if tree is None:
+            return
+        for reference in references(tree):
+            try:
+                title, min_row, min_col, max_row, max_col = self._resolve(reference, key)
+            except (_Error, _Unsupported):
+                continue
+            pending = self._pending_cells(title)
+            if (max_row - min_row + 1) * (max_col - min_col + 1) <= len(pending):
+                for row in range(min_row, max_row + 1):
+                    for column in range(min_col, max_col + 1):
+                        if (row, column) in pending:
+                            yield (title, row, column)
+            else:
+                for row, column in pending:
+                    if min_row <= row <= max_row and min_col <= column <= max_col:
+                        yield (title, row, column)
+
+    def _compute(self, key):
+        if key in self._evaluating:
+            raise _Circular(key)
+        tree = self._formula(key)
+        if tree is None:
+            return None
+        self._evaluating.add(key)
+        try:
+            value = _scalar(self._evaluate(tree, key))
+        except _Error as e:
+            return e.code
+        except _Circular:
+            return 0  # What Excel shows for a circular reference
+        except (_Unsupported, RecursionError):
+            return None
+        finally:
+            self._evaluating.discard(key)
+        if value is None:
+            return 0  # =A1 with A1 empty shows 0
+        return None if value == "" else value  # Cached empty text reads as None too
+
+    def _evaluate(self, tree, key):
+        kind = tree[0]
+        if kind in ("number", "string", "bool"):
+            return tree[1]
+        if kind == "error":
+            return FormulaError(tree[1])
+        if kind == "missing":
+            return _MISSING
+        if kind == "name":
+            return self._evaluate(self._defined_name(tree[1], key[0]), key)
+        if kind in ("ref", "table"):
+            title, min_row, min_col, max_row, max_col = self._resolve(tree, key)
+            return [[self._cell_value(title, row, column) for column in range(min_col, max_col + 1)]
+                    for row in range(min_row, max_row + 1)]
+        if kind == "neg":
+            return _elementwise(lambda value: -_number(value), self._evaluate(tree[1], key))
+        if kind == "percent":
+            return _elementwise(lambda value: _number(value) / 100, self._evaluate(tree[1], key))
+        if kind == "op":
+            return _binary(tree[1], self._evaluate(tree[2], key), self._evaluate(tree[3], key))
+        if kind == "call":
+            function = FUNCTIONS.get(tree[1])
+            if function is None:
+                raise _Unsupported(tree[1])
+            args = [self._evaluate(arg, key) for arg in tree[2]]
+            try:
+                return function(*args)
+            except TypeError:
+                raise _Error(VALUE) from None  # Wrong number of arguments
+        raise _Unsupported(kind)
+
+    # The range a reference (ref, table or name node) in the formula of cell `key` (sheet title, row, column) covers,
+    # as (sheet title, min_row, min_col, max_row, max_col); None when it does not resolve (e.g. an unknown table)
+    def resolve(self, reference, key):
+        try:
+            return self._resolve(reference, key)
+        except (_Error, _Unsupported):
+            return None
+
+    # The range a reference covers, as (sheet title, min_row, min_col, max_row, max_col)
+    def _resolve(self, reference, key):
+        kind = reference[0]
+        if kind == "name":
+            return self._resolve(self._defined_name(reference[1], key[0]), key)
+        if kind == "table":
+            return self._table_range(reference[1], reference[2], key)
+        if kind != "ref":
+            raise _Unsupported(kind)
+        _, sheet_name, min_row, min_col, max_row, max_col = reference
+        ws = self._sheet(sheet_name or key[0])
+        if ws is None:
+            raise _Error(REF)
+        return ws.title, min_row, min_col, max_row or ws.max_row, max_col or ws.max_column
+
+    def _defined_name(self, name, title):
+        for names in (self.workbook[title].defined_names, self.workbook.defined_names):
+            for defined, definition in names.items():
+                if defined.lower() == name.lower():
+                    try:
+                        return parse_formula(definition.value)
+                    except FormulaSyntaxError:
+                        raise _Unsupported(name) from None
+        raise _Error(NAME)
+
+    def _table_range(self, table_name, spec, key):
+        if self._tables is None:
+            self._tables = {}
+            for ws in self.workbook.worksheets:
+                for table in getattr(ws, "tables", {}).values():
+                    self._tables[table.displayName.lower()] = (ws.title, table)
+        if table_name is None:
+            # [@Column] inside a table refers to the table the formula is in
+            title, row, column = key
+            for table_title, table in self._tables.values():
+                min_col, min_row, max_col, max_row = range_boundaries(table.ref)
+                if table_title == title and min_row <= row <= max_row and min_col <= column <= max_col:
+                    break
+            else:
+                raise _Error(REF)
+        elif table_name.lower() in self._tables:
+            table_title, table = self._tables[table_name.lower()]
+        else:
+            raise _Error(REF)
+
+        min_col, min_row, max_col, max_row = range_boundaries(table.ref)
+        headers = 1 if table.headerRowCount is None else table.headerRowCount
+        totals = table.totalsRowCount or 0
+        spans = {
+            "#headers": (min_row, min_row) if headers else None,
+            "#data": (min_row + headers, max_row - totals),
+            "#totals": (max_row - totals + 1, max_row) if totals else None,
+            "#all": (min_row, max_row),
+        }
+
+        items = re.findall(r"\[((?:[^\]']|'.)*)\]", spec) or [spec.lstrip("@")]
+        this_row = spec.lstrip().startswith("@")
+        specials = [item.strip().lower() for item in items if item.strip().startswith("#")]
+        columns = [re.sub(r"'(.)", r"\1", item) for item in items if not item.strip().startswith("#") and item]
+        if "#this row" in specials:
+            specials.remove("#this row")
+            this_row = True
+
+        if this_row:
+            if not spans["#data"][0] <= key[1] <= spans["#data"][1]:
+                raise _Error(VALUE)
+            first_row = last_row = key[1]
+        else:
+            chosen = [spans.get(special) for special in specials or ["#data"]]
+            if any(span is None for span in chosen):
+                raise _Error(REF)
+            first_row, last_row = min(span[0] for span in chosen), max(span[1] for span in chosen)
+
+        first_col, last_col = min_col, max_col
+        if columns:
+            names = [column.name for column in table.tableColumns] or [
+                _text(self._cell_value(table_title, min_row, column)) for column in range(min_col, max_col + 1)]
+            positions = {name.lower(): index for index, name in enumerate(names)}
+            try:
+                first_col = min_col + positions[columns[0].lower()]
+                last_col = min_col + positions[columns[-1].lower()]
+            except KeyError:
+                raise _Error(REF) from None
+        return table_title, first_row, first_col, last_row, last_col
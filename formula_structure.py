@@ -0,0 +1,125 @@
+from formula_eval import FormulaSyntaxError, normalize_formula, parse_formula, references
+
+'''
+Formula structure checks: what a formula does, not only the value it gives.
+
+A typed in "Australia" (or "=69") gives the right value without doing the work. A structure lists what
+the formula of a cell has to contain, e.g. for the most expensive country:
+
+    {'calls': {'MAX': 'B4:B14'}, 'reads': ['A4:A14']}
+
+    functions  functions the formula must call; a tuple lists alternatives, e.g. ('INDEX', 'XLOOKUP')
+    calls      function -> range one of its calls must read anywhere in its arguments (so MAX(LEN(A4:A14))
+               reads A4:A14); None accepts any cells, but not constants only. A tuple of functions lists
+               alternatives, e.g. {('AVERAGE', 'SUM'): None}
+    reads      ranges the formula must read; a reference that covers the range counts (B:B covers B4:B14)
+    tables     tables the formula must use through a structured reference, e.g. Times[Time]
+
+Ranges without a sheet are on the sheet of the checked cell. Structured references (Coffee[Price]) and
+defined names count as the cells they stand for in the student's workbook, which the check gets as
+resolve(reference) (see rubric.py); without it they cover nothing.
+
+Formulas are parsed (formula_eval.parse_formula) and checked once per normalized formula text
+(formula_eval.normalize_formula) and the cells its structured references and names resolve to. Parse
+trees and verdicts are kept for as long as the process runs, so a cohort where most students typed the
+same few formulas costs one check per distinct formula.
+'''
+
+
+def _nodes(tree):
+    yield tree
+    if tree[0] == "call":
+        for arg in tree[2]:
+            yield from _nodes(arg)
+    elif tree[0] == "op":
+        yield from _nodes(tree[2])
+        yield from _nodes(tree[3])
+    elif tree[0] in ("neg", "percent"):
+        yield from _nodes(tree[1])
+
+
+def _target(ref):
+    tree = parse_formula(ref)
+    if tree[0] != "ref":
+        raise ValueError(f"Not a cell range: {ref}")
+    return tree
+
+
+# Whether a reference reads every cell of the target range (a ("ref", ...) node); table and name references
+# count as the range they were resolved to (`resolved`: reference -> ("ref", ...) node or None)
+def _covers(reference, target, sheet, resolved):
+    if reference[0] != "ref":
+        reference = resolved.get(reference)
+        if reference is None:
+            return False
+    _, reference_sheet, min_row, min_col, max_row, max_col = reference
+    _, target_sheet, target_min_row, target_min_col, target_max_row, target_max_col = target
+    if (reference_sheet or sheet or "").lower() != (target_sheet or sheet or "").lower():
+        return False
+    return (min_row <= target_min_row and min_col <= target_min_col
+            and (max_row is None or (target_max_row is not None and max_row >= target_max_row))
+            and (max_col is None or (target_max_col is not None and max_col >= target_max_col)))
+
+
+'''
+Compile a structure (see above) for cells on `sheet` (None for the active sheet). Returns check(formula_text,
+resolve=None), which gives None when the formula has the structure, otherwise what is missing (for the
+feedback). resolve(reference) gives the ("ref", sheet, min_row, min_col, max_row, max_col) node a table or
+name reference of the formula stands for, or None.
+'''
+def compile_structure(structure, sheet=None):
+    def alternatives(names):
+        return tuple(name.upper() for name in (names if isinstance(names, (tuple, list)) else [names]))
+
+    functions = [alternatives(names) for names in structure.get('functions', [])]
+    calls = [(alternatives(names), ref, _target(ref) if ref else None) for names, ref in structure.get('calls', {}).items()]
+    reads = [(ref, _target(ref)) for ref in structure.get('reads', [])]
+    tables = list(structure.get('tables', []))
+    trees = {}  # normalized formula text -> parse tree (None if this parser cannot read it)
+    verdicts = {}  # (normalized formula text, resolved references) -> None or the problem
+
+    def problem(tree, resolved):
+        called = [node for node in _nodes(tree) if node[0] == "call"]
+        names = {node[1] for node in called}
+        for alternatives in functions:
+            if not names.intersection(alternatives):
+                return f"the formula does not use {' or '.join(alternatives)}"
+
+        for called_names, ref, target in calls:
+            name = ' or '.join(called_names)
+            if not names.intersection(called_names):
+                return f"the formula does not use {name}"
+            read = [reference for node in called if node[1] in called_names for arg in node[2] for reference in references(arg)]
+            if target is None and not read:
+                return f"{name} is not applied to any cells"
+            if target is not None and not any(_covers(reference, target, sheet, resolved) for reference in read):
+                return f"{name} is not applied to {ref}"
+
+        read = list(references(tree))
+        for ref, target in reads:
+            if not any(_covers(reference, target, sheet, resolved) for reference in read):
+                return f"the formula does not use the cells {ref}"
+        for table in tables:
+            if not any(reference[0] == "table" and (reference[1] or "").lower() == table.lower() for reference in read):
+                return f"the formula does not refer to the {table} table"
+        return None
+
+    def check(formula, resolve=None):
+        text = normalize_formula(formula)
+        if text not in trees:
+            try:
+                trees[text] = parse_formula(text)
+            except FormulaSyntaxError:
+                trees[text] = None
+        tree = trees[text]
+        if tree is None:
+            return None  # Formulas this parser cannot read get the benefit of the doubt
+
+        indirect = dict.fromkeys(reference for reference in references(tree) if reference[0] != "ref")
+        resolved = {reference: resolve(reference) if resolve else None for reference in indirect}
+        key = (text, tuple(resolved.items()))
+        if key not in verdicts:
+            verdicts[key] = problem(tree, resolved)
+        return verdicts[key]
+
+    return check
@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+'''
+Grade history in SQLite: every run, every graded submission and each of its check outcomes, kept across
+runs and terms (the report of a run is overwritten by the next one).
+
+    runs            one row per grading run: when it started and finished, folder(s), challenge(s), label,
+                    grader version, whether it was cancelled
+    submissions     one row per student and challenge graded in a run: section (submission folder name),
+                    student, file hash, score, total points, percentage, error
+    check_outcomes  one row per check of a submission (see check_results.py): check id, earned, possible, code
+
+Submissions are indexed by student (all attempts of a student), by challenge, section and student (latest
+grade per student; folder names like student_1 repeat across sections) and by run; runs by start time. Ids
+only grow, so the highest submission id of a student is their latest attempt.
+
+Runs add submissions with add() while they grade; rows are buffered and written BATCH_SIZE submissions at
+a time in one transaction (executemany, WAL journal), so a run with thousands of students costs a handful
+of commits. A resumed run (batch_grader.py --resume) adds only the files it grades itself: the results it
+takes from the checkpoint journal were added by the interrupted run. From the command line:
+
+    python grade_history.py grades.sqlite --latest "Project 2: Marathon Participants"
+    python grade_history.py grades.sqlite --student student_17 [--challenge ...] [--checks]
+    python grade_history.py grades.sqlite --runs
+
+prints one JSON object per line ("grade", "attempt" or "run" events).
+'''
+
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    finished TEXT,
+    label TEXT,
+    folder TEXT,
+    challenge TEXT,
+    grader_version TEXT,
+    submissions INTEGER,
+    cancelled INTEGER
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    graded TEXT NOT NULL,
+    section TEXT,
+    student TEXT NOT NULL,
+    challenge TEXT NOT NULL,
+    file_hash TEXT,
+    score REAL,
+    total_points REAL,
+    percentage REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS check_outcomes (
+    submission_id INTEGER NOT NULL REFERENCES submissions(id),
+    check_id TEXT NOT NULL,
+    earned REAL,
+    possible REAL,
+    code TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started);
+CREATE INDEX IF NOT EXISTS submissions_student ON submissions(student, id);
+DROP INDEX IF EXISTS submissions_challenge_student;
+CREATE INDEX IF NOT EXISTS submissions_challenge_section_student ON submissions(challenge, section, student, id);
+CREATE INDEX IF NOT EXISTS submissions_run ON submissions(run_id);
+CREATE INDEX IF NOT EXISTS check_outcomes_submission ON check_outcomes(submission_id);
+"""
+
+_SUBMISSION_COLUMNS = ["id", "run_id", "graded", "section", "student", "challenge", "file_hash", "score",
+                       "total_points", "percentage", "error"]
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class GradeHistory:
+    def __init__(self, path, batch_size=BATCH_SIZE):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        # Transactions are managed here (BEGIN IMMEDIATE ... COMMIT), not by the sqlite3 module
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self.pending = []  # (run id, graded, section, student, challenge, file hash, result) not written yet
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Register a run, returns its id (for add() and finish_run())
+    def start_run(self, folder=None, challenge=None, label=None, grader_version=None):
+        cursor = self.connection.execute(
+            "INSERT INTO runs (started, label, folder, challenge, grader_version) VALUES (?, ?, ?, ?, ?)",
+            (_now(), label, folder, challenge, grader_version)
+        )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, submissions, cancelled=False):
+        self.flush()
+        self.connection.execute("UPDATE runs SET finished = ?, submissions = ?, cancelled = ? WHERE id = ?",
+                                (_now(), submissions, int(cancelled), run_id))
+
+    # Buffer one student's result (as returned by grading_runner.grade_file); written once BATCH_SIZE are buffered
+    def add(self, run_id, section, student, challenge, result, file_hash=None):
+        self.pending.append((run_id, _now(), section, student, challenge, file_hash, result))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    # Write the buffered submissions and their check outcomes in one transaction
+    def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")  # Takes the write lock, so the ids below stay ours
+        try:
+            next_id = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM submissions").fetchone()[0]
+            submissions = []
+            outcomes = []
+            for submission_id, (run_id, graded, section, student, challenge, file_hash, result) in enumerate(pending, next_id):
+                total_points = result.get("total_points", 0)
+                if "error" in result:
+                    score, percentage, error = 0, 0, result["error"]
+                else:
+                    score = result["score"]
+                    percentage = round((score / total_points) * 100, 2) if total_points > 0 else 0
+                    error = None
+                submissions.append((submission_id, run_id, graded, section, student, challenge, file_hash,
+                                    score, total_points, percentage, error))
+                outcomes.extend((submission_id, check_id, earned, possible, code)
+                                for check_id, earned, possible, code in result.get("checks") or ())
+            connection.executemany(f"INSERT INTO submissions VALUES ({', '.join('?' * len(_SUBMISSION_COLUMNS))})", submissions)
+            connection.executemany("INSERT INTO check_outcomes VALUES (?, ?, ?, ?, ?)", outcomes)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _submissions(self, query, parameters, with_checks):
+        self.flush()
+        rows = [dict(zip(_SUBMISSION_COLUMNS, row)) for row in self.connection.execute(query, parameters)]
+        if with_checks:
+            for row in rows:
+                row["checks"] = [list(outcome) for outcome in self.connection.execute(
+                    "SELECT check_id, earned, possible, code FROM check_outcomes WHERE submission_id = ? ORDER BY rowid",
+                    (row["id"],)
+                )]
+        return rows
+
+    # The most recent submission of every student (of every section) for a challenge, by section and student
+    def latest_grades(self, challenge, with_checks=False):
+        return self._submissions(
+            f"SELECT {', '.join('s.' + column for column in _SUBMISSION_COLUMNS)} FROM submissions s "
+            "JOIN (SELECT MAX(id) AS id FROM submissions WHERE challenge = ? GROUP BY section, student) latest "
+            "ON s.id = latest.id ORDER BY s.section, s.student",
+            (challenge,), with_checks
+        )
+
+    # Every submission of a student (for one challenge, if given), oldest first
+    def attempts(self, student, challenge=None, with_checks=False):
+        if challenge is None:
+            query = "WHERE student = ?"
+            parameters = (student,)
+        else:
+            query = "WHERE challenge = ? AND student = ?"
+            parameters = (challenge, student)
+        return self._submissions(f"SELECT {', '.join(_SUBMISSION_COLUMNS)} FROM submissions {query} ORDER BY id",
+                                 parameters, with_checks)
+
+    # Runs, newest first
+    def runs(self, limit=None):
+        self.flush()
+        cursor = self.connection.execute(
+            "SELECT id, started, finished, label, folder, challenge, grader_version, submissions, cancelled "
+            "FROM runs ORDER BY started DESC, id DESC" + (" LIMIT ?" if limit else ""), (limit,) if limit else ()
+        )
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Query the grade history (batch_grader.py --history).")
+    parser.add_argument("database", help="SQLite file of the grade history")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--latest", metavar="CHALLENGE", help="Latest grade of every student for this challenge")
+    query.add_argument("--student", help="Every attempt of this student")
+    query.add_argument("--runs", action="store_true", help="Every run, newest first")
+    parser.add_argument("--challenge", help="With --student, only attempts at this challenge")
+    parser.add_argument("--checks", action="store_true", help="Include each submission's check outcomes")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.database):
+        print(json.dumps({"event": "failed", "message": f"Grade history not found: {args.database}"}), flush=True)
+        return 2
+
+    def emit(event, **fields):
+        print(json.dumps({"event": event, **fields}), flush=True)
+
+    with GradeHistory(args.database) as history:
+        if args.runs:
+            for run in history.runs():
+                emit("run", **run)
+        elif args.latest:
+            for grade in history.latest_grades(args.latest, args.checks):
+                emit("grade", **grade)
+        else:
+            for attempt in history.attempts(args.student, args.challenge, args.checks):
+                emit("attempt", **attempt)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
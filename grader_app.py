@@ -0,0 +1,425 @@
+import os
+import customtkinter as ctk
+from tkinter import filedialog, messagebox
+import threading
+import subprocess
+
+from grading_runner import RESULT_CACHE_DIR, SIMILARITY_INDEX_PATH, process_submissions
+from resource_limits import DEFAULT_LIMITS, DEFAULT_MAX_TASKS_PER_CHILD
+
+# Set the appearance mode and color theme of tkinter window
+ctk.set_appearance_mode("light")
+ctk.set_default_color_theme("blue")
+
+'''
+Main Class that holds the custom Tkinter window.
+
+Users are able to:
+1. Select a folder containing student submissions,
+2. Choose a grading challenge (labled as projects or skills)
+3. Select an output forlder for the grading results
+4. Start the grading process, calling the above functions1
+5. View the progress bar, indicating completion percentage
+6. Cancel grading (keeping a partial report) and resume it later
+7. Open the grading report right from the application
+'''
+class ExcelGraderApp(ctk.CTk):
+    def __init__(self):
+        super().__init__()
+
+        # Configure window
+        self.title("Excel Grader")
+        self.geometry("600x980")
+        self.configure(fg_color="#F0F0F0")  # Light gray background
+
+        # Main container
+        self.main_frame = ctk.CTkFrame(
+            self, 
+            corner_radius=20, 
+            fg_color="white", 
+            bg_color="#F0F0F0"
+        )
+        self.main_frame.pack(pady=20, padx=20, fill="both", expand=True)
+
+        # Title 
+        self.title_label = ctk.CTkLabel(
+            self.main_frame, 
+            text="Excel Grader", 
+            font=("San Francisco", 32, "bold"),
+            text_color="#333333"
+        )
+        self.title_label.pack(pady=(30, 20))
+        
+        # Progress Bar
+        self.progress_bar = ctk.CTkProgressBar(
+            self.main_frame, 
+            width=500, 
+            height=20,
+            corner_radius=10,
+            fg_color="#F0F0F0",  # Light gray bar background
+            progress_color="#007AFF"  # Bright blue progress
+        )
+        self.progress_bar.pack(pady=(10, 20))
+        self.progress_bar.set(0)  # Initial state
+
+        # Submission Folder Section
+        self.create_folder_section(
+            "Student Submissions", 
+            self.select_submissions_folder
+        )
+
+        # Challenge Selection Section
+        self.challenge_label = ctk.CTkLabel(
+            self.main_frame, 
+            text="Select Challenge", 
+            font=("San Francisco", 16),
+            text_color="#666666"
+        )
+        self.challenge_label.pack(anchor="w", padx=40, pady=(20, 5))
+
+        self.challenges = [
+            "Project 1: Cafe Bloom",
+            "Project 2: Marathon Participants",
+            "Skill: Import data into workbooks", 
+            "Skill: Navigate within workbooks", 
+            "Skill: Format worksheets and workbooks"
+        ]
+
+        # Creates dropdown list for users to select challenge
+        self.challenge_combobox = ctk.CTkComboBox(
+            self.main_frame, 
+            values=self.challenges,
+            width=400,
+            height=40,
+            border_width=1,
+            border_color="#CCCCCC",
+            dropdown_hover_color="#E0E0E0",
+            button_hover_color="#E0E0E0",
+            font=("San Francisco", 14)
+        )
+        self.challenge_combobox.pack(pady=10)
+
+        # Worker Process Selection Section (how many submissions are graded at the same time)
+        self.workers_label = ctk.CTkLabel(
+            self.main_frame, 
+            text="Worker Processes", 
+            font=("San Francisco", 16),
+            text_color="#666666"
+        )
+        self.workers_label.pack(anchor="w", padx=40, pady=(20, 5))
+
+        worker_options = [str(count) for count in range(1, (os.cpu_count() or 1) + 1)]
+        self.workers_combobox = ctk.CTkComboBox(
+            self.main_frame, 
+            values=worker_options,
+            width=400,
+            height=40,
+            border_width=1,
+            border_color="#CCCCCC",
+            dropdown_hover_color="#E0E0E0",
+            button_hover_color="#E0E0E0",
+            font=("San Francisco", 14)
+        )
+        self.workers_combobox.set(worker_options[-1])  # Default to one worker per CPU core
+        self.workers_combobox.pack(pady=10)
+
+        # Reuse results for files that were already graded (e.g. regrading after a deadline extension)
+        self.use_cache_checkbox = ctk.CTkCheckBox(
+            self.main_frame, 
+            text="Reuse results for unchanged submissions",
+            font=("San Francisco", 14),
+            text_color="#666666"
+        )
+        self.use_cache_checkbox.select()
+        self.use_cache_checkbox.pack(anchor="w", padx=100, pady=(10, 0))
+
+        # Compare submissions with each other (and with earlier sections) for near-duplicates
+        self.similarity_checkbox = ctk.CTkCheckBox(
+            self.main_frame, 
+            text="Flag suspiciously similar submissions",
+            font=("San Francisco", 14),
+            text_color="#666666"
+        )
+        self.similarity_checkbox.pack(anchor="w", padx=100, pady=(10, 0))
+
+        # Continue a cancelled or interrupted run in the same output folder instead of starting over
+        self.resume_checkbox = ctk.CTkCheckBox(
+            self.main_frame, 
+            text="Resume an interrupted run",
+            font=("San Francisco", 14),
+            text_color="#666666"
+        )
+        self.resume_checkbox.pack(anchor="w", padx=100, pady=(10, 0))
+
+        # Output Folder Section
+        self.create_folder_section(
+            "Output Location", 
+            self.select_output_folder
+        )
+
+        # Start Grading Button
+        self.start_button = ctk.CTkButton(
+            self.main_frame, 
+            text="Start Grading", 
+            command=self.start_grading,
+            width=400,
+            height=50,
+            corner_radius=25,
+            font=("San Francisco", 16, "bold"),
+            fg_color="#007AFF",  # Blue
+            hover_color="#0056b3"
+        )
+        self.start_button.pack(pady=(30, 10))
+
+        # Cancel Button (only enabled while grading)
+        self.cancel_button = ctk.CTkButton(
+            self.main_frame, 
+            text="Cancel", 
+            command=self.cancel_grading,
+            width=400,
+            height=40,
+            corner_radius=25,
+            font=("San Francisco", 14),
+            fg_color="#F2F2F7",  # Light gray
+            text_color="#007AFF",   # Blue
+            hover_color="#E0E0E5",
+            state="disabled"
+        )
+        self.cancel_button.pack(pady=(0, 10))
+        
+        # Status Label
+        self.status_label = ctk.CTkLabel(
+            self.main_frame, 
+            text="", 
+            font=("San Francisco", 14),
+            text_color="#A0A0A0"
+        )
+        self.status_label.pack(pady=(10, 20))
+
+        # State variables initial state (keeps track of user selcections)
+        self.submissions_folder = None
+        self.output_folder = None
+        self.cancel_event = None  # Set to stop the running grading thread
+
+    def create_folder_section(self, label_text, browse_command):
+        # Label
+        label = ctk.CTkLabel(
+            self.main_frame, 
+            text=label_text, 
+            font=("San Francisco", 16),
+            text_color="#666666"
+        )
+        label.pack(anchor="w", padx=40, pady=(20, 5))
+
+        # Container for entry and button
+        container = ctk.CTkFrame(
+            self.main_frame, 
+            fg_color="transparent"
+        )
+        container.pack(pady=10)
+
+        # Entry field
+        entry = ctk.CTkEntry(
+            container, 
+            width=330,
+            height=40,
+            placeholder_text=f"Select {label_text.lower()}",
+            border_width=1,
+            border_color="#CCCCCC",
+            font=("San Francisco", 14)
+        )
+        entry.pack(side="left", padx=(0, 10))
+
+        # Browse button
+        browse_btn = ctk.CTkButton(
+            container, 
+            text="Browse", 
+            command=lambda: self.browse_folder(entry, browse_command),
+            width=60,
+            height=40,
+            corner_radius=10,
+            fg_color="#F2F2F7",  # Very light gray
+            text_color="#007AFF",  # Blue
+            hover_color="#E0E0E5"
+        )
+        browse_btn.pack(side="right")
+
+        # Store references for later use
+        if label_text == "Student Submissions":
+            self.submissions_entry = entry
+        else:
+            self.output_entry = entry
+ 
+    def browse_folder(self, entry_widget, selection_method):
+        selection_method()
+        entry_widget.configure(state="normal")
+        entry_widget.delete(0, "end")
+        entry_widget.insert(0, self.submissions_folder if "submissions" in entry_widget.cget("placeholder_text").lower() else self.output_folder)
+        entry_widget.configure(state="disabled")
+
+    #Updates the widget to show the users selection
+    def select_submissions_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.submissions_folder = folder
+            self.submissions_entry.configure(state="normal")
+            self.submissions_entry.delete(0, "end")
+            self.submissions_entry.insert(0, folder)
+            self.submissions_entry.configure(state="readonly")
+
+    # Updates the widget to show the users selection
+    def select_output_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.output_folder = folder
+            self.output_entry.configure(state="normal")
+            self.output_entry.delete(0, "end")
+            self.output_entry.insert(0, folder)
+            self.output_entry.configure(state="readonly")
+
+    # If all inputs are present, start the grading process
+    def start_grading(self):
+        if not self.submissions_folder or not self.output_folder or not self.challenge_combobox.get():
+            messagebox.showwarning("Input Error", "Please select all required inputs.")
+            return
+
+        try:
+            max_workers = max(1, int(self.workers_combobox.get()))
+        except ValueError:
+            messagebox.showwarning("Input Error", "Worker processes must be a whole number.")
+            return
+
+        # Disable start button during grading (Needed to prevent users from double calling)
+        self.start_button.configure(state="disabled")
+        self.cancel_event = threading.Event()
+        self.cancel_button.configure(state="normal")
+    
+        self.progress_bar.set(0)
+        self.status_label.configure(text="Grading in progress...")
+
+        # Updates the top progress bar (just aesthetic)
+        def progress_update(value):
+            self.progress_bar.set(value / 100)
+
+        # Says how long grading will roughly take, and how many files cannot be graded at all (see preflight.py)
+        def preflight_done(preflight):
+            rejected = preflight["corrupt"] + preflight["encrypted"] + preflight["wrong_format"]
+            message = f"Grading {preflight['submissions'] - rejected} submissions (about {preflight['estimated_seconds']:.0f} s)..."
+            if rejected:
+                message += f" {rejected} cannot be graded (corrupt, encrypted or not a workbook)."
+            self.status_label.configure(text=message)
+
+        # Resets the GUI back to the "standard" state
+        def grading_complete(success, message):
+            cancelled = self.cancel_event.is_set()
+            self.start_button.configure(state="normal")
+            self.cancel_button.configure(state="disabled")
+            if not cancelled:
+                self.progress_bar.set(1 if success else 0)  # A cancelled run keeps showing how far it got
+            self.status_label.configure(text=message)
+
+            if success or cancelled:
+                # Extract the full path of the generated report from the message
+                report_path = message.split(": ")[-1]
+
+                # Show custom completion dialog with the path to the report
+                self.show_completion_dialog(report_path, cancelled)
+
+        # Start grading in a separate thread (This prevents the GUI from freezing while grading)
+        threading.Thread(
+            target=process_submissions, 
+            args=(
+                self.submissions_folder, 
+                self.challenge_combobox.get(), 
+                self.output_folder,
+                progress_update,
+                grading_complete,
+                max_workers,
+                RESULT_CACHE_DIR if self.use_cache_checkbox.get() else None,
+                SIMILARITY_INDEX_PATH if self.similarity_checkbox.get() else None
+            ), 
+            kwargs={
+                "resume": bool(self.resume_checkbox.get()),
+                "cancel_event": self.cancel_event,
+                # A single pathological file must not stall the whole run (see resource_limits.py)
+                "resource_limits": DEFAULT_LIMITS,
+                "max_tasks_per_child": DEFAULT_MAX_TASKS_PER_CHILD,
+                "preflight_callback": preflight_done
+            },
+            daemon=True
+        ).start()
+
+    # Ask the running grading to stop; submissions already being graded finish and a partial report is saved
+    def cancel_grading(self):
+        if self.cancel_event:
+            self.cancel_event.set()
+            self.cancel_button.configure(state="disabled")
+            self.status_label.configure(text="Cancelling... waiting for submissions being graded")
+        
+    # Create a dialog for grading completion with Open report and Close buttons   
+    def show_completion_dialog(self, report_path, cancelled=False):
+        
+        # Creates a top-level window
+        dialog = ctk.CTkToplevel(self)
+        dialog.title("Grading Complete")
+        dialog.geometry("350x200")
+        dialog.resizable(False, False)
+        dialog.grab_set() # This makes the dialogue box modal (prevents the user from taking other action on main window)
+
+        # Success message label
+        message_label = ctk.CTkLabel(
+            dialog, 
+            text="Grading was cancelled." if cancelled else "Grading is complete!", 
+            font=("San Francisco", 18, "bold"),
+            text_color="#333333"
+        )
+        message_label.pack(pady=(30, 20))
+
+        # Button frame
+        button_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        button_frame.pack(pady=20)
+
+        # Open Report button
+        open_button = ctk.CTkButton(
+            button_frame, 
+            text="Open Report", 
+            command=lambda: self.open_excel_report(report_path, dialog),
+            width=120,
+            height=40,
+            corner_radius=25,
+            fg_color="#007AFF",  # Blue
+            hover_color="#0056b3"   #Slightly darker blue
+        )
+        open_button.pack(side="left", padx=10)
+
+        # Close button
+        close_button = ctk.CTkButton(
+            button_frame, 
+            text="Close", 
+            command=dialog.destroy,
+            width=120,
+            height=40,
+            corner_radius=25,
+            fg_color="#F2F2F7",  # Light gray
+            text_color="#007AFF",   # Blue
+            hover_color="#E0E0E5"   # Gray
+        )
+        close_button.pack(side="right", padx=10)
+        
+    # Open the Excel report 
+    def open_excel_report(self, file_path, parent_dialog=None):
+        try:
+            if os.name == 'nt':  # Windows
+                os.startfile(file_path)
+            # If user is using MacOS or Linux, (Remove if packaging as .exe)
+            elif os.name == 'posix':  # macOS and Linux
+                if subprocess.sys.platform == 'darwin':  # macOS
+                    subprocess.call(('open', file_path))
+                else:  # Linux
+                    subprocess.call(('xdg-open', file_path))
+                
+            # Close the parent dialog if provided
+            if parent_dialog:
+                parent_dialog.destroy()
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open the report: {str(e)}")
@@ -1,21 +1,57 @@
-import openpyxl
 import traceback
+import numpy as np
 from openpyxl.utils import get_column_letter
+from workbook_loader import load_student_workbook
+from rubric import compile_rubric
+from answer_keys import answer_key, answer_keys_version, load_answer_keys
+from range_diff import RangeValues, diff_ranges, is_blank, read_range
+import check_results
+import tracing
+
+# Answer keys compiled from solution workbooks (see answer_keys.py), read once when the graders are imported
+COMPILED_ANSWER_KEYS = load_answer_keys()
+
+# Bump whenever grading logic or built-in expected values change, so cached results from older graders are not reused
+# (compiled answer keys add their own digest)
+GRADER_VERSION = "5" + answer_keys_version(COMPILED_ANSWER_KEYS)
+
+# Total points of each grading function (also reported for submissions stopped before their grader finished)
+TOTAL_POINTS = {
+    "grade_challenge_1_1": 10,
+    "grade_challenge_2": 15,  # Adjust based on grading
+    "grade_challenge_3_1": 20,  # Adjust based on grading
+    "grade_project_1": 60,  # Base points
+    "grade_project_2": 50,
+}
+
+# Expected data of the import challenge (A1:D6, headers included)
+CHALLENGE_1_1_KEY = answer_key("Skill: Import data into workbooks", {
+    "solution_data": [
+        ["CustomerID", "FirstName", "LastName", "Email"],
+        [101, "John", "Doe", "johndoe@example.com"],
+        [102, "Jane", "Smith", "janesmith@example.com"],
+        [103, "Michael", "Johnson", "mjohnson@example.com"],
+        [104, "Peter", "Parker", "pparker@dailybugle.com"],
+        [105, "Tony", "Stark", "tstark@starkindustries.com"]
+    ],
+}, COMPILED_ANSWER_KEYS)
 
 #prev
 def grade_challenge_1_1(student_path):
+    total_points = TOTAL_POINTS["grade_challenge_1_1"]
+
     try:
-        # Load workbooks and select active sheets
-        student_wb = openpyxl.load_workbook(student_path)
+        # Load workbooks and select active sheets (only the active sheet gets parsed)
+        student_wb = load_student_workbook(student_path).formulas
         student_ws = student_wb.active
 
         # Initialize scoring variables
         score = 0
-        total_points = 10
         feedback = []
 
         # Define expected headers and row count
-        expected_headers = ["CustomerID", "FirstName", "LastName", "Email"]
+        solution_data = CHALLENGE_1_1_KEY["solution_data"]
+        expected_headers = solution_data[0]
         expected_row_count = 5  # 5 rows of data (not including the header row)
 
         # Check headers in the first row (A1:D1)
@@ -24,6 +60,7 @@ def grade_challenge_1_1(student_path):
             score += 2  # Award 2 points for having the correct headers
         else:
             feedback.append("Headers are incorrect.")
+        check_results.record("headers", 2 if student_headers == expected_headers else 0, 2)
 
         # Check for 5 rows of data below the headers (A2:D6)
         data_rows = [
@@ -37,663 +74,559 @@ def grade_challenge_1_1(student_path):
             score += 2  # Award 2 points for having the correct number of data rows
         else:
             feedback.append("Incorrect number of data rows")
+        check_results.record("data_rows", 2 if len(non_empty_rows) == expected_row_count else 0, 2)
 
-        # Now compare the content of the student's data with the expected solution data
-        solution_data = [
-            ["CustomerID", "FirstName", "LastName", "Email"],
-            [101, "John", "Doe", "johndoe@example.com"],
-            [102, "Jane", "Smith", "janesmith@example.com"],
-            [103, "Michael", "Johnson", "mjohnson@example.com"],
-            [104, "Peter", "Parker", "pparker@dailybugle.com"],
-            [105, "Tony", "Stark", "tstark@starkindustries.com"]
-        ]
-
-        # Compare the content row by row (data only, ignoring the headers)
-        matching_cells = 0
+        # Now compare the content of the student's data with the expected solution data:
+        # all the data cells at once (A2:D6, ignoring the headers), listing the wrong ones
         total_cells = 20  # 5 rows * 4 columns
-
-        for r in range(5):
-            for c in range(4):
-                solution_value = solution_data[r + 1][c]  # Offset by 1 to skip header
-                student_value = data_rows[r][c]
-
-                if student_value == solution_value:
-                    matching_cells += 1
-                else:
-                    feedback.append("Imported data is incorrect in 1(or more) rows.")
+        content_diff = diff_ranges(RangeValues(data_rows, min_row=2), solution_data[1:])
+        matching_cells = total_cells - content_diff.count
+        if not content_diff.ok:
+            feedback.append(f"Imported data is incorrect in {content_diff.describe()}.")
 
         # Award points based on the number of correctly matched cells
         content_points = (matching_cells / total_cells) * 6  # 6 points for content accuracy
         score += content_points
+        check_results.record("content", content_points, 6)
 
         return score, total_points, feedback
     except Exception as e:
         print(f"Error comparing workbooks: {e}")
-        return 0, total_points  # In case of an error, give 0 score but consider total points
+        check_results.abandon()
+        return 0, total_points, [f"An error occurred during grading: {e}"]  # 0 score, but the total points still count
     
+'''
+Rubrics for the challenges below. They are compiled once, when this module is imported, into a plan that
+lists exactly which sheets, cells and workbook parts a submission needs (see rubric.py).
+'''
+CHALLENGE_2_RUBRIC = compile_rubric([
+    # 1. Searching for data (4 points)
+    # Check if the cell with the employee making $75,000 is highlighted in yellow
+    {
+        'id': 'B144_highlight', 'check': 'style', 'cell': 'B144',
+        'attrs': {'fill.start_color.rgb': 'FFFFFF00'},  # Yellow
+        'points': 2,
+        'feedback': "Cell B144 (name of employee with $75,000 salary) is not highlighted in yellow."
+    },
+
+    # 2. Navigating to named cells/ranges (5 points)
+    # Check if "EmployeeInfo" named range exists
+    {
+        'id': 'EmployeeInfo_exists', 'check': 'named_range', 'name': 'EmployeeInfo',
+        'points': 2,
+        'feedback': "Named range 'EmployeeInfo' not found."
+    },
+    # Check if the named range "EmployeeInfo" has the correct range A1:B201 (only when it exists)
+    {
+        'id': 'EmployeeInfo_range', 'check': 'named_range', 'name': 'EmployeeInfo',
+        'refers_to_endswith': '!$A$1:$B$201', 'requires': 'EmployeeInfo_exists',
+        'points': 2,
+        'feedback': "Named range 'EmployeeInfo' does not refer to cells A1:B201."
+    },
+    # Check if the font for the range is Times New Roman
+    {
+        'id': 'EmployeeInfo_font', 'check': 'style', 'range': 'A1:B201',
+        'attrs': {'font.name': 'Times New Roman'},
+        'points': 2,
+        'feedback': "Font for 'EmployeeInfo' named range is not set to Times New Roman."
+    },
+
+    # 3. Hyperlinks (6 points)
+    # Check if the hyperlink in cell B204 has been removed
+    {
+        'id': 'B204_hyperlink', 'check': 'hyperlink', 'cell': 'B204', 'target': None,
+        'points': 3,
+        'feedback': "Hyperlink in cell B204 has not been removed."
+    },
+    # Check if the hyperlink was added to cell F4 with the correct URL and display text
+    {
+        'id': 'F4_hyperlink', 'check': 'hyperlink', 'cell': 'F4',
+        'target': 'https://www.examplecompany.com', 'text': 'Example Company',
+        'points': 3,
+        'feedback': "Cell F4 does not have the correct hyperlink and display text."
+    },
+])
+
+CHALLENGE_3_1_RUBRIC = compile_rubric([
+    # 1. Page Setup (4 points)
+    # Check page orientation
+    {
+        'id': 'orientation', 'check': 'sheet_attr', 'attr': 'page_setup.orientation', 'expected': 'landscape',
+        'points': 1,
+        'feedback': "Incorrect page orientation"
+    },
+    # Check fit to width/height with defaults
+    {
+        'id': 'fit_to_page', 'check': 'sheet_attr',
+        'attrs': ['page_setup.fitToWidth', 'page_setup.fitToHeight'], 'default': 1, 'expected': 1,
+        'points': 1,
+        'feedback': "Incorrect page orientation"
+    },
+    # Scale to Fit to 1 page is ungradeable at this time
+
+    # Check for narrow margins
+    {
+        'id': 'margins', 'check': 'sheet_attr', 'places': 2,
+        'attrs': {
+            'page_margins.left': 0.25,
+            'page_margins.right': 0.25,
+            'page_margins.top': 0.75,
+            'page_margins.bottom': 0.75
+        },
+        'points': 2,
+        'feedback': "Margins are not set to Narrow."
+    },
+
+    # 2. Row Height and Column Width (2 points)
+    # Check row height
+    {
+        'id': 'header_row_height', 'check': 'sheet_attr', 'attr': 'row_dimensions[1].height', 'expected': 30,
+        'points': 2,
+        'feedback': "Row height for the header row (Row 1) is incorrect; Expected 30 points."
+    },
+    # Check column widths for column A (Allows for a small tolerance to mitigate Excels float points)
+    {
+        'id': 'column_A_width', 'check': 'sheet_attr', 'attr': 'column_dimensions[A].width', 'between': [19, 21],
+        'points': 1.5,
+        'feedback': "Incorrect column width for column A; Expected 20."
+    },
+    # Check column widths for column B-I (Allows for a small tolerance), feedback names the first wrong column
+    {
+        'id': 'column_B_I_width', 'check': 'sheet_attr', 'attr': 'column_dimensions[{item}].width',
+        'items': [get_column_letter(col) for col in range(2, 10)], 'between': [13, 16.5],
+        'points': 2,
+        'feedback': "Incorrect width for column {item}; Expected 15."
+    },
+
+    # 3. Headers and Footers (2 points)
+    # Check if there's text in the left part of the header
+    {
+        'id': 'header_left', 'check': 'sheet_attr', 'attr': 'oddHeader.left.text', 'test': 'nonblank',
+        'points': 2,
+        'feedback': "No text found in the left side of the header."
+    },
+    # Check for Date in the center part of the header
+    {
+        'id': 'header_center', 'check': 'sheet_attr', 'attr': 'oddHeader.center.text', 'contains': '&D',
+        'points': 1,
+        'feedback': "Header does not contain date in center."
+    },
+    # Check if the file name is in the right side of the header
+    {
+        'id': 'header_right', 'check': 'sheet_attr', 'attr': 'oddHeader.right.text', 'contains': '&F',
+        'points': 1,
+        'feedback': "Header does not contain file name on the right."
+    },
+    # Footer checks for page numbering
+    {
+        'id': 'footer_left', 'check': 'sheet_attr', 'attr': 'oddFooter.left.text', 'contains': '&P',
+        'points': 1,
+        'feedback': "Footer does not contain page number on the left."
+    },
+    {
+        'id': 'footer_right', 'check': 'sheet_attr', 'attr': 'oddFooter.right.text', 'contains': '&N',
+        'points': 1,
+        'feedback': "Footer does not contain total number of pages on the right."
+    },
+    {
+        'id': 'footer_right_pages', 'check': 'sheet_attr', 'attr': 'oddFooter.right.text', 'contains': '&N',
+        'points': 1,
+        'feedback': "Footer does not contain total number of pages on the right."
+    },
+
+    # 4. Options and Views (1 point)
+    {
+        'id': 'gridlines_headings', 'check': 'sheet_attr', 'test': 'falsy',
+        'attrs': ['sheet_view.showGridLines', 'sheet_view.showRowColHeaders'],
+        'points': 2,
+        'feedback': "Gridlines or headings are not hidden."
+    },
+])
+
 def grade_challenge_2(student_path):
-    try:
-        # Load the student workbook and select the active sheet
-        student_wb = openpyxl.load_workbook(student_path)
-        student_ws = student_wb.active
+    # Initialize scoring variables
+    total_points = TOTAL_POINTS["grade_challenge_2"]
 
-        # Initialize scoring variables
-        score = 0
-        total_points = 15  # Adjust based on grading
-        feedback = []
+    try:
+        # Load the student workbook (only the active sheet, and only the cells the rubric reads)
+        student_wb = CHALLENGE_2_RUBRIC.load(student_path)
 
-        # 1. Searching for data (4 points)
-        # Check if the cell with the employee making $75,000 is highlighted in yellow
-        target_cell = "B144"  # The cell containing the employee's name making $75,000
-        if student_ws[target_cell].fill.start_color.rgb == "FFFFFF00":  # Yellow
-            score += 2
-        else:
-            feedback.append("Cell B144 (name of employee with $75,000 salary) is not highlighted in yellow.")
+        score, feedback = CHALLENGE_2_RUBRIC.grade(student_wb)
 
-        # 2. Navigating to named cells/ranges (5 points)
-        # Check if "EmployeeInfo" named range exists
-        if "EmployeeInfo" in student_wb.defined_names:
-            score += 2
-        else:
-            feedback.append("Named range 'EmployeeInfo' not found.")
+        return score, total_points, feedback
 
-        # Check if the named range "EmployeeInfo" has the correct range A1:B201
-        if "EmployeeInfo" in student_wb.defined_names:
-            defined_range = student_wb.defined_names["EmployeeInfo"].attr_text
-            if defined_range.endswith("!$A$1:$B$201"):
-                score += 2
-            else:
-                feedback.append("Named range 'EmployeeInfo' does not refer to cells A1:B201.")
+    except Exception as e:
+        print(f"Error comparing workbooks for Assignment 2: {e}")
+        check_results.abandon()
+        traceback.print_exc()
+        return 0, total_points, ["An error occurred during grading."]
 
-        # Check if the font for the range is Times New Roman
-        cells_in_range = student_ws["A1:B201"]
-        font_correct = all(cell.font.name == "Times New Roman" for row in cells_in_range for cell in row)
-        if font_correct:
-            score += 2
-        else:
-            feedback.append("Font for 'EmployeeInfo' named range is not set to Times New Roman.")
+def grade_challenge_3_1(student_path):
+    # Initialize scoring variables
+    total_points = TOTAL_POINTS["grade_challenge_3_1"]
 
-        # 3. Hyperlinks (6 points)
-        # Check if the hyperlink in cell B204 has been removed
-        if not student_ws["B204"].hyperlink:
-            score += 3
-        else:
-            feedback.append("Hyperlink in cell B204 has not been removed.")
+    try:
+        # Load the student workbook (only the active sheet's layout is graded)
+        student_wb = CHALLENGE_3_1_RUBRIC.load(student_path)
 
-        # Check if the hyperlink was added to cell F4 with the correct URL and display text
-        cell_f4 = student_ws["F4"]
-        if cell_f4.hyperlink and cell_f4.hyperlink.target == "https://www.examplecompany.com" and cell_f4.value == "Example Company":
-            score += 3
-        else:
-            feedback.append("Cell F4 does not have the correct hyperlink and display text.")
+        score, feedback = CHALLENGE_3_1_RUBRIC.grade(student_wb)
 
         return score, total_points, feedback
 
     except Exception as e:
-        print(f"Error comparing workbooks for Assignment 2: {e}")
+        print(f"Error comparing workbooks for Assignment 3.1: {e}")
+        check_results.abandon()
         traceback.print_exc()
         return 0, total_points, ["An error occurred during grading."]
 
-def grade_challenge_3_1(student_path):
-    try:
-        # Load workbooks and select active sheets
-        student_wb = openpyxl.load_workbook(student_path)
-        student_ws = student_wb.active
+# Expected unique countries with their average price and rating (CoffeeAnalysis, columns A:B and D:E), and the
+# results of the individual calculations
+PROJECT_1_KEY = answer_key("Project 1: Cafe Bloom", {
+    "country_prices": {
+        'Taiwan': 10.15,
+        'United States': 9.24,
+        'Japan': 10.75,
+        'Hawaii': 18.15,
+        'Hong Kong': 15.62,
+        'Guatemala': 3.55,
+        'China': 22.53,
+        'Canada': 4.99,
+        'England': 50.41,
+        'Australia': 69.00,
+        'Kenya': 6.91
+    },
+    "country_ratings": {
+        'Taiwan': 93.64,
+        'United States': 93.24,
+        'Japan': 92.38,
+        'Hawaii': 93.42,
+        'Hong Kong': 92.67,
+        'Guatemala': 90.5,
+        'China': 90,
+        'Canada': 93.6,
+        'England': 94.5,
+        'Australia': 96,
+        'Kenya': 94
+    },
+    "calc_checks": {
+        "B15": 20.12, "E15": 93.08520928987156,
+        "I4": "Australia", "I5": "Guatemala", "I7": "Australia", "I8": "China",
+        "I12": 269.75607779578604, "I13": 509, "I14": 66,
+        "I18": "Australia"
+    },
+}, COMPILED_ANSWER_KEYS)
+PROJECT_1_EXPECTED_PRICES = PROJECT_1_KEY["country_prices"]
+PROJECT_1_EXPECTED_RATINGS = PROJECT_1_KEY["country_ratings"]
+PROJECT_1_CALC_CHECKS = PROJECT_1_KEY["calc_checks"]
+PROJECT_1_PLACES = PROJECT_1_KEY.places
+
+# Feedback given for a calculation cell with the wrong value
+_PROJECT_1_VALUE_FEEDBACK = [
+    "Cell {cell} Value Check:",
+    "  - Received: {actual}",
+    "  - Expected: {expected}"
+]
+
+# Points of a calculation cell that has both checks: half for the value, half for a formula that does the calculation
+# (see formula_structure.py), so a typed in answer earns only the value half
+PROJECT_1_VALUE_POINTS = 2.5
+PROJECT_1_FORMULA_POINTS = 2.5
+
+def _project_1_formula_check(cell, structure):
+    return {'id': f'{cell}_formula', 'check': 'formula', 'sheet': 'CoffeeAnalysis', 'cell': cell, 'structure': structure,
+            'points': PROJECT_1_FORMULA_POINTS,
+            'feedback': ["Cell {cell} Formula Check:", "  - The value must be calculated: {problem}"]}
+
+# Individual Calculations Grading (numbers are compared rounded to the answer key's places, text without surrounding spaces)
+PROJECT_1_RUBRIC = compile_rubric([
+    # Cell B15: Overall Average USD per Unit
+    {'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'B15', 'expected': PROJECT_1_CALC_CHECKS['B15'], 'places': PROJECT_1_PLACES['calc_checks'],
+     'points': 5, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell E15: Overall Average Rating
+    {'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'E15', 'expected': PROJECT_1_CALC_CHECKS['E15'], 'places': PROJECT_1_PLACES['calc_checks'],
+     'points': 5, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I4: Most Expensive Country of Origin
+    _project_1_formula_check('I4', {'calls': {'MAX': 'B4:B14'}, 'reads': ['A4:A14']}),
+    {'check': 'value', 'sheet': 'CoffeeAnalysis', 'cell': 'I4', 'expected': PROJECT_1_CALC_CHECKS['I4'], 'strip': True,
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I5: Least Expensive Country of Origin
+    _project_1_formula_check('I5', {'calls': {'MIN': 'B4:B14'}, 'reads': ['A4:A14']}),
+    {'check': 'value', 'sheet': 'CoffeeAnalysis', 'cell': 'I5', 'expected': PROJECT_1_CALC_CHECKS['I5'], 'strip': True,
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I7: Country with the Highest Rating
+    _project_1_formula_check('I7', {'calls': {'MAX': 'E4:E14'}, 'reads': ['D4:D14']}),
+    {'check': 'value', 'sheet': 'CoffeeAnalysis', 'cell': 'I7', 'expected': PROJECT_1_CALC_CHECKS['I7'], 'strip': True,
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I8: Country with the Lowest Rating
+    _project_1_formula_check('I8', {'calls': {'MIN': 'E4:E14'}, 'reads': ['D4:D14']}),
+    {'check': 'value', 'sheet': 'CoffeeAnalysis', 'cell': 'I8', 'expected': PROJECT_1_CALC_CHECKS['I8'], 'strip': True,
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I12: Average Length of Reviews
+    # Review lengths may be worked out inline (AVERAGE(LEN(...)), SUMPRODUCT(LEN(...))/COUNTA(...)) or in a helper column,
+    # so any cells count, but the averaging function must read some (not AVERAGE(269.75))
+    _project_1_formula_check('I12', {'calls': {('AVERAGE', 'SUMPRODUCT', 'SUM'): None}}),
+    {'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'I12', 'expected': PROJECT_1_CALC_CHECKS['I12'], 'places': PROJECT_1_PLACES['calc_checks'],
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I13: Longest Review Length
+    _project_1_formula_check('I13', {'calls': {'MAX': None}}),
+    {'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'I13', 'expected': PROJECT_1_CALC_CHECKS['I13'], 'places': PROJECT_1_PLACES['calc_checks'],
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+    # Cell I14: Shortest Review Length
+    _project_1_formula_check('I14', {'calls': {'MIN': None}}),
+    {'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'I14', 'expected': PROJECT_1_CALC_CHECKS['I14'], 'places': PROJECT_1_PLACES['calc_checks'],
+     'points': PROJECT_1_VALUE_POINTS, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+
+    #--------BONUS QUESTION---------------------
+    # Cell I18: Country Skewing Results
+    {'check': 'value', 'sheet': 'CoffeeAnalysis', 'cell': 'I18', 'expected': PROJECT_1_CALC_CHECKS['I18'], 'strip': True,
+     'points': 5, 'feedback': _PROJECT_1_VALUE_FEEDBACK},
+], reads={'CoffeeAnalysis': ['A4:B14', 'D4:E14']}, catch_errors=True)
+
+#Function to help with edge cases of users sorting tables and altering data locations
+def _verify_unique_countries_and_prices(analysis_sheet_values):
+    country_prices = {}
+    feedback = []
+    score = 0
+
+    for row in range(4, 15):
+        country = analysis_sheet_values.cell(row=row, column=1).value
+        price = analysis_sheet_values.cell(row=row, column=2).value
+
+        if country and price is not None:
+            country = str(country).strip()
+            try:
+                country_prices[country] = round(float(price), PROJECT_1_PLACES["country_prices"])
+            except ValueError:
+                feedback.append(f"Non-numeric price for {country}: {price}")
 
-        # Initialize scoring variables
-        score = 0
-        total_points = 20  # Adjust based on grading
-        feedback = []  
-        
-        # 1. Page Setup (4 points)
-        # Check page orientation
-        if student_ws.page_setup.orientation == "landscape":
-            score += 1
-        else:
-            feedback.append("Incorrect page orientation")
-            
-            
-        #DEBUGGING
-        print("Debug - Page Setup Scaling Settings:")
-        print("Orientation:", student_ws.page_setup.orientation)
-        print("Fit to Width:", student_ws.page_setup.fitToWidth)
-        print("Margins - Left:", student_ws.page_margins.left, "Right:", student_ws.page_margins.right)
-        print("Margins - Top:", student_ws.page_margins.top, "Bottom:", student_ws.page_margins.bottom)
-        print("Row Height for Row 1:", student_ws.row_dimensions[1].height)
-        print("Column Width for Column A:", student_ws.column_dimensions["A"].width)
-
-            
-        # Check fit to width/height with defaults
-        fit_to_width = student_ws.page_setup.fitToWidth or 1
-        fit_to_height = student_ws.page_setup.fitToHeight or 1
-        if fit_to_width == 1 and fit_to_height == 1:
-            score += 1
-        else:
-            feedback.append("Incorrect page orientation")
-            
-            
-        # Scale to Fit to 1 page is ungradeable at this time
-
-        # Check for narrow margins
-        if (round(float(student_ws.page_margins.left), 2) == 0.25 and 
-            round(float(student_ws.page_margins.right), 2) == 0.25 and
-            round(float(student_ws.page_margins.top), 2) == 0.75 and 
-            round(float(student_ws.page_margins.bottom), 2) == 0.75):
-            score += 2
-        else:
-            feedback.append("Margins are not set to Narrow.")
+    missing_countries = set(PROJECT_1_EXPECTED_PRICES.keys()) - set(country_prices.keys())
+    extra_countries = set(country_prices.keys()) - set(PROJECT_1_EXPECTED_PRICES.keys())
 
-        # 2. Row Height and Column Width (2 points)
-        # Check row height
-        if student_ws.row_dimensions[1].height == 30:
-            score += 2
-        else:
-            feedback.append("Row height for the header row (Row 1) is incorrect; Expected 30 points.")
-            
-        # Check column widths for column A (Allows for a small tolerance to mitigate Excels float points)
-        if 19 <= student_ws.column_dimensions["A"].width <=21:
-            score += 1.5
-        else:
-            feedback.append("Incorrect column width for column A; Expected 20.")
-        
-        # Check column widths for column B-J (Allows for a small tolerance)    
-        for col in range(2, 10):
-            col_letter = get_column_letter(col)
-            if not (13 <= student_ws.column_dimensions[col_letter].width <= 16.5):
-                feedback.append(f"Incorrect width for column {col_letter}; Expected 15.")
-                break
-        else:
-            score += 2
+    if missing_countries:
+        feedback.append(f"Missing countries: {', '.join(missing_countries)}")
+    if extra_countries:
+        feedback.append(f"Extra countries found: {', '.join(extra_countries)}")
 
-        # 3. Headers and Footers (2 points)
-        # Check if there's text in the left part of the header
-        if student_ws.oddHeader.left and hasattr(student_ws.oddHeader.left, 'text') and student_ws.oddHeader.left.text.strip():
-            score += 2
-        else:
-            feedback.append("No text found in the left side of the header.")
+    price_matches = 0
+    total_countries = len(PROJECT_1_EXPECTED_PRICES)
 
-        # Check for Date in the center part of the header
-        if student_ws.oddHeader.center and hasattr(student_ws.oddHeader.center, 'text') and "&D" in student_ws.oddHeader.center.text:
-            score += 1
-        else:
-            feedback.append("Header does not contain date in center.")
+    for country, expected_price in PROJECT_1_EXPECTED_PRICES.items():
+        if country in country_prices:
+            if abs(country_prices[country] - expected_price) < 10 ** -PROJECT_1_PLACES["country_prices"]:
+                price_matches += 1
+            else:
+                feedback.append(
+                    f"Incorrect price for {country}. Expected {expected_price}, Got {country_prices[country]}"
+                )
 
-        # Check if the file name is in the right side of the header
-        if student_ws.oddHeader.right and hasattr(student_ws.oddHeader.right, 'text') and "&F" in student_ws.oddHeader.right.text:
-            score += 1
-        else:
-            feedback.append("Header does not contain file name on the right.")
+    country_score = 5 if len(country_prices) == total_countries else 1
+    price_score = (price_matches / total_countries) * 3
+    score = country_score + price_score
+    return score, feedback
 
-        # Footer checks for page numbering
-        if student_ws.oddFooter.left and hasattr(student_ws.oddFooter.left, 'text') and "&P" in student_ws.oddFooter.left.text:
-            score += 1
-        else:
-            feedback.append("Footer does not contain page number on the left.")
 
-        if student_ws.oddFooter.right and hasattr(student_ws.oddFooter.right, 'text') and "&N" in student_ws.oddFooter.right.text:
-            score += 1
-        else:
-            feedback.append("Footer does not contain total number of pages on the right.")
+def _verify_unique_countries_and_ratings(analysis_sheet):
+    # Extract unique countries and their ratings from the sheet
+    country_ratings = {}
 
-        if student_ws.oddFooter.right and hasattr(student_ws.oddFooter.right, 'text') and "&N" in student_ws.oddFooter.right.text:
-            score += 1
-        else:
-            feedback.append("Footer does not contain total number of pages on the right.")
+    # Assuming the data is in columns D and E, starting from row 4 to 14
+    for row in range(4, 15):
+        country = analysis_sheet.cell(row=row, column=4).value
+        rating = analysis_sheet.cell(row=row, column=5).value
 
-        # 4. Options and Views (1 point)
-        if not student_ws.sheet_view.showGridLines and not student_ws.sheet_view.showRowColHeaders:
-            score += 2
-        else:
-            feedback.append("Gridlines or headings are not hidden.")
+        if country and rating is not None:
+            # Normalize country names (strip whitespace, handle potential capitalization issues)
+            country = str(country).strip()
 
-        return score, total_points, feedback
+            # Store the rating, allowing for small floating-point variations
+            country_ratings[country] = round(float(rating), PROJECT_1_PLACES["country_ratings"])
 
-    except Exception as e:
-        print(f"Error comparing workbooks for Assignment 3.1: {e}")
-        traceback.print_exc()
-        return 0, total_points, ["An error occurred during grading."]
+    # Check if all expected countries are present
+    missing_countries = set(PROJECT_1_EXPECTED_RATINGS.keys()) - set(country_ratings.keys())
+    extra_countries = set(country_ratings.keys()) - set(PROJECT_1_EXPECTED_RATINGS.keys())
 
-def grade_project_1(student_path):
-    #Function to help with edge cases of users sorting tables and altering data locations
-    def verify_unique_countries_and_prices(analysis_sheet_values):
-        expected_country_prices = {
-            'Taiwan': 10.15,
-            'United States': 9.24,
-            'Japan': 10.75,
-            'Hawaii': 18.15,
-            'Hong Kong': 15.62,
-            'Guatemala': 3.55,
-            'China': 22.53,
-            'Canada': 4.99,
-            'England': 50.41,
-            'Australia': 69.00,
-            'Kenya': 6.91
-        }
-        country_prices = {}
-        feedback = []
-        score = 0
+    feedback = []
+    score = 0
 
-        for row in range(4, 15):
-            country = analysis_sheet_values.cell(row=row, column=1).value
-            price = analysis_sheet_values.cell(row=row, column=2).value
-
-            if country and price is not None:
-                country = str(country).strip()
-                try:
-                    country_prices[country] = round(float(price), 2)
-                except ValueError:
-                    feedback.append(f"Non-numeric price for {country}: {price}")
-
-        missing_countries = set(expected_country_prices.keys()) - set(country_prices.keys())
-        extra_countries = set(country_prices.keys()) - set(expected_country_prices.keys())
-
-        if missing_countries:
-            feedback.append(f"Missing countries: {', '.join(missing_countries)}")
-        if extra_countries:
-            feedback.append(f"Extra countries found: {', '.join(extra_countries)}")
-
-        price_matches = 0
-        total_countries = len(expected_country_prices)
-
-        for country, expected_price in expected_country_prices.items():
-            if country in country_prices:
-                if abs(country_prices[country] - expected_price) < 0.01:
-                    price_matches += 1
-                else:
-                    feedback.append(
-                        f"Incorrect price for {country}. Expected {expected_price}, Got {country_prices[country]}"
-                    )
-
-        country_score = 5 if len(country_prices) == total_countries else 1
-        price_score = (price_matches / total_countries) * 3
-        score = country_score + price_score
-        return score, feedback
+    if missing_countries:
+        feedback.append(f"Missing countries: {', '.join(missing_countries)}")
 
-    
-    def verify_unique_countries_and_ratings(analysis_sheet):
-        # Dictionary of expected countries and ratings
-        expected_country_ratings = {
-            'Taiwan': 93.64,
-            'United States': 93.24,
-            'Japan': 92.38,
-            'Hawaii': 93.42,
-            'Hong Kong': 92.67,
-            'Guatemala': 90.5,
-            'China': 90,
-            'Canada': 93.6,
-            'England': 94.5,
-            'Australia': 96,
-            'Kenya': 94
-        }
-        
-        # Extract unique countries and their ratings from the sheet
-        country_ratings = {}
-        
-        # Assuming the data is in columns D and E, starting from row 4 to 14
-        for row in range(4, 15):
-            country = analysis_sheet.cell(row=row, column=4).value
-            rating = analysis_sheet.cell(row=row, column=5).value
-            
-            if country and rating is not None:
-                # Normalize country names (strip whitespace, handle potential capitalization issues)
-                country = str(country).strip()
-                
-                # Store the rating, allowing for small floating-point variations
-                country_ratings[country] = round(float(rating), 2)
-        
-        # Check if all expected countries are present
-        missing_countries = set(expected_country_ratings.keys()) - set(country_ratings.keys())
-        extra_countries = set(country_ratings.keys()) - set(expected_country_ratings.keys())
-        
-        feedback = []
-        score = 0
-        
-        if missing_countries:
-            feedback.append(f"Missing countries: {', '.join(missing_countries)}")
-        
-        if extra_countries:
-            feedback.append(f"Extra countries found: {', '.join(extra_countries)}")
-        
-        # Check ratings for each country
-        rating_matches = 0
-        total_countries = len(expected_country_ratings)
-        
-        for country, expected_rating in expected_country_ratings.items():
-            if country in country_ratings:
-                # Allow a small tolerance for floating-point comparisons
-                if abs(country_ratings[country] - expected_rating) < 0.01:
-                    rating_matches += 1
-                else:
-                    feedback.append(f"Incorrect rating for {country}. Expected {expected_rating}, Got {country_ratings[country]}")
-        
-        # Calculate scores
-        country_score = 4 if len(country_ratings) == total_countries else 2
-        rating_score = (rating_matches / total_countries) * 3
-        
-        score = country_score + rating_score
-        
-        return score, feedback
+    if extra_countries:
+        feedback.append(f"Extra countries found: {', '.join(extra_countries)}")
+
+    # Check ratings for each country
+    rating_matches = 0
+    total_countries = len(PROJECT_1_EXPECTED_RATINGS)
+
+    for country, expected_rating in PROJECT_1_EXPECTED_RATINGS.items():
+        if country in country_ratings:
+            # Allow a small tolerance for floating-point comparisons
+            if abs(country_ratings[country] - expected_rating) < 10 ** -PROJECT_1_PLACES["country_ratings"]:
+                rating_matches += 1
+            else:
+                feedback.append(f"Incorrect rating for {country}. Expected {expected_rating}, Got {country_ratings[country]}")
+
+    # Calculate scores
+    country_score = 4 if len(country_ratings) == total_countries else 2
+    rating_score = (rating_matches / total_countries) * 3
+
+    score = country_score + rating_score
+
+    return score, feedback
+
+def grade_project_1(student_path):
+    # Initialize scoring variables
+    total_points = TOTAL_POINTS["grade_project_1"]
 
     try:
-        # First pass: Check formulas (data_only=False)
-        wb_formulas = openpyxl.load_workbook(student_path, data_only=False)
-        
-        # Second pass: Check values (data_only=True)
-        wb_values = openpyxl.load_workbook(student_path, data_only=True)
+        # Parse only the CoffeeAnalysis cells the rubric reads; the cached values (what Excel last calculated, or what
+        # formula_eval.py computes for files saved without them) are graded
+        student_wb = PROJECT_1_RUBRIC.load(student_path)
 
-        # Initialize scoring variables
         score = 0
-        total_points = 60  # Base points
         feedback = []
 
         # Define sheet to be graded
-        analysis_sheet_values = wb_values["CoffeeAnalysis"]
+        analysis_sheet_values = student_wb.values["CoffeeAnalysis"]
 
         # Verify Unique Countries and Prices
-        unique_countries_score, unique_countries_feedback = verify_unique_countries_and_prices(analysis_sheet_values)
+        with tracing.span("unique countries and prices", category="check"):
+            unique_countries_score, unique_countries_feedback = _verify_unique_countries_and_prices(analysis_sheet_values)
         score += unique_countries_score
+        check_results.record("unique_countries_prices", unique_countries_score, 8)
         feedback.extend(unique_countries_feedback)
-        
+
         # Verify Unique Countries and Ratings
-        unique_ratings_score, unique_ratings_feedback = verify_unique_countries_and_ratings(analysis_sheet_values)
+        with tracing.span("unique countries and ratings", category="check"):
+            unique_ratings_score, unique_ratings_feedback = _verify_unique_countries_and_ratings(analysis_sheet_values)
         score += unique_ratings_score
+        check_results.record("unique_countries_ratings", unique_ratings_score, 7)
         feedback.extend(unique_ratings_feedback)
-        
-        
-        # Individual Calculations Grading
-        calc_checks = [
-            
-            # Cell B15: Overall Average USD per Unit
-            {
-                'cell': 'B15', 
-                'expected_value': 20.12,
-                'points': {
-                    'value': 5,
-                }
-            },
-            # Cell E15: Overall Average Rating
-            {
-                'cell': 'E15', 
-                'expected_value': 93.08520928987156,
-                'points': {
-                    'value': 5,
-                }
-            },
-            # Cell I4: Most Expensive Country of Origin
-            {
-                'cell': 'I4', 
-                'expected_value': "Australia",
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I5: Least Expensive Country of Origin
-            {
-                'cell': 'I5', 
-                'expected_value': "Guatemala",
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I7: Country with the Highest Rating
-            {
-                'cell': 'I7', 
-                'expected_value': "Australia",
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I8: Country with the Lowest Rating
-            {
-                'cell': 'I8', 
-                'expected_value': "China",
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I12: Average Length of Reviews
-            {
-                'cell': 'I12', 
-                'expected_value': 269.75607779578604,
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I13: Longest Review Length
-            {
-                'cell': 'I13', 
-                'expected_value': 509,
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            # Cell I14: Shortest Review Length
-            {
-                'cell': 'I14', 
-                'expected_value': 66,
-                'points': {
-                    'value': 5,
-                    'formula': 5
-                }
-            },
-            
-            #--------BONUS QUESTION---------------------
-            # Cell I18: Country Skewing Results
-            {
-                'cell': 'I18', 
-                'expected_value': "Australia",
-                'points': {
-                    'value': 5
-                }
-            }
-            
-        ]
 
-        # Helper function to compare values with type checking
-        def compare_values(actual_value, expected_value):
-            if isinstance(expected_value, (int, float)):
-                try:
-                    if actual_value is None:
-                        return False
-                    actual_float = float(actual_value)
-                    return round(actual_float, 2) == round(float(expected_value), 2)
-                except (TypeError, ValueError):
-                    return False
-            else:
-                # For text comparisons, convert both to strings and compare
-                return str(actual_value).strip() == str(expected_value).strip()
-
-        # Perform checks for each calculation
-        for calc in calc_checks:
-            cell = calc['cell']
-            try:
-                cell_obj = analysis_sheet_values[cell]
-                cell_value = wb_values['CoffeeAnalysis'][cell].value  # Adjusted sheet name
-
-
-                #-------WORK IN PROGRESS----------------
-                # Formula check: Ensure any formula exists
-                #if 'points' in calc and 'formula' in calc['points']:
-                #    if cell_obj.data_type == 'f':  # Cell contains a formula
-                #        score += calc['points']['formula']
-                #    else:
-                #        feedback.append(f"Cell {cell}: No formula found (cell contains a static value)")
-
-
-                # Value check with type handling
-                if 'expected_value' in calc:
-                    value_match = compare_values(cell_value, calc['expected_value'])
-                    if value_match:
-                        score += calc['points']['value']
-                    else:
-                        value_feedback = [
-                            f"Cell {cell} Value Check:",
-                            f"  - Received: {cell_value}",
-                            f"  - Expected: {calc['expected_value']}"
-                        ]
-                        feedback.extend(value_feedback)
-
-            except Exception as e:
-                print(f"Error processing cell {cell}: {e}")
-                feedback.append(f"Error processing cell {cell}: {e}")
+        # Individual Calculations Grading
+        calc_score, calc_feedback = PROJECT_1_RUBRIC.grade(student_wb)
+        score += calc_score
+        feedback.extend(calc_feedback)
 
         return score, total_points, feedback
 
     except Exception as e:
         print(f"Error grading Project 1: {e}")
+        check_results.abandon()
         traceback.print_exc()
         return 0, total_points, [f"An error occurred during grading: {str(e)}"]
-      
-def grade_project_2(student_path):
-    try:
-        # First pass: Check formulas (data_only=False)
-        wb_formulas = openpyxl.load_workbook(student_path, data_only=False)
-        # Second pass: Check values (data_only=True)
-        wb_values = openpyxl.load_workbook(student_path, data_only=True)
-
-        # Initialize scoring variables
-        score = 0
-        total_points = 50
-        feedback = []
-
-        # Check if all required sheets are present
-        required_sheets = ["Report", "Participants", "Times", "Names & Emails"]
-        sheet_names = wb_formulas.sheetnames
-        if all(sheet in sheet_names for sheet in required_sheets):
-            score += 4
-        else:
-            feedback.append("Sheet structure incorrect: Required sheets not found or incorrectly named.")
-
-        # Sheet 1: "Report" - Cell Values Check
-        report_sheet = wb_values["Report"]
-        report_values = {
-            "B2": 917, "B3": 283, "B4": 332,
-            "D2": 574, "D3": 689, "D4": 308,
-            "F2": 801, "F3": 931, "F4": 407,
-            "H2": 11, "H3": 478, "H4": 70,
-            "B7": 522, "B8": 49
-        }
-        points_per_cell = 1
-        for cell, expected_value in report_values.items():
-            if report_sheet[cell].value == expected_value:
-                score += points_per_cell
-            else:
-                feedback.append(f"Incorrect value in Report sheet at {cell}. Expected {expected_value}, found {report_sheet[cell].value}.")
-
-        # Sheet 2: "Participants"
-        participants_sheet = wb_formulas["Participants"]
-        # Check for the presence of a table in Participants sheet
-        if len(participants_sheet.tables) > 0:
-            score += 3
-        else:
-            feedback.append("No table found in Participants sheet.")
-
-        # Check the number of rows in Participants sheet
-        num_rows = participants_sheet.max_row
-        if num_rows == 1001:
-            score += 5
-        elif num_rows == 523:
-            score += 5
-        else:
-            feedback.append(f"Incorrect number of rows in Participants sheet. Found {num_rows} rows.")
-
-        # Header Formatting Check
-        try:
-            header_font = participants_sheet["A1"].font
-            if header_font.bold and header_font.size == 13:  # Assuming Heading 2 style has size 13 and bold
-                score += 3
-            else:
-                feedback.append("Incorrect header formatting in Participants sheet. Expected 'Heading 2' style (bold, size 13).")
-        except AttributeError:
-            feedback.append("Error checking header formatting in Participants sheet.")
-
-        # Check if top row is frozen in Participants sheet
-        if participants_sheet.freeze_panes == "A2":
-            score += 3
-        else:
-            feedback.append("Top row is not frozen in Participants sheet.")
-
-        # Sheet 3: "Times"
-        times_sheet = wb_formulas["Times"]
-        # Check for the presence of a table in Times sheet
-        if len(times_sheet.tables) > 0:
-            score += 3
-        else:
-            feedback.append("No table found in Times sheet.")
-
-        # Check the number of rows in Times sheet
-        num_rows = times_sheet.max_row
-        if num_rows == 523:
-            score += 3
-        else:
-            feedback.append(f"Incorrect number of rows in Times sheet. Found {num_rows} rows.")
 
+PROJECT_2_REQUIRED_SHEETS = ["Report", "Participants", "Times", "Names & Emails"]
+
+# Sheet 1: "Report" - expected cell values, and the rows that should be empty in the "Names & Emails" sheet, column B
+PROJECT_2_KEY = answer_key("Project 2: Marathon Participants", {
+    "report_values": {
+        "B2": 917, "B3": 283, "B4": 332,
+        "D2": 574, "D3": 689, "D4": 308,
+        "F2": 801, "F3": 931, "F4": 407,
+        "H2": 11, "H3": 478, "H4": 70,
+        "B7": 522, "B8": 49
+    },
+    "allowed_empty_cells": frozenset([
+        3, 17, 18, 33, 61, 78, 79, 80, 85, 113, 127, 128, 138, 148, 153, 159, 161,
+        183, 187, 190, 191, 205, 246, 250, 252, 279, 284, 289, 302, 309, 312, 329,
+        347, 361, 365, 369, 387, 394, 398, 422, 442, 458, 467, 489, 490, 493, 497,
+        499, 507
+    ]),
+}, COMPILED_ANSWER_KEYS)
+PROJECT_2_REPORT_VALUES = PROJECT_2_KEY["report_values"]
+PROJECT_2_ALLOWED_EMPTY_EMAILS = PROJECT_2_KEY["allowed_empty_cells"]
+# The same rows as a mask over Names & Emails B2:B523
+PROJECT_2_EMPTY_EMAIL_ROWS = np.array([[row in PROJECT_2_ALLOWED_EMPTY_EMAILS] for row in range(2, 524)])
+
+# Table, row count, header formatting ('Heading 2' style: bold, size 13) and frozen top row of a data sheet
+def _project_2_data_sheet_checks(sheet, expected_rows, row_points):
+    return [
+        # Check for the presence of a table
+        {'id': f'{sheet}_table', 'check': 'sheet_attr', 'sheet': sheet, 'attr': 'tables', 'test': 'nonempty',
+         'points': 3, 'feedback': f"No table found in {sheet} sheet."},
+        # Check the number of rows
+        {'id': f'{sheet}_rows', 'check': 'sheet_attr', 'sheet': sheet, 'attr': 'max_row', 'expected_in': expected_rows,
+         'points': row_points, 'feedback': f"Incorrect number of rows in {sheet} sheet. Found {{actual}} rows."},
         # Header Formatting Check
-        try:
-            header_font = times_sheet["A1"].font
-            if header_font.bold and header_font.size == 13:  # Assuming Heading 2 style has size 13 and bold
-                score += 3
-            else:
-                feedback.append("Incorrect header formatting in Times sheet. Expected 'Heading 2' style (bold, size 13).")
-        except AttributeError:
-            feedback.append("Error checking header formatting in Times sheet.")
-
-        # Check if top row is frozen in Times sheet
-        if times_sheet.freeze_panes == "A2":
-            score += 3
-        else:
-            feedback.append("Top row is not frozen in Times sheet.")
-
-        # Sheet 4: "Names & Emails"
-        names_emails_sheet = wb_values["Names & Emails"]
-        match_names = True
-        match_emails = True
-
-        # List of cells that should be empty in the "Names & Emails" sheet, column B
-        allowed_empty_cells = [
-            3, 17, 18, 33, 61, 78, 79, 80, 85, 113, 127, 128, 138, 148, 153, 159, 161,
-            183, 187, 190, 191, 205, 246, 250, 252, 279, 284, 289, 302, 309, 312, 329,
-            347, 361, 365, 369, 387, 394, 398, 422, 442, 458, 467, 489, 490, 493, 497,
-            499, 507
-        ]
-
-        for row in range(2, 524):
-            participant_name = wb_values["Participants"][f"B{row}"].value
-            names_emails_name = names_emails_sheet[f"A{row}"].value
+        {'id': f'{sheet}_header', 'check': 'style', 'sheet': sheet, 'cell': 'A1', 'attrs': {'font.bold': True, 'font.size': 13},
+         'points': 3, 'feedback': f"Incorrect header formatting in {sheet} sheet. Expected 'Heading 2' style (bold, size 13)."},
+        # Check if top row is frozen
+        {'id': f'{sheet}_freeze', 'check': 'sheet_attr', 'sheet': sheet, 'attr': 'freeze_panes', 'expected': "A2",
+         'points': 3, 'feedback': f"Top row is not frozen in {sheet} sheet."},
+    ]
+
+PROJECT_2_RUBRIC = compile_rubric(
+    # Check if all required sheets are present
+    [{'id': 'required_sheets', 'check': 'sheets_present', 'sheets': PROJECT_2_REQUIRED_SHEETS, 'points': 4,
+      'feedback': "Sheet structure incorrect: Required sheets not found or incorrectly named."}]
+    # Sheet 1: "Report" - Cell Values Check (1 point per cell)
+    + [{'check': 'value', 'sheet': "Report", 'cell': cell, 'expected': expected_value, 'points': 1,
+        'feedback': "Incorrect value in Report sheet at {cell}. Expected {expected}, found {actual}."}
+       for cell, expected_value in PROJECT_2_REPORT_VALUES.items()]
+    # Sheet 2: "Participants" (1000 rows with the original data, or 522 participants plus the header)
+    + _project_2_data_sheet_checks("Participants", [1001, 523], 5)
+    # Sheet 3: "Times"
+    + _project_2_data_sheet_checks("Times", [523], 3),
+    reads={"Participants": ["B2:B523", "E2:E523"], "Names & Emails": ["A2:B523"]}
+)
 
-            if participant_name is not None and names_emails_name != participant_name.upper():
-                match_names = False
-                feedback.append(f"Incorrect name format at Names & Emails sheet cell A{row}. Expected uppercase.")
-                break
-
-            participant_email = wb_values["Participants"][f"E{row}"].value
-            names_emails_email = names_emails_sheet[f"B{row}"].value
+def grade_project_2(student_path):
+    # Initialize scoring variables
+    total_points = TOTAL_POINTS["grade_project_2"]
 
-            if row in allowed_empty_cells:
-                if names_emails_email is not None:
-                    match_emails = False
-                    feedback.append(f"Cell B{row} in Names & Emails sheet should be empty but contains data.")
-                    break
-            else:
-                if participant_email is not None and names_emails_email != participant_email.lower():
-                    match_emails = False
-                    feedback.append(f"Incorrect email format at Names & Emails sheet cell B{row}. Expected lowercase.")
-                    break
+    try:
+        # Parse the workbook once (only the sheets and cells graded below), then check formulas/structure on
+        # one view and cached values on the other
+        student_wb = PROJECT_2_RUBRIC.load(student_path)
+        wb_values = student_wb.values
+
+        score, feedback = PROJECT_2_RUBRIC.grade(student_wb)
+
+        # Sheet 4: "Names & Emails" must match the Participants sheet row by row (upper case names, lower case
+        # emails, and no email where the participant has none). Every row is checked, all wrong cells are listed.
+        with tracing.span("names and emails", category="check"):
+            names = read_range(wb_values["Names & Emails"], "A2:A523")
+            emails = read_range(wb_values["Names & Emails"], "B2:B523")
+            participant_names = read_range(wb_values["Participants"], "B2:B523")
+            participant_emails = read_range(wb_values["Participants"], "E2:E523")
+
+            name_diff = diff_ranges(names, participant_names, transform="upper", skip=is_blank(participant_names))
+            filled_diff = diff_ranges(emails, None, skip=~PROJECT_2_EMPTY_EMAIL_ROWS)
+            email_diff = diff_ranges(emails, participant_emails, transform="lower",
+                                     skip=PROJECT_2_EMPTY_EMAIL_ROWS | is_blank(participant_emails))
+
+        match_names = name_diff.ok
+        match_emails = filled_diff.ok and email_diff.ok
+        if not name_diff.ok:
+            feedback.append(f"Incorrect name format at {name_diff.describe('Names & Emails')}. Expected uppercase.")
+        if not filled_diff.ok:
+            feedback.append(f"{filled_diff.describe('Names & Emails')} should be empty but contains data.")
+        if not email_diff.ok:
+            feedback.append(f"Incorrect email format at {email_diff.describe('Names & Emails')}. Expected lowercase.")
 
         if match_names:
             score += 3
         if match_emails:
             score += 3
+        check_results.record("names_uppercase", 3 if match_names else 0, 3)
+        check_results.record("emails_lowercase", 3 if match_emails else 0, 3)
 
         return score, total_points, feedback
 
     except Exception as e:
         print(f"Error grading Project 2: {e}")
+        check_results.abandon()
         traceback.print_exc()
-        return 0, total_points, [f"An error occurred during grading: {str(e)}"]
\ No newline at end of file
+        return 0, total_points, [f"An error occurred during grading: {str(e)}"]
+
+
+# What each grading function loads from a submission (None = every cell of the sheets it reads), so a file
+# graded for several challenges can be parsed once for all of them (see grading_runner.grade_file_for_challenges)
+LOAD_PLANS = {
+    "grade_challenge_1_1": None,
+    "grade_challenge_2": CHALLENGE_2_RUBRIC.plan,
+    "grade_challenge_3_1": CHALLENGE_3_1_RUBRIC.plan,
+    "grade_project_1": PROJECT_1_RUBRIC.plan,
+    "grade_project_2": PROJECT_2_RUBRIC.plan,
+}
@@ -0,0 +1,526 @@
+import os
+import signal
+import sys
+import zipfile
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, wait
+from checkpoint import JOURNAL_NAME, CheckpointJournal
+from preflight import REJECTED_STATUSES, rejected_result, summarize, triage_submission
+from result_cache import ResultCache, hash_file
+from zip_submissions import find_archive_submissions, hash_member, is_member_path, is_submission_archive, open_submission
+from report_writer import open_report_writer
+from resource_limits import ResourceLimitExceeded, check_uncompressed_size, limit_result, resource_guard, worker_timeout
+from worker_pool import TaskTimeout, WorkerPool
+import check_results
+import tracing
+
+'''
+Grading runner shared by the GUI (main_grader.py) and the command line (batch_grader.py).
+Nothing in here touches tkinter, so it can run on a server without a display.
+
+Importing this module is cheap: the grading algorithms (and openpyxl with them) are imported the
+first time a grading function is looked up, and numpy only when similarity checks are turned on.
+Run import_timing.py to measure it.
+'''
+
+# Where the grader keeps results of previous runs (see result_cache.py)
+RESULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".excel_grader_cache")
+# Where the grader keeps submission fingerprints of earlier sections (see similarity.py)
+SIMILARITY_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".excel_grader_similarity.npz")
+
+# How often a parallel run checks whether it was cancelled while waiting for workers
+CANCEL_POLL_SECONDS = 0.2
+
+# Per-student columns added to the report when timing_columns is on (see tracing.py)
+TIMING_COLUMNS = {"Wall ms": "wall_ms", "CPU ms": "cpu_ms", "Peak Memory KB": "peak_memory_kb"}
+
+# Grading functions that correlate to algorithms in the 'grading_algorithms.py' file (by name, see get_grading_function)
+GRADING_FUNCTIONS = {
+    "Project 1: Cafe Bloom": "grade_project_1",
+    "Project 2: Marathon Participants": "grade_project_2",
+    "Skill: Import data into workbooks": "grade_challenge_1_1",
+    "Skill: Navigate within workbooks": "grade_challenge_2",
+    "Skill: Format worksheets and workbooks": "grade_challenge_3_1"
+}
+CHALLENGES = list(GRADING_FUNCTIONS)
+
+# Look up a challenge's grading function; grading_algorithms is only imported here, once something is graded
+def get_grading_function(challenge_number):
+    import grading_algorithms
+    grading_functions = {challenge: getattr(grading_algorithms, name) for challenge, name in GRADING_FUNCTIONS.items()}
+    return grading_functions.get(challenge_number), grading_functions
+
+# Total points of a challenge, for results of files whose grader never finished (0 for an unknown challenge)
+def get_total_points(challenge_number):
+    from grading_algorithms import TOTAL_POINTS
+    return TOTAL_POINTS.get(GRADING_FUNCTIONS.get(challenge_number), 0)
+
+# Collect every student's .xlsx file in a stable (sorted) order so parallel runs report the same way each time
+# folder_path may also be an LMS zip export, whose workbooks are then read from the archive (see zip_submissions.py)
+def find_submission_files(folder_path):
+    if is_submission_archive(folder_path):
+        return find_archive_submissions(folder_path)
+    submissions = []
+    student_folders = sorted(f for f in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, f)))
+    for student_folder in student_folders:
+        student_folder_path = os.path.join(folder_path, student_folder)
+        for file in sorted(os.listdir(student_folder_path)):
+            if file.endswith(".xlsx"):
+                submissions.append((student_folder, os.path.join(student_folder_path, file)))
+    return submissions
+
+# SHA-256 of a submission's bytes, for files and workbooks inside a zip export alike
+def hash_submission(student_file_path):
+    if is_member_path(student_file_path):
+        return hash_member(student_file_path)
+    return hash_file(student_file_path)
+
+'''
+Grade a single student file with the challenge's grading function.
+This lives at module level (and looks the grading function up by name) so it can be sent to worker processes.
+Returns the score, total points, feedback and the outcome of every check ("checks", see check_results.py; None when
+the grader stopped early), or the error that stopped grading (e.g., file format issue).
+When similarity_excludes is not None the submission's similarity fingerprint is added as well.
+With trace, the submission's timing spans, wall/CPU time and peak memory are added as "trace".
+With limits (see resource_limits.py), grading is stopped once the file is too big, too slow or uses too much memory.
+'''
+def grade_file(challenge_number, student_file_path, similarity_excludes=None, trace=False, limits=None):
+    if trace:
+        with tracing.submission_trace() as metrics:
+            with tracing.span("grade", file=student_file_path):
+                result = grade_file(challenge_number, student_file_path, similarity_excludes, limits=limits)
+        result["trace"] = metrics
+        return result
+
+    grading_function, _ = get_grading_function(challenge_number)
+    print(f"Grading {student_file_path}")
+
+    total_points = get_total_points(challenge_number)
+    try:
+        source = open_submission(student_file_path)
+        if limits:
+            check_uncompressed_size(source, limits)
+        with resource_guard(limits) if limits else nullcontext(), check_results.recording() as checks:
+            score, total_points, feedback = grading_function(source)
+        result = {"score": score, "total_points": total_points, "feedback": list(feedback),
+                  "checks": None if checks.abandoned else list(checks)}
+    except ResourceLimitExceeded as e:
+        print(f"Stopped grading {student_file_path}: {e}")
+        return limit_result(e, get_total_points(challenge_number))  # Not fingerprinted either, that would hit the same limit
+    except Exception as e:
+        result = {"error": str(e), "total_points": total_points}
+
+    if similarity_excludes is not None:
+        add_fingerprint(result, student_file_path, similarity_excludes)
+    return result
+
+'''
+Grade one file for several challenges, parsing it only once: the graders share one workbook, loaded
+with everything their rubrics read (see workbook_loader.shared_loads). Returns {challenge: result}.
+'''
+def grade_file_for_challenges(challenge_numbers, student_file_path, similarity_excludes=None, trace=False, limits=None):
+    if len(challenge_numbers) == 1:
+        return {challenge_numbers[0]: grade_file(challenge_numbers[0], student_file_path, similarity_excludes, trace, limits)}
+
+    from grading_algorithms import LOAD_PLANS
+    from rubric import merge_plans
+    from workbook_loader import shared_loads
+    plan = merge_plans([LOAD_PLANS[GRADING_FUNCTIONS[challenge]] for challenge in challenge_numbers])
+    with shared_loads(plan):
+        return {challenge: grade_file(challenge, student_file_path, similarity_excludes, trace, limits)
+                for challenge in challenge_numbers}
+
+# Worker processes leave Ctrl+C to the process that started them, which cancels the run cleanly
+def ignore_interrupts():
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+# Runs first in every worker process. Workers that are spawned (not forked) start with the real stdout, so grader
+# output the parent sends to stderr (batch_grader.py keeps stdout for its JSON events) is sent there in the workers as well
+def _start_worker(initializer, stdout_to_stderr):
+    if stdout_to_stderr:
+        sys.stdout = sys.stderr
+    initializer()
+
+'''
+Pool of grading worker processes (see worker_pool.py); with max_tasks_per_child each worker is replaced after that
+many files. With limits (see resource_limits.py), a worker still grading a file well past the wall time limit is
+killed and replaced, and the file's future fails with TaskTimeout (see worker_failure_result).
+'''
+def open_worker_pool(max_workers, max_tasks_per_child=None, initializer=ignore_interrupts, limits=None):
+    return WorkerPool(max_workers, max_tasks_per_child, _start_worker, (initializer, sys.stdout is sys.stderr),
+                      task_timeout=worker_timeout(limits))
+
+# Result of a file whose worker failed: over the wall time limit if the pool had to stop it, otherwise an error
+# (e.g. the worker crashed), out of the challenge's total points either way
+def worker_failure_result(error, challenge_number):
+    total_points = get_total_points(challenge_number)
+    if isinstance(error, TaskTimeout):
+        return limit_result(ResourceLimitExceeded("wall_time", f"grading did not stop, the worker was stopped after {error.seconds:g} s"),
+                            total_points)
+    return {"error": str(error), "total_points": total_points}
+
+# Fingerprint a submission for similarity checks; files that cannot be read simply get no fingerprint
+def add_fingerprint(result, student_file_path, similarity_excludes):
+    from similarity import fingerprint_submission
+    try:
+        with tracing.span("fingerprint"):
+            result["fingerprint"] = fingerprint_submission(open_submission(student_file_path), similarity_excludes)
+    except Exception as e:
+        print(f"Could not fingerprint {student_file_path}: {e}")
+
+'''
+Grade distinct files, each for one or more challenges, and hand every result to record_result(file_hash,
+challenge, result) as it comes in. Shared by process_submissions and batch_manifest.run_manifest, with
+`files` as [(file_hash, student_file_path, [challenge, ...])]:
+    earlier_result      earlier_result(file_hash, challenge) returns a result kept from before (checkpoint
+                        journal, result cache) or None; kept results are recorded without grading again
+    preflight           files that cannot be graded are rejected for every challenge (see preflight.py);
+                        preflight_callback gets the triage summary before grading starts
+    grading             in a worker pool with max_workers > 1 or resource_limits, otherwise in this process;
+                        finish_result(file_hash, challenge, result) (journal, cache) runs before record_result
+Setting cancel_event stops handing out files; files already being graded finish. Returns whether the run
+was cancelled.
+'''
+def grade_distinct_files(files, record_result, earlier_result=None, finish_result=None, max_workers=1,
+                         resource_limits=None, max_tasks_per_child=None, preflight=True, preflight_callback=None,
+                         cancel_event=None, similarity_excludes=None, trace=False):
+    to_grade = []
+    for file_hash, student_file_path, challenges in files:
+        remaining = []
+        for challenge in challenges:
+            result = earlier_result(file_hash, challenge) if earlier_result else None
+            if result is not None:
+                record_result(file_hash, challenge, result)
+            else:
+                remaining.append(challenge)
+        if remaining:
+            to_grade.append((file_hash, student_file_path, remaining))
+
+    # Report files that cannot be graded right away (they are cheap to triage again, so not journaled or cached).
+    # A file graded for several challenges is triaged without one: missing sheets differ per challenge, and
+    # those files are graded anyway
+    if preflight:
+        with tracing.span("preflight", files=len(to_grade)):
+            verdicts = [triage_submission(student_file_path, challenges[0] if len(challenges) == 1 else None)
+                        for _, student_file_path, challenges in to_grade]
+        if preflight_callback:
+            preflight_callback(summarize(
+                [verdict for (_, _, challenges), verdict in zip(to_grade, verdicts) for _ in challenges], max_workers or 1))
+        for (file_hash, _, challenges), verdict in zip(to_grade, verdicts):
+            if verdict["status"] in REJECTED_STATUSES:
+                for challenge in challenges:
+                    record_result(file_hash, challenge, rejected_result(verdict, challenge))
+        to_grade = [graded_file for graded_file, verdict in zip(to_grade, verdicts) if verdict["status"] not in REJECTED_STATUSES]
+
+    def finish_results(file_hash, results):
+        for challenge, result in results.items():
+            if finish_result:
+                finish_result(file_hash, challenge, result)
+            record_result(file_hash, challenge, result)
+
+    def is_cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    cancelled = False
+    # Limits interrupt grading with a signal, which only works in a worker process's main thread
+    if (max_workers and max_workers > 1 and len(to_grade) > 1) or (resource_limits and to_grade):
+        with open_worker_pool(max(1, max_workers or 1), max_tasks_per_child, limits=resource_limits) as executor:
+            # A file graded for several challenges gets the wall time limit once per challenge
+            futures = {
+                executor.submit_with_timeout(worker_timeout(resource_limits, len(challenges)), grade_file_for_challenges,
+                                             challenges, student_file_path, similarity_excludes, trace, resource_limits): (file_hash, challenges)
+                for file_hash, student_file_path, challenges in to_grade
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_hash, challenges = futures[future]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # The worker itself failed (it crashed, or was stopped past the time limit): report it like any
+                        # other grading error, but skip finish_result so a resumed run tries the file again
+                        for challenge in challenges:
+                            record_result(file_hash, challenge, worker_failure_result(e, challenge))
+                        continue
+                    finish_results(file_hash, results)
+                if is_cancelled() and not cancelled:
+                    cancelled = True
+                    # Files that are already being graded cannot be cancelled; they finish and are kept
+                    pending = {future for future in pending if not future.cancel()}
+    else:
+        for file_hash, student_file_path, challenges in to_grade:
+            if is_cancelled():
+                cancelled = True
+                break
+            finish_results(file_hash, grade_file_for_challenges(challenges, student_file_path, similarity_excludes, trace))
+    return cancelled
+
+'''
+Where a run keeps its results besides the report, both optional: the per-check results store (results_store,
+see check_results.py) and the SQLite grade history (history_path, see grade_history.py), labelled run_label.
+Results are added as they come in; close() writes the store and finishes the run in the history. Used as a
+context manager, so a run that fails halfway still keeps what it collected and leaves no history open.
+'''
+class RunArchive:
+    def __init__(self, results_store=None, history_path=None, run_label=None, folder=None, challenge=None):
+        from grading_algorithms import GRADER_VERSION
+        self.results_store = results_store
+        self.run_results = check_results.RunResults(run_label, GRADER_VERSION) if results_store else None
+        self.history = None
+        if history_path:
+            from grade_history import GradeHistory
+            self.history = GradeHistory(history_path)
+            self.history_run = self.history.start_run(folder, challenge, run_label, GRADER_VERSION)
+        self.submissions = 0
+        self.closed = False
+        self.check_results_path = None
+
+    def add(self, section, student, challenge, result, file_hash=None):
+        self.submissions += 1
+        if self.run_results is not None:
+            self.run_results.add(section, student, challenge, result)
+        if self.history is not None:
+            self.history.add(self.history_run, section, student, challenge, result, file_hash)
+
+    # Returns the path of the run in the results store (None without one)
+    def close(self, cancelled=False):
+        if self.closed:
+            return self.check_results_path
+        self.closed = True
+        try:
+            if self.run_results is not None:
+                with tracing.span("check results", rows=len(self.run_results)):
+                    self.check_results_path = self.run_results.write(self.results_store, cancelled)
+        finally:
+            if self.history is not None:
+                with tracing.span("grade history"):
+                    try:
+                        self.history.finish_run(self.history_run, self.submissions, cancelled)
+                    finally:
+                        self.history.close()
+        return self.check_results_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self.close(cancelled=exc_type is not None)
+        return False
+
+'''
+Build a student's row for the grading report.
+If grading succeeded, it records the student's folder name, score, total points, percentage, and feedback.
+If an error occurred during grading, the grade is set to 0, and an error message is added to the feedback.
+With timings (see tracing.submission_trace), the TIMING_COLUMNS are filled in as well.
+'''
+def build_grade_row(student_folder, result, timings=None):
+    if "error" in result:
+        row = {
+            "Student": student_folder,
+            "Score": 0,
+            "Total Points": result["total_points"],
+            "Percentage": 0,
+            "": "",
+            "Feedback": f"Error: {result['error']}" # Appends the issue that caused an error with that student
+        }
+    else:
+        score = result["score"]
+        total_points = result["total_points"]
+        percentage = round((score / total_points) * 100, 2) if total_points > 0 else 0
+
+        row = {
+            "Student": student_folder,
+            "Score": score,
+            "Total Points": total_points,
+            "Percentage": percentage,
+            "": "",
+            "Feedback": "; ".join(result["feedback"])
+        }
+
+    if timings:
+        for column, key in TIMING_COLUMNS.items():
+            row[column] = timings[key]
+    return row
+
+# Link the users input to a called function
+# max_workers > 1 grades submissions in a pool of worker processes, otherwise they are graded one after another.
+# With a cache_dir, results are reused for files that were already graded (same bytes, challenge and grader version).
+# With a similarity_index_path, submissions are fingerprinted and near-duplicates (within this folder, or with
+# sections stored in the index earlier) are listed on a "Similarity" sheet. Shingles found in the starter or
+# solution workbooks given as similarity_excludes are ignored (by default the challenge's similarity_templates/).
+# The report is written row by row while grading (see report_writer.py) as "xlsx", "csv" or "jsonl".
+# With a trace_path, timing spans of every phase (discovery, load, each rubric check, report output) are written
+# there as a Chrome trace (see tracing.py); timing_columns adds each student's wall/CPU time and peak memory to
+# the report. Cached results have no timings.
+# Every graded file is appended to a checkpoint journal in the output folder as soon as it finishes (see
+# checkpoint.py); with resume, files journaled by an interrupted run of the same folder are not graded again.
+# Setting cancel_event (a threading.Event) stops the run: nothing new is started, files already being graded
+# finish, and a partial report of the graded submissions is saved. The journal is kept so the run can be resumed.
+# With resource_limits (see resource_limits.py), files are always graded in worker processes and a file that is
+# too big, too slow or uses too much memory is stopped and reported as "Resource limit exceeded: ...".
+# max_tasks_per_child replaces each worker process after that many files, so memory growth stays bounded.
+# With preflight, files about to be graded are triaged first (see preflight.py): corrupt, encrypted and wrong format
+# files are reported as "Not gradeable (...)" without grading them, and preflight_callback (if given) gets the
+# triage summary with the estimated grading time before grading starts.
+# With a results_store, every check outcome of every student is added to that check results store as one run
+# labelled run_label (see check_results.py), also for a cancelled run (marked as cancelled in the run's meta data).
+# With a history_path, the run, every student's result and its check outcomes are added to that SQLite grade
+# history as they come in (see grade_history.py), also for a cancelled run. Results a resumed run takes from the
+# journal were added by the interrupted run, so the store and the history only get the files graded since.
+# Returns a summary of the run ({"report", "submissions", "graded", "errors", "resource_limited", "rejected",
+# "cancelled"}, plus "check_results" with a results_store), or None if nothing was graded.
+def process_submissions(folder_path, challenge_number, output_path, progress_callback, completion_callback,
+                        max_workers=1, cache_dir=None, similarity_index_path=None, similarity_excludes=(),
+                        report_format="xlsx", trace_path=None, timing_columns=False, resume=False, cancel_event=None,
+                        resource_limits=None, max_tasks_per_child=None, preflight=True, preflight_callback=None,
+                        results_store=None, run_label=None, history_path=None):
+    grading_function, _ = get_grading_function(challenge_number)
+    
+    #Handles if user enters wrong function
+    if not grading_function:
+        completion_callback(False, "No grading function available.")
+        return
+
+    trace = bool(trace_path or timing_columns)
+    previous_recorder = tracing.start() if trace else None
+    try:
+        with tracing.span("discovery", folder=folder_path):
+            submissions = find_submission_files(folder_path)
+        # Indicates the number of files to grade
+        total_submissions = len(submissions)
+
+        report = open_report_writer(output_path, report_format, extra_columns=list(TIMING_COLUMNS) if timing_columns else ())
+
+        # Rows are written in submission order; rows that finish early wait here until the rows before them are done
+        pending_rows = {}
+        next_row = 0
+        completed = 0
+        errors = 0
+        resource_limited = 0
+        rejected = 0
+
+        from grading_algorithms import GRADER_VERSION
+        cache = ResultCache(cache_dir, GRADER_VERSION) if cache_dir else None
+        similarity_excludes = tuple(similarity_excludes) if similarity_index_path else None
+        if similarity_index_path and not similarity_excludes:
+            from similarity import default_excludes
+            similarity_excludes = default_excludes(challenge_number)
+            if not similarity_excludes:
+                print(f"Similarity: no starter workbook excluded for {challenge_number}, content every student was handed "
+                      f"counts as similar (pass similarity_excludes or put the starter file in similarity_templates/)")
+
+        section = os.path.basename(os.path.normpath(folder_path))
+        journal = CheckpointJournal(os.path.join(output_path, JOURNAL_NAME), folder_path, challenge_number, GRADER_VERSION)
+        journaled = journal.load() if resume else {}
+        # Left early (an exception), the journal is kept for a resume and the grade history is closed
+        with RunArchive(results_store, history_path, run_label, folder_path, challenge_number) as archive, \
+                journal.open(keep_existing=bool(journaled)):
+            # Group byte-identical files (by content hash) so each distinct file is graded only once
+            distinct_files = {}
+            with tracing.span("discovery: hash files", files=total_submissions):
+                for index, (student_folder, student_file_path) in enumerate(submissions):
+                    try:
+                        file_hash = hash_submission(student_file_path)
+                    except (OSError, KeyError, zipfile.BadZipFile):
+                        file_hash = student_file_path  # Unreadable file, grading will report the error
+                    distinct_files.setdefault(file_hash, (student_file_path, []))[1].append(index)
+
+            # Store a result for every student who handed in this file and update progress (used for progress bar)
+            fingerprints = {}
+            def record_result(file_hash, _, result):
+                nonlocal completed, next_row, errors, resource_limited, rejected
+                fingerprints[file_hash] = result.pop("fingerprint", None)
+                timings = result.pop("trace", None)
+                if timings:
+                    tracing.current().events.extend(timings.pop("events"))
+                for index in distinct_files[file_hash][1]:
+                    pending_rows[index] = build_grade_row(submissions[index][0], result, timings)
+                    if file_hash not in journaled:  # The interrupted run added those already
+                        archive.add(section, submissions[index][0], challenge_number, result, file_hash)
+                    completed += 1
+                    if "error" in result:
+                        errors += 1
+                    if "resource_limit" in result:
+                        resource_limited += 1
+                    if "preflight" in result:
+                        rejected += 1
+                with tracing.span("report: write rows", category="report"):
+                    while next_row in pending_rows:
+                        report.write_row(pending_rows.pop(next_row))
+                        next_row += 1
+                progress_callback(int((completed / total_submissions) * 100))
+
+            def earlier_result(file_hash, _):
+                result = journaled.get(file_hash)
+                if result is None and cache:
+                    result = cache.get(cache.key(file_hash, challenge_number))
+                if result is not None and similarity_excludes is not None and "fingerprint" not in result:
+                    add_fingerprint(result, distinct_files[file_hash][0], similarity_excludes)
+                return result
+
+            def finish_result(file_hash, _, result):
+                journal.append(file_hash, {k: v for k, v in result.items() if k != "trace"})
+                if cache and "error" not in result:
+                    # Fingerprints depend on the exclude files of a run, so they are not cached
+                    cache.put(cache.key(file_hash, challenge_number), {k: v for k, v in result.items() if k not in ("fingerprint", "trace")})
+
+            cancelled = grade_distinct_files(
+                [(file_hash, student_file_path, [challenge_number]) for file_hash, (student_file_path, _) in distinct_files.items()],
+                record_result, earlier_result, finish_result, max_workers, resource_limits, max_tasks_per_child, preflight,
+                preflight_callback, cancel_event, similarity_excludes, trace
+            )
+
+            if cache:
+                cache.evict()
+
+            if cancelled:
+                # Rows still waiting for an earlier (now never graded) submission are written as they are
+                with tracing.span("report: write rows", category="report"):
+                    for index in sorted(pending_rows):
+                        report.write_row(pending_rows.pop(index))
+
+            # Flag suspiciously similar submissions, list them on their own sheet and keep the index for later sections
+            # (not for a cancelled run, whose section is incomplete)
+            if similarity_index_path and not cancelled:
+                with tracing.span("similarity"):
+                    from similarity import SimilarityIndex
+                    index = SimilarityIndex.load(similarity_index_path)
+                    for file_hash, (_, submission_indexes) in distinct_files.items():
+                        for submission_index in submission_indexes:
+                            index.add(section, challenge_number, submissions[submission_index][0], fingerprints.get(file_hash))
+                    similar_pairs = index.find_similar_pairs()
+                    index.save(similarity_index_path)
+
+                    report.add_sheet(
+                        "Similarity",
+                        ["Student", "Section", "Similar To", "Section", "Similarity"],
+                        [[student_a, section_a, student_b, section_b, similarity]
+                         for (section_a, _, student_a), (section_b, _, student_b), similarity in similar_pairs]
+                    )
+
+            # Save the report
+            with tracing.span("report: save", category="report"):
+                output_file = report.close()
+            journal.close(completed=not cancelled)
+
+            check_results_path = archive.close(cancelled)
+    finally:
+        # Also when the run fails, so later runs on this thread do not add their spans to this recorder
+        recorder = tracing.stop(previous_recorder) if trace else None
+
+    if trace_path:
+        tracing.write_chrome_trace(trace_path, recorder.events)
+
+    summary = {"report": output_file, "submissions": total_submissions, "graded": completed, "errors": errors,
+               "resource_limited": resource_limited, "rejected": rejected, "cancelled": cancelled}
+    if results_store:
+        summary["check_results"] = check_results_path
+    if cancelled:
+        completion_callback(False, f"Grading cancelled after {completed} of {total_submissions} submissions. Partial report saved to: {output_file}")
+        return summary
+
+    # Signal completion to user with the report path
+    completion_callback(True, f"Grading complete! Report saved to: {output_file}")
+    return summary
@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from preflight import REJECTED_STATUSES, rejected_result, triage_submission
+from grading_runner import (CHALLENGES, RESULT_CACHE_DIR, get_grading_function, grade_file, ignore_interrupts, open_worker_pool,
+                            worker_failure_result)
+from resource_limits import DEFAULT_LIMITS, DEFAULT_MAX_TASKS_PER_CHILD
+from result_cache import ResultCache, hash_file
+
+'''
+Local HTTP service that grades single workbooks on demand (for instructors' scripts and the LMS
+integration), without paying for a Python start and the grader imports on every file.
+
+    python grading_service.py --workers 4 --max-queue 16
+
+The worker processes are started when the service starts and import the graders (openpyxl, numpy)
+once, so a request only costs the grading itself. The service binds to 127.0.0.1 by default; put a
+reverse proxy in front of it if it has to be reachable from elsewhere.
+
+    POST /grade?challenge=<challenge name>   body: the .xlsx file (Content-Type application/octet-stream)
+        200 {"challenge", "score", "total_points", "percentage", "feedback": [...]}
+            or {"challenge", "error", "total_points"} when the file could not be graded (plus "preflight"
+            when it is corrupt, encrypted or not a workbook, see preflight.py; those never reach a worker)
+        400 unknown challenge, empty body or an upload that ended early, 413 file too large
+        503 queue full (Retry-After header), try again later
+    GET /status       {"workers", "running", "queued", "max_queue", "graded", "rejected", "uptime_seconds"}
+    GET /challenges   the challenge names /grade accepts
+
+At most `workers` files are graded at the same time and `max_queue` more wait for a worker; further
+requests are turned away with 503 before their upload is read, hashed or triaged, so they cannot pile up. Uploads are graded under the default resource
+limits (resource_limits.py) and workers are replaced after DEFAULT_MAX_TASKS_PER_CHILD files.
+'''
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 16
+MAX_UPLOAD_MB = 50
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+# Runs in each worker process when it starts: import the graders so the first request is not slowed down
+def warm_worker():
+    ignore_interrupts()
+    get_grading_function(CHALLENGES[0])
+
+
+class GradingService:
+    def __init__(self, workers=1, max_queue=DEFAULT_MAX_QUEUE, cache_dir=None, limits=DEFAULT_LIMITS,
+                 max_tasks_per_child=DEFAULT_MAX_TASKS_PER_CHILD):
+        from grading_algorithms import GRADER_VERSION
+        self.workers = workers
+        self.max_queue = max_queue
+        self.limits = limits
+        self.cache = ResultCache(cache_dir, GRADER_VERSION) if cache_dir else None
+        self.executor = open_worker_pool(workers, max_tasks_per_child, initializer=warm_worker, limits=limits)
+        # Every worker process starts (and imports the graders) now rather than on its first request
+        for future in [self.executor.submit(os.getpid) for _ in range(workers)]:
+            future.result()
+
+        self.lock = threading.Lock()
+        self.pending = 0  # Admitted requests: uploading, being graded or waiting for a worker
+        self.graded = 0
+        self.rejected = 0
+        self.started = time.monotonic()
+
+    def status(self):
+        with self.lock:
+            return {
+                "workers": self.workers,
+                "running": min(self.pending, self.workers),
+                "queued": max(0, self.pending - self.workers),
+                "max_queue": self.max_queue,
+                "graded": self.graded,
+                "rejected": self.rejected,
+                "uptime_seconds": round(time.monotonic() - self.started, 1),
+            }
+
+    # Hold one of the workers + max_queue places for a request; raises ServiceBusy when every place is taken
+    @contextmanager
+    def admission(self):
+        with self.lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise ServiceBusy()
+            self.pending += 1
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    # Grade an uploaded file (already written to path); call it within admission()
+    def grade(self, challenge_number, path):
+        file_hash = hash_file(path)
+        cache_key = self.cache.key(file_hash, challenge_number) if self.cache else None
+        cached_result = self.cache.get(cache_key) if self.cache else None
+        if cached_result is not None:
+            with self.lock:
+                self.graded += 1
+            return cached_result
+
+        verdict = triage_submission(path, challenge_number)
+        if verdict["status"] in REJECTED_STATUSES:
+            with self.lock:
+                self.graded += 1
+            return rejected_result(verdict, challenge_number)
+
+        try:
+            result = self.executor.submit(grade_file, challenge_number, path, limits=self.limits).result()
+        except Exception as e:
+            # The worker itself failed (it crashed, or was stopped past the time limit)
+            result = worker_failure_result(e, challenge_number)
+        with self.lock:
+            self.graded += 1
+
+        if self.cache and "error" not in result:
+            self.cache.put(cache_key, result)
+        return result
+
+    def close(self):
+        self.executor.shutdown()
+
+
+class GradingRequestHandler(BaseHTTPRequestHandler):
+    service = None  # Set by create_server()
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/status":
+            self.send_json(200, self.service.status())
+        elif path == "/challenges":
+            self.send_json(200, CHALLENGES)
+        else:
+            self.send_json(404, {"error": f"Unknown path: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/grade":
+            self.send_json(404, {"error": f"Unknown path: {url.path}"})
+            return
+
+        challenge_number = parse_qs(url.query).get("challenge", [None])[0]
+        if challenge_number not in CHALLENGES:
+            self.send_json(400, {"error": f"Unknown challenge: {challenge_number}", "challenges": CHALLENGES})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self.send_json(400, {"error": "Send the .xlsx file as the request body"})
+            return
+        if length > MAX_UPLOAD_MB * 1024 * 1024:
+            self.send_json(413, {"error": f"Files over {MAX_UPLOAD_MB} MB are not graded"})
+            return
+
+        try:
+            with self.service.admission():
+                result = self.receive_and_grade(challenge_number, length)
+        except ServiceBusy:
+            self.send_json(503, {"error": "Too many files waiting to be graded, try again later"}, {"Retry-After": "5"})
+            return
+        if result is None:
+            return  # Already answered
+
+        if "error" in result:
+            body = {"challenge": challenge_number, **result}
+        else:
+            total_points = result["total_points"]
+            percentage = round((result["score"] / total_points) * 100, 2) if total_points > 0 else 0
+            body = {"challenge": challenge_number, **result, "percentage": percentage}
+        self.send_json(200, body)
+
+    # The graders read from a path, so the upload goes to a temporary file the worker can open. Returns the
+    # result, or None once an upload that ended early was answered with 400
+    def receive_and_grade(self, challenge_number, length):
+        upload = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
+        try:
+            with upload:
+                remaining = length
+                while remaining:
+                    chunk = self.rfile.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    upload.write(chunk)
+                    remaining -= len(chunk)
+            if remaining:
+                self.send_json(400, {"error": f"The upload ended after {length - remaining} of {length} bytes"})
+                return None
+            return self.service.grade(challenge_number, upload.name)
+        finally:
+            os.remove(upload.name)
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}", file=sys.stderr)
+
+
+# Start the service and return the (not yet serving) server; call serve_forever() on it
+def create_server(host="127.0.0.1", port=DEFAULT_PORT, workers=1, max_queue=DEFAULT_MAX_QUEUE, cache_dir=None):
+    service = GradingService(workers, max_queue, cache_dir)
+    handler = type("Handler", (GradingRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server, service
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade single workbooks over HTTP with warm worker processes.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--max-queue", type=int, default=DEFAULT_MAX_QUEUE,
+                        help="Files that may wait for a worker before requests are turned away")
+    parser.add_argument("--no-cache", action="store_true", help="Grade every file, even if an unchanged copy was graded before")
+    args = parser.parse_args(argv)
+
+    # The graders print progress; keep it off stdout like the other command line tools
+    with redirect_stdout(sys.stderr):
+        server, service = create_server(args.host, args.port, max(1, args.workers), max(0, args.max_queue),
+                                        None if args.no_cache else RESULT_CACHE_DIR)
+        print(f"Grading service listening on http://{args.host}:{server.server_port}")
+
+        # Ctrl+C and SIGTERM stop the service once the requests in progress are answered
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        while not stop_event.wait(1):
+            pass
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+'''
+Measure how long it takes to import the grader's entry points in a fresh interpreter.
+
+Every worker process and every batch_grader.py run pays this before grading anything, so it is
+tracked like any other performance number:
+
+    python import_timing.py                           # print the table
+    python import_timing.py --record import_times.jsonl  # also append the run (with the git commit)
+
+Each module is imported REPEATS times in a new `python` process; the median is reported together
+with the heavy libraries the import pulled in.
+'''
+
+MODULES = ["grading_runner", "batch_grader", "main_grader", "grading_algorithms", "grader_app"]
+HEAVY_MODULES = ["openpyxl", "numpy", "tkinter", "customtkinter", "pandas"]
+REPEATS = 5
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def time_import(module, repeats=REPEATS):
+    samples = []
+    loaded = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        samples.append(probe["ms"])
+        loaded = probe["loaded"]
+    return {"module": module, "median_ms": round(statistics.median(samples), 1), "loaded": loaded}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time of the grader's entry points.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--record", help="Append the results as a JSON line to this file")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        try:
+            result = time_import(module, args.repeats)
+        except subprocess.CalledProcessError as e:
+            result = {"module": module, "median_ms": None, "loaded": [], "error": e.stderr.strip().splitlines()[-1]}
+        results.append(result)
+        timing = f"{result['median_ms']:8.1f} ms" if result["median_ms"] is not None else f"  failed: {result['error']}"
+        print(f"{module:20} {timing}  {', '.join(result['loaded'])}")
+
+    if args.record:
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "imports": results,
+        }
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import io
+import json
+import os
+import sys
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+from zip_submissions import is_member_path, read_member
+
+'''
+Pre-flight triage: sort out submissions that cannot be graded before any of them is parsed.
+
+    python preflight.py --folder submissions/section_1 --challenge "Project 1: Cafe Bloom"
+
+Only the zip's central directory, [Content_Types].xml and the workbook part (for the sheet names, which
+the content types do not list) are read, so a file takes a millisecond or two instead of a full
+openpyxl load. Every submission is put into one of these groups:
+
+    gradeable       an Excel workbook with the sheets the challenge grades
+    missing_sheets  a workbook without some of those sheets (still graded, the graders give partial credit)
+    corrupt         a cut off or damaged zip, or a package without the parts every workbook has
+    encrypted       password protected (Excel stores those as an encrypted OLE file, not as a zip)
+    wrong_format    anything else renamed to .xlsx: an old .xls, a Word document, a CSV file, ...
+
+process_submissions runs this for every file it is about to grade and reports corrupt, encrypted and
+wrong_format files right away ("Not gradeable (corrupt): ..."), without sending them to a worker. The sizes in the
+central directory also give a rough cost estimate for the run (see estimate_ms).
+'''
+
+GRADEABLE = "gradeable"
+MISSING_SHEETS = "missing_sheets"
+CORRUPT = "corrupt"
+ENCRYPTED = "encrypted"
+WRONG_FORMAT = "wrong_format"
+STATUSES = [GRADEABLE, MISSING_SHEETS, CORRUPT, ENCRYPTED, WRONG_FORMAT]
+# Files with these statuses are reported without grading them
+REJECTED_STATUSES = {CORRUPT, ENCRYPTED, WRONG_FORMAT}
+
+# Sheets each challenge grades by name (the others grade the active sheet).
+# Kept in step with the rubrics in grading_algorithms.py, which this module does not import (it pulls in openpyxl)
+REQUIRED_SHEETS = {
+    "Project 1: Cafe Bloom": ["CoffeeAnalysis"],
+    "Project 2: Marathon Participants": ["Report", "Participants", "Times", "Names & Emails"],
+}
+
+# Workbook content types openpyxl can load (.xlsx, .xlsm, .xltx, .xltm)
+WORKBOOK_CONTENT_TYPES = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml",
+    "application/vnd.ms-excel.sheet.macroEnabled.main+xml",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.template.main+xml",
+    "application/vnd.ms-excel.template.macroEnabled.main+xml",
+}
+# What other Office files renamed to .xlsx are, by their main content type
+OTHER_CONTENT_TYPES = {
+    "application/vnd.ms-excel.sheet.binary.macroEnabled.main": "an Excel binary workbook (.xlsb)",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml": "a Word document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation.main+xml": "a PowerPoint presentation",
+}
+
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ENCRYPTION_STREAM = "EncryptionInfo".encode("utf-16-le")
+# Package parts read during triage are small; anything bigger than this is not an honest workbook
+MAX_PART_BYTES = 4 * 1024 * 1024
+
+# Grading time in ms: a fixed part plus a part per MB of (uncompressed) sheet XML, measured on synthetic_submissions.py cohorts
+ESTIMATE_BASE_MS = 5
+ESTIMATE_MS_PER_MB = 500
+
+_NAMESPACES = {
+    "types": "http://schemas.openxmlformats.org/package/2006/content-types",
+    "main": "http://schemas.openxmlformats.org/spreadsheetml/2006/main",
+}
+
+
+def _verdict(status, message="", sheets=(), estimated_ms=0):
+    return {"status": status, "message": message, "sheets": list(sheets), "estimated_ms": estimated_ms}
+
+
+# Rough grading time of a workbook, from the uncompressed sizes of its sheets and shared strings
+def estimate_ms(archive):
+    size = sum(info.file_size for info in archive.infolist()
+               if info.filename.startswith("xl/worksheets/") or info.filename == "xl/sharedStrings.xml")
+    return round(ESTIMATE_BASE_MS + ESTIMATE_MS_PER_MB * size / (1024 * 1024), 1)
+
+
+def _read_part(archive, info):
+    if info.file_size > MAX_PART_BYTES:
+        raise zipfile.BadZipFile(f"{info.filename} is {info.file_size // 1024} KB")
+    return ElementTree.fromstring(archive.read(info))
+
+
+# An OLE compound file is either a password protected workbook or a file from before Excel 2007
+def _ole_verdict(data):
+    if ENCRYPTION_STREAM in data:
+        return _verdict(ENCRYPTED, "the workbook is password protected, save it again without a password")
+    return _verdict(WRONG_FORMAT, "this is an old Excel (.xls) or other Office file, save it as .xlsx")
+
+
+def _package_verdict(archive, file_size, challenge_number):
+    parts = {}
+    for info in archive.infolist():
+        if info.header_offset + info.compress_size > file_size:
+            return _verdict(CORRUPT, "the file was cut off (the upload or copy did not finish)")
+        if info.flag_bits & 0x1:
+            return _verdict(ENCRYPTED, "the zip is password protected")
+        parts[info.filename] = info
+
+    content_types = parts.get("[Content_Types].xml")
+    if content_types is None:
+        if any(name.startswith("xl/") for name in parts):
+            return _verdict(CORRUPT, "the workbook has no [Content_Types].xml")
+        return _verdict(WRONG_FORMAT, "this is a zip archive, not an Excel workbook")
+
+    overrides = {
+        override.get("PartName", "").lstrip("/"): override.get("ContentType")
+        for override in _read_part(archive, content_types).findall("types:Override", _NAMESPACES)
+    }
+    workbook_parts = [part for part, content_type in overrides.items() if content_type in WORKBOOK_CONTENT_TYPES]
+    if not workbook_parts:
+        kinds = [OTHER_CONTENT_TYPES[content_type] for content_type in overrides.values() if content_type in OTHER_CONTENT_TYPES]
+        return _verdict(WRONG_FORMAT, f"this is {kinds[0] if kinds else 'not an Excel workbook'}, save it as .xlsx")
+    if workbook_parts[0] not in parts:
+        return _verdict(CORRUPT, f"the workbook part {workbook_parts[0]} is missing")
+
+    workbook = _read_part(archive, parts[workbook_parts[0]])
+    sheets = [sheet.get("name") for sheet in workbook.iterfind("main:sheets/main:sheet", _NAMESPACES)]
+    if not sheets:
+        return _verdict(CORRUPT, "the workbook has no sheets")
+
+    missing = [sheet for sheet in REQUIRED_SHEETS.get(challenge_number, []) if sheet not in sheets]
+    if missing:
+        return _verdict(MISSING_SHEETS, f"missing sheets: {', '.join(missing)}", sheets, estimate_ms(archive))
+    return _verdict(GRADEABLE, "", sheets, estimate_ms(archive))
+
+
+'''
+Triage one submission (a file path or a member path of a zip export) for a challenge (None checks no sheets).
+Returns {"status", "message", "sheets", "estimated_ms"}; estimated_ms is 0 for files that will not be graded.
+'''
+def triage_submission(student_file_path, challenge_number=None):
+    try:
+        if is_member_path(student_file_path):
+            data = read_member(student_file_path)
+            file_size, head, source = len(data), data[:8], io.BytesIO(data)
+        else:
+            file_size = os.path.getsize(student_file_path)
+            with open(student_file_path, "rb") as f:
+                head = f.read(8)
+                data = f.read() if head == OLE_SIGNATURE else None
+            source = student_file_path
+    except (OSError, KeyError, zipfile.BadZipFile) as e:
+        return _verdict(CORRUPT, f"the file could not be read ({e})")
+
+    if not head:
+        return _verdict(CORRUPT, "the file is empty")
+    if head == OLE_SIGNATURE:
+        return _ole_verdict(data)
+    if not head.startswith(b"PK"):
+        return _verdict(WRONG_FORMAT, "this is not an Excel workbook (maybe a CSV or another file renamed to .xlsx)")
+
+    try:
+        with zipfile.ZipFile(source) as archive:
+            return _package_verdict(archive, file_size, challenge_number)
+    except (zipfile.BadZipFile, zlib.error, EOFError, ElementTree.ParseError, NotImplementedError) as e:
+        return _verdict(CORRUPT, f"the workbook is damaged or was cut off ({e})")
+
+
+# Result recorded for a rejected submission of challenge_number (reported like any other grading error, out of
+# the challenge's total points)
+def rejected_result(verdict, challenge_number):
+    from grading_runner import get_total_points
+    return {"error": f"Not gradeable ({verdict['status']}): {verdict['message']}",
+            "total_points": get_total_points(challenge_number), "preflight": verdict["status"]}
+
+
+# Counts per status and the estimated grading time of the files that will be graded, on max_workers processes
+def summarize(verdicts, max_workers=1):
+    counts = {status: 0 for status in STATUSES}
+    for verdict in verdicts:
+        counts[verdict["status"]] += 1
+    estimated_seconds = sum(verdict["estimated_ms"] for verdict in verdicts) / 1000 / max(1, max_workers)
+    return {"submissions": len(verdicts), **counts, "estimated_seconds": round(estimated_seconds, 1)}
+
+
+def build_parser():
+    from grading_runner import CHALLENGES
+    parser = argparse.ArgumentParser(description="Check which submissions can be graded, without grading them.")
+    parser.add_argument("--folder", required=True, help="Folder with one sub folder per student, or an LMS zip export")
+    parser.add_argument("--challenge", choices=CHALLENGES, metavar="CHALLENGE",
+                        help="Challenge whose sheets are checked, one of: " + "; ".join(CHALLENGES))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes the estimate assumes")
+    return parser
+
+
+'''
+Prints one JSON object per submission and a summary:
+    {"event": "submission", "student": "student_04", "file": "...", "status": "corrupt", "message": "..."}
+    {"event": "summary", "submissions": 40, "gradeable": 37, ..., "estimated_seconds": 2.4}
+Exits with 1 if any submission would be rejected.
+'''
+def main(argv=None):
+    from grading_runner import find_submission_files
+    args = build_parser().parse_args(argv)
+    verdicts = []
+    for student_folder, student_file_path in find_submission_files(args.folder):
+        verdict = triage_submission(student_file_path, args.challenge)
+        verdicts.append(verdict)
+        print(json.dumps({"event": "submission", "student": student_folder, "file": student_file_path,
+                          "status": verdict["status"], "message": verdict["message"]}))
+    summary = summarize(verdicts, args.workers)
+    print(json.dumps({"event": "summary", **summary}))
+    return 1 if any(summary[status] for status in REJECTED_STATUSES) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
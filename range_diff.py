@@ -0,0 +1,149 @@
+import numpy as np
+from openpyxl.utils import range_boundaries
+from openpyxl.utils.cell import get_column_letter
+
+from workbook_loader import range_values
+
+'''
+Vectorized comparison of cell ranges.
+
+A student range and a reference (a solution table, another range of the same submission, or a
+single value for every cell) are pulled into 2D NumPy arrays and compared in one operation,
+every cell, instead of cell by cell with an early exit:
+
+    names = read_range(wb_values["Names & Emails"], "A2:A523")
+    participants = read_range(wb_values["Participants"], "B2:B523")
+    diff = diff_ranges(names, participants, transform="upper", skip=is_blank(participants))
+    if not diff.ok:
+        feedback.append(f"Incorrect name format at {diff.describe()}. Expected uppercase.")
+
+Comparison rules:
+    exact      values must be equal (the default)
+    casefold   text is compared case-insensitively, anything else must be equal
+    tolerance  numbers must be equal once rounded to `places` decimals, anything else must be equal
+transform ("upper" or "lower") is applied to the reference's text before comparing, and `skip` is a
+boolean mask of cells that are not checked at all.
+'''
+
+TRANSFORMS = {"upper": np.char.upper, "lower": np.char.lower}
+RULES = ("exact", "casefold", "tolerance")
+
+_is_text = np.frompyfunc(lambda value: isinstance(value, str), 1, 1)
+_is_number = np.frompyfunc(lambda value: isinstance(value, (int, float)) and not isinstance(value, bool), 1, 1)
+
+
+class RangeValues:
+    def __init__(self, values, min_row=1, min_col=1):
+        self.values = np.asarray(values, dtype=object)
+        if self.values.ndim == 1:
+            self.values = self.values.reshape(-1, 1)
+        self.min_row = min_row
+        self.min_col = min_col
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def coordinate(self, row_offset, column_offset):
+        return f"{get_column_letter(self.min_col + column_offset)}{self.min_row + row_offset}"
+
+
+class RangeDiff:
+    def __init__(self, student, mismatches):
+        self.student = student
+        self.mismatches = mismatches  # Boolean array, True where the student's cell is wrong
+
+    @property
+    def ok(self):
+        return not self.mismatches.any()
+
+    @property
+    def count(self):
+        return int(self.mismatches.sum())
+
+    @property
+    def coordinates(self):
+        return [self.student.coordinate(row, column) for row, column in np.argwhere(self.mismatches)]
+
+    '''
+    Compact description of the wrong cells for feedback:
+        "Names & Emails sheet cell A300"
+        "Names & Emails sheet cells A300, A301, A305 and 12 more"
+    '''
+    def describe(self, sheet=None, limit=3):
+        coordinates = self.coordinates
+        where = f"{sheet} sheet " if sheet else ""
+        if len(coordinates) == 1:
+            return f"{where}cell {coordinates[0]}"
+        listed = ", ".join(coordinates[:limit])
+        more = f" and {len(coordinates) - limit} more" if len(coordinates) > limit else ""
+        return f"{where}cells {listed}{more}"
+
+
+# Read a range ("A2:A523") of a worksheet into a RangeValues
+def read_range(ws, ref):
+    min_col, min_row, max_col, max_row = range_boundaries(ref)
+    return RangeValues(range_values(ws, min_row, min_col, max_row, max_col), min_row, min_col)
+
+
+def _values(reference, shape):
+    if isinstance(reference, RangeValues):
+        reference = reference.values
+    if isinstance(reference, (list, tuple, np.ndarray)):
+        values = np.asarray(reference, dtype=object)
+        return values.reshape(shape) if values.size == np.prod(shape) else values
+    values = np.empty(shape, dtype=object)  # A single value for every cell
+    values.fill(reference)
+    return values
+
+
+# Mask of the empty (None) cells of a range or array
+def is_blank(values):
+    if isinstance(values, RangeValues):
+        values = values.values
+    return np.equal(np.asarray(values, dtype=object), None)
+
+
+def _transform_text(values, transform):
+    text = _is_text(values).astype(bool)
+    if not text.any():
+        return values
+    transformed = values.copy()
+    transformed[text] = TRANSFORMS[transform](values[text].astype(str)).astype(object)
+    return transformed
+
+
+'''
+Compare a student range with a reference of the same shape (RangeValues, nested lists, an array or
+a single value). Returns a RangeDiff listing every cell that does not match.
+'''
+def diff_ranges(student, reference, rule="exact", places=2, transform=None, skip=None):
+    if rule not in RULES:
+        raise ValueError(f"Unknown comparison rule: {rule}")
+    if not isinstance(student, RangeValues):
+        student = RangeValues(student)
+    actual = student.values
+    expected = _values(reference, actual.shape)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Cannot compare a {actual.shape} range with a {expected.shape} reference")
+
+    if transform:
+        expected = _transform_text(expected, transform)
+
+    matches = np.equal(actual, expected).astype(bool)
+
+    if rule == "casefold":
+        both_text = (_is_text(actual) & _is_text(expected)).astype(bool)
+        if both_text.any():
+            matches[both_text] = np.char.lower(actual[both_text].astype(str)) == np.char.lower(expected[both_text].astype(str))
+    elif rule == "tolerance":
+        both_numbers = (_is_number(actual) & _is_number(expected)).astype(bool)
+        if both_numbers.any():
+            rounded_actual = np.round(actual[both_numbers].astype(float), places)
+            rounded_expected = np.round(expected[both_numbers].astype(float), places)
+            matches[both_numbers] = rounded_actual == rounded_expected
+
+    mismatches = ~matches
+    if skip is not None:
+        mismatches &= ~np.asarray(skip, dtype=bool).reshape(actual.shape)
+    return RangeDiff(student, mismatches)
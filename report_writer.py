@@ -0,0 +1,127 @@
+import csv
+import json
+import os
+
+'''
+Streaming writers for the grading report.
+
+Rows are written as soon as they are handed over, nothing is collected in memory first:
+    xlsx   write-only openpyxl workbook; the Outstanding/Good/Neutral/Bad score bands are a single
+           conditional formatting range over the Score column (B) instead of a style per cell
+    csv    one row per student, for gradebook bulk import
+    jsonl  one JSON object per student, for gradebook bulk import
+
+openpyxl is only imported when an xlsx report is opened, so csv/jsonl runs and importing this
+module stay cheap.
+
+Columns after the standard ones (e.g. per-student timings) are passed as extra_columns.
+Every writer has write_row(row), add_sheet(title, header, rows) for extra tables (csv/jsonl write
+those next to the report as <report>_<title>.<ext>) and close(), which returns the report path.
+'''
+
+REPORT_FORMATS = ("xlsx", "csv", "jsonl")
+
+# Columns of the grading report (the empty column keeps some room before the feedback in Excel)
+REPORT_HEADER = ["Student", "Score", "Total Points", "Percentage", "", "Feedback"]
+
+# Gradebook imports have no use for the spacer column
+EXPORT_HEADER = [column for column in REPORT_HEADER if column]
+
+# Score bands, checked in order against the Percentage column (D) and applied to the Score column (B)
+SCORE_BANDS = [
+    ("Outstanding", "$D2>100", "CDAEED"),  # User score over 100 (achieved bonus points)
+    ("Good", "$D2>85", "82EA85"),  # User score over 85
+    ("Neutral", "AND($D2>=70,$D2<=85)", "FFFFB3"),  # User score between 70 and 85
+    ("Bad", "$D2<70", "FF4D4D"),  # User score under 70
+]
+
+
+class XlsxReportWriter:
+    def __init__(self, path, extra_columns=()):
+        from openpyxl import Workbook
+        self.path = path
+        self.header = REPORT_HEADER + list(extra_columns)
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet("Grading Report")
+        self.ws.append(self.header)
+        self.rows = 0
+
+    def write_row(self, row):
+        self.ws.append([row.get(column, "") for column in self.header])
+        self.rows += 1
+
+    def add_sheet(self, title, header, rows):
+        ws = self.wb.create_sheet(title)
+        ws.append(header)
+        for row in rows:
+            ws.append(list(row))
+
+    def close(self):
+        from openpyxl.formatting.rule import FormulaRule
+        from openpyxl.styles import PatternFill
+        if self.rows:
+            score_range = f"B2:B{self.rows + 1}"
+            for _, formula, color in SCORE_BANDS:
+                fill = PatternFill(start_color=color, end_color=color, fill_type='solid')
+                self.ws.conditional_formatting.add(score_range, FormulaRule(formula=[formula], fill=fill, stopIfTrue=True))
+        self.wb.save(self.path)
+        return self.path
+
+
+class CsvReportWriter:
+    def __init__(self, path, extra_columns=()):
+        self.path = path
+        self.header = EXPORT_HEADER + list(extra_columns)
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.header)
+
+    def write_row(self, row):
+        self.writer.writerow([row.get(column, "") for column in self.header])
+
+    def add_sheet(self, title, header, rows):
+        with open(_extra_path(self.path, title), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+        return self.path
+
+
+class JsonlReportWriter:
+    def __init__(self, path, extra_columns=()):
+        self.path = path
+        self.header = EXPORT_HEADER + list(extra_columns)
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write_row(self, row):
+        self.file.write(json.dumps({column: row.get(column, "") for column in self.header}) + "\n")
+
+    def add_sheet(self, title, header, rows):
+        # Repeated column names ("Section", "Section") become "Section", "Section 2" so no value is lost
+        keys = []
+        for column in header:
+            keys.append(column if column not in keys else f"{column} {keys.count(column) + 1}")
+        with open(_extra_path(self.path, title), "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(dict(zip(keys, row))) + "\n")
+
+    def close(self):
+        self.file.close()
+        return self.path
+
+
+# grades_report.csv + "Similarity" -> grades_report_similarity.csv
+def _extra_path(path, title):
+    stem, extension = os.path.splitext(path)
+    return f"{stem}_{title.lower().replace(' ', '_')}{extension}"
+
+
+# Open a report writer for `grades_report.<format>` in the output folder
+def open_report_writer(output_path, report_format="xlsx", file_name="grades_report", extra_columns=()):
+    writers = {"xlsx": XlsxReportWriter, "csv": CsvReportWriter, "jsonl": JsonlReportWriter}
+    if report_format not in writers:
+        raise ValueError(f"Unknown report format: {report_format}")
+    return writers[report_format](os.path.join(output_path, f"{file_name}.{report_format}"), extra_columns)
@@ -0,0 +1,128 @@
+import os
+import signal
+import threading
+import zipfile
+from contextlib import contextmanager
+
+'''
+Per-submission resource limits, so one pathological file (a zip bomb renamed to .xlsx, a sheet with a
+million styled rows, a file openpyxl loops on) cannot stall a whole run.
+
+    limits = {"wall_seconds": 60, "uncompressed_mb": 200, "memory_mb": 1024}
+
+    uncompressed_mb  checked before anything is parsed, from the sizes in the zip's central directory
+    wall_seconds     grading is interrupted once it has taken this long
+    memory_mb        grading is interrupted once the worker's resident memory grew this much
+
+A submission that hits a limit is recorded with limit_result() ("Resource limit exceeded: ...") and
+the run continues. The limit is raised as a BaseException so the graders' own `except Exception`
+blocks do not turn it into an ordinary grading error.
+
+The wall time and memory limits use SIGALRM, so they work in worker processes (the main thread) on
+Linux and macOS; memory is read from /proc, so that limit is Linux only. Memory that Python keeps
+after a large file is returned when the worker is recycled (DEFAULT_MAX_TASKS_PER_CHILD).
+
+SIGALRM only interrupts Python code, so a worker stuck in C code (zip or XML parsing), or a grader that
+swallows the exception, would never stop by itself. The parent process therefore gives every file a
+deadline of its own (worker_timeout(): the wall time limit plus WORKER_GRACE_SECONDS) and kills and
+replaces a worker that is still busy by then (worker_pool.py).
+'''
+
+DEFAULT_LIMITS = {"wall_seconds": 60, "uncompressed_mb": 200, "memory_mb": 1024}
+# Worker processes are replaced after this many submissions, so memory growth stays bounded
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+MEMORY_POLL_SECONDS = 0.02
+# How much longer than the wall time limit the parent waits before it kills a worker
+WORKER_GRACE_SECONDS = 5
+
+_MB = 1024 * 1024
+
+
+class ResourceLimitExceeded(BaseException):
+    def __init__(self, limit, message):
+        super().__init__(message)
+        self.limit = limit  # "wall_time", "memory" or "uncompressed_size"
+
+
+# Result of a submission that was stopped by a limit (reported like any other grading error, out of the
+# challenge's total points)
+def limit_result(error, total_points=0):
+    return {"error": f"Resource limit exceeded: {error}", "total_points": total_points, "resource_limit": error.limit}
+
+
+# Seconds the parent waits for a worker grading `files` gradings of one file before it kills it (None: no deadline)
+def worker_timeout(limits, files=1):
+    if not limits or not limits.get("wall_seconds"):
+        return None
+    return limits["wall_seconds"] * files + WORKER_GRACE_SECONDS
+
+
+# Refuse workbooks that would unpack to more than limits["uncompressed_mb"] (source: path or file object)
+def check_uncompressed_size(source, limits):
+    limit_mb = limits.get("uncompressed_mb")
+    if not limit_mb:
+        return
+    try:
+        with zipfile.ZipFile(source) as archive:
+            size = sum(info.file_size for info in archive.infolist())
+    except (zipfile.BadZipFile, OSError):
+        return  # Not a zip at all, the grader reports that
+    finally:
+        if hasattr(source, "seek"):
+            source.seek(0)
+    if size > limit_mb * _MB:
+        raise ResourceLimitExceeded("uncompressed_size", f"the workbook unpacks to {size / _MB:.0f} MB (limit {limit_mb} MB)")
+
+
+def _resident_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / _MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+'''
+Interrupt the block with ResourceLimitExceeded once it runs longer than limits["wall_seconds"] or the
+process's resident memory grows more than limits["memory_mb"]. Does nothing outside the main thread
+or where SIGALRM does not exist (Windows).
+'''
+@contextmanager
+def resource_guard(limits):
+    wall_seconds = limits.get("wall_seconds")
+    memory_mb = limits.get("memory_mb")
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    breach = {"limit": ("wall_time", f"grading took longer than {wall_seconds} s")}
+    def interrupt(signum, frame):
+        raise ResourceLimitExceeded(*breach["limit"])
+
+    previous_handler = signal.signal(signal.SIGALRM, interrupt)
+    if wall_seconds:
+        signal.setitimer(signal.ITIMER_REAL, wall_seconds)
+
+    stop = threading.Event()
+    watchdog = None
+    baseline = _resident_mb() if memory_mb else None
+    if baseline is not None:
+        main_thread = threading.main_thread().ident
+        def watch_memory():
+            while not stop.wait(MEMORY_POLL_SECONDS):
+                resident = _resident_mb()
+                if resident is not None and resident - baseline > memory_mb:
+                    breach["limit"] = ("memory", f"grading used more than {memory_mb} MB of memory")
+                    signal.pthread_kill(main_thread, signal.SIGALRM)
+                    return
+        watchdog = threading.Thread(target=watch_memory, daemon=True)
+        watchdog.start()
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        stop.set()
+        if watchdog:
+            watchdog.join()
+        signal.signal(signal.SIGALRM, previous_handler)
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+'''
+On-disk cache of grading results.
+
+Results are keyed by the SHA-256 of the submitted file's bytes, the challenge name and the grader
+version (GRADER_VERSION in grading_algorithms.py), so regrading a folder after a deadline extension
+only grades the files that actually changed. Each entry is a small JSON file holding the score,
+total points and feedback the grading function returned:
+
+    <cache_dir>/<first 2 hex chars>/<key>.json
+
+Entries older than max_age_days, and the least recently used entries once the cache grows past
+max_size_mb, are removed by evict(). The watcher, the command line and the grading service share one
+cache folder, so entries are written through uniquely named temporary files, and evict() leaves
+temporary files alone until they are older than TEMP_FILE_GRACE_SECONDS (left behind by a crash).
+'''
+
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_MAX_SIZE_MB = 200
+TEMP_FILE_GRACE_SECONDS = 60 * 60
+
+
+# SHA-256 of a file's contents, read in chunks so large submissions are not held in memory
+def hash_file(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, cache_dir, grader_version, max_age_days=DEFAULT_MAX_AGE_DAYS, max_size_mb=DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.grader_version = str(grader_version)
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, file_hash, challenge_number):
+        return hashlib.sha256(f"{self.grader_version}\0{challenge_number}\0{file_hash}".encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    # Returns the stored result dict, or None on a miss (or an unreadable entry)
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - os.path.getmtime(path) > self.max_age_seconds:
+            return None
+
+        # Touch the entry so size based eviction drops the least recently used results first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temporary file first so a crash never leaves a half written entry behind. Its name is unique,
+        # as threads of one process (the grading service) may store the same result at the same time
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            self._remove(temp_path)
+            raise
+
+    # Remove expired entries, then the least recently used ones until the cache fits in max_size_mb
+    def evict(self):
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.endswith(".tmp"):
+                    # Another process may be writing it right now; only old ones were left behind by a crash
+                    if now - stat.st_mtime > TEMP_FILE_GRACE_SECONDS:
+                        self._remove(path)
+                elif now - stat.st_mtime > self.max_age_seconds:
+                    self._remove(path)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size_bytes:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,497 @@
+import re
+
+import numpy as np
+from openpyxl.utils import range_boundaries
+from openpyxl.utils.cell import get_column_letter
+
+import check_results
+import tracing
+from formula_structure import compile_structure
+from workbook_loader import load_student_workbook
+
+'''
+Declarative rubric engine.
+
+A rubric is a list of plain dicts, one per graded item, e.g.
+
+    {'id': 'B15', 'check': 'tolerance', 'sheet': 'CoffeeAnalysis', 'cell': 'B15',
+     'expected': 20.12, 'places': 2, 'points': 5,
+     'feedback': ["Cell {cell} Value Check:", "  - Received: {actual}", "  - Expected: {expected}"]}
+
+compile_rubric() turns that list into a Rubric once (at import time of the grading module). The
+compiled rubric knows exactly which sheets, cells and workbook parts its checks touch (rubric.plan),
+loads a submission with only those (rubric.load()) and runs every check in a single pass
+(rubric.grade()).
+
+Check types:
+    value          cell value equals 'expected' ('strip': True compares text without surrounding spaces)
+    tolerance      numeric cell value within 'tolerance' of 'expected', or equal after rounding to 'places'
+    formula        cell holds a formula instead of a typed in value ('structure' also checks what the formula
+                   does, e.g. {'calls': {'MAX': 'B4:B14'}}, see formula_structure.py; feedback gets {problem})
+    style          every cell in 'cell' (or 'range') has the style attributes in 'attrs', e.g. {'font.name': 'Arial'}
+    named_range    workbook defined name 'name' exists ('refers_to_endswith' also checks what it points to)
+    hyperlink      cell has no hyperlink ('target': None) or links to 'target' (and shows 'text')
+    sheet_attr     worksheet attribute(s) in 'attr'/'attrs', e.g. 'page_setup.orientation' or 'row_dimensions[1].height'
+                   ('attrs' may also map each attribute to its own expected value)
+    sheets_present workbook contains every sheet listed in 'sheets'
+
+'value', 'tolerance' and 'sheet_attr' compare against one of: 'expected', 'expected_in', 'between',
+'contains' or 'test' ('truthy', 'falsy', 'nonblank', 'nonempty').
+
+Other optional keys: 'sheet' (defaults to the active sheet), 'view' ('values' or 'formulas'),
+'default' (used when a sheet attribute is unset), 'items' (repeat a sheet_attr check for every item,
+'{item}' in the attribute path is replaced) and 'requires' (id of a check that must pass first,
+otherwise this one is skipped without feedback).
+
+grade() records every check's outcome with check_results.record() (passed, failed, skipped or error; a check
+can name a more specific failure with 'code' in its context, like the formula check's "static_value").
+'''
+
+# Worksheet attributes that depend on every cell of the sheet being loaded
+_FULL_SHEET_ATTRS = {'max_row', 'max_column', 'min_row', 'min_column', 'dimensions'}
+
+# Workbook parts each check type needs besides the cells themselves
+_CHECK_PARTS = {
+    'value': set(),
+    'tolerance': set(),
+    'formula': set(),
+    'style': {'styles'},
+    'named_range': {'defined_names'},
+    'hyperlink': {'hyperlinks'},
+    'sheet_attr': {'sheet_properties'},
+    'sheets_present': {'sheetnames'},
+}
+
+_PATH_SEGMENT = re.compile(r"^(\w+)(?:\[(.+)\])?$")
+
+
+# What a rubric needs from a submission: the cells per sheet (None = whole sheet) and the workbook parts
+class RubricPlan:
+    def __init__(self):
+        self.sheets = {}
+        self.parts = set()
+
+    def add_cells(self, sheet, coordinates):
+        if sheet in self.sheets and self.sheets[sheet] is None:
+            return
+        self.sheets.setdefault(sheet, set()).update(coordinates)
+
+    def add_full_sheet(self, sheet):
+        self.sheets[sheet] = None
+
+    # Cells to load for a sheet, or None when the whole sheet (or a sheet outside the plan) is needed
+    def cells_for(self, sheet_name, is_active=False):
+        if sheet_name in self.sheets:
+            cells = self.sheets[sheet_name]
+            if is_active and None in self.sheets:
+                if cells is None or self.sheets[None] is None:
+                    return None
+                return cells | self.sheets[None]
+            return cells
+        if is_active and None in self.sheets:
+            return self.sheets[None]
+        return None
+
+    def __repr__(self):
+        sheets = {
+            sheet if sheet is not None else '<active>': 'all cells' if cells is None else sorted(cells)
+            for sheet, cells in self.sheets.items()
+        }
+        return f"RubricPlan(sheets={sheets}, parts={sorted(self.parts)})"
+
+
+# One plan that loads everything the given plans load; a None plan (every cell) makes the result None
+def merge_plans(plans):
+    merged = RubricPlan()
+    for plan in plans:
+        if plan is None:
+            return None
+        for sheet, cells in plan.sheets.items():
+            if cells is None:
+                merged.add_full_sheet(sheet)
+            else:
+                merged.add_cells(sheet, cells)
+        merged.parts |= plan.parts
+    return merged
+
+
+# Expand a cell ("A1") or a cell range ("A1:B3") into the coordinates it covers
+def expand_range(ref):
+    min_col, min_row, max_col, max_row = range_boundaries(ref)
+    return [
+        f"{get_column_letter(col)}{row}"
+        for row in range(min_row, max_row + 1)
+        for col in range(min_col, max_col + 1)
+    ]
+
+
+# Follow a dotted attribute path such as "oddHeader.left.text" or "column_dimensions[A].width".
+# Missing attributes resolve to None, like the hasattr() guards the graders used to have.
+def _compile_path(path):
+    steps = []
+    for segment in path.split('.'):
+        match = _PATH_SEGMENT.match(segment)
+        if not match:
+            raise ValueError(f"Invalid attribute path: {path}")
+        name, key = match.groups()
+        if key is not None:
+            key = key.strip("'\"")
+            key = int(key) if key.isdigit() else key
+        steps.append((name, key))
+
+    def resolve(obj):
+        for name, key in steps:
+            obj = getattr(obj, name, None)
+            if obj is not None and key is not None:
+                obj = obj[key]
+            if obj is None:
+                return None
+        return obj
+
+    return resolve
+
+
+def _compile_comparison(check):
+    if 'expected_in' in check:
+        options = check['expected_in']
+        return lambda actual: actual in options
+    if 'between' in check:
+        low, high = check['between']
+        return lambda actual: actual is not None and low <= actual <= high
+    if 'contains' in check:
+        text = check['contains']
+        return lambda actual: actual is not None and text in str(actual)
+    if 'test' in check:
+        return {
+            'truthy': lambda actual: bool(actual),
+            'falsy': lambda actual: not actual,
+            'nonblank': lambda actual: actual is not None and bool(str(actual).strip()),
+            'nonempty': lambda actual: actual is not None and len(actual) > 0,
+        }[check['test']]
+
+    expected = check['expected']
+    if 'tolerance' in check or 'places' in check:
+        tolerance = check.get('tolerance')
+        places = check.get('places')
+
+        def numeric_match(actual):
+            if actual is None:
+                return False
+            try:
+                actual = float(actual)
+            except (TypeError, ValueError):
+                return False
+            if tolerance is not None:
+                return abs(actual - float(expected)) <= tolerance
+            return round(actual, places) == round(float(expected), places)
+
+        return numeric_match
+    if check.get('strip'):
+        expected_text = str(expected).strip()
+        return lambda actual: str(actual).strip() == expected_text
+    return lambda actual: actual == expected
+
+
+# A compiled check: evaluate(student_wb) returns (passed, values used to fill in the feedback)
+class CompiledCheck:
+    def __init__(self, check, evaluate):
+        self.id = check['id']
+        self.check = check['check']
+        self.points = check.get('points', 0)
+        self.requires = check.get('requires')
+        self.cell = check.get('cell')
+        feedback = check.get('feedback', [])
+        self.feedback = [feedback] if isinstance(feedback, str) else list(feedback)
+        self.evaluate = evaluate
+
+
+def _sheet_getter(check, view):
+    sheet = check.get('sheet')
+    if sheet is None:
+        return lambda student_wb: getattr(student_wb, view).active
+    return lambda student_wb: getattr(student_wb, view)[sheet]
+
+
+# resolve(reference) for formula_structure: the cells a table or name reference in the formula of cell `key`
+# (sheet title, row, column) stands for. Tables are looked up on every sheet, so only formulas that use them pay for it
+def _reference_resolver(student_wb, key):
+    evaluator = None
+
+    def resolve(reference):
+        nonlocal evaluator
+        if evaluator is None:
+            from formula_eval import FormulaEvaluator
+            evaluator = FormulaEvaluator(student_wb.formulas, {})
+        cells = evaluator.resolve(reference, key)
+        return ("ref", *cells) if cells else None
+    return resolve
+
+
+def _compile_cell_check(check, plan):
+    view = check.get('view', 'values' if check['check'] in ('value', 'tolerance') else 'formulas')
+    get_sheet = _sheet_getter(check, view)
+    cell = check['cell']
+    plan.add_cells(check.get('sheet'), [cell])
+    base = {'cell': cell, 'sheet': check.get('sheet'), 'expected': check.get('expected')}
+
+    if check['check'] == 'formula':
+        structure = None
+        if 'structure' in check:
+            structure = compile_structure(check['structure'], check.get('sheet'))
+            plan.parts.add('tables')  # Structured references count as the table columns they name
+
+        def evaluate(student_wb):
+            ws = get_sheet(student_wb)
+            cell_obj = ws[cell]
+            if cell_obj.data_type != 'f':
+                return False, dict(base, actual=cell_obj.value, problem="no formula found (cell contains a static value)",
+                                   code="static_value")
+            problem = None
+            if structure:
+                problem = structure(getattr(cell_obj.value, 'text', cell_obj.value),
+                                    _reference_resolver(student_wb, (ws.title, cell_obj.row, cell_obj.column)))
+            return problem is None, dict(base, actual=cell_obj.value, problem=problem, code="formula_structure")
+        return evaluate
+
+    if check['check'] == 'hyperlink':
+        target = check.get('target')
+        text = check.get('text')
+
+        def evaluate(student_wb):
+            cell_obj = get_sheet(student_wb)[cell]
+            link = cell_obj.hyperlink
+            if target is None:
+                return not link, dict(base, actual=link.target if link else None)
+            passed = bool(link) and link.target == target and (text is None or cell_obj.value == text)
+            return passed, dict(base, actual=link.target if link else None)
+        return evaluate
+
+    matches = _compile_comparison(check)
+
+    def evaluate(student_wb):
+        actual = get_sheet(student_wb)[cell].value
+        return matches(actual), dict(base, actual=actual)
+    return evaluate
+
+
+# Position of each style record id in a cell's style array (openpyxl StyleArray); cells share these records
+_STYLE_COMPONENTS = {'font': 0, 'fill': 1, 'border': 2, 'number_format': 3, 'protection': 4, 'alignment': 5}
+
+
+# The style record ids of one component for a list of (row, column) positions; cells that do not exist use record 0
+def _style_ids(ws, positions, component):
+    cells = ws._cells
+    return np.fromiter(
+        (cells[position]._style[component] if position in cells else 0 for position in positions),
+        dtype=np.int64, count=len(positions)
+    )
+
+
+'''
+Style checks. When every attribute lives in a shared style record (font.*, fill.*, border.*, ...), each
+distinct record used in the range is resolved once (through the first cell using it) and the range is
+answered from its array of record ids; otherwise every cell is resolved.
+'''
+def _compile_style_check(check, plan):
+    get_sheet = _sheet_getter(check, 'formulas')
+    ref = check.get('range', check.get('cell'))
+    coordinates = expand_range(ref)
+    plan.add_cells(check.get('sheet'), coordinates)
+    attrs = [(path, _compile_path(path), expected) for path, expected in check['attrs'].items()]
+    base = {'cell': ref, 'sheet': check.get('sheet')}
+
+    components = [_STYLE_COMPONENTS.get(path.split('.')[0]) for path, _, _ in attrs]
+    if None in components:
+        def evaluate(student_wb):
+            ws = get_sheet(student_wb)
+            for coordinate in coordinates:
+                cell_obj = ws[coordinate]
+                for path, resolve, expected in attrs:
+                    actual = resolve(cell_obj)
+                    if actual != expected:
+                        return False, dict(base, actual=actual, expected=expected, item=coordinate)
+            return True, base
+        return evaluate
+
+    positions = []
+    for coordinate in coordinates:
+        min_col, min_row, _, _ = range_boundaries(coordinate)
+        positions.append((min_row, min_col))
+
+    def evaluate(student_wb):
+        ws = get_sheet(student_wb)
+        first_failure = None  # (index in the range, attribute index, actual value)
+        for attr_index, ((path, resolve, expected), component) in enumerate(zip(attrs, components)):
+            ids = _style_ids(ws, positions, component)
+            distinct_ids, first_index = np.unique(ids, return_index=True)
+            wrong_ids = []
+            for style_id, index in zip(distinct_ids, first_index):
+                if resolve(ws[coordinates[index]]) != expected:
+                    wrong_ids.append(style_id)
+            if not wrong_ids:
+                continue
+            index = int(np.argmax(np.isin(ids, wrong_ids)))
+            if first_failure is None or index < first_failure[0]:
+                first_failure = (index, attr_index)
+
+        if first_failure is None:
+            return True, base
+        index, attr_index = first_failure
+        # Report the first attribute that is wrong at the first wrong cell, like a cell-by-cell scan would
+        cell_obj = ws[coordinates[index]]
+        for path, resolve, expected in attrs:
+            actual = resolve(cell_obj)
+            if actual != expected:
+                return False, dict(base, actual=actual, expected=expected, item=coordinates[index])
+        return False, dict(base, actual=None, expected=attrs[attr_index][2], item=coordinates[index])
+    return evaluate
+
+
+def _compile_named_range_check(check, plan):
+    name = check['name']
+    refers_to_endswith = check.get('refers_to_endswith')
+    base = {'name': name, 'expected': refers_to_endswith}
+
+    def evaluate(student_wb):
+        defined_names = student_wb.formulas.defined_names
+        if name not in defined_names:
+            return False, dict(base, actual=None)
+        if refers_to_endswith is None:
+            return True, base
+        attr_text = defined_names[name].attr_text
+        return attr_text.endswith(refers_to_endswith), dict(base, actual=attr_text)
+    return evaluate
+
+
+def _compile_sheet_attr_check(check, plan):
+    get_sheet = _sheet_getter(check, 'formulas')
+    attrs = check.get('attrs') or [check['attr']]
+    if isinstance(attrs, dict):
+        # Each attribute has its own expected value, the other comparison options are shared
+        attrs = [(attr, _compile_comparison(dict(check, expected=expected))) for attr, expected in attrs.items()]
+    else:
+        matches = _compile_comparison(check)
+        attrs = [(attr, matches) for attr in attrs]
+    items = check.get('items', [None])
+    default = check.get('default')
+
+    resolvers = []
+    for item in items:
+        for attr, matches in attrs:
+            path = attr.replace('{item}', str(item)) if item is not None else attr
+            resolvers.append((item, _compile_path(path), matches))
+            root = path.split('.')[0].split('[')[0]
+            if root in _FULL_SHEET_ATTRS:
+                plan.add_full_sheet(check.get('sheet'))
+            elif root == 'tables':
+                plan.parts.add('tables')
+
+    if check.get('sheet') not in plan.sheets:
+        plan.add_cells(check.get('sheet'), [])
+    base = {'sheet': check.get('sheet'), 'expected': check.get('expected')}
+
+    def evaluate(student_wb):
+        ws = get_sheet(student_wb)
+        for item, resolve, matches in resolvers:
+            actual = resolve(ws)
+            if default is not None and not actual:
+                actual = default
+            if not matches(actual):
+                return False, dict(base, actual=actual, item=item)
+        return True, base
+    return evaluate
+
+
+def _compile_sheets_present_check(check, plan):
+    sheets = list(check['sheets'])
+    base = {'expected': ", ".join(sheets)}
+
+    def evaluate(student_wb):
+        sheet_names = student_wb.formulas.sheetnames
+        missing = [sheet for sheet in sheets if sheet not in sheet_names]
+        return not missing, dict(base, actual=", ".join(missing))
+    return evaluate
+
+
+_COMPILERS = {
+    'value': _compile_cell_check,
+    'tolerance': _compile_cell_check,
+    'formula': _compile_cell_check,
+    'hyperlink': _compile_cell_check,
+    'style': _compile_style_check,
+    'named_range': _compile_named_range_check,
+    'sheet_attr': _compile_sheet_attr_check,
+    'sheets_present': _compile_sheets_present_check,
+}
+
+
+class Rubric:
+    def __init__(self, checks, plan, catch_errors=False):
+        self.checks = checks
+        self.plan = plan
+        self.catch_errors = catch_errors
+
+    # Load a submission with only the sheets, cells and parts this rubric (and its grader) reads
+    def load(self, student_path):
+        return load_student_workbook(student_path, plan=self.plan)
+
+    # Run every check against a loaded submission, returns (score, feedback)
+    def grade(self, student_wb):
+        score = 0
+        feedback = []
+        passed_checks = set()
+
+        for check in self.checks:
+            if check.requires is not None and check.requires not in passed_checks:
+                check_results.record(check.id, 0, check.points, check_results.SKIPPED)
+                continue
+
+            try:
+                with tracing.span(check.id, category="check", check=check.check):
+                    passed, context = check.evaluate(student_wb)
+            except Exception as e:
+                if not self.catch_errors:
+                    raise
+                where = f"cell {check.cell}" if check.cell else f"check {check.id}"
+                print(f"Error processing {where}: {e}")
+                feedback.append(f"Error processing {where}: {e}")
+                check_results.record(check.id, 0, check.points, check_results.ERROR)
+                continue
+
+            if passed:
+                score += check.points
+                passed_checks.add(check.id)
+                check_results.record(check.id, check.points, check.points, check_results.PASSED)
+            else:
+                feedback.extend(line.format(**context) for line in check.feedback)
+                check_results.record(check.id, 0, check.points, context.get('code', check_results.FAILED))
+
+        return score, feedback
+
+
+'''
+Compile a list of rubric checks once.
+`reads` lists what hand-written grading code around the rubric reads as well: {sheet: ["A4:B14", ...]},
+where a sheet mapped to None is needed in full. Sheet None is the active sheet.
+'''
+def compile_rubric(checks, reads=None, catch_errors=False):
+    plan = RubricPlan()
+    compiled = []
+
+    for index, check in enumerate(checks):
+        check = dict(check)
+        check.setdefault('id', check.get('cell') or f"{check['check']}_{index + 1}")
+        kind = check['check']
+        if kind not in _COMPILERS:
+            raise ValueError(f"Unknown rubric check type: {kind}")
+        compiled.append(CompiledCheck(check, _COMPILERS[kind](check, plan)))
+        plan.parts.update(_CHECK_PARTS[kind])
+
+    for sheet, ranges in (reads or {}).items():
+        if ranges is None:
+            plan.add_full_sheet(sheet)
+            continue
+        for ref in ranges:
+            plan.add_cells(sheet, expand_range(ref))
+
+    return Rubric(compiled, plan, catch_errors)
@@ -0,0 +1,289 @@
+import os
+import posixpath
+import re
+import zipfile
+import zlib
+from functools import lru_cache
+from xml.etree.ElementTree import fromstring, iterparse
+
+import numpy as np
+
+'''
+Near-duplicate submission detection.
+
+Every submission gets a fingerprint: the set of its cell values, formulas and style choices (per sheet
+and cell), read straight from the workbook XML. Anything that is also in the starter/solution files
+passed as `exclude_paths` is dropped, so only what the student changed counts. The fingerprint is
+compressed into a MinHash signature (NUM_PERMUTATIONS numbers whose agreement estimates the Jaccard
+similarity of two fingerprints), and SimilarityIndex buckets signatures by bands (LSH) so only
+submissions that share a band are ever compared. That keeps a 1,000 student cohort near-linear
+instead of comparing every pair.
+
+The index is saved as a .npz file, so later sections can be checked against earlier ones.
+
+Exclude the workbook handed out to everyone. Without it, the template's cells are most of every fingerprint,
+so every submission lands in the same buckets, and buckets are cut off at MAX_BUCKET_SIZE members (a
+warning is printed when that happens), which can hide real near-duplicates. Starter files put in
+similarity_templates/ (named after the challenge like answer keys, e.g. project_1_cafe_bloom.xlsx or
+project_1_cafe_bloom_starter.xlsx) are excluded by default (default_excludes()).
+'''
+
+# Bump when the fingerprint or signature changes, so stored signatures are not compared with new ones
+FINGERPRINT_VERSION = 1
+
+NUM_PERMUTATIONS = 128
+BANDS = 16  # 16 bands of 8 rows: pairs above ~0.7 similarity are very likely to share a bucket
+DEFAULT_THRESHOLD = 0.8
+
+# Buckets with more members than this (e.g. dozens of untouched starter files) are only partly paired
+MAX_BUCKET_SIZE = 50
+
+# Starter workbooks excluded from every fingerprint of their challenge (see default_excludes)
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "similarity_templates")
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_random = np.random.RandomState(20240901)
+_PERM_A = _random.randint(1, (1 << 31) - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _random.randint(0, (1 << 31) - 1, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _read_xml(archive, name):
+    try:
+        return fromstring(archive.read(name))
+    except KeyError:
+        return None
+
+
+def _shared_strings(archive):
+    root = _read_xml(archive, "xl/sharedStrings.xml")
+    if root is None:
+        return []
+    return ["".join(t.text or "" for t in si.iter(f"{_MAIN_NS}t")) for si in root.iter(f"{_MAIN_NS}si")]
+
+
+# One signature string per cellXfs entry (font, fill, border and number format), independent of style ids
+def _style_signatures(archive):
+    root = _read_xml(archive, "xl/styles.xml")
+    if root is None:
+        return []
+
+    def records(tag, child):
+        parent = root.find(f"{_MAIN_NS}{tag}")
+        if parent is None:
+            return []
+        return [zlib.crc32(_element_text(element).encode("utf-8")) for element in parent.findall(f"{_MAIN_NS}{child}")]
+
+    fonts = records("fonts", "font")
+    fills = records("fills", "fill")
+    borders = records("borders", "border")
+
+    signatures = []
+    cell_xfs = root.find(f"{_MAIN_NS}cellXfs")
+    for xf in (cell_xfs.findall(f"{_MAIN_NS}xf") if cell_xfs is not None else []):
+        def pick(table, attr):
+            index = int(xf.get(attr, 0))
+            return table[index] if index < len(table) else 0
+        signatures.append(f"{pick(fonts, 'fontId')}:{pick(fills, 'fillId')}:{pick(borders, 'borderId')}:{xf.get('numFmtId', 0)}")
+    return signatures
+
+
+def _element_text(element):
+    parts = [element.tag.replace(_MAIN_NS, "")]
+    parts.extend(f"{key}={value}" for key, value in sorted(element.attrib.items()))
+    parts.extend(_element_text(child) for child in element)
+    return "(" + " ".join(parts) + ")"
+
+
+# Map sheet names to their XML part inside the archive
+def _sheet_parts(archive):
+    workbook = _read_xml(archive, "xl/workbook.xml")
+    rels = _read_xml(archive, "xl/_rels/workbook.xml.rels")
+    if workbook is None or rels is None:
+        return []
+
+    targets = {}
+    for rel in rels.iter(f"{_PKG_REL_NS}Relationship"):
+        target = rel.get("Target", "")
+        targets[rel.get("Id")] = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+    sheets = []
+    for sheet in workbook.iter(f"{_MAIN_NS}sheet"):
+        target = targets.get(sheet.get(f"{_REL_NS}id"))
+        if target:
+            sheets.append((sheet.get("name"), target))
+    return sheets
+
+
+def _normalize_formula(formula):
+    return "".join(formula.split()).upper()
+
+
+# The raw shingles (as 32 bit hashes) of a workbook: values, formulas and styles per sheet and cell
+def workbook_shingles(source):
+    shingles = set()
+    with zipfile.ZipFile(source) as archive:
+        shared_strings = _shared_strings(archive)
+        styles = _style_signatures(archive)
+
+        for sheet_name, part in _sheet_parts(archive):
+            try:
+                stream = archive.open(part)
+            except KeyError:
+                continue
+            with stream:
+                for _, element in iterparse(stream):
+                    if element.tag != f"{_MAIN_NS}c":
+                        continue
+                    coordinate = element.get("r", "")
+                    formula = element.findtext(f"{_MAIN_NS}f")
+                    value = element.findtext(f"{_MAIN_NS}v")
+                    if value is None and element.get("t") == "inlineStr":
+                        value = "".join(t.text or "" for t in element.iter(f"{_MAIN_NS}t"))
+                    elif value is not None and element.get("t") == "s":
+                        index = int(value)
+                        value = shared_strings[index] if index < len(shared_strings) else value
+
+                    if formula:
+                        shingles.add(f"f|{sheet_name}|{coordinate}|{_normalize_formula(formula)}")
+                    elif value is not None:
+                        shingles.add(f"v|{sheet_name}|{coordinate}|{value.strip()}")
+
+                    style = int(element.get("s", 0))
+                    if style and style < len(styles):
+                        shingles.add(f"s|{sheet_name}|{coordinate}|{styles[style]}")
+                    element.clear()
+
+    return {zlib.crc32(shingle.encode("utf-8")) for shingle in shingles}
+
+
+# Shingles shared by every student (starter file, solution) are read once per process
+@lru_cache(maxsize=8)
+def _excluded_shingles(exclude_paths):
+    excluded = set()
+    for path in exclude_paths:
+        excluded |= workbook_shingles(path)
+    return frozenset(excluded)
+
+
+def minhash_signature(shingles):
+    if not shingles:
+        return np.full(NUM_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint32)
+    values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    hashed = (_PERM_A[:, None] * values[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+'''
+Fingerprint a submission (path or binary file-like object) as a MinHash signature.
+Returned as a plain dict so it can travel back from worker processes.
+'''
+def fingerprint_submission(source, exclude_paths=()):
+    shingles = workbook_shingles(source)
+    if exclude_paths:
+        shingles -= _excluded_shingles(tuple(exclude_paths))
+    return {"version": FINGERPRINT_VERSION, "size": len(shingles), "signature": minhash_signature(shingles).tolist()}
+
+
+# The starter workbooks in `directory` for a challenge: <challenge name>.xlsx and <challenge name>_*.xlsx
+def default_excludes(challenge, directory=TEMPLATE_DIR):
+    if not os.path.isdir(directory):
+        return ()
+    name = re.sub(r"[^a-z0-9]+", "_", str(challenge).lower()).strip("_")
+    return tuple(sorted(
+        os.path.join(directory, file_name) for file_name in os.listdir(directory)
+        if file_name.lower().endswith(".xlsx") and (file_name[:-5].lower() == name or file_name.lower().startswith(name + "_"))
+    ))
+
+
+class SimilarityIndex:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.labels = []  # (section, challenge, student) per signature
+        self.signatures = []
+        self.positions = {}
+        self.fresh = set()  # Positions added or updated since loading; pairs of older entries were reported before
+        self.truncated_buckets = 0  # Buckets the last find_similar_pairs() cut off at MAX_BUCKET_SIZE
+
+    @classmethod
+    def load(cls, path, threshold=DEFAULT_THRESHOLD):
+        index = cls(threshold)
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) == FINGERPRINT_VERSION:
+                    index.labels = [tuple(label) for label in data["labels"].tolist()]
+                    index.signatures = list(data["signatures"])
+                    index.positions = {label: position for position, label in enumerate(index.labels)}
+        return index
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        labels = np.array(self.labels, dtype=str).reshape(-1, 3)
+        signatures = np.array(self.signatures, dtype=np.uint32).reshape(-1, NUM_PERMUTATIONS)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, version=FINGERPRINT_VERSION, labels=labels, signatures=signatures)
+
+    # Add (or replace) a student's signature for a section and challenge
+    def add(self, section, challenge, student, fingerprint):
+        if not fingerprint or fingerprint.get("version") != FINGERPRINT_VERSION or not fingerprint.get("size"):
+            return
+        label = (str(section), str(challenge), str(student))
+        signature = np.asarray(fingerprint["signature"], dtype=np.uint32)
+        if label in self.positions:
+            position = self.positions[label]
+            self.signatures[position] = signature
+        else:
+            position = len(self.labels)
+            self.positions[label] = position
+            self.labels.append(label)
+            self.signatures.append(signature)
+        self.fresh.add(position)
+
+    '''
+    Pairs of submissions (for the same challenge) whose estimated similarity is at least the threshold.
+    Pairs where neither submission was added since loading are skipped, they were reported by an earlier run.
+    Returns [(label_a, label_b, similarity)], most similar first.
+    '''
+    def find_similar_pairs(self):
+        if len(self.signatures) < 2:
+            return []
+
+        signatures = np.vstack(self.signatures)
+        rows = NUM_PERMUTATIONS // BANDS
+        buckets = {}
+        for position, (_, challenge, _) in enumerate(self.labels):
+            for band in range(BANDS):
+                key = (challenge, band, signatures[position, band * rows:(band + 1) * rows].tobytes())
+                buckets.setdefault(key, []).append(position)
+
+        candidates = set()
+        truncated = []
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET_SIZE:
+                truncated.append(len(members))
+            # New submissions first, so a large bucket of old entries cannot crowd them out
+            members = sorted(members, key=lambda position: position not in self.fresh)[:MAX_BUCKET_SIZE]
+            for i, first in enumerate(members):
+                for second in members[i + 1:]:
+                    if first in self.fresh or second in self.fresh:
+                        candidates.add((min(first, second), max(first, second)))
+
+        self.truncated_buckets = len(truncated)
+        if truncated:
+            print(f"Similarity: {len(truncated)} buckets had more than {MAX_BUCKET_SIZE} submissions (largest {max(truncated)}), "
+                  f"only {MAX_BUCKET_SIZE} of each were compared and near-duplicates may be missed. Exclude the starter "
+                  f"workbook (see similarity.py) so its content does not put every submission in the same bucket.")
+
+        pairs = []
+        for first, second in candidates:
+            similarity = float(np.mean(signatures[first] == signatures[second]))
+            if similarity >= self.threshold:
+                pairs.append((self.labels[first], self.labels[second], round(similarity, 3)))
+        pairs.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+        return pairs
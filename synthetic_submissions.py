@@ -0,0 +1,319 @@
+import argparse
+import io
+import json
+import os
+import random
+import re
+import zipfile
+
+from grading_runner import CHALLENGES
+
+'''
+Synthetic student submissions for benchmarking (see benchmark.py).
+
+Builds a submissions folder the way the grader expects it (one sub folder per student, each with
+one .xlsx file) for any challenge in grading_runner.GRADING_FUNCTIONS. Every student is one of:
+    correct    the workbook the grader expects
+    partial    one or two of the challenge's MISTAKES
+    corrupt    a truncated workbook or bytes that are not a zip file at all
+    oversized  a correct workbook with a large extra "Padding" sheet
+
+    python synthetic_submissions.py cohorts/project_2 --challenge "Project 2: Marathon Participants" --count 1000
+
+Workbooks are only built once per distinct variant. Each student's copy gets its own zip comment,
+so every file still has its own content hash (no dedupe or cache hits in benchmarks) without
+building thousands of workbooks. A synthetic_cohort.json file next to the student folders records
+which variant every student got.
+'''
+
+DEFAULT_MIX = {"correct": 0.6, "partial": 0.3, "corrupt": 0.05, "oversized": 0.05}
+DEFAULT_PADDING_ROWS = 20000
+COHORT_MANIFEST = "synthetic_cohort.json"
+
+# Project 1 lookup tables (country -> price / rating) and the formulas (with their cached results) the sheet needs
+PROJECT_1_PRICES = {'Taiwan': 10.15, 'United States': 9.24, 'Japan': 10.75, 'Hawaii': 18.15, 'Hong Kong': 15.62,
+                    'Guatemala': 3.55, 'China': 22.53, 'Canada': 4.99, 'England': 50.41, 'Australia': 69.00, 'Kenya': 6.91}
+PROJECT_1_RATINGS = {'Taiwan': 93.64, 'United States': 93.24, 'Japan': 92.38, 'Hawaii': 93.42, 'Hong Kong': 92.67,
+                     'Guatemala': 90.5, 'China': 90, 'Canada': 93.6, 'England': 94.5, 'Australia': 96, 'Kenya': 94}
+PROJECT_1_FORMULAS = {
+    "B15": ("=AVERAGE(B4:B14)", 20.118181818),
+    "E15": ("=AVERAGE(E4:E14)", 93.08520928987156),
+    "I4": ("=INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0))", "Australia"),
+    "I5": ("=INDEX(A4:A14,MATCH(MIN(B4:B14),B4:B14,0))", "Guatemala"),
+    "I7": ("=XLOOKUP(MAX(E4:E14),E4:E14,D4:D14)", "Australia"),
+    "I8": ("=XLOOKUP(MIN(E4:E14),E4:E14,D4:D14)", "China"),
+    "I12": ("=AVERAGE(LEN(A4:A14))", 269.75607779578604),
+    "I13": ("=MAX(LEN(A4:A14))", 509),
+    "I14": ("=MIN(LEN(A4:A14))", 66),
+    "I18": ("=I4", "Australia"),
+}
+
+PROJECT_2_REPORT_VALUES = {"B2": 917, "B3": 283, "B4": 332, "D2": 574, "D3": 689, "D4": 308, "F2": 801, "F3": 931,
+                           "F4": 407, "H2": 11, "H3": 478, "H4": 70, "B7": 522, "B8": 49}
+
+CHALLENGE_1_1_ROWS = [
+    ["CustomerID", "FirstName", "LastName", "Email"],
+    [101, "John", "Doe", "johndoe@example.com"],
+    [102, "Jane", "Smith", "janesmith@example.com"],
+    [103, "Michael", "Johnson", "mjohnson@example.com"],
+    [104, "Peter", "Parker", "pparker@dailybugle.com"],
+    [105, "Tony", "Stark", "tstark@starkindustries.com"]
+]
+
+# Mistakes a "partial" submission can make, per challenge
+MISTAKES = {
+    "Project 1: Cafe Bloom": ["wrong_price", "wrong_lookup", "wrong_length"],
+    "Project 2: Marathon Participants": ["wrong_report_value", "lowercase_name", "missing_table"],
+    "Skill: Import data into workbooks": ["wrong_name", "missing_row"],
+    "Skill: Navigate within workbooks": ["wrong_font", "hyperlink_left", "no_named_range"],
+    "Skill: Format worksheets and workbooks": ["portrait", "narrow_column", "gridlines"],
+}
+
+
+# openpyxl writes formulas without a cached result; put the value Excel would have stored next to each formula
+def _add_cached_values(data, sheet_part, cached_values):
+    source = zipfile.ZipFile(io.BytesIO(data))
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            content = source.read(item.filename)
+            if item.filename == sheet_part:
+                xml = content.decode("utf-8")
+                for coordinate, value in cached_values.items():
+                    value_type = ' t="str"' if isinstance(value, str) else ""
+                    xml = re.sub(
+                        rf'<c r="{coordinate}"([^>]*)><f>(.*?)</f>(?:<v\s*/>|<v></v>)?</c>',
+                        lambda match: f'<c r="{coordinate}"{match.group(1)}{value_type}><f>{match.group(2)}</f><v>{value}</v></c>',
+                        xml
+                    )
+                content = xml.encode("utf-8")
+            target.writestr(item, content)
+    return output.getvalue()
+
+
+def _project_1(wb, mistakes):
+    ws = wb.active
+    ws.title = "CoffeeAnalysis"
+    for offset, (country, price) in enumerate(PROJECT_1_PRICES.items()):
+        ws.cell(row=4 + offset, column=1, value=country)
+        ws.cell(row=4 + offset, column=2, value=price + 1 if "wrong_price" in mistakes and offset == 0 else price)
+    for offset, (country, rating) in enumerate(PROJECT_1_RATINGS.items()):
+        ws.cell(row=4 + offset, column=4, value=country)
+        ws.cell(row=4 + offset, column=5, value=rating)
+
+    cached_values = {}
+    for coordinate, (formula, value) in PROJECT_1_FORMULAS.items():
+        if coordinate == "I7" and "wrong_lookup" in mistakes:
+            formula, value = "=XLOOKUP(MIN(E4:E14),E4:E14,D4:D14)", "China"
+        if coordinate == "I14" and "wrong_length" in mistakes:
+            value = 65
+        ws[coordinate] = formula
+        cached_values[coordinate] = value
+    return lambda data: _add_cached_values(data, "xl/worksheets/sheet1.xml", cached_values)
+
+
+def _project_2(wb, mistakes):
+    from openpyxl.styles import Font
+    from openpyxl.worksheet.table import Table
+    from grading_algorithms import PROJECT_2_ALLOWED_EMPTY_EMAILS
+
+    report = wb.active
+    report.title = "Report"
+    for coordinate, value in PROJECT_2_REPORT_VALUES.items():
+        report[coordinate] = value - 1 if coordinate == "B8" and "wrong_report_value" in mistakes else value
+
+    participants = wb.create_sheet("Participants")
+    times = wb.create_sheet("Times")
+    names = wb.create_sheet("Names & Emails")
+    participants.append(["ID", "Name", "City", "Age", "Email"])
+    times.append(["ID", "Time"])
+    for row in range(2, 524):
+        email = None if row in PROJECT_2_ALLOWED_EMPTY_EMAILS else f"Runner{row}@Mail.COM"
+        participants.append([row - 1, f"Runner Name{row}", "Town", 20 + row % 50, email])
+        times.append([row - 1, round(120 + row * 0.37, 2)])
+        name = f"Runner Name{row}" if row == 300 and "lowercase_name" in mistakes else f"RUNNER NAME{row}"
+        names[f"A{row}"] = name
+        if email:
+            names[f"B{row}"] = email.lower()
+
+    for ws, ref in ((participants, "A1:E523"), (times, "A1:B523")):
+        ws["A1"].font = Font(bold=True, size=13)
+        ws.freeze_panes = "A2"
+        if not (ws is times and "missing_table" in mistakes):
+            ws.add_table(Table(displayName=ws.title, ref=ref))
+
+
+def _challenge_1_1(wb, mistakes):
+    ws = wb.active
+    for index, row in enumerate(CHALLENGE_1_1_ROWS):
+        row = list(row)
+        if index == 2 and "wrong_name" in mistakes:
+            row[1] = "Janet"
+        if index == 5 and "missing_row" in mistakes:
+            continue
+        ws.append(row)
+
+
+def _challenge_2(wb, mistakes):
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.workbook.defined_name import DefinedName
+
+    ws = wb.active
+    ws.title = "Employees"
+    for row in range(1, 202):
+        ws.cell(row=row, column=1, value=f"Employee {row}").font = Font(name="Times New Roman")
+        font = "Arial" if row == 50 and "wrong_font" in mistakes else "Times New Roman"
+        ws.cell(row=row, column=2, value=row * 500).font = Font(name=font)
+    ws["B144"].fill = PatternFill(start_color="FFFFFF00", end_color="FFFFFF00", fill_type="solid")
+    if "no_named_range" not in mistakes:
+        wb.defined_names["EmployeeInfo"] = DefinedName("EmployeeInfo", attr_text="Employees!$A$1:$B$201")
+    ws["B204"] = "Old link"
+    if "hyperlink_left" in mistakes:
+        ws["B204"].hyperlink = "https://old.example.com"
+    ws["F4"] = "Example Company"
+    ws["F4"].hyperlink = "https://www.examplecompany.com"
+
+
+def _challenge_3_1(wb, mistakes):
+    ws = wb.active
+    for row in range(1, 20):
+        ws.append([f"Value {row}-{column}" for column in range(10)])
+    ws.page_setup.orientation = "portrait" if "portrait" in mistakes else "landscape"
+    ws.page_setup.fitToWidth = 1
+    ws.page_setup.fitToHeight = 1
+    ws.page_margins.left = ws.page_margins.right = 0.25
+    ws.page_margins.top = ws.page_margins.bottom = 0.75
+    ws.row_dimensions[1].height = 30
+    ws.column_dimensions["A"].width = 20
+    for column in "BCDEFGHI":
+        ws.column_dimensions[column].width = 8 if column == "E" and "narrow_column" in mistakes else 15
+    ws.oddHeader.left.text = "Company"
+    ws.oddHeader.center.text = "&D"
+    ws.oddHeader.right.text = "&F"
+    ws.oddFooter.left.text = "&P"
+    ws.oddFooter.right.text = "&N"
+    ws.sheet_view.showGridLines = "gridlines" in mistakes
+    ws.sheet_view.showRowColHeaders = False
+
+
+# Fill a new workbook for each challenge; a builder may return a function that post-processes the saved bytes
+BUILDERS = {
+    "Project 1: Cafe Bloom": _project_1,
+    "Project 2: Marathon Participants": _project_2,
+    "Skill: Import data into workbooks": _challenge_1_1,
+    "Skill: Navigate within workbooks": _challenge_2,
+    "Skill: Format worksheets and workbooks": _challenge_3_1,
+}
+
+
+# The bytes of one submission; mistakes is a subset of MISTAKES[challenge]
+def build_workbook(challenge, mistakes=(), padding_rows=0):
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    post_process = BUILDERS[challenge](wb, set(mistakes))
+    if padding_rows:
+        padding = wb.create_sheet("Padding")
+        for row in range(1, padding_rows + 1):
+            padding.append([row, row * 1.5, f"Padding row {row}", row % 7, row * 3])
+
+    output = io.BytesIO()
+    wb.save(output)
+    data = output.getvalue()
+    return post_process(data) if post_process else data
+
+
+# Give a workbook a zip comment, which changes its hash but not its content
+def stamp(data, text):
+    if data[-22:-18] != b"PK\x05\x06":
+        return data  # Not a plain zip without a comment (e.g. a corrupt submission)
+    comment = text.encode("utf-8")[:0xFFFF]
+    return data[:-2] + len(comment).to_bytes(2, "little") + comment
+
+
+def _pick_variant(rng, mix):
+    variants = list(mix)
+    return rng.choices(variants, weights=[mix[variant] for variant in variants])[0]
+
+
+'''
+Write a cohort of `count` students for a challenge into folder/<student>/<student>.xlsx.
+mix maps variants to weights (DEFAULT_MIX); the same seed always gives the same cohort.
+Returns the manifest: [{"student", "variant", "mistakes"}].
+'''
+def generate_cohort(folder, challenge, count, mix=None, seed=0, padding_rows=DEFAULT_PADDING_ROWS):
+    if challenge not in BUILDERS:
+        raise ValueError(f"Unknown challenge: {challenge}")
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    templates = {}
+    manifest = []
+    width = len(str(count))
+
+    for number in range(1, count + 1):
+        student = f"student_{number:0{width}d}"
+        variant = _pick_variant(rng, mix)
+        mistakes = ()
+        if variant == "partial":
+            mistakes = tuple(sorted(rng.sample(MISTAKES[challenge], rng.randint(1, 2))))
+
+        key = (mistakes, padding_rows if variant == "oversized" else 0)
+        if key not in templates:
+            templates[key] = build_workbook(challenge, mistakes, key[1])
+
+        if variant == "corrupt":
+            # Half of the corrupt files are cut off mid-archive, the others are not zip files at all
+            data = templates[key][:len(templates[key]) // 2] if number % 2 else b"This is not an Excel workbook.\n" * 20
+        else:
+            data = stamp(templates[key], student)
+
+        student_folder = os.path.join(folder, student)
+        os.makedirs(student_folder, exist_ok=True)
+        with open(os.path.join(student_folder, f"{student}.xlsx"), "wb") as f:
+            f.write(data)
+        manifest.append({"student": student, "variant": variant, "mistakes": list(mistakes)})
+
+    with open(os.path.join(folder, COHORT_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"challenge": challenge, "seed": seed, "students": manifest}, f, indent=1)
+    return manifest
+
+
+# "correct=0.7,partial=0.3" -> {"correct": 0.7, "partial": 0.3}
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        variant, _, weight = part.partition("=")
+        if variant.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown variant: {variant.strip()}")
+        mix[variant.strip()] = float(weight)
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic student submissions.")
+    parser.add_argument("folder", help="Folder to write the cohort to (one sub folder per challenge with --all)")
+    parser.add_argument("--challenge", choices=CHALLENGES, metavar="CHALLENGE", help="; ".join(CHALLENGES))
+    parser.add_argument("--all", action="store_true", help="Generate a cohort for every challenge")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", type=parse_mix, default=None, help="Variant weights, e.g. correct=0.7,partial=0.2,corrupt=0.1")
+    parser.add_argument("--padding-rows", type=int, default=DEFAULT_PADDING_ROWS, help="Rows on the padding sheet of oversized submissions")
+    args = parser.parse_args(argv)
+
+    if not args.all and not args.challenge:
+        parser.error("pass --challenge or --all")
+
+    challenges = CHALLENGES if args.all else [args.challenge]
+    for challenge in challenges:
+        folder = os.path.join(args.folder, challenge_folder_name(challenge)) if args.all else args.folder
+        generate_cohort(folder, challenge, args.count, args.mix, args.seed, args.padding_rows)
+        print(f"{args.count} submissions for {challenge} written to {folder}")
+
+
+# "Project 1: Cafe Bloom" -> "project_1_cafe_bloom"
+def challenge_folder_name(challenge):
+    return re.sub(r"[^a-z0-9]+", "_", challenge.lower()).strip("_")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The grader is a folder of top-level modules, not a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_submissions import build_workbook
+
+
+# Write one synthetic submission (see synthetic_submissions.py) to folder/<student>/<student>.xlsx and return its path
+@pytest.fixture
+def make_submission(tmp_path):
+    def make(challenge, mistakes=(), student="student_01", folder=None, data=None):
+        student_folder = os.path.join(folder or str(tmp_path / "submissions"), student)
+        os.makedirs(student_folder, exist_ok=True)
+        path = os.path.join(student_folder, f"{student}.xlsx")
+        with open(path, "wb") as f:
+            f.write(build_workbook(challenge, mistakes) if data is None else data)
+        return path
+    return make
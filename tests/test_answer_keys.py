@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from openpyxl import Workbook
+
+from answer_keys import (answer_key, answer_key_path, answer_keys_version, compile_answer_key, load_answer_keys, main,
+                         read_answer_key)
+from grading_algorithms import PROJECT_2_ALLOWED_EMPTY_EMAILS
+from synthetic_submissions import (CHALLENGE_1_1_ROWS, PROJECT_1_FORMULAS, PROJECT_1_PRICES, PROJECT_1_RATINGS,
+                                   build_workbook)
+
+PROJECT_1 = "Project 1: Cafe Bloom"
+PROJECT_2 = "Project 2: Marathon Participants"
+IMPORT = "Skill: Import data into workbooks"
+
+
+def compile_key(tmp_path, challenge, data, places=None):
+    solution = tmp_path / "solution.xlsx"
+    solution.write_bytes(data)
+    path = answer_key_path(challenge, str(tmp_path / "keys"))
+    cells = compile_answer_key(challenge, str(solution), path, places)
+    return cells, read_answer_key(path)
+
+
+def test_project_1_key_holds_the_solution_values(tmp_path):
+    cells, key = compile_key(tmp_path, PROJECT_1, build_workbook(PROJECT_1), {"calc_checks": 3})
+
+    assert cells == 11 + 11 + 10
+    assert key.challenge == PROJECT_1
+    assert key["country_prices"] == PROJECT_1_PRICES
+    assert key["country_ratings"] == PROJECT_1_RATINGS
+    assert key["calc_checks"] == {cell: value for cell, (_, value) in PROJECT_1_FORMULAS.items()}
+    assert key.places == {"country_prices": 2, "country_ratings": 2, "calc_checks": 3}
+    assert key.metadata["solution"] == "solution.xlsx"
+
+
+def test_table_and_blank_row_groups(tmp_path):
+    _, import_key = compile_key(tmp_path, IMPORT, build_workbook(IMPORT))
+    _, project_2_key = compile_key(tmp_path, PROJECT_2, build_workbook(PROJECT_2))
+
+    assert import_key["solution_data"] == CHALLENGE_1_1_ROWS
+    assert project_2_key["allowed_empty_cells"] == frozenset(PROJECT_2_ALLOWED_EMPTY_EMAILS)
+    assert project_2_key["report_values"]["B8"] == 49
+
+
+def test_solution_without_calculated_values_is_refused(tmp_path):
+    wb = Workbook()
+    wb.active.title = "Report"
+    wb.active["B2"] = "=SUM(Times!B2:B523)"
+    wb.create_sheet("Names & Emails")
+    wb.save(tmp_path / "formulas_only.xlsx")
+
+    with pytest.raises(ValueError, match="Solution cells B2, B3, .* have no value"):
+        compile_answer_key(PROJECT_2, str(tmp_path / "formulas_only.xlsx"), str(tmp_path / "key.npz"))
+    with pytest.raises(ValueError, match="no expected values to compile"):
+        compile_answer_key("Skill: Navigate within workbooks", str(tmp_path / "formulas_only.xlsx"), str(tmp_path / "key.npz"))
+
+
+def test_compiled_groups_replace_the_built_in_values(tmp_path):
+    _, compiled = compile_key(tmp_path, IMPORT, build_workbook(IMPORT, ["wrong_name"]))
+    defaults = {"solution_data": CHALLENGE_1_1_ROWS}
+
+    built_in = answer_key(IMPORT, defaults, {})
+    key = answer_key(IMPORT, defaults, {IMPORT: compiled})
+
+    assert built_in["solution_data"] == CHALLENGE_1_1_ROWS and built_in.digest is None
+    assert key["solution_data"][2][1] == "Janet"
+    assert key.digest == compiled.digest
+    assert answer_keys_version({}) == ""
+    assert answer_keys_version({IMPORT: compiled}).startswith("+keys.")
+
+
+def test_unreadable_keys_are_left_out(tmp_path, capsys):
+    compile_key(tmp_path, IMPORT, build_workbook(IMPORT))
+    (tmp_path / "keys" / "broken.npz").write_bytes(b"not a key")
+
+    keys = load_answer_keys(str(tmp_path / "keys"))
+
+    assert list(keys) == [IMPORT]
+    assert "Ignoring answer key broken.npz" in capsys.readouterr().err
+    assert load_answer_keys(str(tmp_path / "missing")) == {}
+
+
+def test_command_line_compiles_and_shows_a_key(tmp_path, capsys):
+    solution, output = tmp_path / "solution.xlsx", str(tmp_path / "key.npz")
+    solution.write_bytes(build_workbook(PROJECT_1))
+
+    assert main(["--challenge", PROJECT_1, "--solution", str(solution), "--output", output, "--places", "calc_checks=4"]) == 0
+    assert json.loads(capsys.readouterr().out) == {"event": "compiled", "challenge": PROJECT_1, "key": output, "cells": 32}
+    assert main(["--show", output]) == 0
+    shown = json.loads(capsys.readouterr().out)
+    assert shown["places"]["calc_checks"] == 4
+    assert shown["values"]["calc_checks"]["I4"] == "Australia"
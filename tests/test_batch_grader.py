@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+import batch_grader
+
+CHALLENGE = "Skill: Import data into workbooks"
+BATCH_GRADER = batch_grader.__file__
+
+
+# Run batch_grader.py in its own process (it installs signal handlers); returns (exit code, events, stderr)
+def run(*args):
+    completed = subprocess.run([sys.executable, BATCH_GRADER, *args], capture_output=True, text=True, timeout=300)
+    return completed.returncode, [json.loads(line) for line in completed.stdout.splitlines()], completed.stderr
+
+
+def grade_args(tmp_path, *extra):
+    return ("--folder", str(tmp_path / "submissions"), "--challenge", CHALLENGE, "--output", str(tmp_path / "report"),
+            "--workers", "1", "--format", "csv", "--no-cache", *extra)
+
+
+def test_graded_folder_exits_0_with_json_events(tmp_path, make_submission):
+    make_submission(CHALLENGE, student="student_01")
+    make_submission(CHALLENGE, ["wrong_name"], student="student_02")
+
+    code, events, stderr = run(*grade_args(tmp_path, "--no-limits"))
+
+    assert code == batch_grader.EXIT_OK
+    assert events[0]["event"] == "preflight" and events[0]["gradeable"] == 2
+    assert events[-2] == {"event": "progress", "percent": 100}
+    complete = events[-1]
+    assert (complete["event"], complete["submissions"], complete["graded"], complete["errors"]) == ("complete", 2, 2, 0)
+    assert os.path.exists(complete["report"])
+    assert "Grading " in stderr  # Grader output stays off stdout
+
+
+def test_ungradeable_submission_exits_1(tmp_path, make_submission):
+    make_submission(CHALLENGE, student="student_01")
+    make_submission(CHALLENGE, student="student_02", data=b"This is not an Excel workbook.\n" * 20)
+
+    code, events, _ = run(*grade_args(tmp_path))
+
+    assert code == batch_grader.EXIT_SUBMISSION_ERRORS
+    assert (events[-1]["event"], events[-1]["errors"], events[-1]["rejected"]) == ("complete", 1, 1)
+
+
+def test_missing_folder_exits_2(tmp_path):
+    code, events, _ = run(*grade_args(tmp_path))
+
+    assert code == batch_grader.EXIT_USAGE
+    assert events == [{"event": "failed", "message": f"Submissions folder not found: {tmp_path / 'submissions'}"}]
+
+
+def test_bad_arguments_exit_2(tmp_path):
+    assert run("--folder", str(tmp_path))[0] == batch_grader.EXIT_USAGE
+    assert run("--folder", str(tmp_path), "--challenge", CHALLENGE, "--output", str(tmp_path), "--workers", "0")[1] == \
+           [{"event": "failed", "message": "--workers must be at least 1"}]
+    assert run("--folder", str(tmp_path), "--challenge", "Project 9", "--output", str(tmp_path))[0] == batch_grader.EXIT_USAGE
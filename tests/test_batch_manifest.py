@@ -0,0 +1,115 @@
+import csv
+import json
+import os
+
+import pytest
+
+import workbook_loader
+from batch_manifest import SUMMARY_HEADER, load_manifest, run_manifest
+from grading_runner import process_submissions
+from synthetic_submissions import build_workbook
+
+IMPORT = "Skill: Import data into workbooks"
+NAVIGATE = "Skill: Navigate within workbooks"
+
+
+def write_manifest(tmp_path, jobs, **settings):
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"jobs": jobs, **settings}), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def sections(tmp_path, make_submission):
+    correct, wrong_name = build_workbook(IMPORT), build_workbook(IMPORT, ["wrong_name"])
+    for section in ("section_1", "section_2"):
+        folder = str(tmp_path / section)
+        make_submission(IMPORT, student="student_01", folder=folder, data=correct)
+        make_submission(IMPORT, student="student_02", folder=folder, data=wrong_name)
+    make_submission(NAVIGATE, student="student_03", folder=str(tmp_path / "section_2"))
+    return tmp_path
+
+
+def test_manifest_paths_are_relative_to_the_manifest(sections):
+    manifest = load_manifest(write_manifest(sections, [
+        {"folder": "section_1", "challenge": IMPORT, "output": "reports/1"},
+        {"folder": "section_2", "challenge": IMPORT, "output": "reports/2", "format": "csv", "name": "Late section"},
+    ], format="jsonl"))
+
+    first, second = manifest["jobs"]
+    assert first == {"name": f"section_1: {IMPORT}", "folder": str(sections / "section_1"), "challenge": IMPORT,
+                     "output": str(sections / "reports" / "1"), "format": "jsonl"}
+    assert (second["name"], second["format"]) == ("Late section", "csv")
+    assert manifest["summary"] == str(sections / "batch_summary.csv")
+
+
+def test_toml_manifest(sections):
+    path = sections / "manifest.toml"
+    path.write_text(f'format = "csv"\n[[jobs]]\nfolder = "section_1"\nchallenge = "{IMPORT}"\noutput = "reports/1"\n',
+                    encoding="utf-8")
+
+    (job,) = load_manifest(str(path))["jobs"]
+
+    assert (job["folder"], job["format"]) == (str(sections / "section_1"), "csv")
+
+
+@pytest.mark.parametrize("jobs, message", [
+    ([], "lists no jobs"),
+    ([{"folder": "section_1", "challenge": IMPORT}], "Job 1 of the manifest has no output"),
+    ([{"folder": "section_1", "challenge": "Project 9", "output": "r"}], "unknown challenge: Project 9"),
+    ([{"folder": "section_1", "challenge": IMPORT, "output": "r", "format": "pdf"}], "unknown report format: pdf"),
+    ([{"folder": "section_9", "challenge": IMPORT, "output": "r"}], "Submissions folder of job 1 not found"),
+    ([{"folder": "section_1", "challenge": IMPORT, "output": "r"},
+      {"folder": "section_2", "challenge": IMPORT, "output": "r"}], "would write the same report"),
+])
+def test_invalid_manifests_are_rejected(sections, jobs, message):
+    with pytest.raises(ValueError, match=message):
+        load_manifest(write_manifest(sections, jobs))
+
+
+def test_jobs_share_grading_and_report_like_single_runs(sections, monkeypatch, capsys):
+    loads = []
+    load = workbook_loader._load_student_workbook
+    monkeypatch.setattr(workbook_loader, "_load_student_workbook", lambda *args: loads.append(args[0]) or load(*args))
+    manifest = load_manifest(write_manifest(sections, [
+        {"folder": "section_1", "challenge": IMPORT, "output": "reports/1"},
+        {"folder": "section_2", "challenge": IMPORT, "output": "reports/2"},
+        {"folder": "section_2", "challenge": NAVIGATE, "output": "reports/3"},
+    ], format="csv"))
+    progress = []
+
+    summary = run_manifest(manifest, progress.append)
+
+    # section_2 hands in the same two files as section_1; its three files are graded for both challenges
+    assert len(loads) == 3
+    assert len([line for line in capsys.readouterr().out.splitlines() if line.startswith("Grading ")]) == 6
+    assert (summary["submissions"], summary["errors"], summary["cancelled"]) == (8, 0, False)
+    assert progress[-1] == 100
+
+    os.makedirs(sections / "single")
+    single = process_submissions(str(sections / "section_2"), IMPORT, str(sections / "single"), lambda percent: None,
+                                 lambda ok, message: None, report_format="csv")
+    with open(single["report"], encoding="utf-8") as f, open(summary["jobs"][1]["report"], encoding="utf-8") as g:
+        assert f.read() == g.read()
+
+    with open(summary["summary"], encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == SUMMARY_HEADER
+    assert [row[0] for row in rows[1:]] == [f"section_1: {IMPORT}", f"section_2: {IMPORT}", f"section_2: {NAVIGATE}"]
+    assert rows[1][3:5] == ["2", "0"]
+
+
+def test_duplicate_file_is_graded_once_per_challenge(sections, capsys):
+    (sections / "section_3" / "student_09").mkdir(parents=True)
+    (sections / "section_3" / "student_09" / "student_09.xlsx").write_bytes(
+        (sections / "section_1" / "student_01" / "student_01.xlsx").read_bytes())
+    manifest = load_manifest(write_manifest(sections, [
+        {"folder": "section_1", "challenge": IMPORT, "output": "reports/1"},
+        {"folder": "section_3", "challenge": IMPORT, "output": "reports/3"},
+    ], format="csv"))
+
+    summary = run_manifest(manifest, lambda percent: None)
+
+    assert len([line for line in capsys.readouterr().out.splitlines() if line.startswith("Grading ")]) == 2
+    assert [job["graded"] for job in summary["jobs"]] == [2, 1]
+    assert summary["jobs"][1]["average_percentage"] == 100
@@ -0,0 +1,141 @@
+import json
+import os
+
+import pytest
+
+import check_results
+from check_results import (ERROR, FAILED, INCOMPLETE, PASSED, SKIPPED, SUBMISSION_CHECK, RunResults, load_results, main,
+                           run_files)
+from grading_runner import grade_file, process_submissions
+
+IMPORT = "Skill: Import data into workbooks"
+PROJECT_1 = "Project 1: Cafe Bloom"
+
+
+def result(*checks, **fields):
+    return {"score": sum(check[1] for check in checks), "total_points": sum(check[2] for check in checks),
+            "checks": [list(check) for check in checks], **fields}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "store")
+    fall = RunResults("2026-fall", "6")
+    fall.add("section_1", "ann", PROJECT_1, result(("I4", 3, 3, PASSED), ("I5", 0, 3, FAILED)))
+    fall.add("section_1", "bob", PROJECT_1, result(("I4", 0, 3, FAILED), ("I5", 0, 3, SKIPPED)))
+    fall.add("section_1", "cy", PROJECT_1, {"error": "Not gradeable (corrupt)", "total_points": 6, "preflight": "corrupt"})
+    fall.write(path)
+    # A later run whose vocabularies list the same strings in another order
+    spring = RunResults("2027-spring", "6")
+    spring.add("section_2", "dee", IMPORT, result(("headers", 2, 2, PASSED)))
+    spring.add("section_2", "eve", PROJECT_1, result(("I5", 3, 3, PASSED), ("I4", 1, 3, ERROR)))
+    spring.write(path, cancelled=True)
+    return path
+
+
+def test_checks_are_recorded_per_block():
+    check_results.record("ignored", 1, 1)  # Nothing is recording
+
+    with check_results.recording() as outer:
+        check_results.record("I4", 3, 3)
+        with check_results.recording() as inner:
+            check_results.record("I5", 0, 3)
+        check_results.record("I7", 1, 3, "static_value")
+
+    assert outer == [["I4", 3, 3, PASSED], ["I7", 1, 3, "static_value"]]
+    assert inner == [["I5", 0, 3, FAILED]]
+
+    with check_results.recording() as abandoned:
+        check_results.record("I4", 3, 3)
+        check_results.abandon()
+    assert (abandoned, abandoned.abandoned) == ([], True)
+
+
+def test_runs_are_added_to_the_store_and_loaded_together(store):
+    results = load_results(store)
+
+    assert len(run_files(store)) == 2 and len(results) == 8
+    assert [(run["label"], run["cancelled"]) for run in results.runs] == [("2026-fall", False), ("2027-spring", True)]
+    eve = results.rows[results.rows["student"] == results.students.index("eve")]
+    assert [results.checks[check] for check in eve["check"]] == ["I5", "I4"]
+    assert [results.codes[code] for code in eve["code"]] == [PASSED, ERROR]
+    assert len(load_results(store, labels=["2027-spring"])) == 3
+    assert len(load_results(store + "_missing")) == 0
+
+
+def test_failure_rates_leave_out_submissions_without_checks(store):
+    items = load_results(store).failure_rates(PROJECT_1)
+
+    assert items == [
+        {"challenge": PROJECT_1, "check": "I4", "attempts": 3, "failed": 2, "skipped": 0, "errors": 1,
+         "failure_rate": 0.6667, "points_lost": 5.0},
+        {"challenge": PROJECT_1, "check": "I5", "attempts": 3, "failed": 2, "skipped": 1, "errors": 0,
+         "failure_rate": 0.6667, "points_lost": 6.0},
+    ]
+    assert load_results(store).failure_rates(min_rate=0.5) == items
+    assert load_results(store).failure_rates("Project 9") == []
+
+
+def test_score_distribution_counts_one_score_per_submission(store):
+    scores = load_results(store).score_distribution(PROJECT_1, bins=4)
+
+    assert (scores["submissions"], scores["excluded"]) == (3, 1)
+    assert scores["mean"] == pytest.approx((50 + 0 + 4 / 6 * 100) / 3, abs=0.01)
+    assert scores["histogram"] == {"edges": [0, 25, 50, 75, 100], "counts": [1, 0, 2, 0]}
+    assert load_results(store).score_distribution(IMPORT)["median"] == 100
+
+
+def test_files_of_other_store_versions_are_skipped(store, monkeypatch):
+    monkeypatch.setattr(check_results, "STORE_VERSION", 2)
+    RunResults("2027-spring").write(store)
+
+    assert len(load_results(store).runs) == 1
+    assert not [name for name in os.listdir(store) if name.endswith(".partial")]
+
+
+def test_graded_submissions_carry_their_checks(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(IMPORT, student="student_01", folder=folder)
+    wrong_name = make_submission(IMPORT, ["wrong_name"], student="student_02", folder=folder)
+    make_submission(IMPORT, student="student_03", folder=folder, data=b"not a workbook")
+    output, store = str(tmp_path / "report"), str(tmp_path / "store")
+    os.makedirs(output)
+
+    graded = grade_file(IMPORT, wrong_name)
+    summary = process_submissions(folder, IMPORT, output, lambda percent: None, lambda ok, message: None,
+                                  report_format="csv", results_store=store, run_label="2026-fall")
+
+    assert sum(check[1] for check in graded["checks"]) == pytest.approx(graded["score"])
+    assert summary["check_results"] == run_files(store)[0]
+    results = load_results(store)
+    (item,) = results.failure_rates(min_rate=0.01)
+    assert (item["attempts"], item["failed"]) == (2, 1)
+    assert results.score_distribution()["excluded"] == 1
+    codes = {results.codes[row["code"]] for row in results.rows if results.checks[row["check"]] == SUBMISSION_CHECK}
+    assert codes == {"not_gradeable"}
+
+
+def test_abandoned_checks_exclude_the_submission(tmp_path):
+    path = tmp_path / "broken.xlsx"
+    path.write_bytes(b"PK\x03\x04 broken")
+
+    graded = grade_file(IMPORT, str(path))
+    run = RunResults()
+    run.add("section_1", "student_01", IMPORT, graded)
+    run.write(str(tmp_path / "store"))
+    results = load_results(str(tmp_path / "store"))
+
+    assert (graded["score"], graded["checks"]) == (0, None)
+    assert (results.checks, results.codes) == ([SUBMISSION_CHECK], [INCOMPLETE])
+    assert results.score_distribution() == {"submissions": 0, "excluded": 1}
+
+
+def test_command_line_prints_items_or_scores(store, capsys):
+    assert main([store, "--challenge", PROJECT_1, "--min-rate", "0.5"]) == 0
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(event["event"], event["check"]) for event in events] == [("item", "I4"), ("item", "I5")]
+
+    assert main([store, "--scores", "--label", "2027-spring"]) == 0
+    (event,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert (event["event"], event["runs"], event["submissions"]) == ("scores", 1, 2)
+    assert event["mean"] == pytest.approx((100 + 4 / 6 * 100) / 2, abs=0.01)
@@ -0,0 +1,129 @@
+import csv
+import os
+import threading
+
+import pytest
+
+from checkpoint import JOURNAL_NAME, CheckpointJournal
+from grading_algorithms import GRADER_VERSION
+from grading_runner import process_submissions
+from synthetic_submissions import build_workbook, stamp
+
+CHALLENGE = "Skill: Import data into workbooks"
+RESULT = {"score": 10, "total_points": 10, "feedback": []}
+
+
+def test_journaled_results_are_loaded_for_the_same_run(tmp_path):
+    path = str(tmp_path / JOURNAL_NAME)
+    with CheckpointJournal(path, "submissions", CHALLENGE, "6").open() as journal:
+        journal.append("hash_1", RESULT)
+        journal.append("hash_2", dict(RESULT, score=7))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "result", "file_hash": "hash_3", "res')  # Cut off by a crash
+
+    assert CheckpointJournal(path, "submissions", CHALLENGE, "6").load() == {"hash_1": RESULT, "hash_2": dict(RESULT, score=7)}
+    assert CheckpointJournal(path, "other_folder", CHALLENGE, "6").load() == {}
+    assert CheckpointJournal(path, "submissions", CHALLENGE, "7").load() == {}
+    assert CheckpointJournal(str(tmp_path / "missing.jsonl"), "submissions", CHALLENGE, "6").load() == {}
+
+
+def test_resume_after_a_cut_off_line_keeps_new_results(tmp_path):
+    path = str(tmp_path / JOURNAL_NAME)
+    with CheckpointJournal(path, "submissions", CHALLENGE, "6").open() as journal:
+        journal.append("hash_1", RESULT)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"type": "result", "file_hash": "hash_2", "res')  # Cut off by a crash
+
+    resumed = CheckpointJournal(path, "submissions", CHALLENGE, "6")
+    with resumed.open(keep_existing=True) as journal:
+        journal.append("hash_3", dict(RESULT, score=7))
+
+    assert resumed.load() == {"hash_1": RESULT, "hash_3": dict(RESULT, score=7)}
+
+
+def test_completed_run_removes_the_journal(tmp_path):
+    path = str(tmp_path / JOURNAL_NAME)
+    journal = CheckpointJournal(path, "submissions", CHALLENGE, "6").open()
+    journal.append("hash_1", RESULT)
+
+    journal.close(completed=True)
+
+    assert not os.path.exists(path)
+
+
+def make_cohort(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    for number in range(1, 6):
+        student = f"student_{number:02d}"
+        data = stamp(build_workbook(CHALLENGE, ["wrong_name"] if number % 2 else ()), student)  # No two files alike
+        make_submission(CHALLENGE, student=student, folder=folder, data=data)
+    output = str(tmp_path / "report")
+    os.makedirs(output, exist_ok=True)
+    return folder, output
+
+
+def run(folder, output, progress_callback=lambda percent: None, **options):
+    return process_submissions(folder, CHALLENGE, output, progress_callback, lambda ok, message: None,
+                               report_format="csv", **options)
+
+
+def report_rows(summary):
+    with open(summary["report"], encoding="utf-8") as f:
+        return list(csv.reader(f))[1:]
+
+
+def graded_files(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("Grading ")]
+
+
+def test_cancelled_run_resumes_without_grading_journaled_files(tmp_path, make_submission, capsys):
+    folder, output = make_cohort(tmp_path, make_submission)
+    cancel_event = threading.Event()
+
+    def cancel_after_two(percent):
+        if percent >= 40:
+            cancel_event.set()
+
+    cancelled = run(folder, output, cancel_after_two, cancel_event=cancel_event)
+    assert cancelled["cancelled"] and cancelled["graded"] == 2
+    assert [row[0] for row in report_rows(cancelled)] == ["student_01", "student_02"]
+    assert os.path.exists(os.path.join(output, JOURNAL_NAME))
+    assert len(graded_files(capsys)) == 2
+
+    resumed = run(folder, output, resume=True)
+    assert not resumed["cancelled"] and resumed["graded"] == 5
+    assert [line.rsplit(os.sep, 1)[-1] for line in graded_files(capsys)] == \
+           ["student_03.xlsx", "student_04.xlsx", "student_05.xlsx"]
+    assert not os.path.exists(os.path.join(output, JOURNAL_NAME))
+
+    fresh = run(folder, str(tmp_path))
+    assert report_rows(resumed) == report_rows(fresh)
+
+
+def test_run_that_fails_keeps_its_journal_for_a_resume(tmp_path, make_submission, capsys):
+    folder, output = make_cohort(tmp_path, make_submission)
+
+    def fail_after_three(percent):
+        if percent >= 60:
+            raise OSError("Network share went away")
+
+    with pytest.raises(OSError):
+        run(folder, output, fail_after_three)
+    journal = CheckpointJournal(os.path.join(output, JOURNAL_NAME), folder, CHALLENGE, GRADER_VERSION)
+    assert len(journal.load()) == 3
+    capsys.readouterr()
+
+    resumed = run(folder, output, resume=True)
+    assert resumed["graded"] == 5
+    assert len(graded_files(capsys)) == 2
+
+
+def test_without_resume_the_journal_starts_over(tmp_path, make_submission, capsys):
+    folder, output = make_cohort(tmp_path, make_submission)
+    cancel_event = threading.Event()
+    run(folder, output, lambda percent: cancel_event.set(), cancel_event=cancel_event)
+    capsys.readouterr()
+
+    run(folder, output)
+
+    assert len(graded_files(capsys)) == 5
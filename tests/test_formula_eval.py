@@ -0,0 +1,145 @@
+import io
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.table import Table
+
+from formula_eval import DIV0, NA, FormulaError, FormulaSyntaxError, normalize_formula, parse_formula
+from grading_runner import grade_file
+from synthetic_submissions import PROJECT_1_FORMULAS, build_workbook
+from workbook_loader import load_student_workbook
+
+PROJECT_1 = "Project 1: Cafe Bloom"
+
+
+# Saved by openpyxl, so every formula is stored without a cached value
+def formulas_only(tmp_path, wb, name="formulas.xlsx"):
+    path = str(tmp_path / name)
+    wb.save(path)
+    return load_student_workbook(path).values
+
+
+@pytest.fixture
+def sheet():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Data"
+    for row, (country, price) in enumerate([("Brazil", 2.5), ("Kenya", 4), ("Peru", 3)], start=1):
+        ws.cell(row, 1, country)
+        ws.cell(row, 2, price)
+    return wb
+
+
+@pytest.mark.parametrize("formula, value", [
+    ("=SUM(B1:B3)", 9.5),
+    ("=AVERAGE(B1:B3)*2", 9.5 * 2 / 3),
+    ("=MAX(B:B)-MIN(B1:B3)", 1.5),
+    ("=COUNTIF(B1:B3,\">=3\")", 2),
+    ("=INDEX(A1:A3,MATCH(MAX(B1:B3),B1:B3,0))", "Kenya"),
+    ("=_xlfn.XLOOKUP(\"Peru\",A1:A3,B1:B3)", 3),
+    ("=XLOOKUP(\"Chile\",A1:A3,B1:B3,\"none\")", "none"),
+    ("=UPPER(A1)&\" \"&LEN(A2)", "BRAZIL 5"),
+    ("=SUM(LEN(A1:A3))", 15),
+    ("=B2^2+50%", 16.5),
+    ("=B1>B3", False),
+    ("=B1/0", DIV0),
+    ("=MATCH(\"Chile\",A1:A3,0)", NA),
+    ("=C1", 0),
+])
+def test_formulas_are_computed_like_excel(tmp_path, sheet, formula, value):
+    sheet.active["D1"] = formula
+
+    computed = formulas_only(tmp_path, sheet)["Data"]["D1"].value
+
+    assert computed == (pytest.approx(value) if isinstance(value, (int, float)) else value)
+    assert isinstance(computed, FormulaError) == isinstance(value, FormulaError)
+
+
+def test_chains_of_formulas_are_computed_precedents_first(tmp_path, sheet):
+    ws = sheet.active
+    ws["C1"] = "=B1*2"
+    for row in range(2, 3001):
+        ws.cell(row, 3, f"=C{row - 1}+1")
+    other = sheet.create_sheet("Summary")
+    other["A1"] = "=MAX(Data!C1:C3000)"
+    other["A2"] = "=D1"
+    other["A3"] = "=A3+1"
+
+    values = formulas_only(tmp_path, sheet)
+
+    assert values["Summary"]["A1"].value == 5 + 2999
+    assert values["Data"]["C10"].value == 14
+    assert values["Summary"]["A2"].value == 0
+    assert values["Summary"]["A3"].value == 0  # Circular, like Excel
+
+
+def test_tables_and_defined_names(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Times"
+    ws.append(["Runner", "Time", "Minutes"])
+    for runner, time in [("Ann", 30), ("Bob", 45), ("Cy", 40)]:
+        ws.append([runner, time, "=[@Time]/60"])
+    ws.add_table(Table(displayName="Times", ref="A1:C4"))
+    wb.defined_names["Runners"] = DefinedName("Runners", attr_text="Times!$A$2:$A$4")
+    ws["E1"] = "=AVERAGE(Times[Time])"
+    ws["E2"] = "=COUNTA(Runners)"
+    ws["E3"] = "=SUM(Times[Minutes])"
+    ws["E4"] = "=COUNTA(Times[#All])"
+    ws["E5"] = "=SUM(Missing[Time])"
+
+    values = formulas_only(tmp_path, wb)["Times"]
+
+    assert [values[f"E{row}"].value for row in range(1, 6)] == [pytest.approx(115 / 3), 3, pytest.approx(115 / 60),
+                                                                 12, "#REF!"]
+    assert values["C2"].value == 0.5
+
+
+def test_unsupported_formulas_read_as_missing(tmp_path, sheet):
+    sheet.active["D1"] = "=VLOOKUP(\"Peru\",A1:B3,2,FALSE)"
+
+    assert formulas_only(tmp_path, sheet)["Data"]["D1"].value is None
+    with pytest.raises(FormulaSyntaxError):
+        parse_formula("=SUM(B1:B3")
+
+
+def test_cached_values_are_kept(tmp_path):
+    path = tmp_path / "cached.xlsx"
+    path.write_bytes(build_workbook(PROJECT_1))
+
+    values = load_student_workbook(str(path)).values["CoffeeAnalysis"]
+
+    for cell, (_, value) in PROJECT_1_FORMULAS.items():
+        assert values[cell].value == value
+
+
+def test_parse_and_normalize():
+    assert parse_formula("=SUM('My Sheet'!$B$4:B14)") == ("call", "SUM", [("ref", "My Sheet", 4, 2, 14, 2)])
+    assert parse_formula("=-A1%") == ("neg", ("percent", ("ref", None, 1, 1, 1, 1)))
+    assert parse_formula("=SUM(A:A)") == ("call", "SUM", [("ref", None, 1, 1, None, 1)])
+    assert normalize_formula("= average( $B$4:$B$14 )") == normalize_formula("=_xlfn.AVERAGE(B4:B14)") == \
+           "=AVERAGE(B4:B14)"
+    assert normalize_formula('=A1&" a b"') == '=A1&" a b"'
+
+
+def test_workbooks_without_cached_values_are_graded(tmp_path):
+    cached = tmp_path / "cached.xlsx"
+    cached.write_bytes(build_workbook(PROJECT_1))
+    resaved = io.BytesIO()
+    load_workbook(str(cached)).save(resaved)
+    formulas = tmp_path / "formulas.xlsx"
+    formulas.write_bytes(resaved.getvalue())
+
+    expected, result = grade_file(PROJECT_1, str(cached)), grade_file(PROJECT_1, str(formulas))
+
+    # The synthetic workbook caches the LEN results of the real solution, whose A4:A14 text is longer
+    len_cells = {"I12", "I13", "I14"}
+    values = load_student_workbook(str(formulas)).values["CoffeeAnalysis"]
+    assert load_workbook(str(formulas), data_only=True)["CoffeeAnalysis"]["I4"].value is None
+    for cell, (_, value) in PROJECT_1_FORMULAS.items():
+        if cell not in len_cells:
+            assert values[cell].value == (pytest.approx(value, rel=1e-4) if isinstance(value, float) else value)
+    failed = {line.split()[1] for line in set(result["feedback"]) - set(expected["feedback"]) if line.startswith("Cell ")}
+    assert failed == len_cells
+    assert result["score"] > 0
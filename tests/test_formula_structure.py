@@ -0,0 +1,87 @@
+import pytest
+from openpyxl import load_workbook
+
+import formula_structure
+from formula_structure import compile_structure
+from grading_runner import grade_file
+from synthetic_submissions import build_workbook
+
+PROJECT_1 = "Project 1: Cafe Bloom"
+MOST_EXPENSIVE = {'calls': {'MAX': 'B4:B14'}, 'reads': ['A4:A14']}
+PROJECT_1_I12 = {'calls': {('AVERAGE', 'SUMPRODUCT', 'SUM'): None}}
+
+
+@pytest.mark.parametrize("structure, formula, problem", [
+    (MOST_EXPENSIVE, "=INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0))", None),
+    (MOST_EXPENSIVE, "=xlookup(max($B$4:$B$14), B:B, A4:A14)", None),
+    (MOST_EXPENSIVE, "=INDEX(A4:A14,MATCH(69,B4:B14,0))", "the formula does not use MAX"),
+    (MOST_EXPENSIVE, "=INDEX(A4:A14,MATCH(MAX(B4:B10),B4:B14,0))", "MAX is not applied to B4:B14"),
+    (MOST_EXPENSIVE, "=INDEX(Other!A4:A14,MATCH(MAX(B4:B14),B4:B14,0))", "the formula does not use the cells A4:A14"),
+    (MOST_EXPENSIVE, "=69", "the formula does not use MAX"),
+    ({'calls': {'MAX': None}}, "=MAX(LEN(A4:A14))", None),
+    ({'calls': {'MAX': None}}, "=MAX(1,2)", "MAX is not applied to any cells"),
+    ({'functions': [('AVERAGE', 'SUMPRODUCT')]}, "=SUMPRODUCT(LEN(A4:A14))/11", None),
+    ({'functions': [('AVERAGE', 'SUMPRODUCT')]}, "=SUM(LEN(A4:A14))/11", "the formula does not use AVERAGE or SUMPRODUCT"),
+    (PROJECT_1_I12, "=AVERAGE(LEN(A4:A14))", None),
+    (PROJECT_1_I12, "=SUMPRODUCT(LEN(A4:A14))/COUNTA(A4:A14)", None),
+    (PROJECT_1_I12, "=AVERAGE(J4:J14)", None),  # A helper column of lengths
+    (PROJECT_1_I12, "=AVERAGE(269.75)", "AVERAGE or SUMPRODUCT or SUM is not applied to any cells"),
+    (PROJECT_1_I12, "=SUM(2967)/11", "AVERAGE or SUMPRODUCT or SUM is not applied to any cells"),
+    (PROJECT_1_I12, "=LEN(A4)", "the formula does not use AVERAGE or SUMPRODUCT or SUM"),
+    ({'tables': ['Times']}, "=AVERAGE(times[Time])", None),
+    ({'tables': ['Times']}, "=AVERAGE(B2:B523)", "the formula does not refer to the Times table"),
+    (MOST_EXPENSIVE, "=INDEX(A4:A14,MATCH(MAX(B4:B14)", None),  # Unreadable formulas are not held against the student
+])
+def test_formulas_are_checked_for_what_they_do(structure, formula, problem):
+    assert compile_structure(structure, "CoffeeAnalysis")(formula) == problem
+
+
+def test_sheet_qualified_ranges_match_the_checked_sheet():
+    check = compile_structure(MOST_EXPENSIVE, "CoffeeAnalysis")
+
+    assert check("=INDEX(CoffeeAnalysis!A4:A14,MATCH(MAX('coffeeanalysis'!B4:B14),B4:B14,0))") is None
+    with pytest.raises(ValueError, match="Not a cell range"):
+        compile_structure({'reads': ['1+1']})
+
+
+def test_table_and_name_references_count_as_the_cells_they_resolve_to():
+    check = compile_structure(MOST_EXPENSIVE, "CoffeeAnalysis")
+    formula = "=INDEX(Coffee[Country],MATCH(MAX(Prices),Prices,0))"
+    # Formulas are normalized before they are parsed, so the references reach resolve() in upper case
+    cells = {("table", "COFFEE", "COUNTRY"): ("ref", "CoffeeAnalysis", 4, 1, 14, 1),
+             ("name", "PRICES"): ("ref", "CoffeeAnalysis", 4, 2, 14, 2)}
+
+    assert check(formula, cells.get) is None
+    assert check(formula) == "MAX is not applied to B4:B14"
+
+
+def test_each_distinct_formula_is_parsed_and_checked_once(monkeypatch):
+    check = compile_structure(MOST_EXPENSIVE, "CoffeeAnalysis")
+    parsed = []
+    parse = formula_structure.parse_formula
+    monkeypatch.setattr(formula_structure, "parse_formula", lambda text: parsed.append(text) or parse(text))
+
+    for formula in ["=INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0))", "= index( $A$4:$A$14, match(max(B4:B14), B4:B14, 0))",
+                    "=_xlfn.XLOOKUP(MAX(B4:B14),B4:B14,A4:A14)", "=INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0))"]:
+        assert check(formula) is None
+
+    assert parsed == ["=INDEX(A4:A14,MATCH(MAX(B4:B14),B4:B14,0))", "=XLOOKUP(MAX(B4:B14),B4:B14,A4:A14)"]
+
+
+@pytest.mark.parametrize("cell, typed", [
+    ("I4", "Australia"),
+    ("I12", "=AVERAGE(269.75607779578604)"),  # The right value, inside a formula that reads no cells
+])
+def test_typed_in_answers_only_earn_the_value_points(tmp_path, cell, typed):
+    source = tmp_path / "source.xlsx"
+    source.write_bytes(build_workbook(PROJECT_1))
+    wb = load_workbook(str(source))
+    wb.save(str(tmp_path / "formulas.xlsx"))
+    wb["CoffeeAnalysis"][cell] = typed
+    wb.save(str(tmp_path / "typed.xlsx"))
+
+    expected, result = grade_file(PROJECT_1, str(tmp_path / "formulas.xlsx")), grade_file(PROJECT_1, str(tmp_path / "typed.xlsx"))
+
+    assert f"Cell {cell} Formula Check:" not in expected["feedback"]
+    assert f"Cell {cell} Formula Check:" in result["feedback"]
+    assert f"Cell {cell} Value Check:" not in result["feedback"]
@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from grade_history import GradeHistory, main
+from grading_runner import process_submissions
+
+IMPORT = "Skill: Import data into workbooks"
+PROJECT_1 = "Project 1: Cafe Bloom"
+
+
+def result(score, total_points=10, checks=None):
+    return {"score": score, "total_points": total_points, "feedback": [], "checks": checks}
+
+
+def stored_submissions(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+
+@pytest.fixture
+def history(tmp_path):
+    with GradeHistory(str(tmp_path / "history" / "grades.sqlite")) as history:
+        first = history.start_run("section_1", IMPORT, "2026-fall", "6")
+        history.add(first, "section_1", "ann", IMPORT, result(6, checks=[["headers", 2, 2, "passed"], ["rows", 4, 8, "failed"]]))
+        history.add(first, "section_1", "bob", IMPORT, {"error": "Not gradeable (corrupt)", "total_points": 10})
+        history.add(first, "section_1", "ann", PROJECT_1, result(45, 65))
+        history.finish_run(first, 3)
+        second = history.start_run("section_1", IMPORT, "2026-fall", "6")
+        history.add(second, "section_1", "ann", IMPORT, result(10), file_hash="abc")
+        history.finish_run(second, 1, cancelled=True)
+        yield history
+
+
+def test_latest_grade_of_every_student(history):
+    grades = history.latest_grades(IMPORT)
+
+    assert [(grade["student"], grade["score"], grade["percentage"], grade["file_hash"]) for grade in grades] == \
+           [("ann", 10, 100, "abc"), ("bob", 0, 0, None)]
+    assert grades[1]["error"] == "Not gradeable (corrupt)"
+    assert history.latest_grades("Project 9") == []
+
+
+def test_students_with_the_same_name_in_other_sections_keep_their_own_grade(history):
+    run = history.start_run("section_2", IMPORT)
+    history.add(run, "section_2", "ann", IMPORT, result(3))
+    history.finish_run(run, 1)
+
+    grades = history.latest_grades(IMPORT)
+
+    assert [(grade["section"], grade["student"], grade["score"]) for grade in grades] == \
+           [("section_1", "ann", 10), ("section_1", "bob", 0), ("section_2", "ann", 3)]
+    plan = history.connection.execute("EXPLAIN QUERY PLAN SELECT MAX(id) FROM submissions WHERE challenge = ? "
+                                      "GROUP BY section, student", (IMPORT,)).fetchall()
+    assert "submissions_challenge_section_student" in str(plan)
+
+
+def test_every_attempt_of_a_student_with_its_checks(history):
+    attempts = history.attempts("ann", IMPORT, with_checks=True)
+
+    assert [attempt["score"] for attempt in attempts] == [6, 10]
+    assert attempts[0]["checks"] == [["headers", 2, 2, "passed"], ["rows", 4, 8, "failed"]]
+    assert attempts[1]["checks"] == []
+    assert [attempt["challenge"] for attempt in history.attempts("ann")] == [IMPORT, PROJECT_1, IMPORT]
+
+
+def test_runs_newest_first(history):
+    runs = history.runs()
+
+    assert [(run["submissions"], run["cancelled"]) for run in runs] == [(1, 1), (3, 0)]
+    assert runs[0]["label"] == "2026-fall" and runs[0]["finished"]
+    assert len(history.runs(limit=1)) == 1
+
+
+def test_submissions_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "grades.sqlite")
+    history = GradeHistory(path, batch_size=3)
+    run = history.start_run()
+
+    for student in ("ann", "bob"):
+        history.add(run, "section_1", student, IMPORT, result(10))
+    assert stored_submissions(path) == 0
+    history.add(run, "section_1", "cy", IMPORT, result(10))
+    assert stored_submissions(path) == 3
+    history.add(run, "section_1", "dee", IMPORT, result(10))
+    history.close()
+    assert stored_submissions(path) == 4
+
+
+def test_a_failed_batch_is_rolled_back(tmp_path):
+    path = str(tmp_path / "grades.sqlite")
+    with GradeHistory(path) as history:
+        run = history.start_run()
+        history.add(run, "section_1", "ann", IMPORT, result(10))
+        history.add(run, "section_1", "bob", IMPORT, {"total_points": 10})  # Neither a score nor an error
+
+        with pytest.raises(KeyError):
+            history.flush()
+        assert history.latest_grades(IMPORT) == []
+
+
+def test_grading_runs_are_added_to_the_history(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(IMPORT, student="student_01", folder=folder)
+    make_submission(IMPORT, ["wrong_name"], student="student_02", folder=folder)
+    output, path = str(tmp_path / "report"), str(tmp_path / "grades.sqlite")
+    os.makedirs(output)
+
+    for _ in range(2):
+        process_submissions(folder, IMPORT, output, lambda percent: None, lambda ok, message: None,
+                            report_format="csv", history_path=path, run_label="2026-fall")
+
+    with GradeHistory(path) as history:
+        grades = history.latest_grades(IMPORT, with_checks=True)
+        assert [(grade["student"], grade["score"]) for grade in grades] == [("student_01", 10), ("student_02", 9.7)]
+        assert sum(check[1] for check in grades[1]["checks"]) == pytest.approx(9.7)
+        assert len(history.attempts("student_02")) == 2
+        assert [run["submissions"] for run in history.runs()] == [2, 2]
+
+
+def test_command_line_queries(history, capsys):
+    assert main([history.path, "--student", "ann", "--challenge", IMPORT, "--checks"]) == 0
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(event["event"], event["score"], len(event["checks"])) for event in events] == [("attempt", 6, 2),
+                                                                                           ("attempt", 10, 0)]
+
+    assert main([history.path, "--latest", IMPORT]) == 0
+    assert [json.loads(line)["student"] for line in capsys.readouterr().out.splitlines()] == ["ann", "bob"]
+    assert main([history.path, "--runs"]) == 0
+    assert [json.loads(line)["event"] for line in capsys.readouterr().out.splitlines()] == ["run", "run"]
+
+    assert main([history.path + ".missing", "--runs"]) == 2
+    assert json.loads(capsys.readouterr().out)["event"] == "failed"
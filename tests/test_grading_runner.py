@@ -0,0 +1,63 @@
+import json
+import os
+
+from grading_runner import process_submissions
+
+CHALLENGE = "Skill: Import data into workbooks"
+
+
+# A small cohort with right, wrong and broken files; returns the submissions folder
+def make_cohort(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(CHALLENGE, student="student_01", folder=folder)
+    make_submission(CHALLENGE, ["wrong_name"], student="student_02", folder=folder)
+    make_submission(CHALLENGE, ["missing_row"], student="student_03", folder=folder)
+    make_submission(CHALLENGE, student="student_04", folder=folder, data=b"This is not an Excel workbook.\n" * 20)
+    make_submission(CHALLENGE, ["wrong_name", "missing_row"], student="student_05", folder=folder)
+    make_submission(CHALLENGE, student="student_06", folder=folder)
+    return folder
+
+
+def run(folder, output, **options):
+    os.makedirs(output, exist_ok=True)
+    messages = []
+    summary = process_submissions(folder, CHALLENGE, output, lambda percent: None,
+                                  lambda ok, message: messages.append((ok, message)), report_format="jsonl", **options)
+    with open(summary["report"], encoding="utf-8") as f:
+        return summary, [json.loads(line) for line in f], messages
+
+
+def test_parallel_and_serial_runs_give_the_same_report(tmp_path, make_submission):
+    folder = make_cohort(tmp_path, make_submission)
+
+    serial, serial_rows, _ = run(folder, str(tmp_path / "serial"))
+    parallel, parallel_rows, messages = run(folder, str(tmp_path / "parallel"), max_workers=2)
+
+    assert parallel_rows == serial_rows
+    assert [row["Student"] for row in serial_rows] == [f"student_{number:02d}" for number in range(1, 7)]
+    assert {key: parallel[key] for key in ("submissions", "graded", "rejected", "cancelled")} == \
+           {key: serial[key] for key in ("submissions", "graded", "rejected", "cancelled")} == \
+           {"submissions": 6, "graded": 6, "rejected": 1, "cancelled": False}
+    assert messages == [(True, f"Grading complete! Report saved to: {parallel['report']}")]
+
+
+def test_rows_carry_scores_and_feedback(tmp_path, make_submission):
+    _, rows, _ = run(make_cohort(tmp_path, make_submission), str(tmp_path / "report"))
+    rows = {row["Student"]: row for row in rows}
+
+    assert (rows["student_01"]["Score"], rows["student_01"]["Percentage"]) == (10, 100)
+    assert rows["student_01"]["Feedback"] == rows["student_06"]["Feedback"]
+    assert rows["student_02"]["Score"] < 10 and rows["student_02"]["Feedback"]
+    assert rows["student_05"]["Score"] < rows["student_02"]["Score"]
+    assert rows["student_04"]["Score"] == 0
+    assert rows["student_04"]["Feedback"].startswith("Error: Not gradeable")
+
+
+def test_empty_folder_writes_an_empty_report(tmp_path):
+    folder = tmp_path / "submissions"
+    folder.mkdir()
+
+    summary, rows, messages = run(str(folder), str(tmp_path / "report"), max_workers=2)
+
+    assert (summary["submissions"], summary["graded"], rows) == (0, 0, [])
+    assert messages[0][0] is True
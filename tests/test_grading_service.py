@@ -0,0 +1,132 @@
+import http.client
+import json
+import socket
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from grading_service import MAX_UPLOAD_MB, create_server
+from synthetic_submissions import build_workbook
+
+CHALLENGE = "Skill: Import data into workbooks"
+
+
+# One service on a free localhost port for the module: one worker, no queue, so a single admitted request fills it
+@pytest.fixture(scope="module")
+def server():
+    server, service = create_server(port=0, workers=1, max_queue=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=60)
+    try:
+        connection.request(method, path, body, headers or {})
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def grade_path(challenge=CHALLENGE):
+    return f"/grade?challenge={quote(challenge)}"
+
+
+def test_grade_returns_score_total_and_feedback(server):
+    status, _, body = request(server, "POST", grade_path(), build_workbook(CHALLENGE))
+
+    assert status == 200
+    assert body["challenge"] == CHALLENGE
+    assert body["score"] == body["total_points"] == 10
+    assert body["percentage"] == 100
+    assert isinstance(body["feedback"], list)
+
+
+def test_wrong_answers_lose_points(server):
+    status, _, body = request(server, "POST", grade_path(), build_workbook(CHALLENGE, ["wrong_name"]))
+
+    assert status == 200
+    assert body["score"] < body["total_points"]
+    assert body["feedback"]
+
+
+def test_corrupt_upload_is_rejected_without_grading(server):
+    status, _, body = request(server, "POST", grade_path(), b"This is not an Excel workbook.\n" * 20)
+
+    assert status == 200
+    assert body["preflight"] == "wrong_format"
+    assert body["error"].startswith("Not gradeable")
+    assert body["total_points"] == 10
+
+
+def test_unknown_challenge_is_400(server):
+    status, _, body = request(server, "POST", grade_path("Project 9"), build_workbook(CHALLENGE))
+
+    assert status == 400
+    assert CHALLENGE in body["challenges"]
+
+
+def test_empty_body_is_400(server):
+    status, _, _ = request(server, "POST", grade_path(), b"")
+
+    assert status == 400
+
+
+def test_upload_over_the_limit_is_413(server):
+    status, _, _ = request(server, "POST", grade_path(), None,
+                           {"Content-Length": str(MAX_UPLOAD_MB * 1024 * 1024 + 1)})
+
+    assert status == 413
+
+
+def test_upload_that_ends_early_is_400(server):
+    head = (f"POST {grade_path()} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+            f"Content-Length: 1000\r\nContent-Type: application/octet-stream\r\n\r\n").encode("ascii")
+    with socket.create_connection(("127.0.0.1", server.server_port), timeout=60) as connection:
+        connection.sendall(head + b"PK\x03\x04 only the start")
+        connection.shutdown(socket.SHUT_WR)
+        response = b""
+        while chunk := connection.recv(65536):
+            response += chunk
+
+    status_line, _, body = response.partition(b"\r\n")
+    assert status_line.split()[1] == b"400"
+    assert b"ended after" in body
+
+
+def test_full_queue_is_503_with_retry_after(server):
+    service = server.RequestHandlerClass.service
+    rejected = service.status()["rejected"]
+
+    with service.admission():  # Takes the only place
+        status, headers, _ = request(server, "POST", grade_path(), build_workbook(CHALLENGE))
+
+    assert status == 503
+    assert headers["Retry-After"] == "5"
+    assert service.status()["rejected"] == rejected + 1
+    # The place is free again
+    assert request(server, "POST", grade_path(), build_workbook(CHALLENGE))[0] == 200
+
+
+def test_status_counts_graded_requests(server):
+    _, _, before = request(server, "GET", "/status")
+    request(server, "POST", grade_path(), build_workbook(CHALLENGE))
+    status, _, after = request(server, "GET", "/status")
+
+    assert status == 200
+    assert after["graded"] == before["graded"] + 1
+    assert after["rejected"] == before["rejected"]
+    assert (after["workers"], after["max_queue"], after["running"], after["queued"]) == (1, 0, 0, 0)
+    assert after["uptime_seconds"] >= before["uptime_seconds"]
+
+
+def test_challenges_lists_every_challenge(server):
+    status, _, body = request(server, "GET", "/challenges")
+
+    assert status == 200
+    assert CHALLENGE in body
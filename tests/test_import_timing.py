@@ -0,0 +1,32 @@
+import pytest
+
+from import_timing import time_import
+
+
+# Entry points import no heavy library until grading actually starts
+@pytest.mark.parametrize("module", ["grading_runner", "batch_grader", "main_grader", "batch_manifest", "watch_grader",
+                                    "grading_service", "preflight", "report_writer"])
+def test_entry_points_start_without_heavy_libraries(module):
+    result = time_import(module, repeats=1)
+
+    assert result["module"] == module
+    assert result["loaded"] == []
+    assert result["median_ms"] > 0
+
+
+def test_grading_algorithms_bring_openpyxl_along():
+    assert "openpyxl" in time_import("grading_algorithms", repeats=1)["loaded"]
+
+
+def test_main_grader_still_exports_the_grading_api():
+    import grading_algorithms
+    import grading_runner
+    import main_grader
+    from main_grader import grade_challenge_1_1, grade_project_1, process_submissions
+
+    assert process_submissions is grading_runner.process_submissions
+    assert (grade_project_1, grade_challenge_1_1) == (grading_algorithms.grade_project_1, grading_algorithms.grade_challenge_1_1)
+    for name in main_grader.__all__:
+        assert getattr(main_grader, name) is not None
+    with pytest.raises(ImportError):
+        from main_grader import grade_challenge_9  # noqa: F401
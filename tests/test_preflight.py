@@ -0,0 +1,87 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from preflight import (CORRUPT, ENCRYPTED, GRADEABLE, MISSING_SHEETS, OLE_SIGNATURE, WRONG_FORMAT, main,
+                       rejected_result, summarize, triage_submission)
+from synthetic_submissions import build_workbook
+
+PROJECT_2 = "Project 2: Marathon Participants"
+
+
+def zip_bytes(members):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return output.getvalue()
+
+
+WORD_CONTENT_TYPES = ('<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                      '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-'
+                      'officedocument.wordprocessingml.document.main+xml"/></Types>')
+
+
+@pytest.mark.parametrize("data, challenge, status, message", [
+    (build_workbook(PROJECT_2), PROJECT_2, GRADEABLE, ""),
+    (build_workbook(PROJECT_2), None, GRADEABLE, ""),
+    (build_workbook("Project 1: Cafe Bloom"), PROJECT_2, MISSING_SHEETS, "missing sheets: Report, Participants"),
+    (build_workbook(PROJECT_2)[:5000], PROJECT_2, CORRUPT, ""),
+    (b"", PROJECT_2, CORRUPT, "the file is empty"),
+    (OLE_SIGNATURE + b"\0" * 100 + "EncryptionInfo".encode("utf-16-le"), None, ENCRYPTED, "password protected"),
+    (OLE_SIGNATURE + b"\0" * 100, None, WRONG_FORMAT, "old Excel (.xls)"),
+    (b"Name,Score\nJane,10\n", None, WRONG_FORMAT, "not an Excel workbook"),
+    (zip_bytes({"notes.txt": "x"}), None, WRONG_FORMAT, "a zip archive, not an Excel workbook"),
+    (zip_bytes({"[Content_Types].xml": WORD_CONTENT_TYPES}), None, WRONG_FORMAT, "this is a Word document"),
+    (zip_bytes({"xl/workbook.xml": "<workbook/>"}), None, CORRUPT, "no [Content_Types].xml"),
+])
+def test_submissions_are_sorted_by_what_can_be_graded(tmp_path, data, challenge, status, message):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(data)
+
+    verdict = triage_submission(str(path), challenge)
+
+    assert verdict["status"] == status
+    assert message in verdict["message"]
+    assert (verdict["estimated_ms"] > 0) == (status in (GRADEABLE, MISSING_SHEETS))
+
+
+def test_gradeable_workbooks_list_their_sheets(tmp_path):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(build_workbook(PROJECT_2))
+
+    assert triage_submission(str(path))["sheets"] == ["Report", "Participants", "Times", "Names & Emails"]
+    assert triage_submission(str(tmp_path / "missing.xlsx"))["status"] == CORRUPT
+
+
+def test_rejected_files_are_reported_as_errors():
+    verdict = {"status": CORRUPT, "message": "the file is empty", "sheets": [], "estimated_ms": 0}
+
+    assert rejected_result(verdict, PROJECT_2) == {"error": "Not gradeable (corrupt): the file is empty",
+                                                   "total_points": 50, "preflight": CORRUPT}
+
+
+def test_summary_counts_statuses_and_estimates_the_time():
+    verdicts = [{"status": GRADEABLE, "estimated_ms": 1500}, {"status": GRADEABLE, "estimated_ms": 500},
+                {"status": CORRUPT, "estimated_ms": 0}]
+
+    summary = summarize(verdicts, max_workers=2)
+
+    assert summary == {"submissions": 3, GRADEABLE: 2, MISSING_SHEETS: 0, CORRUPT: 1, ENCRYPTED: 0, WRONG_FORMAT: 0,
+                       "estimated_seconds": 1.0}
+
+
+def test_command_line_prints_a_verdict_per_submission(tmp_path, make_submission, capsys):
+    folder = str(tmp_path / "submissions")
+    make_submission(PROJECT_2, student="student_01", folder=folder)
+    make_submission(PROJECT_2, student="student_02", folder=folder, data=b"not a workbook")
+
+    code = main(["--folder", folder, "--challenge", PROJECT_2, "--workers", "1"])
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert code == 1
+    assert [(event.get("student"), event.get("status")) for event in events[:2]] == \
+           [("student_01", GRADEABLE), ("student_02", WRONG_FORMAT)]
+    assert events[2]["event"] == "summary" and events[2][WRONG_FORMAT] == 1
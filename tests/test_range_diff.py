@@ -0,0 +1,60 @@
+import pytest
+
+from range_diff import RangeValues, diff_ranges, is_blank, read_range
+from synthetic_submissions import build_workbook
+from workbook_loader import load_student_workbook
+
+
+def test_exact_diff_lists_every_wrong_cell():
+    student = RangeValues([["a", 1], ["b", 2], ["c", 3]], min_row=2, min_col=1)
+
+    diff = diff_ranges(student, [["a", 1], ["B", 2], ["c", 4]])
+
+    assert not diff.ok
+    assert diff.count == 2
+    assert diff.coordinates == ["A3", "B4"]
+    assert diff.describe("Report") == "Report sheet cells A3, B4"
+    assert diff_ranges(student, student).ok
+
+
+def test_describe_shortens_long_lists():
+    diff = diff_ranges(RangeValues(list(range(10)), min_row=5, min_col=3), [None] * 10)
+
+    assert diff.describe() == "cells C5, C6, C7 and 7 more"
+    assert diff_ranges(RangeValues([1, 2], min_row=5, min_col=3), [1, 9]).describe() == "cell C6"
+
+
+def test_casefold_and_tolerance_rules():
+    assert diff_ranges(["Name", "EMAIL", 3], ["name", "email", 3], rule="casefold").ok
+    assert diff_ranges(["Name", 3], ["name", "3"], rule="casefold").coordinates == ["A2"]
+    assert diff_ranges([20.1181, "x"], [20.118181, "x"], rule="tolerance", places=3).ok
+    assert not diff_ranges([20.1181], [20.12], rule="tolerance", places=3).ok
+
+
+def test_transform_skip_and_single_value_references():
+    student = ["RUNNER ONE", "runner two", None]
+    reference = ["Runner One", "Runner Two", None]
+
+    diff = diff_ranges(student, reference, transform="upper", skip=is_blank(reference))
+    assert diff.coordinates == ["A2"]
+    assert diff_ranges([None, "x", None], None, skip=[False, True, False]).ok
+
+
+def test_shape_mismatch_and_unknown_rule_are_errors():
+    with pytest.raises(ValueError, match="Cannot compare"):
+        diff_ranges([[1, 2], [3, 4]], [1, 2, 3])
+    with pytest.raises(ValueError, match="Unknown comparison rule: fuzzy"):
+        diff_ranges([1], [1], rule="fuzzy")
+
+
+def test_read_range_uses_cached_formula_values(tmp_path):
+    path = tmp_path / "project_1.xlsx"
+    path.write_bytes(build_workbook("Project 1: Cafe Bloom"))
+    ws = load_student_workbook(str(path)).values["CoffeeAnalysis"]
+
+    prices = read_range(ws, "A4:B5")
+    lookups = read_range(ws, "I4:I5")
+
+    assert prices.values.tolist() == [["Taiwan", 10.15], ["United States", 9.24]]
+    assert lookups.values.tolist() == [["Australia"], ["Guatemala"]]
+    assert read_range(ws, "K1:K2").values.tolist() == [[None], [None]]
@@ -0,0 +1,72 @@
+import csv
+import json
+
+import pytest
+from openpyxl import load_workbook
+
+from report_writer import EXPORT_HEADER, REPORT_HEADER, SCORE_BANDS, open_report_writer
+
+ROWS = [
+    {"Student": "student_01", "Score": 10, "Total Points": 10, "Percentage": 100, "": "", "Feedback": ""},
+    {"Student": "student_02", "Score": 6.5, "Total Points": 10, "Percentage": 65, "": "",
+     "Feedback": "Incorrect number of data rows; Imported data is incorrect in cell B3."},
+]
+
+
+def write(tmp_path, report_format, extra_columns=()):
+    report = open_report_writer(str(tmp_path), report_format, extra_columns=extra_columns)
+    for row in ROWS:
+        report.write_row(dict(row, **{column: 12.5 for column in extra_columns}))
+    report.add_sheet("Similarity", ["Student", "Section", "Similar To", "Section", "Similarity"],
+                     [["student_01", "a", "student_02", "b", 0.9]])
+    return report.close()
+
+
+def test_xlsx_report_has_one_conditional_format_range_per_band(tmp_path):
+    path = write(tmp_path, "xlsx")
+
+    wb = load_workbook(path)
+    ws = wb["Grading Report"]
+    assert [cell.value or "" for cell in ws[1]] == REPORT_HEADER
+    assert [ws["A3"].value, ws["B3"].value, ws["F3"].value] == ["student_02", 6.5, ROWS[1]["Feedback"]]
+    ranges = list(ws.conditional_formatting)
+    assert [str(formatting.sqref) for formatting in ranges] == ["B2:B3"]
+    assert [rule.formula for rule in ranges[0].rules] == [[formula] for _, formula, _ in SCORE_BANDS]
+    assert [cell.value for cell in wb["Similarity"][2]] == ["student_01", "a", "student_02", "b", 0.9]
+
+
+def test_csv_report_leaves_out_the_spacer_column(tmp_path):
+    path = write(tmp_path, "csv", ["Wall ms"])
+
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == EXPORT_HEADER + ["Wall ms"]
+    assert rows[2] == ["student_02", "6.5", "10", "65", ROWS[1]["Feedback"], "12.5"]
+    with open(tmp_path / "grades_report_similarity.csv", encoding="utf-8") as f:
+        assert list(csv.reader(f))[1] == ["student_01", "a", "student_02", "b", "0.9"]
+
+
+def test_jsonl_report_keeps_repeated_columns_apart(tmp_path):
+    path = write(tmp_path, "jsonl")
+
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert rows[0] == {"Student": "student_01", "Score": 10, "Total Points": 10, "Percentage": 100, "Feedback": ""}
+    assert len(rows) == 2
+    with open(tmp_path / "grades_report_similarity.jsonl", encoding="utf-8") as f:
+        assert json.loads(f.readline()) == {"Student": "student_01", "Section": "a", "Similar To": "student_02",
+                                            "Section 2": "b", "Similarity": 0.9}
+
+
+def test_empty_xlsx_report_has_no_formatting(tmp_path):
+    report = open_report_writer(str(tmp_path))
+
+    ws = load_workbook(report.close())["Grading Report"]
+
+    assert ws.max_row == 1
+    assert list(ws.conditional_formatting) == []
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown report format: pdf"):
+        open_report_writer(str(tmp_path), "pdf")
@@ -0,0 +1,114 @@
+import csv
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from grading_runner import grade_file, process_submissions
+from resource_limits import (WORKER_GRACE_SECONDS, ResourceLimitExceeded, check_uncompressed_size, limit_result,
+                             resource_guard, worker_timeout)
+from synthetic_submissions import build_workbook
+from worker_pool import TaskTimeout, WorkerPool
+
+CHALLENGE = "Skill: Import data into workbooks"
+
+
+# Tasks for the worker pool (module level, so they can be sent to worker processes)
+def pid_after(seconds=0):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def crash():
+    os._exit(3)
+
+
+def test_workers_are_recycled_after_max_tasks_per_child():
+    with WorkerPool(1, max_tasks_per_child=2) as pool:
+        pids = [pool.submit(pid_after).result(timeout=30) for _ in range(5)]
+
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert os.getpid() not in pids
+
+
+def test_a_task_past_its_deadline_is_stopped_and_the_pool_goes_on():
+    with WorkerPool(2) as pool:
+        stuck = pool.submit_with_timeout(0.5, pid_after, 60)
+        quick = pool.submit(pid_after)
+        after = pool.submit_with_timeout(10, pid_after)
+
+        with pytest.raises(TaskTimeout, match="still running after 0.5 s"):
+            stuck.result(timeout=30)
+        assert quick.result(timeout=30) and after.result(timeout=30)
+
+
+def test_a_crashed_worker_only_fails_its_own_task():
+    with WorkerPool(1) as pool:
+        crashed = pool.submit(crash)
+        survivor = pool.submit(pid_after)
+
+        with pytest.raises(BrokenProcessPool, match="exit code 3"):
+            crashed.result(timeout=30)
+        assert survivor.result(timeout=30)
+
+
+def test_queued_tasks_can_be_cancelled():
+    with WorkerPool(1) as pool:
+        running = pool.submit(pid_after, 0.5)
+        queued = pool.submit(pid_after)
+        assert queued.cancel()
+        assert running.result(timeout=30)
+
+
+def test_workbooks_that_unpack_too_far_are_refused(tmp_path):
+    path = tmp_path / "padded.xlsx"
+    path.write_bytes(build_workbook(CHALLENGE, padding_rows=20000))
+
+    with pytest.raises(ResourceLimitExceeded) as raised:
+        check_uncompressed_size(str(path), {"uncompressed_mb": 1})
+    check_uncompressed_size(str(path), {"uncompressed_mb": 200})
+
+    assert raised.value.limit == "uncompressed_size"
+    result = limit_result(raised.value, 10)
+    assert result["error"].startswith("Resource limit exceeded: the workbook unpacks to")
+    assert (result["total_points"], result["resource_limit"]) == (10, "uncompressed_size")
+
+
+def test_slow_grading_is_interrupted():
+    started = time.monotonic()
+    with pytest.raises(ResourceLimitExceeded, match="longer than 0.2 s"):
+        with resource_guard({"wall_seconds": 0.2}):
+            while True:
+                pass
+
+    assert time.monotonic() - started < 5
+    with resource_guard({"wall_seconds": 0.2}):
+        pass
+    time.sleep(0.4)  # Finished in time, so the timer was turned off
+
+
+def test_worker_deadline_allows_every_challenge_of_a_file():
+    assert worker_timeout(None) is None
+    assert worker_timeout({"wall_seconds": 0}) is None
+    assert worker_timeout({"wall_seconds": 60}, files=2) == 120 + WORKER_GRACE_SECONDS
+
+
+def test_a_file_over_a_limit_is_reported_and_the_run_goes_on(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(CHALLENGE, student="student_01", folder=folder)
+    make_submission(CHALLENGE, student="student_02", folder=folder, data=build_workbook(CHALLENGE, padding_rows=20000))
+    output = str(tmp_path / "report")
+    os.makedirs(output)
+
+    summary = process_submissions(folder, CHALLENGE, output, lambda percent: None, lambda ok, message: None,
+                                  report_format="csv", resource_limits={"uncompressed_mb": 1, "wall_seconds": 60},
+                                  max_tasks_per_child=1)
+
+    with open(summary["report"], encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert (summary["graded"], summary["errors"], summary["resource_limited"]) == (2, 1, 1)
+    assert rows[0][1] == "10.0"
+    assert rows[1][4].startswith("Error: Resource limit exceeded: the workbook unpacks to")
+    assert grade_file(CHALLENGE, os.path.join(folder, "student_02", "student_02.xlsx"),
+                      limits={"uncompressed_mb": 1})["resource_limit"] == "uncompressed_size"
@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+from grading_runner import process_submissions
+from result_cache import TEMP_FILE_GRACE_SECONDS, ResultCache, hash_file
+
+CHALLENGE = "Skill: Import data into workbooks"
+RESULT = {"score": 9.7, "total_points": 10, "feedback": ["Imported data is incorrect in cell B3."]}
+
+
+def test_results_are_stored_by_content_challenge_and_grader_version(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), "6")
+    key = cache.key("abc123", CHALLENGE)
+    cache.put(key, RESULT)
+
+    assert cache.get(key) == RESULT
+    assert ResultCache(str(tmp_path / "cache"), "6").get(key) == RESULT
+    assert cache.get(cache.key("abc124", CHALLENGE)) is None
+    assert cache.get(cache.key("abc123", "Project 1: Cafe Bloom")) is None
+    assert key != ResultCache(str(tmp_path / "cache"), "7").key("abc123", CHALLENGE)
+
+
+def test_unreadable_and_expired_entries_are_misses(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), "6", max_age_days=1)
+    broken, old = cache.key("broken", CHALLENGE), cache.key("old", CHALLENGE)
+    cache.put(broken, RESULT)
+    cache.put(old, RESULT)
+    with open(cache._entry_path(broken), "w", encoding="utf-8") as f:
+        f.write('{"score": 9')
+    os.utime(cache._entry_path(old), (time.time() - 2 * 86400,) * 2)
+
+    assert cache.get(broken) is None
+    assert cache.get(old) is None
+    cache.evict()
+    assert not os.path.exists(cache._entry_path(old))
+
+
+def test_eviction_drops_the_least_recently_used_entries(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), "6")
+    keys = [cache.key(str(number), CHALLENGE) for number in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.put(key, RESULT)
+        os.utime(cache._entry_path(key), (time.time() - age,) * 2)
+    cache.get(keys[0])  # Used again, so now the most recent
+    cache.max_size_bytes = 2 * os.path.getsize(cache._entry_path(keys[0]))
+
+    cache.evict()
+
+    assert [cache.get(key) is not None for key in keys] == [True, False, True]
+
+
+def test_threads_can_store_the_same_result_at_once(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), "6")
+    key = cache.key("abc123", CHALLENGE)
+    errors = []
+
+    def store():
+        try:
+            for _ in range(50):
+                cache.put(key, RESULT)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=store) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.get(key) == RESULT
+    assert os.listdir(os.path.dirname(cache._entry_path(key))) == [f"{key}.json"]
+
+
+def test_eviction_leaves_temporary_files_being_written(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), "6")
+    fresh, stale = tmp_path / "cache" / "ab" / "fresh.tmp", tmp_path / "cache" / "ab" / "stale.tmp"
+    fresh.parent.mkdir()
+    fresh.write_text("{")
+    stale.write_text("{")
+    os.utime(stale, (time.time() - TEMP_FILE_GRACE_SECONDS - 60,) * 2)
+
+    cache.evict()
+
+    assert (fresh.exists(), stale.exists()) == (True, False)
+
+
+def test_hash_file_hashes_the_contents(tmp_path):
+    (tmp_path / "a.xlsx").write_bytes(b"same bytes")
+    (tmp_path / "b.xlsx").write_bytes(b"same bytes")
+    (tmp_path / "c.xlsx").write_bytes(b"other bytes")
+
+    assert hash_file(str(tmp_path / "a.xlsx"), chunk_size=4) == hash_file(str(tmp_path / "b.xlsx"))
+    assert hash_file(str(tmp_path / "a.xlsx")) != hash_file(str(tmp_path / "c.xlsx"))
+
+
+def run(folder, output, cache_dir):
+    os.makedirs(output, exist_ok=True)
+    return process_submissions(folder, CHALLENGE, output, lambda percent: None, lambda ok, message: None,
+                               cache_dir=cache_dir, report_format="csv")
+
+
+def graded_files(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("Grading ")]
+
+
+def test_identical_files_are_graded_once_and_cached_files_not_again(tmp_path, make_submission, capsys):
+    folder = str(tmp_path / "submissions")
+    for student in ("student_01", "student_02", "student_03"):
+        make_submission(CHALLENGE, student=student, folder=folder)
+    make_submission(CHALLENGE, ["wrong_name"], student="student_04", folder=folder)
+    cache_dir = str(tmp_path / "cache")
+
+    first = run(folder, str(tmp_path / "first"), cache_dir)
+    assert len(graded_files(capsys)) == 2
+    assert first["graded"] == 4
+
+    make_submission(CHALLENGE, ["missing_row"], student="student_04", folder=folder)
+    second = run(folder, str(tmp_path / "second"), cache_dir)
+    assert graded_files(capsys) == [f"Grading {os.path.join(folder, 'student_04', 'student_04.xlsx')}"]
+    assert second["graded"] == 4
+
+    with open(first["report"], encoding="utf-8") as f:
+        first_rows = f.read().splitlines()
+    with open(second["report"], encoding="utf-8") as f:
+        second_rows = f.read().splitlines()
+    assert first_rows[:4] == second_rows[:4]
+    assert first_rows[4] != second_rows[4]
@@ -0,0 +1,108 @@
+import pytest
+
+import check_results
+import grading_algorithms
+from grading_runner import GRADING_FUNCTIONS
+from rubric import compile_rubric, merge_plans
+from synthetic_submissions import build_workbook
+from workbook_loader import load_student_workbook
+
+# (challenge, mistakes, score, total points, feedback) the hand-written graders gave before the rubric engine.
+# Project 1 only keeps the cases its formula structure checks (user-023) left alone.
+OLD_GRADER_RESULTS = [
+    ("Project 1: Cafe Bloom", (), 65.0, 60, []),
+    ("Project 1: Cafe Bloom", ("wrong_price",), 64.72727272727272, 60,
+     ["Incorrect price for Taiwan. Expected 10.15, Got 11.15"]),
+    ("Project 2: Marathon Participants", (), 50, 50, []),
+    ("Project 2: Marathon Participants", ("wrong_report_value",), 49, 50,
+     ["Incorrect value in Report sheet at B8. Expected 49, found 48."]),
+    ("Project 2: Marathon Participants", ("lowercase_name",), 47, 50,
+     ["Incorrect name format at Names & Emails sheet cell A300. Expected uppercase."]),
+    ("Project 2: Marathon Participants", ("missing_table",), 47, 50, ["No table found in Times sheet."]),
+    ("Skill: Navigate within workbooks", (), 14, 15, []),
+    ("Skill: Navigate within workbooks", ("wrong_font",), 12, 15,
+     ["Font for 'EmployeeInfo' named range is not set to Times New Roman."]),
+    ("Skill: Navigate within workbooks", ("hyperlink_left",), 11, 15, ["Hyperlink in cell B204 has not been removed."]),
+    ("Skill: Navigate within workbooks", ("no_named_range",), 10, 15, ["Named range 'EmployeeInfo' not found."]),
+    ("Skill: Format worksheets and workbooks", (), 18.5, 20, []),
+    ("Skill: Format worksheets and workbooks", ("portrait",), 17.5, 20, ["Incorrect page orientation"]),
+    ("Skill: Format worksheets and workbooks", ("narrow_column",), 16.5, 20, ["Incorrect width for column E; Expected 15."]),
+    ("Skill: Format worksheets and workbooks", ("gridlines",), 16.5, 20, ["Gridlines or headings are not hidden."]),
+]
+
+
+@pytest.mark.parametrize("challenge, mistakes, score, total_points, feedback", OLD_GRADER_RESULTS)
+def test_rubric_graders_match_the_old_graders(tmp_path, challenge, mistakes, score, total_points, feedback):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(build_workbook(challenge, mistakes))
+
+    result = getattr(grading_algorithms, GRADING_FUNCTIONS[challenge])(str(path))
+
+    assert (result[0], result[1], list(result[2])) == pytest.approx((score, total_points, feedback))
+
+
+CHECKS = [
+    {'id': 'name', 'check': 'value', 'sheet': 'Sheet', 'cell': 'B2', 'expected': 'John', 'points': 2,
+     'feedback': "B2 should be John, got {actual}"},
+    {'id': 'id', 'check': 'tolerance', 'sheet': 'Sheet', 'cell': 'A2', 'expected': 101.4, 'tolerance': 0.5, 'points': 1},
+    {'id': 'email', 'check': 'value', 'sheet': 'Sheet', 'cell': 'D2', 'contains': '@', 'points': 1,
+     'requires': 'name'},
+    {'check': 'sheets_present', 'sheets': ['Sheet', 'Summary'], 'points': 3, 'feedback': "Missing sheets: {actual}"},
+]
+
+
+def grade(tmp_path, checks, mistakes=()):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(build_workbook("Skill: Import data into workbooks", mistakes))
+    rubric = compile_rubric(checks)
+    with check_results.recording() as recorded:
+        score, feedback = rubric.grade(rubric.load(str(path)))
+    return score, feedback, {check_id: outcome for check_id, _, _, outcome in recorded}
+
+
+def test_checks_score_and_fill_in_their_feedback(tmp_path):
+    score, feedback, outcomes = grade(tmp_path, CHECKS)
+
+    assert score == 4
+    assert feedback == ["Missing sheets: Summary"]
+    assert outcomes == {"name": check_results.PASSED, "id": check_results.PASSED, "email": check_results.PASSED,
+                        "sheets_present_4": check_results.FAILED}
+
+
+def test_a_check_whose_requirement_failed_is_skipped(tmp_path):
+    checks = [dict(CHECKS[0], cell='B3'), CHECKS[2]]
+
+    score, feedback, outcomes = grade(tmp_path, checks, ["wrong_name"])
+
+    assert (score, feedback) == (0, ["B2 should be John, got Janet"])
+    assert outcomes == {"name": check_results.FAILED, "email": check_results.SKIPPED}
+
+
+def test_plan_lists_only_the_cells_and_parts_the_checks_read():
+    rubric = compile_rubric(CHECKS, reads={'Sheet': ["A4:B5"], 'Summary': None})
+
+    assert rubric.plan.sheets == {'Sheet': {'B2', 'A2', 'D2', 'A4', 'B4', 'A5', 'B5'}, 'Summary': None}
+    assert rubric.plan.parts == {'sheetnames'}
+    assert rubric.plan.cells_for('Other') is None
+
+
+def test_a_planned_load_skips_the_other_cells(tmp_path):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(build_workbook("Skill: Import data into workbooks"))
+    rubric = compile_rubric(CHECKS)
+
+    ws = load_student_workbook(str(path), plan=rubric.plan).formulas["Sheet"]
+
+    assert sorted(ws._cells) == [(2, 1), (2, 2), (2, 4)]
+
+
+def test_merged_plans_load_what_each_plan_loads():
+    merged = merge_plans([compile_rubric(CHECKS[:1]).plan, compile_rubric(CHECKS[1:2], reads={'Other': None}).plan])
+
+    assert merged.sheets == {'Sheet': {'B2', 'A2'}, 'Other': None}
+    assert merge_plans([compile_rubric(CHECKS).plan, None]) is None
+
+
+def test_unknown_check_type_is_rejected():
+    with pytest.raises(ValueError, match="Unknown rubric check type: spelling"):
+        compile_rubric([{'check': 'spelling', 'cell': 'A1'}])
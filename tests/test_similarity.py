@@ -0,0 +1,93 @@
+import csv
+import os
+
+from grading_runner import process_submissions
+from similarity import SimilarityIndex, fingerprint_submission, minhash_signature, workbook_shingles
+from synthetic_submissions import build_workbook, stamp
+
+CHALLENGE = "Project 2: Marathon Participants"
+
+
+def fingerprint(tmp_path, name, data, exclude_paths=()):
+    path = tmp_path / f"{name}.xlsx"
+    path.write_bytes(data)
+    return fingerprint_submission(str(path), exclude_paths)
+
+
+def test_near_duplicates_are_paired_and_different_work_is_not(tmp_path):
+    index = SimilarityIndex()
+    index.add("A", CHALLENGE, "copied", fingerprint(tmp_path, "copied", stamp(build_workbook(CHALLENGE), "copied")))
+    index.add("A", CHALLENGE, "original", fingerprint(tmp_path, "original", build_workbook(CHALLENGE, ["wrong_report_value"])))
+    index.add("A", CHALLENGE, "different", fingerprint(tmp_path, "different", build_workbook("Skill: Navigate within workbooks")))
+
+    (first, second, similarity), = index.find_similar_pairs()
+
+    assert {first[2], second[2]} == {"copied", "original"}
+    assert similarity > 0.9
+
+
+def test_only_the_same_challenge_is_compared(tmp_path):
+    same = fingerprint(tmp_path, "same", build_workbook(CHALLENGE))
+    index = SimilarityIndex()
+    index.add("A", CHALLENGE, "student_01", same)
+    index.add("A", "Project 1: Cafe Bloom", "student_01", same)
+
+    assert index.find_similar_pairs() == []
+
+
+def test_starter_content_is_excluded(tmp_path):
+    starter = tmp_path / "starter.xlsx"
+    starter.write_bytes(build_workbook(CHALLENGE))
+
+    untouched = fingerprint(tmp_path, "untouched", build_workbook(CHALLENGE), [str(starter)])
+    changed = fingerprint(tmp_path, "changed", build_workbook(CHALLENGE, ["lowercase_name"]), [str(starter)])
+
+    assert untouched["size"] == 0
+    assert 0 < changed["size"] < len(workbook_shingles(str(starter)))
+    index = SimilarityIndex()
+    index.add("A", CHALLENGE, "untouched", untouched)  # Nothing of their own, so not indexed
+    assert index.labels == []
+
+
+def test_identical_shingles_give_identical_signatures():
+    shingles = set(range(1000, 1200))
+
+    assert (minhash_signature(shingles) == minhash_signature(set(shingles))).all()
+    assert (minhash_signature(shingles) == minhash_signature(shingles | {5})).mean() > 0.9
+
+
+def test_saved_index_only_reports_pairs_with_new_submissions(tmp_path):
+    path = str(tmp_path / "index.npz")
+    data = build_workbook(CHALLENGE)
+    index = SimilarityIndex()
+    index.add("A", CHALLENGE, "student_01", fingerprint(tmp_path, "one", stamp(data, "one")))
+    index.add("A", CHALLENGE, "student_02", fingerprint(tmp_path, "two", stamp(data, "two")))
+    assert len(index.find_similar_pairs()) == 1
+    index.save(path)
+
+    later = SimilarityIndex.load(path)
+    assert later.labels == index.labels
+    assert later.find_similar_pairs() == []
+    later.add("B", CHALLENGE, "student_01", fingerprint(tmp_path, "three", stamp(data, "three")))
+    assert [(a[0], b[0]) for a, b, _ in later.find_similar_pairs()] == [("A", "B"), ("A", "B")]
+
+
+def test_similar_submissions_are_listed_next_to_the_report(tmp_path, make_submission):
+    folder = str(tmp_path / "section_a")
+    data = build_workbook(CHALLENGE)
+    make_submission(CHALLENGE, student="student_01", folder=folder, data=stamp(data, "one"))
+    make_submission(CHALLENGE, student="student_02", folder=folder, data=stamp(data, "two"))
+    make_submission("Skill: Format worksheets and workbooks", student="student_03", folder=folder)
+    output = str(tmp_path / "report")
+    os.makedirs(output)
+
+    summary = process_submissions(folder, CHALLENGE, output, lambda percent: None, lambda ok, message: None,
+                                  similarity_index_path=str(tmp_path / "index.npz"), similarity_excludes=(),
+                                  report_format="csv")
+
+    with open(os.path.join(output, "grades_report_similarity.csv"), encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert summary["graded"] == 3
+    assert rows == [["Student", "Section", "Similar To", "Section", "Similarity"],
+                    ["student_01", "section_a", "student_02", "section_a", "1.0"]]
+    assert os.path.exists(tmp_path / "index.npz")
@@ -0,0 +1,45 @@
+import pytest
+
+import check_results
+import rubric
+from rubric import compile_rubric
+from synthetic_submissions import build_workbook
+
+CHECKS = [
+    {'id': 'fonts', 'check': 'style', 'sheet': 'Employees', 'range': 'B1:B201', 'points': 2,
+     'attrs': {'font.name': 'Times New Roman'}, 'feedback': "{item}: {actual} instead of {expected}"},
+    {'id': 'fill', 'check': 'style', 'sheet': 'Employees', 'cell': 'B144', 'points': 1,
+     'attrs': {'fill.fgColor.rgb': 'FFFFFF00', 'fill.fill_type': 'solid'}, 'feedback': "{item}: {actual}"},
+    {'id': 'past_the_data', 'check': 'style', 'sheet': 'Employees', 'range': 'A199:B203', 'points': 1,
+     'attrs': {'font.name': 'Times New Roman', 'font.b': False}, 'feedback': "{item}: {actual} instead of {expected}"},
+]
+
+
+def grade(tmp_path, checks, mistakes=()):
+    path = tmp_path / "submission.xlsx"
+    path.write_bytes(build_workbook("Skill: Navigate within workbooks", mistakes))
+    compiled = compile_rubric(checks)
+    with check_results.recording():
+        return compiled.grade(compiled.load(str(path)))
+
+
+@pytest.mark.parametrize("mistakes", [(), ("wrong_font",)])
+def test_style_records_give_the_same_answer_as_every_cell(tmp_path, monkeypatch, mistakes):
+    fast = grade(tmp_path, CHECKS, mistakes)
+    monkeypatch.setattr(rubric, "_STYLE_COMPONENTS", {})  # Every cell resolved on its own
+    slow = grade(tmp_path, CHECKS, mistakes)
+
+    assert fast == slow
+
+
+def test_first_wrong_cell_is_reported(tmp_path):
+    score, feedback = grade(tmp_path, CHECKS, ["wrong_font"])
+
+    assert score == 1
+    assert feedback == ["B50: Arial instead of Times New Roman", "A202: Calibri instead of Times New Roman"]
+
+
+def test_cells_that_do_not_exist_use_the_default_style(tmp_path):
+    checks = [dict(CHECKS[2], range='C1:C3', attrs={'font.name': 'Calibri', 'fill.fill_type': None})]
+
+    assert grade(tmp_path, checks) == (1, [])
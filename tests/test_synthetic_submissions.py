@@ -0,0 +1,78 @@
+import json
+import os
+
+import pytest
+
+import benchmark
+from grading_runner import CHALLENGES, find_submission_files, grade_file, hash_submission
+from synthetic_submissions import COHORT_MANIFEST, MISTAKES, build_workbook, generate_cohort, parse_mix, stamp
+
+
+@pytest.mark.parametrize("challenge", CHALLENGES)
+def test_every_mistake_costs_points(tmp_path, challenge):
+    correct, partial = tmp_path / "correct.xlsx", tmp_path / "partial.xlsx"
+    correct.write_bytes(build_workbook(challenge))
+    partial.write_bytes(build_workbook(challenge, MISTAKES[challenge]))
+
+    correct_result, partial_result = grade_file(challenge, str(correct)), grade_file(challenge, str(partial))
+
+    assert "error" not in correct_result and "error" not in partial_result
+    assert partial_result["score"] < correct_result["score"]
+    assert partial_result["feedback"]
+
+
+def test_cohorts_are_the_same_for_the_same_seed(tmp_path):
+    mix = parse_mix("correct=0.5,partial=0.3,corrupt=0.2")
+    first = generate_cohort(str(tmp_path / "a"), "Skill: Import data into workbooks", 12, mix, seed=3, padding_rows=10)
+    second = generate_cohort(str(tmp_path / "b"), "Skill: Import data into workbooks", 12, mix, seed=3, padding_rows=10)
+
+    assert first == second
+    assert {student["variant"] for student in first} <= {"correct", "partial", "corrupt"}
+    with open(tmp_path / "a" / COHORT_MANIFEST, encoding="utf-8") as f:
+        assert json.load(f)["students"] == first
+    assert [student for student, _ in find_submission_files(str(tmp_path / "a"))] == [f"student_{n:02d}" for n in range(1, 13)]
+
+
+def test_every_student_file_has_its_own_hash(tmp_path):
+    generate_cohort(str(tmp_path), "Skill: Import data into workbooks", 8, {"correct": 1}, padding_rows=10)
+
+    hashes = {hash_submission(path) for _, path in find_submission_files(str(tmp_path))}
+
+    assert len(hashes) == 8
+    assert stamp(b"not a zip", "student_01") == b"not a zip"
+
+
+def test_unknown_variant_or_challenge_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown variant: perfect"):
+        parse_mix("perfect=1")
+    with pytest.raises(ValueError, match="Unknown challenge"):
+        generate_cohort(str(tmp_path), "Project 9", 1)
+
+
+def test_grader_latency_covers_every_variant(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "LATENCY_PADDING_ROWS", 50)
+
+    results = benchmark.bench_grader_latency("Skill: Import data into workbooks", str(tmp_path), repeats=2)
+
+    assert [result["variant"] for result in results] == ["correct", "partial", "oversized", "corrupt"]
+    assert all(result["median_ms"] > 0 and result["p95_ms"] >= result["median_ms"] for result in results)
+
+
+def test_throughput_runs_a_cohort_in_a_fresh_interpreter(tmp_path):
+    result = benchmark.bench_throughput("Skill: Import data into workbooks", 4, str(tmp_path), report_format="csv")
+
+    assert (result["size"], result["workers"], result["format"]) == (4, 1, "csv")
+    assert result["seconds"] > 0
+    assert os.path.exists(tmp_path / "reports" / "grades_report.csv")
+
+
+def test_compare_reports_the_change_per_measurement():
+    old = {"commit": "a", "grader_latency": [{"challenge": "C", "variant": "correct", "median_ms": 10.0}], "throughput": []}
+    new = {"commit": "b", "grader_latency": [{"challenge": "C", "variant": "correct", "median_ms": 5.0},
+                                             {"challenge": "C", "variant": "partial", "median_ms": 7.0}], "throughput": []}
+    lines = []
+
+    benchmark.compare(old, new, log=lines.append)
+
+    assert lines[0] == "a -> b"
+    assert len(lines) == 2 and lines[1].endswith("(-50.0%)")
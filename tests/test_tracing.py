@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+import tracing
+from grading_runner import TIMING_COLUMNS, grade_file, process_submissions
+
+CHALLENGE = "Skill: Navigate within workbooks"
+
+
+def test_spans_are_no_ops_unless_recording():
+    assert tracing.current() is None
+    assert tracing.span("load") is tracing.span("grade", file="a.xlsx")
+
+
+def test_recorded_spans_are_chrome_trace_events(tmp_path):
+    previous = tracing.start()
+    with tracing.span("load", category="load", file="a.xlsx"):
+        with tracing.span("B2"):
+            pass
+    recorder = tracing.stop(previous)
+
+    inner, outer = recorder.events
+    assert (outer["name"], outer["cat"], outer["ph"], outer["args"]) == ("load", "load", "X", {"file": "a.xlsx"})
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert outer["pid"] == os.getpid()
+
+    tracing.write_chrome_trace(str(tmp_path / "traces" / "run.json"), recorder.events)
+    with open(tmp_path / "traces" / "run.json", encoding="utf-8") as f:
+        assert json.load(f)["traceEvents"] == recorder.events
+
+
+def test_traced_submission_times_every_check(tmp_path, make_submission):
+    path = make_submission(CHALLENGE)
+
+    result = grade_file(CHALLENGE, path, trace=True)
+
+    timings = result["trace"]
+    assert timings["wall_ms"] > 0 and timings["cpu_ms"] >= 0
+    names = {event["name"] for event in timings["events"]}
+    assert {"grade", "load"} <= names
+    assert {event["cat"] for event in timings["events"]} >= {"check", "load"}
+    assert tracing.current() is None
+
+
+def test_run_writes_a_trace_and_timing_columns(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(CHALLENGE, folder=folder)
+    make_submission(CHALLENGE, ["wrong_font"], student="student_02", folder=folder)
+    output, trace_path = str(tmp_path / "report"), str(tmp_path / "trace.json")
+    os.makedirs(output)
+
+    summary = process_submissions(folder, CHALLENGE, output, lambda percent: None, lambda ok, message: None,
+                                  report_format="jsonl", trace_path=trace_path, timing_columns=True)
+
+    with open(summary["report"], encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert all(row[column] is not None and row[column] != "" for row in rows for column in TIMING_COLUMNS)
+    with open(trace_path, encoding="utf-8") as f:
+        names = [event["name"] for event in json.load(f)["traceEvents"]]
+    assert names.count("grade") == 2
+    assert {"discovery", "report: save"} <= set(names)
+
+
+def test_a_failed_run_stops_recording(tmp_path, make_submission):
+    folder = str(tmp_path / "submissions")
+    make_submission(CHALLENGE, folder=folder)
+
+    with pytest.raises(ValueError):
+        process_submissions(folder, CHALLENGE, str(tmp_path), lambda percent: None, lambda ok, message: None,
+                            report_format="pdf", timing_columns=True)
+
+    assert tracing.current() is None
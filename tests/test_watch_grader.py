@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+from synthetic_submissions import build_workbook
+from watch_grader import SubmissionWatcher, main, watch
+
+CHALLENGE = "Skill: Import data into workbooks"
+
+
+def make_watcher(tmp_path, max_workers=1):
+    folder = tmp_path / "submissions"
+    folder.mkdir(exist_ok=True)
+    (tmp_path / "report").mkdir(exist_ok=True)
+    return SubmissionWatcher(str(folder), CHALLENGE, str(tmp_path / "report"), max_workers=max_workers,
+                             report_format="csv", settle_seconds=3), str(folder)
+
+
+def report_rows(watcher):
+    with open(watcher.report_path, encoding="utf-8") as f:
+        return [(row[0], row[1], row[4]) for row in list(csv.reader(f))[1:]]
+
+
+def graded_lines(capsys):
+    return [line for line in capsys.readouterr().out.splitlines() if line.startswith("Grading ")]
+
+
+def test_files_are_graded_once_they_settle(tmp_path, make_submission):
+    watcher, folder = make_watcher(tmp_path)
+    make_submission(CHALLENGE, folder=folder)
+
+    assert watcher.poll(now=0) == 0  # Seen, not settled yet (the first poll writes an empty report)
+    assert watcher.poll(now=1) is None
+    assert watcher.poll(now=4) == 1
+    (student_folder, result), = watcher.results.values()
+    assert student_folder == "student_01"
+    assert result["score"] == result["total_points"] == 10
+    assert os.path.exists(watcher.report_path)
+
+
+def test_touched_files_are_not_graded_again(tmp_path, make_submission):
+    watcher, folder = make_watcher(tmp_path)
+    path = make_submission(CHALLENGE, folder=folder)
+    watcher.poll(now=0)
+    watcher.poll(now=4)
+
+    os.utime(path, (1, 1))
+    watcher.poll(now=10)
+    assert watcher.poll(now=14) == 0
+
+
+def test_files_still_being_written_wait_to_settle(tmp_path, make_submission):
+    watcher, folder = make_watcher(tmp_path)
+    path = make_submission(CHALLENGE, folder=folder)
+    watcher.poll(now=0)
+
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    assert watcher.poll(now=4) is None
+    assert not watcher.settled
+    assert watcher.poll(now=7) == 1
+    assert watcher.settled
+
+
+def test_changed_bytes_are_graded_again(tmp_path, make_submission, capsys):
+    watcher, folder = make_watcher(tmp_path)
+    path = make_submission(CHALLENGE, folder=folder)
+    watcher.poll(now=0)
+    watcher.poll(now=4)
+
+    with open(path, "wb") as f:
+        f.write(build_workbook(CHALLENGE, ["wrong_name"]))
+    watcher.poll(now=10)
+    assert watcher.poll(now=14) == 1
+    assert len(graded_lines(capsys)) == 2
+    assert report_rows(watcher)[0][:2] == ("student_01", "9.7")
+
+
+def test_removed_and_rejected_files_update_the_report(tmp_path, make_submission, capsys):
+    watcher, folder = make_watcher(tmp_path)
+    path = make_submission(CHALLENGE, student="student_01", folder=folder)
+    make_submission(CHALLENGE, student="student_02", folder=folder, data=b"Name,Score\n")
+    watcher.poll(now=0)
+    watcher.poll(now=4)
+
+    assert [row[:2] for row in report_rows(watcher)] == [("student_01", "10.0"), ("student_02", "0")]
+    assert report_rows(watcher)[1][2].startswith("Error: Not gradeable (wrong_format)")
+    assert (watcher.errors, len(graded_lines(capsys))) == (1, 1)
+
+    os.remove(path)
+    assert watcher.poll(now=5) == 0
+    assert [row[0] for row in report_rows(watcher)] == ["student_02"]
+
+
+def test_unchanged_copies_come_from_the_cache(tmp_path, make_submission, capsys):
+    make_submission(CHALLENGE, folder=str(tmp_path / "submissions"))
+    for _ in range(2):
+        watcher = SubmissionWatcher(str(tmp_path / "submissions"), CHALLENGE, str(tmp_path), report_format="csv",
+                                    settle_seconds=3, cache_dir=str(tmp_path / "cache"))
+        watcher.poll(now=0)
+        watcher.poll(now=4)
+        watcher.close()
+
+    assert len(graded_lines(capsys)) == 1
+    assert report_rows(watcher)[0][:2] == ("student_01", "10.0")
+
+
+def test_parallel_batches_keep_every_result(tmp_path, make_submission):
+    watcher, folder = make_watcher(tmp_path, max_workers=2)
+    for number in range(1, 5):
+        make_submission(CHALLENGE, ["wrong_name"] if number % 2 else (), student=f"student_{number:02d}", folder=folder)
+    try:
+        watcher.poll(now=0)
+        assert watcher.poll(now=4) == 4
+    finally:
+        watcher.close()
+
+    scores = {student: result["score"] for student, result in watcher.results.values()}
+    assert scores["student_02"] == scores["student_04"] == 10
+    assert scores["student_01"] == scores["student_03"] < 10
+
+
+def test_files_under_resource_limits_are_graded_in_a_worker(tmp_path, make_submission):
+    folder = tmp_path / "submissions"
+    make_submission(CHALLENGE, folder=str(folder))
+    watcher = SubmissionWatcher(str(folder), CHALLENGE, str(tmp_path), report_format="csv", settle_seconds=0,
+                                limits={"wall_seconds": 60})
+    try:
+        watcher.poll(now=0)
+        assert watcher.poll(now=0) == 1
+        assert watcher.executor is not None
+    finally:
+        watcher.close()
+
+    (_, result), = watcher.results.values()
+    assert result["score"] == 10
+
+
+def test_files_without_limits_are_graded_in_the_watcher(tmp_path, make_submission):
+    watcher, folder = make_watcher(tmp_path)
+    make_submission(CHALLENGE, folder=folder)
+    watcher.poll(now=0)
+    watcher.poll(now=4)
+
+    assert watcher.executor is None
+
+
+def test_deadline_with_a_utc_offset_stops_the_watcher(tmp_path):
+    watcher, _ = make_watcher(tmp_path)
+    deadline = datetime.now(timezone(timedelta(hours=5))) - timedelta(minutes=1)
+    stop_event = threading.Event()
+    timer = threading.Timer(30, stop_event.set)  # Only fires if the deadline is not honoured
+    timer.start()
+    try:
+        watch(watcher, interval=0.01, deadline=deadline, stop_event=stop_event)
+    finally:
+        timer.cancel()
+
+    assert not stop_event.is_set()
+
+
+def test_deadline_with_a_utc_offset_in_the_future_keeps_watching(tmp_path):
+    watcher, _ = make_watcher(tmp_path)
+    deadline = datetime.now(timezone(timedelta(hours=-7))) + timedelta(hours=1)
+    stop_event = threading.Event()
+    polls = []
+
+    def on_update(watcher, graded):
+        polls.append(graded)
+        stop_event.set()
+
+    watch(watcher, interval=0.01, deadline=deadline, stop_event=stop_event, on_update=on_update)
+
+    assert polls == [0]
+
+
+def test_command_line_rejects_a_missing_folder(tmp_path, capsys):
+    assert main(["--folder", str(tmp_path / "missing"), "--challenge", CHALLENGE, "--output", str(tmp_path)]) == 2
+    assert json.loads(capsys.readouterr().out)["event"] == "failed"
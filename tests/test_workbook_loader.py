@@ -0,0 +1,87 @@
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from synthetic_submissions import PROJECT_1_FORMULAS, build_workbook
+from workbook_loader import load_student_workbook
+
+PROJECT_1 = "Project 1: Cafe Bloom"
+
+
+def test_one_load_gives_formulas_and_cached_values(tmp_path):
+    path = tmp_path / "project_1.xlsx"
+    path.write_bytes(build_workbook(PROJECT_1))
+
+    workbook = load_student_workbook(str(path))
+    formulas = workbook.formulas["CoffeeAnalysis"]
+    values = workbook.values["CoffeeAnalysis"]
+
+    for coordinate, (formula, value) in PROJECT_1_FORMULAS.items():
+        assert formulas[coordinate].value == formula
+        assert values[coordinate].value == value
+    assert formulas["A4"].value == values["A4"].value == "Taiwan"
+    assert values["B4"].value == 10.15
+
+
+def test_matches_both_openpyxl_loads(tmp_path):
+    path = tmp_path / "project_1.xlsx"
+    path.write_bytes(build_workbook(PROJECT_1))
+
+    workbook = load_student_workbook(str(path))
+    expected_formulas = load_workbook(str(path), data_only=False)["CoffeeAnalysis"]
+    expected_values = load_workbook(str(path), data_only=True)["CoffeeAnalysis"]
+
+    formulas = workbook.formulas["CoffeeAnalysis"]
+    values = workbook.values["CoffeeAnalysis"]
+    for row in expected_formulas.iter_rows():
+        for cell in row:
+            assert formulas[cell.coordinate].value == cell.value
+            assert values[cell.coordinate].value == expected_values[cell.coordinate].value
+    assert list(values.iter_rows(min_row=4, max_row=5, max_col=2, values_only=True)) == \
+           list(expected_values.iter_rows(min_row=4, max_row=5, max_col=2, values_only=True))
+
+
+def test_loads_from_a_file_object():
+    workbook = load_student_workbook(io.BytesIO(build_workbook(PROJECT_1)))
+
+    assert workbook.values["CoffeeAnalysis"]["I4"].value == "Australia"
+    assert workbook.values.sheetnames == ["CoffeeAnalysis"]
+
+
+def test_sheets_are_parsed_when_first_used(tmp_path):
+    path = tmp_path / "project_2.xlsx"
+    path.write_bytes(build_workbook("Project 2: Marathon Participants"))
+
+    workbook = load_student_workbook(str(path))
+    lazy = workbook.formulas
+
+    assert lazy.sheetnames == ["Report", "Participants", "Times", "Names & Emails"]
+    assert "Times" in lazy and "Missing" not in lazy
+    assert lazy._loaded == {}
+    assert lazy["Report"]["B2"].value == 917
+    assert list(lazy._loaded) == ["Report"]
+    assert lazy.active is lazy["Report"]
+    assert lazy["Times"].tables["Times"].ref == "A1:B523"
+    assert list(lazy._loaded) == ["Report", "Times"]
+
+
+def test_missing_sheet_is_a_key_error(tmp_path):
+    path = tmp_path / "project_2.xlsx"
+    path.write_bytes(build_workbook("Project 2: Marathon Participants"))
+
+    workbook = load_student_workbook(str(path))
+    with pytest.raises(KeyError, match="Summary"):
+        workbook.formulas["Summary"]
+
+
+def test_every_sheet_loaded_releases_the_file(tmp_path):
+    path = tmp_path / "project_2.xlsx"
+    path.write_bytes(build_workbook("Project 2: Marathon Participants"))
+
+    workbook = load_student_workbook(str(path))
+    titles = [ws.title for ws in workbook.formulas.worksheets]
+
+    assert titles == workbook.formulas.sheetnames
+    assert workbook.formulas._reader.archive.fp is None
+    assert workbook.values["Names & Emails"]["A2"].value == "RUNNER NAME2"
@@ -0,0 +1,94 @@
+import csv
+import io
+import os
+import zipfile
+
+import pytest
+
+from grading_runner import find_submission_files, grade_file, hash_submission, process_submissions
+from synthetic_submissions import build_workbook
+from zip_submissions import MEMBER_SEPARATOR, is_member_path, is_submission_archive, open_submission, student_name
+
+CHALLENGE = "Skill: Import data into workbooks"
+
+
+def nested_zip(members):
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return output.getvalue()
+
+
+# A Moodle style export in one top level folder, with one student's workbook zipped and some clutter
+@pytest.fixture
+def export(tmp_path):
+    path = str(tmp_path / "section_1.zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("Project/Jane Doe_12345_assignsubmission_file_/Cafe Bloom.xlsx", build_workbook(CHALLENGE))
+        archive.writestr("Project/Ann Lee_12346_assignsubmission_file_/work.zip",
+                         nested_zip({"Inner.xlsx": build_workbook(CHALLENGE, ["wrong_name"]), "notes.txt": "x"}))
+        archive.writestr("Project/Bob Roe_12347_assignsubmission_file_/~$Cafe Bloom.xlsx", b"lock file")
+        archive.writestr("__MACOSX/Project/._Cafe Bloom.xlsx", b"resource fork")
+    return path
+
+
+@pytest.mark.parametrize("name, student", [
+    ("Jane Doe_12345_assignsubmission_file_", "Jane Doe"),
+    ("doejane_late_12345_67890_Project1.xlsx", "doejane"),
+    ("doejane_12345_67890_project1.zip", "doejane"),
+    ("student_01", "student_01"),
+    ("Jane Doe.xlsx", "Jane Doe"),
+])
+def test_student_names_lose_the_lms_suffixes(name, student):
+    assert student_name(name) == student
+
+
+def test_export_members_are_found_without_extracting(export, tmp_path):
+    submissions = find_submission_files(export)
+
+    assert is_submission_archive(export)
+    assert submissions == [
+        ("Ann Lee", f"{export}{MEMBER_SEPARATOR}Project/Ann Lee_12346_assignsubmission_file_/work.zip{MEMBER_SEPARATOR}Inner.xlsx"),
+        ("Jane Doe", f"{export}{MEMBER_SEPARATOR}Project/Jane Doe_12345_assignsubmission_file_/Cafe Bloom.xlsx"),
+    ]
+    assert all(is_member_path(path) for _, path in submissions)
+    assert sorted(os.listdir(tmp_path)) == ["section_1.zip"]
+
+
+def test_members_are_read_and_hashed_in_memory(export):
+    (_, nested), (_, plain) = find_submission_files(export)
+
+    source = open_submission(nested)
+    assert source.name == nested
+    assert zipfile.is_zipfile(source)
+    assert hash_submission(nested) != hash_submission(plain)
+    assert grade_file(CHALLENGE, plain)["score"] == 10
+    assert grade_file(CHALLENGE, nested)["score"] < 10
+
+
+def test_export_is_graded_like_a_folder(export, tmp_path):
+    output = str(tmp_path / "report")
+    os.makedirs(output)
+
+    summary = process_submissions(export, CHALLENGE, output, lambda percent: None, lambda ok, message: None,
+                                  max_workers=2, report_format="csv")
+
+    with open(summary["report"], encoding="utf-8") as f:
+        rows = list(csv.reader(f))[1:]
+    assert [(row[0], row[1]) for row in rows] == [("Ann Lee", "9.7"), ("Jane Doe", "10.0")]
+    assert summary["errors"] == 0
+
+
+def test_broken_inner_zip_is_reported_when_graded(tmp_path):
+    path = str(tmp_path / "export.zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("student_01/work.zip", b"not a zip")
+        archive.writestr("student_02/work.xlsx", build_workbook(CHALLENGE))
+
+    (student, member_path), _ = find_submission_files(path)
+
+    assert (student, member_path) == ("student_01", f"{path}{MEMBER_SEPARATOR}student_01/work.zip")
+    result = grade_file(CHALLENGE, member_path)
+    assert (result["score"], result["checks"]) == (0, None)
+    assert "File is not a zip file" in result["feedback"][0]
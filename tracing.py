@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+'''
+Timing spans for grading runs.
+
+Code marks the phases it wants timed:
+
+    with tracing.span("load", file=path):
+        ...
+
+While nothing is recording (the default) span() returns one shared no-op context manager, so the
+cost is a thread-local lookup per span. Recording is per thread: start() installs a recorder for
+the calling thread, stop() removes it. grade_file records each submission into its own recorder
+(in whichever process grades it) and sends the events back with the result, and process_submissions
+merges them into the run's recorder.
+
+Events use the Chrome trace format ("X" complete events, microseconds since the epoch), so a run
+written with write_chrome_trace() opens in chrome://tracing or https://ui.perfetto.dev with one lane
+per worker process.
+'''
+
+_NO_SPAN = nullcontext()
+_local = threading.local()
+
+
+class TraceRecorder:
+    def __init__(self):
+        self.events = []
+        # perf_counter is precise but has no fixed origin; anchor it to the wall clock so events
+        # recorded in different worker processes line up
+        self._epoch_ns = time.time_ns()
+        self._perf_ns = time.perf_counter_ns()
+
+    def now_us(self):
+        return (self._epoch_ns + time.perf_counter_ns() - self._perf_ns) / 1000
+
+    def add(self, name, category, start_us, duration_us, args=None):
+        self.events.append({
+            "name": name, "cat": category, "ph": "X", "ts": start_us, "dur": duration_us,
+            "pid": os.getpid(), "tid": threading.get_ident(), "args": args or {},
+        })
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "category", "args", "start")
+
+    def __init__(self, recorder, name, category, args):
+        self.recorder = recorder
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = self.recorder.now_us()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.add(self.name, self.category, self.start, self.recorder.now_us() - self.start, self.args)
+        return False
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+# Time a block under `name` if the current thread is recording, otherwise do nothing
+def span(name, category="grading", **args):
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        return _NO_SPAN
+    return _Span(recorder, name, category, args)
+
+
+# Start recording on this thread; returns the previous recorder, to hand back to stop()
+def start(recorder=None):
+    previous = current()
+    _local.recorder = recorder or TraceRecorder()
+    return previous
+
+
+# Stop recording on this thread, returns the recorder that was active
+def stop(previous=None):
+    recorder = current()
+    _local.recorder = previous
+    return recorder
+
+
+# On Linux the peak resident memory of a process can be reset, so it can be measured per submission
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KB on Linux
+
+
+'''
+Record one submission into a fresh recorder and measure its wall time, CPU time (of this thread)
+and peak resident memory. The yielded dict is filled in when the block ends:
+    {"wall_ms", "cpu_ms", "peak_memory_kb", "events"}
+Peak memory is exact per submission on Linux; elsewhere it is the process's peak so far.
+(tracemalloc would be exact everywhere, but makes grading several times slower.)
+'''
+@contextmanager
+def submission_trace():
+    metrics = {}
+    previous = start()
+    _reset_peak_rss()
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield metrics
+    finally:
+        metrics["wall_ms"] = round((time.perf_counter() - wall) * 1000, 2)
+        metrics["cpu_ms"] = round((time.thread_time() - cpu) * 1000, 2)
+        metrics["peak_memory_kb"] = _peak_rss_kb()
+        metrics["events"] = stop(previous).events
+
+
+def write_chrome_trace(path, events):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
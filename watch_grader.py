@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import as_completed
+from contextlib import redirect_stdout
+from datetime import datetime
+
+from grading_runner import (CHALLENGES, RESULT_CACHE_DIR, build_grade_row, find_submission_files,
+                            get_grading_function, grade_file, open_worker_pool, worker_failure_result)
+from preflight import REJECTED_STATUSES, rejected_result, triage_submission
+from resource_limits import DEFAULT_LIMITS, DEFAULT_MAX_TASKS_PER_CHILD
+from report_writer import REPORT_FORMATS, open_report_writer
+from result_cache import ResultCache, hash_file
+
+'''
+Watch a submissions folder and grade files as they come in, so the report is ready seconds after
+the deadline instead of after a full run.
+
+    python watch_grader.py --folder submissions/section_1 --challenge "Project 1: Cafe Bloom" \
+        --output reports/section_1 --until 2026-10-20T23:59
+
+Every --interval seconds the folder is scanned (os.stat only, the standard library has no portable
+file notifications). A new or changed .xlsx is graded once its size and modification time have not
+changed for --settle seconds, so uploads and copies that are still being written are left alone;
+a file whose bytes did not change (only touched) is not graded again. Worker processes stay up
+between batches; under resource limits (the default) even a single file is graded in a worker, never in
+the watcher itself. After each batch the report is rewritten (to a temporary file that then replaces
+grades_report.<format>, so it can be opened at any time) with one row per current file. Files are
+graded under the default resource limits (resource_limits.py); corrupt, encrypted and wrong format files
+are reported without grading them (preflight.py).
+
+With --until the watcher stops after the deadline, once every file seen has settled and been graded.
+Ctrl+C or SIGTERM stop it after the batch in progress.
+
+Events are printed to stdout as one JSON object per line:
+    {"event": "graded", "files": 3, "submissions": 27, "errors": 0, "report": "..."}
+    {"event": "stopped", "submissions": 40, "errors": 1, "report": "..."}
+Anything the graders print themselves goes to stderr.
+'''
+
+DEFAULT_INTERVAL_SECONDS = 2.0
+DEFAULT_SETTLE_SECONDS = 3.0
+
+
+class SubmissionWatcher:
+    def __init__(self, folder_path, challenge_number, output_path, max_workers=1, report_format="xlsx",
+                 settle_seconds=DEFAULT_SETTLE_SECONDS, cache_dir=None, limits=None, max_tasks_per_child=None):
+        self.folder_path = folder_path
+        self.challenge_number = challenge_number
+        self.output_path = output_path
+        self.max_workers = max_workers
+        self.report_format = report_format
+        self.settle_seconds = settle_seconds
+        self.limits = limits
+        self.max_tasks_per_child = max_tasks_per_child
+
+        from grading_algorithms import GRADER_VERSION
+        self.cache = ResultCache(cache_dir, GRADER_VERSION) if cache_dir else None
+        self.executor = None
+
+        self.changing = {}  # path -> (size, mtime) and when it was first seen like that
+        self.graded = {}  # path -> (size, mtime) of the version that was graded
+        self.hashes = {}  # path -> content hash of the version that was graded
+        self.results = {}  # path -> (student folder, result)
+        self.report_path = None
+
+    # Files that are new or changed and have settled, plus whether anything is still being written
+    def scan(self, now=None):
+        now = time.monotonic() if now is None else now
+        submissions = find_submission_files(self.folder_path)
+        current = {path for _, path in submissions}
+
+        # Submissions that were removed (or renamed) leave the report too
+        removed = [path for path in self.results if path not in current]
+        for path in removed:
+            for state in (self.results, self.graded, self.hashes):
+                state.pop(path, None)
+        for path in [path for path in self.changing if path not in current]:
+            del self.changing[path]
+
+        ready = []
+        for student_folder, path in submissions:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # Deleted between listing and stat
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self.graded.get(path) == signature:
+                continue
+
+            seen_signature, since = self.changing.get(path, (None, None))
+            if seen_signature != signature:
+                self.changing[path] = (signature, now)  # New or still being written, wait for it to settle
+            elif now - since >= self.settle_seconds:
+                ready.append((student_folder, path, signature))
+        return ready, bool(removed)
+
+    # Grade settled files (skipping those whose bytes did not change) and store their results
+    def grade(self, ready):
+        to_grade = []
+        for student_folder, path, signature in ready:
+            del self.changing[path]
+            self.graded[path] = signature
+            try:
+                file_hash = hash_file(path)
+            except OSError:
+                file_hash = None
+            if file_hash is not None and self.hashes.get(path) == file_hash:
+                continue  # Touched, not changed
+            self.hashes[path] = file_hash
+
+            cached_result = self.cache.get(self.cache.key(file_hash, self.challenge_number)) if self.cache and file_hash else None
+            if cached_result is not None:
+                self.results[path] = (student_folder, cached_result)
+                continue
+            verdict = triage_submission(path, self.challenge_number)
+            if verdict["status"] in REJECTED_STATUSES:
+                self.results[path] = (student_folder, rejected_result(verdict, self.challenge_number))  # Not gradeable, no worker needed
+            else:
+                to_grade.append((student_folder, path, file_hash))
+
+        def finish(student_folder, path, file_hash, result):
+            if self.cache and file_hash and "error" not in result:
+                self.cache.put(self.cache.key(file_hash, self.challenge_number), result)
+            self.results[path] = (student_folder, result)
+
+        # Under resource limits every file goes to a worker, so one that hangs or blows up cannot take the watcher with it
+        if (self.max_workers > 1 and len(to_grade) > 1) or (self.limits and to_grade):
+            if self.executor is None:
+                self.executor = open_worker_pool(max(1, self.max_workers), self.max_tasks_per_child, limits=self.limits)
+            futures = {self.executor.submit(grade_file, self.challenge_number, graded_file[1], limits=self.limits): graded_file
+                       for graded_file in to_grade}
+            # Results are kept as they finish, so a slow file does not hold back the ones after it
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker itself failed (it crashed, or was stopped past the time limit)
+                    result = worker_failure_result(e, self.challenge_number)
+                finish(*futures[future], result)
+        else:
+            for student_folder, path, file_hash in to_grade:
+                finish(student_folder, path, file_hash, grade_file(self.challenge_number, path, limits=self.limits))
+        return len(to_grade)
+
+    # Rewrite the report with the current results, in the same order as a full run
+    def write_report(self):
+        file_name = "grades_report"
+        report = open_report_writer(self.output_path, self.report_format, file_name=f".{file_name}.partial")
+        for path in sorted(self.results, key=lambda path: (self.results[path][0], os.path.basename(path))):
+            student_folder, result = self.results[path]
+            report.write_row(build_grade_row(student_folder, result))
+        partial_path = report.close()
+        self.report_path = os.path.join(self.output_path, f"{file_name}.{self.report_format}")
+        os.replace(partial_path, self.report_path)
+        return self.report_path
+
+    # One scan: grade what has settled and update the report. Returns the number of files graded (None if idle)
+    def poll(self, now=None):
+        ready, removed = self.scan(now)
+        graded = self.grade(ready) if ready else 0
+        if ready or removed or self.report_path is None:
+            self.write_report()
+            return graded
+        return None
+
+    @property
+    def settled(self):
+        return not self.changing
+
+    @property
+    def errors(self):
+        return sum(1 for _, result in self.results.values() if "error" in result)
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+        if self.cache:
+            self.cache.evict()
+
+
+'''
+Poll until stop_event is set or, with a deadline (datetime), until the deadline has passed and every
+file has settled. A deadline without a UTC offset is local time. on_update(watcher, graded) is called
+after each batch that changed the report.
+'''
+def watch(watcher, interval=DEFAULT_INTERVAL_SECONDS, deadline=None, stop_event=None, on_update=None):
+    stop_event = stop_event or threading.Event()
+    if deadline and deadline.tzinfo is not None:
+        deadline = deadline.astimezone().replace(tzinfo=None)  # --until 2026-10-20T23:59+02:00, in local time
+    try:
+        while not stop_event.is_set():
+            graded = watcher.poll()
+            if graded is not None and on_update:
+                on_update(watcher, graded)
+            if deadline and datetime.now() >= deadline and watcher.settled:
+                break
+            stop_event.wait(interval)
+    finally:
+        watcher.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Watch a submissions folder and grade files as they come in.")
+    parser.add_argument("--folder", required=True, help="Folder with one sub folder per student")
+    parser.add_argument("--challenge", required=True, choices=CHALLENGES, metavar="CHALLENGE",
+                        help="Challenge to grade, one of: " + "; ".join(CHALLENGES))
+    parser.add_argument("--output", required=True, help="Folder the report is written to (created if needed)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--format", default="xlsx", choices=REPORT_FORMATS, help="Report format (default: xlsx)")
+    parser.add_argument("--no-cache", action="store_true", help="Grade every file, even if an unchanged copy was graded before")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS, help="Seconds between scans of the folder")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Seconds a file must stay unchanged before it is graded")
+    parser.add_argument("--until", type=datetime.fromisoformat, metavar="DEADLINE",
+                        help="Stop once this time (e.g. 2026-10-20T23:59, local time unless it has a UTC offset) "
+                             "has passed and every file is graded")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Events go to the real stdout, even while grader output is redirected to stderr
+    stdout = sys.stdout
+    def emit(event, **fields):
+        print(json.dumps({"event": event, **fields}), file=stdout, flush=True)
+
+    if not os.path.isdir(args.folder):
+        emit("failed", message=f"Submissions folder not found: {args.folder}")
+        return 2
+    if args.workers < 1:
+        emit("failed", message="--workers must be at least 1")
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    get_grading_function(args.challenge)  # Import the graders before the first file comes in
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    watcher = SubmissionWatcher(args.folder, args.challenge, args.output, args.workers, args.format, args.settle,
+                                None if args.no_cache else RESULT_CACHE_DIR, DEFAULT_LIMITS, DEFAULT_MAX_TASKS_PER_CHILD)
+    def on_update(watcher, graded):
+        emit("graded", files=graded, submissions=len(watcher.results), errors=watcher.errors, report=watcher.report_path)
+
+    with redirect_stdout(sys.stderr):
+        watch(watcher, args.interval, args.until, stop_event, on_update)
+    emit("stopped", submissions=len(watcher.results), errors=watcher.errors, report=watcher.report_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
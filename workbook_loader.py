@@ -0,0 +1,433 @@
+import threading
+import warnings
+from contextlib import contextmanager
+
+from openpyxl.cell import MergedCell
+from openpyxl.comments.comment_sheet import CommentSheet
+from openpyxl.packaging.relationship import RelationshipList, get_dependents, get_rels_path
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.styles.stylesheet import apply_stylesheet
+from openpyxl.worksheet._reader import FORMULA_TAG, VALUE_TAG, WorkSheetParser, WorksheetReader
+from openpyxl.worksheet.print_settings import PrintArea, PrintTitles
+from openpyxl.worksheet.table import Table
+from openpyxl.xml.constants import COMMENTS_NS
+from openpyxl.xml.functions import fromstring
+
+import tracing
+
+'''
+Single-parse, sheet-on-demand workbook loader used by the grading algorithms.
+
+openpyxl can either give back formulas (data_only=False) or the values Excel cached the last
+time it saved the file (data_only=True), so the graders used to load every submission twice.
+load_student_workbook() parses each sheet once, keeps the formulas in a regular openpyxl
+workbook and remembers the cached value of every formula cell next to it:
+
+    workbook = load_student_workbook(student_path)
+    workbook.formulas["Report"]["B2"].value   -> "=SUM(Times[Time])"
+    workbook.values["Report"]["B2"].value     -> 917
+
+Worksheets are only parsed the first time a grader asks for them (wb[...], wb.active), so
+sheets that are never graded cost nothing beyond reading the zip directory and workbook.xml.
+Given a compiled rubric plan (see rubric.py), only the cells and parts the plan lists are loaded.
+
+Formula cells saved without a cached value (Google Sheets exports, LibreOffice, scripts) are computed
+on first read from `values` by the built-in evaluator in formula_eval.py, so those files are graded
+on what their formulas give instead of as empty cells.
+
+Inside shared_loads(plan), every load of the same path returns one workbook, loaded with that plan
+(e.g. the merged plan of several rubrics), so a file graded for several challenges is parsed once.
+'''
+
+_shared = threading.local()
+
+
+# Worksheet parser that reads formulas, but also keeps the cached <v> value of every formula cell that has one.
+# When wanted_cells is set, every other cell is dropped before it is parsed.
+class _FormulaAndValueParser(WorkSheetParser):
+    def __init__(self, *args, wanted_cells=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cached_values = {}
+        self.wanted_cells = wanted_cells
+        if wanted_cells is not None:
+            self.wanted_rows = {coordinate.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for coordinate in wanted_cells}
+
+    def parse_row(self, row):
+        if self.wanted_cells is not None and all(el.get('r') for el in row):
+            keep_row = row.get('r') in self.wanted_rows
+            for el in list(row):
+                if keep_row and el.get('r') in self.wanted_cells:
+                    continue
+                # Shared formula masters are kept so later cells can still translate their formula
+                formula = el.find(FORMULA_TAG)
+                if formula is not None and formula.get('ref'):
+                    continue
+                row.remove(el)
+        return super().parse_row(row)
+
+    def parse_cell(self, element):
+        col_counter = self.col_counter
+        cell = super().parse_cell(element)
+
+        # An empty <v> only holds a result for text formulas (t="str", Excel's empty text); scripts write <v/> with no result
+        if cell['data_type'] == 'f' and (element.findtext(VALUE_TAG) or element.get('t') == 'str'):
+            # Parse the same element again the way data_only=True would (handles shared strings, dates, booleans)
+            self.col_counter = col_counter
+            self.data_only = True
+            try:
+                cached = super().parse_cell(element)
+            finally:
+                self.data_only = False
+            self.cached_values[(cell['row'], cell['column'])] = cached['value']
+
+        return cell
+
+
+class _FormulaAndValueReader(WorksheetReader):
+    def __init__(self, ws, xml_source, shared_strings, rich_text, wanted_cells=None, parts=None):
+        self.ws = ws
+        self.parser = _FormulaAndValueParser(xml_source, shared_strings,
+                False, ws.parent.epoch, ws.parent._date_formats,
+                ws.parent._timedelta_formats, rich_text, wanted_cells=wanted_cells)
+        self.tables = []
+        self.parts = parts
+
+    def bind_all(self):
+        self.bind_cells()
+        self.bind_merged_cells()
+        if self.parts is None or 'hyperlinks' in self.parts:
+            self.bind_hyperlinks()
+        self.bind_formatting()
+        self.bind_col_dimensions()
+        self.bind_row_dimensions()
+        if self.parts is None or 'tables' in self.parts:
+            self.bind_tables()
+        self.bind_properties()
+
+
+# Reads the workbook like openpyxl.load_workbook(data_only=False) while collecting the cached values per sheet.
+# Only the workbook level parts are read up front, worksheets are read one at a time by LazyWorkbook.
+class _StudentWorkbookReader(ExcelReader):
+    def __init__(self, filename, plan=None):
+        super().__init__(filename, read_only=False, data_only=False)
+        self.plan = plan
+        self.cached_values = {}
+        self.sheet_parts = []
+        self.names_by_sheet = {}
+
+    def read(self):
+        action = "read manifest"
+        try:
+            self.read_manifest()
+            action = "read strings"
+            self.read_strings()
+            action = "read workbook"
+            self.read_workbook()
+            action = "read properties"
+            self.read_properties()
+            action = "read custom properties"
+            self.read_custom()
+            action = "read theme"
+            self.read_theme()
+            action = "read stylesheet"
+            apply_stylesheet(self.archive, self.wb)
+        except ValueError as e:
+            self.archive.close()
+            raise ValueError(f"Unable to read workbook: could not {action} from {self.archive.filename}.") from e
+
+        self.sheet_parts = [
+            (sheet, rel) for sheet, rel in self.parser.find_sheets() if rel.target in self.valid_files
+        ]
+        self.names_by_sheet = self.parser.defined_names.by_sheet()
+        self.wb.defined_names = self.names_by_sheet.get("global", self.wb.defined_names)
+
+    def read_sheet(self, index):
+        sheet, rel = self.sheet_parts[index]
+        if "chartsheet" in rel.Type:
+            self.read_chartsheet(sheet, rel)
+            ws = self.wb._sheets[-1]
+        elif self.plan is not None:
+            wanted_cells = self.plan.cells_for(sheet.name, is_active=index == self.wb._active_sheet_index)
+            ws = self.read_worksheet(sheet, rel, wanted_cells, self.plan.parts)
+        else:
+            ws = self.read_worksheet(sheet, rel)
+        self.assign_sheet_names(index, ws)
+        return ws
+
+    def read_worksheet(self, sheet, rel, wanted_cells=None, parts=None):
+        rels_path = get_rels_path(rel.target)
+        rels = RelationshipList()
+        if rels_path in self.valid_files:
+            rels = get_dependents(self.archive, rels_path)
+
+        ws = self.wb.create_sheet(sheet.name)
+        ws._rels = rels
+        with self.archive.open(rel.target) as fh:
+            ws_parser = _FormulaAndValueReader(ws, fh, self.shared_strings, self.rich_text, wanted_cells, parts)
+            ws_parser.bind_all()
+        self.cached_values[ws.title] = ws_parser.parser.cached_values
+
+        # Assign any comments to cells (no rubric check reads comments)
+        comment_rels = rels.find(COMMENTS_NS) if parts is None else []
+        for r in comment_rels:
+            comment_sheet = CommentSheet.from_tree(fromstring(self.archive.read(r.target)))
+            for ref, comment in comment_sheet.comments:
+                cell = ws[ref]
+                if isinstance(cell, MergedCell):
+                    warnings.warn(f"Cell '{ws.title}':{ref} is part of a merged range, its comment was skipped.")
+                    continue
+                cell.comment = comment
+
+        ws.legacy_drawing = None
+
+        for table_path in ws_parser.tables:
+            ws.add_table(Table.from_tree(fromstring(self.archive.read(table_path))))
+
+        ws.sheet_state = sheet.state
+        return ws
+
+    # Same as WorkbookParser.assign_names(), for the names that belong to a single sheet
+    def assign_sheet_names(self, index, ws):
+        for name, defn in self.names_by_sheet.get(index, {}).items():
+            reserved = defn.is_reserved
+            if reserved is None:
+                ws.defined_names[name] = defn
+            elif reserved == "Print_Titles":
+                titles = PrintTitles.from_string(defn.value)
+                ws._print_rows = titles.rows
+                ws._print_cols = titles.cols
+            elif reserved == "Print_Area":
+                try:
+                    ws._print_area = PrintArea.from_string(defn.value)
+                except TypeError:
+                    continue
+
+
+# Workbook proxy that parses a worksheet the first time it is used (by name, wb.active or wb.worksheets).
+# Everything else (defined_names, styles, ...) is answered by the underlying openpyxl workbook.
+class LazyWorkbook:
+    def __init__(self, reader):
+        self._reader = reader
+        self._workbook = reader.wb
+        self._sheet_index = {sheet.name: index for index, (sheet, _) in enumerate(reader.sheet_parts)}
+        self._loaded = {}
+
+    @property
+    def sheetnames(self):
+        return [sheet.name for sheet, _ in self._reader.sheet_parts]
+
+    def _load(self, index):
+        sheet_name = self._reader.sheet_parts[index][0].name
+        if sheet_name not in self._loaded:
+            with tracing.span("load: parse sheet", category="load", sheet=sheet_name):
+                self._loaded[sheet_name] = self._reader.read_sheet(index)
+            if len(self._loaded) == len(self._reader.sheet_parts):
+                self.close()
+        return self._loaded[sheet_name]
+
+    def __getitem__(self, sheet_name):
+        if sheet_name not in self._sheet_index:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        return self._load(self._sheet_index[sheet_name])
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self._sheet_index
+
+    def __iter__(self):
+        return iter(self.worksheets)
+
+    @property
+    def active(self):
+        try:
+            return self._load(self._workbook._active_sheet_index)
+        except IndexError:
+            return None
+
+    @property
+    def worksheets(self):
+        return [self._load(index) for index in range(len(self._reader.sheet_parts))]
+
+    # Release the zip file; sheets that were not parsed yet can no longer be loaded
+    def close(self):
+        self._reader.archive.close()
+
+    def __getattr__(self, name):
+        return getattr(self._workbook, name)
+
+
+# A loaded submission: `formulas` is the (lazy) openpyxl workbook, `values` shows the cached values instead
+class StudentWorkbook:
+    def __init__(self, workbook, cached_values, source=None, plan=None):
+        self.formulas = workbook
+        self.values = CachedValueWorkbook(workbook, cached_values, self.evaluate)
+        self._cached_values = cached_values
+        self._source = source
+        self._plan = plan
+        self._evaluator = None
+
+    # Value of a formula cell saved without a cached result, computed by formula_eval.py. A workbook loaded
+    # with a rubric plan lacks the cells the formulas refer to, so the evaluator gets a full load of the file
+    def evaluate(self, sheet_name, row, column):
+        if self._evaluator is None:
+            from formula_eval import FormulaEvaluator
+            if self._plan is None:
+                self._evaluator = FormulaEvaluator(self.formulas, self._cached_values)
+            else:
+                if hasattr(self._source, "seek"):
+                    self._source.seek(0)
+                full = _load_student_workbook(self._source, None)
+                self._evaluator = FormulaEvaluator(full.formulas, full._cached_values)
+        return self._evaluator.value(sheet_name, row, column)
+
+    def close(self):
+        self.formulas.close()
+
+
+# Read-only view over the formula workbook that answers with the cached values (like data_only=True)
+# Formula cells without a cached value are answered by evaluate(sheet_name, row, column), when given.
+class CachedValueWorkbook:
+    def __init__(self, workbook, cached_values, evaluate=None):
+        self._workbook = workbook
+        self._cached_values = cached_values
+        self._evaluate = evaluate
+
+    def _wrap(self, ws):
+        if ws is None:
+            return None
+        return CachedValueWorksheet(ws, self._cached_values.get(ws.title, {}), self._evaluate)
+
+    def __getitem__(self, sheet_name):
+        return self._wrap(self._workbook[sheet_name])
+
+    def __contains__(self, sheet_name):
+        return sheet_name in self._workbook
+
+    @property
+    def active(self):
+        return self._wrap(self._workbook.active)
+
+    # Anything else (sheetnames, defined_names, ...) is the same for both views
+    def __getattr__(self, name):
+        return getattr(self._workbook, name)
+
+
+class CachedValueWorksheet:
+    def __init__(self, worksheet, cached_values, evaluate=None):
+        self._worksheet = worksheet
+        self._cached_values = cached_values
+        self._evaluate = evaluate
+
+    def _wrap(self, cell):
+        return CachedValueCell(cell, self._cached_values, self._evaluate)
+
+    def __getitem__(self, key):
+        cells = self._worksheet[key]
+        if isinstance(cells, tuple):
+            # Ranges come back as rows of cells (or a single row/column of cells)
+            return tuple(
+                tuple(self._wrap(cell) for cell in row) if isinstance(row, tuple) else self._wrap(row)
+                for row in cells
+            )
+        return self._wrap(cells)
+
+    def cell(self, row, column, value=None):
+        return self._wrap(self._worksheet.cell(row=row, column=column, value=value))
+
+    def iter_rows(self, min_row=None, max_row=None, min_col=None, max_col=None, values_only=False):
+        for row in self._worksheet.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col):
+            cells = tuple(self._wrap(cell) for cell in row)
+            yield tuple(cell.value for cell in cells) if values_only else cells
+
+    def __getattr__(self, name):
+        return getattr(self._worksheet, name)
+
+
+class CachedValueCell:
+    def __init__(self, cell, cached_values, evaluate=None):
+        self._cell = cell
+        self._cached_values = cached_values
+        self._evaluate = evaluate
+
+    @property
+    def value(self):
+        if self._cell.data_type == 'f':
+            key = (self._cell.row, self._cell.column)
+            if key not in self._cached_values and self._evaluate is not None:
+                return self._evaluate(self._cell.parent.title, *key)
+            return self._cached_values.get(key)
+        return self._cell.value
+
+    @property
+    def data_type(self):
+        if self._cell.data_type != 'f':
+            return self._cell.data_type
+        value = self.value
+        if isinstance(value, bool):
+            return 'b'
+        if value is None or isinstance(value, (int, float)):
+            return 'n'
+        return 's'
+
+    def __getattr__(self, name):
+        return getattr(self._cell, name)
+
+
+# Values of a rectangular range as a list of rows, read straight from the sheet's cell table so
+# empty coordinates do not create cells; cached-value sheets answer formulas with their cached (or computed) value
+def range_values(ws, min_row, min_col, max_row, max_col):
+    cached_values = evaluate = None
+    if isinstance(ws, CachedValueWorksheet):
+        ws, cached_values, evaluate = ws._worksheet, ws._cached_values, ws._evaluate
+
+    cells = getattr(ws, "_cells", None)
+    if cells is None:
+        return [list(row) for row in ws.iter_rows(min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col, values_only=True)]
+
+    rows = []
+    for row in range(min_row, max_row + 1):
+        values = []
+        for column in range(min_col, max_col + 1):
+            cell = cells.get((row, column))
+            if cell is None:
+                values.append(None)
+            elif cached_values is not None and cell.data_type == 'f':
+                if (row, column) not in cached_values and evaluate is not None:
+                    values.append(evaluate(ws.title, row, column))
+                else:
+                    values.append(cached_values.get((row, column)))
+            else:
+                values.append(cell.value)
+        rows.append(values)
+    return rows
+
+
+'''
+Load a student submission (path or binary file-like object); each sheet is parsed once, when first used.
+With a rubric plan, sheets listed there only get the listed cells, and hyperlinks/tables/comments are
+only bound when the plan asks for them.
+'''
+def load_student_workbook(filename, plan=None):
+    workbooks = getattr(_shared, "workbooks", None)
+    key = filename if isinstance(filename, str) else getattr(filename, "name", None)
+    if workbooks is not None and key:
+        if key not in workbooks:
+            workbooks[key] = _load_student_workbook(filename, _shared.plan)
+        return workbooks[key]
+    return _load_student_workbook(filename, plan)
+
+
+def _load_student_workbook(filename, plan):
+    with tracing.span("load", category="load"):
+        reader = _StudentWorkbookReader(filename, plan)
+        reader.read()
+    return StudentWorkbook(LazyWorkbook(reader), reader.cached_values, filename, plan)
+
+
+# Share loaded workbooks (by path) between every grader run in this block, loaded with `plan` (None = every cell)
+@contextmanager
+def shared_loads(plan=None):
+    _shared.workbooks, _shared.plan = {}, plan
+    try:
+        yield
+    finally:
+        _shared.workbooks = _shared.plan = None
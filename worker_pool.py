@@ -0,0 +1,235 @@
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.connection import wait as wait_for
+
+'''
+Pool of worker processes that the parent process supervises, used for all grading runs (see
+grading_runner.open_worker_pool).
+
+It offers the parts of the ProcessPoolExecutor interface the runners use (submit, shutdown, with;
+futures can be cancelled until a worker picks them up), plus what the executor cannot do:
+
+    task timeouts   every task gets a deadline (task_timeout, or submit_with_timeout). A worker that is
+                    still busy at the deadline, e.g. stuck in C code (zip or XML parsing) or swallowing
+                    the exception resource_limits.py raises, is killed and replaced; its future fails
+                    with TaskTimeout and the run goes on.
+    recycling       each worker is replaced after max_tasks_per_child tasks, on its own, so the others
+                    keep working. (ProcessPoolExecutor's max_tasks_per_child hangs on Python 3.11 once a
+                    worker retires.)
+    crashes         a worker that dies fails only its own task (BrokenProcessPool) and is replaced.
+
+Each worker has its own pipe and gets one task at a time, so the parent always knows which task a
+worker is running. A dispatcher thread hands out tasks and waits for results, deaths and deadlines.
+'''
+
+# How long a retiring worker gets to exit before it is killed
+_RETIRE_SECONDS = 1.0
+
+
+class TaskTimeout(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"the task was still running after {seconds:g} s, its worker process was stopped")
+        self.seconds = seconds
+
+
+def _worker_main(connection, initializer, initargs):
+    if initializer:
+        initializer(*initargs)
+    while True:
+        try:
+            task = connection.recv()
+        except (EOFError, OSError):
+            return  # The pool is gone
+        if task is None:
+            return
+        fn, args, kwargs = task
+        try:
+            reply = (True, fn(*args, **kwargs))
+        except BaseException as e:
+            reply = (False, e)
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The result (or exception) cannot be pickled; nothing was written, so send why instead
+            connection.send((False, RuntimeError(f"The worker could not send its result back: {e}")))
+
+
+class _Worker:
+    def __init__(self, context, initializer, initargs):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection, initializer, initargs), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.tasks = 0
+        self.future = None  # Task being run
+        self.timeout = None
+        self.deadline = None
+
+    def stop(self, kill=False):
+        if not kill:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+            self.process.join(_RETIRE_SECONDS)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class WorkerPool:
+    def __init__(self, max_workers, max_tasks_per_child=None, initializer=None, initargs=(), task_timeout=None,
+                 mp_context=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.initializer = initializer
+        self.initargs = initargs
+        self.task_timeout = task_timeout
+        self.context = mp_context or multiprocessing.get_context()
+
+        self.lock = threading.RLock()
+        self.queue = deque()  # (future, fn, args, kwargs, timeout) not handed to a worker yet
+        self.shutting_down = False
+        self.workers = []  # Only touched by the dispatcher thread
+        self.dispatcher = None
+        self.wakeup_reader, self.wakeup_writer = self.context.Pipe(duplex=False)
+        self.woken = False  # A wake-up is waiting in the pipe (so the pipe never fills up)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.submit_with_timeout(self.task_timeout, fn, *args, **kwargs)
+
+    # Like submit, with this task's own timeout in seconds (None: no deadline)
+    def submit_with_timeout(self, timeout, fn, *args, **kwargs):
+        future = Future()
+        with self.lock:
+            if self.shutting_down:
+                raise RuntimeError("cannot submit to a worker pool that was shut down")
+            self.queue.append((future, fn, args, kwargs, timeout))
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self._dispatch, name="WorkerPool dispatcher", daemon=True)
+                self.dispatcher.start()
+            self._wake()
+        return future
+
+    def _wake(self):
+        if not self.woken:
+            self.woken = True
+            self.wakeup_writer.send_bytes(b"")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self.lock:
+            self.shutting_down = True
+            if cancel_futures:
+                while self.queue:
+                    self.queue.popleft()[0].cancel()
+            dispatcher = self.dispatcher
+            if dispatcher is not None:
+                self._wake()
+        if dispatcher is not None and wait:
+            dispatcher.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        return False
+
+    # Hand queued tasks to idle workers (starting workers as needed); returns whether the pool is done
+    def _assign(self):
+        with self.lock:
+            while self.queue:
+                idle = next((worker for worker in self.workers if worker.future is None), None)
+                if idle is None:
+                    if len(self.workers) >= self.max_workers:
+                        break
+                    idle = _Worker(self.context, self.initializer, self.initargs)
+                    self.workers.append(idle)
+                future, fn, args, kwargs, timeout = self.queue.popleft()
+                if not future.set_running_or_notify_cancel():
+                    continue  # Cancelled while it waited
+                try:
+                    idle.connection.send((fn, args, kwargs))
+                except OSError as e:
+                    future.set_exception(BrokenProcessPool(f"A worker process could not be reached: {e}"))
+                    self._replace(idle, kill=True)
+                    continue
+                except Exception as e:
+                    future.set_exception(e)  # E.g. arguments that cannot be pickled
+                    continue
+                idle.future = future
+                idle.timeout = timeout
+                idle.deadline = time.monotonic() + timeout if timeout else None
+            return self.shutting_down and not self.queue and all(worker.future is None for worker in self.workers)
+
+    def _replace(self, worker, kill=False):
+        self.workers.remove(worker)
+        worker.stop(kill=kill)
+
+    def _finish(self, worker, outcome):
+        future, worker.future, worker.deadline = worker.future, None, None
+        worker.tasks += 1
+        ok, value = outcome
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+        if self.max_tasks_per_child and worker.tasks >= self.max_tasks_per_child:
+            self._replace(worker)  # A fresh one is started when there is work for it
+
+    def _dispatch(self):
+        try:
+            while not self._assign():
+                busy = [worker for worker in self.workers if worker.future is not None]
+                deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+                timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                waiting_on = [self.wakeup_reader] + [worker.connection for worker in busy] + [worker.process.sentinel for worker in busy]
+                ready = wait_for(waiting_on, timeout)
+
+                if self.wakeup_reader in ready:
+                    with self.lock:
+                        while self.wakeup_reader.poll():
+                            self.wakeup_reader.recv_bytes()
+                        self.woken = False
+
+                now = time.monotonic()
+                for worker in busy:
+                    if worker.connection in ready or worker.connection.poll():
+                        try:
+                            outcome = worker.connection.recv()
+                        except (EOFError, OSError):
+                            outcome = None
+                        if outcome is not None:
+                            self._finish(worker, outcome)
+                            continue
+                    if worker.process.sentinel in ready or not worker.process.is_alive():
+                        worker.process.join()
+                        worker.future.set_exception(BrokenProcessPool(
+                            f"A worker process exited unexpectedly (exit code {worker.process.exitcode})"))
+                        self._replace(worker, kill=True)
+                    elif worker.deadline is not None and now >= worker.deadline:
+                        future = worker.future
+                        self._replace(worker, kill=True)
+                        future.set_exception(TaskTimeout(worker.timeout))
+        finally:
+            # Only left over if the dispatcher itself failed
+            with self.lock:
+                self.shutting_down = True
+                while self.queue:
+                    future = self.queue.popleft()[0]
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(BrokenProcessPool("The worker pool stopped"))
+            for worker in list(self.workers):
+                if worker.future is not None:
+                    worker.future.set_exception(BrokenProcessPool("The worker pool stopped"))
+                    worker.future = None
+                self._replace(worker)
+            self.wakeup_reader.close()
+            self.wakeup_writer.close()
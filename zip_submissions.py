@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+import re
+import zipfile
+
+'''
+Submissions read straight from an LMS zip export, without extracting it to disk.
+
+Every student workbook in the archive (also inside a zip per student, nested in the export) gets a
+member path that can stand in for a file path anywhere the runner uses one:
+
+    exports/section_1.zip::Jane Doe_12345_assignsubmission_file_/Cafe Bloom.xlsx
+    exports/section_1.zip::doejane_12345_67890_project1.zip::Cafe Bloom.xlsx
+
+open_submission() returns such a workbook as an in-memory file for the graders; nothing is written to
+disk. Student names are taken from the archive the same way folder discovery takes them from the
+sub folders: the first folder in the archive (below a single top level folder, if everything is in one),
+or the name of a student's zip or workbook when it lies at the top. The suffixes Moodle and Canvas add
+to names ("_12345_assignsubmission_file_", "_late_12345_67890_...") are removed.
+'''
+
+MEMBER_SEPARATOR = "::"
+
+# Suffixes LMS exports append to the student's name
+LMS_NAME_PATTERNS = [
+    re.compile(r"^(?P<name>.+?)_\d+_assignsubmission_\w+_?$"),  # Moodle: "Jane Doe_12345_assignsubmission_file_"
+    re.compile(r"^(?P<name>[^_]+)(?:_late)?_\d+_\d+_.+$"),  # Canvas: "doejane_late_12345_67890_Project1.xlsx"
+]
+
+_archives = {}  # Archives opened by this process (workers read many members of the same export)
+
+
+def is_submission_archive(path):
+    return isinstance(path, str) and os.path.isfile(path) and path.lower().endswith(".zip") and zipfile.is_zipfile(path)
+
+
+def is_member_path(path):
+    return isinstance(path, str) and MEMBER_SEPARATOR in path
+
+
+def _skipped(name):
+    base = os.path.basename(name.rstrip("/"))
+    return name.startswith("__MACOSX/") or base.startswith("~$") or base.startswith(".")
+
+
+def student_name(name):
+    stem = os.path.splitext(name)[0] if name.lower().endswith((".xlsx", ".zip")) else name
+    for pattern in LMS_NAME_PATTERNS:
+        match = pattern.match(name) or pattern.match(stem)
+        if match:
+            return match.group("name")
+    return stem
+
+
+# Workbooks in an archive (and in the zips inside it) as [(name inside the archive, member path)]
+def _workbooks(archive, prefix):
+    found = []
+    for info in archive.infolist():
+        if info.is_dir() or _skipped(info.filename):
+            continue
+        lower = info.filename.lower()
+        if lower.endswith(".xlsx"):
+            found.append((info.filename, prefix + info.filename))
+        elif lower.endswith(".zip"):
+            try:
+                with zipfile.ZipFile(io.BytesIO(archive.read(info))) as inner:
+                    for _, member_path in _workbooks(inner, prefix + info.filename + MEMBER_SEPARATOR):
+                        found.append((info.filename, member_path))
+            except zipfile.BadZipFile:
+                found.append((info.filename, prefix + info.filename))  # Grading reports the broken zip
+    return found
+
+
+'''
+Collect every student's workbook in an export, sorted like find_submission_files:
+[(student name, member path)]
+'''
+def find_archive_submissions(archive_path):
+    with zipfile.ZipFile(archive_path) as archive:
+        workbooks = _workbooks(archive, archive_path + MEMBER_SEPARATOR)
+
+    # Everything inside a single top level folder (e.g. "Section 1 - Project 1/...") is one level down
+    top_levels = {name.split("/", 1)[0] for name, _ in workbooks}
+    strip = len(top_levels) == 1 and all("/" in name for name, _ in workbooks)
+
+    submissions = []
+    for name, member_path in workbooks:
+        parts = name.split("/")[1:] if strip else name.split("/")
+        submissions.append((student_name(parts[0]), member_path))
+    return sorted(submissions, key=lambda submission: (submission[0], submission[1]))
+
+
+def _open_archive(archive_path):
+    archive = _archives.get(archive_path)
+    if archive is None:
+        if len(_archives) > 4:
+            for open_archive in _archives.values():
+                open_archive.close()
+            _archives.clear()
+        archive = _archives[archive_path] = zipfile.ZipFile(archive_path)
+    return archive
+
+
+# The bytes of a workbook in an export, unpacking nested zips in memory
+def read_member(member_path):
+    archive_path, *names = member_path.split(MEMBER_SEPARATOR)
+    archive = _open_archive(archive_path)
+    data = archive.read(names[0])
+    for name in names[1:]:
+        with zipfile.ZipFile(io.BytesIO(data)) as inner:
+            data = inner.read(name)
+    return data
+
+
+# A file path or member path as something the graders can open (the path itself, or an in-memory file)
+def open_submission(path):
+    if is_member_path(path):
+        source = io.BytesIO(read_member(path))
+        source.name = path  # Shows up in loader errors, and lets workbook_loader.shared_loads recognise it
+        return source
+    return path
+
+
+def hash_member(member_path):
+    return hashlib.sha256(read_member(member_path)).hexdigest()